@@ -1,4 +1,5 @@
 import { User, TestResult } from '../models/index.js';
+import mlService from '../ml/mlService.js';
 
 // @desc    Obtener todos los usuarios
 // @route   GET /api/admin/users
@@ -214,3 +215,27 @@ export const getStats = async (req, res) => {
     });
   }
 };
+
+// @desc    Métricas del servicio de predicción (formato Prometheus)
+// @route   GET /api/admin/ml/metrics
+// @access  Private/Admin
+export const getMlMetrics = async (req, res) => {
+  try {
+    const metricas = await mlService.metricasPrometheus();
+
+    if (metricas === null) {
+      return res.status(404).json({
+        success: false,
+        message: 'Métricas de ML desactivadas (configurar ML_METRICAS=1)'
+      });
+    }
+
+    res.type('text/plain; version=0.0.4').send(metricas);
+  } catch (error) {
+    res.status(500).json({ 
+      success: false, 
+      message: 'Error al obtener métricas de ML',
+      error: error.message 
+    });
+  }
+};
@@ -58,6 +58,10 @@ export const predictCareer = async (req, res) => {
         confianza: prediction.porcentaje_confianza, // porcentaje de 0-100
         top_5_carreras: prediction.top_5_carreras,
         perfil: prediction.perfil,
+        perfiles_similares: prediction.perfiles_similares,
+        distancias_carreras: prediction.distancias_carreras,
+        dimensiones_diferentes: prediction.dimensiones_diferentes,
+        explicacion: prediction.explicacion,
         completedAt: testResult.completedAt
       }
     });
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén persistente de resultados de predicción en SQLite.
+
+La clave de cada resultado es el hash del perfil canónico (los promedios que
+recibe predecir(), así que las mismas 62 respuestas o los mismos 14 promedios
+dan la misma clave) junto con la versión del modelo: un hash del contenido de
+modelo_random_forest.pkl, label_encoder.pkl, calibracion.npz y sus demás
+artefactos, VERSION_REGLAS y OPCIONES_RESULTADO (las variables que agregan o
+quitan campos del resultado), o la versión del manifiesto para los modelos del
+registro (registro_modelos.py), que también incluye las reglas y las opciones.
+Un resultado guardado se devuelve sin cargar ni recorrer el bosque.
+
+La base usa WAL, así que varios procesos (workers --serve, hijos pre-fork,
+ejecuciones de una sola predicción) leen a la vez mientras uno escribe.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from predict import OPCIONES_RESULTADO, SCRIPT_DIR, VERSION_REGLAS
+
+RUTA_POR_DEFECTO = Path(os.environ.get('ML_ALMACEN_RUTA', SCRIPT_DIR / 'resultados.sqlite3'))
+
+# Archivos que definen la versión del modelo (si falta el .pkl se usan los compilados)
+ARCHIVOS_VERSION = (
+    SCRIPT_DIR / 'modelo_random_forest.pkl',
+    SCRIPT_DIR / 'label_encoder.pkl',
+    SCRIPT_DIR / 'calibracion.npz',
+    SCRIPT_DIR / 'indice_vecinos.pkl',
+    SCRIPT_DIR / 'perfiles_carrera.npz',
+    SCRIPT_DIR / 'explicaciones.npz',
+)
+ARCHIVOS_VERSION_COMPILADO = (
+    SCRIPT_DIR / 'modelo_compilado.npz',
+    SCRIPT_DIR / 'modelo_mmap' / 'metadatos.json',
+    SCRIPT_DIR / 'calibracion.npz',
+    SCRIPT_DIR / 'indice_vecinos.pkl',
+    SCRIPT_DIR / 'perfiles_carrera.npz',
+    SCRIPT_DIR / 'explicaciones.npz',
+)
+
+# La fecha de acceso solo se actualiza si es más antigua que esto (evita una
+# escritura por cada lectura)
+REFRESCO_ACCESO_SEGUNDOS = 60
+
+# Cada cuántas inserciones se revisa el límite de tamaño
+INSERCIONES_POR_REVISION = 100
+
+# Filas borradas por transacción al limpiar versiones viejas
+LOTE_LIMPIEZA = 500
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    version TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    creado REAL NOT NULL,
+    accedido REAL NOT NULL,
+    PRIMARY KEY (version, clave)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resultados_accedido ON resultados (accedido);
+CREATE TABLE IF NOT EXISTS hashes_archivos (
+    ruta TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    tamano INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+def clave_perfil(datos_estudiante):
+    """
+    Hash del perfil en JSON canónico. Se conserva el tipo de cada valor (3 y
+    3.0 dan claves distintas) porque el perfil se devuelve tal cual en el
+    resultado.
+    """
+    canonico = json.dumps(datos_estudiante, sort_keys=True, ensure_ascii=False,
+                          separators=(',', ':'))
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+class AlmacenResultados:
+    """Almacén de resultados con límite de tamaño y limpieza de versiones viejas."""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, max_entradas=100000, limpiar=True):
+        self.ruta = Path(ruta)
+        self.max_entradas = max_entradas
+        self.inserciones = 0
+        self.lock = threading.Lock()
+
+        self.conexion = self._conectar()
+        with self.conexion:
+            self.conexion.executescript(ESQUEMA)
+        self.limpiar = limpiar
+        self.hilo_limpieza = None
+        self.actualizar_version()
+
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+        conexion.execute('PRAGMA journal_mode=WAL')
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        return conexion
+
+    def hash_archivo(self, ruta):
+        """
+        sha256 del contenido de un archivo. Se guarda en la base por
+        (ruta, mtime, tamaño) para no releer el .pkl en cada proceso.
+        """
+        estado = os.stat(ruta)
+        with self.lock:
+            fila = self.conexion.execute(
+                'SELECT hash FROM hashes_archivos WHERE ruta = ? AND mtime_ns = ? AND tamano = ?',
+                (str(ruta), estado.st_mtime_ns, estado.st_size),
+            ).fetchone()
+        if fila:
+            return fila[0]
+
+        resumen = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                resumen.update(bloque)
+        valor = resumen.hexdigest()
+
+        with self.lock:
+            self.conexion.execute(
+                'INSERT OR REPLACE INTO hashes_archivos VALUES (?, ?, ?, ?)',
+                (str(ruta), estado.st_mtime_ns, estado.st_size, valor),
+            )
+        return valor
+
+    def version_modelo(self):
+        """
+        Hash de los archivos del modelo, de la versión de las reglas de negocio
+        y de las opciones que cambian los campos del resultado.
+        """
+        archivos = ARCHIVOS_VERSION if ARCHIVOS_VERSION[0].exists() else ARCHIVOS_VERSION_COMPILADO
+        resumen = hashlib.sha256(f'reglas:{VERSION_REGLAS}:{OPCIONES_RESULTADO}'.encode('utf-8'))
+        for ruta in archivos:
+            if ruta.exists():
+                resumen.update(f'{ruta.name}:{self.hash_archivo(ruta)}'.encode('utf-8'))
+        return resumen.hexdigest()[:32]
+
+    def actualizar_version(self, *_):
+        """
+        Recalcula la versión desde los archivos actuales y limpia en segundo
+        plano las entradas de versiones anteriores. Se llama al crear el almacén
+        y cada vez que el proceso recarga el modelo, para que la versión sea
+        siempre la del modelo cargado en memoria.
+        """
+        self.version = self.version_modelo()
+        if self.limpiar:
+            self.hilo_limpieza = threading.Thread(
+                target=self.limpiar_versiones_viejas, args=(self.version,),
+                name='limpieza-almacen', daemon=True,
+            )
+            self.hilo_limpieza.start()
+
+    def conservar_versiones(self, versiones):
+        """
+        Limpia en segundo plano las entradas de todas las versiones salvo
+        `versiones` (las de los modelos del registro cargados ahora).
+        """
+        self.hilo_limpieza = threading.Thread(
+            target=self.limpiar_versiones_viejas, args=(set(versiones),),
+            name='limpieza-almacen', daemon=True,
+        )
+        self.hilo_limpieza.start()
+
+    def obtener(self, datos_estudiante, version=None):
+        """Resultado guardado para el perfil (en `version` o la actual), o None."""
+        version = version or self.version
+        clave = clave_perfil(datos_estudiante)
+        ahora = time.time()
+        with self.lock:
+            fila = self.conexion.execute(
+                'SELECT resultado, accedido FROM resultados WHERE version = ? AND clave = ?',
+                (version, clave),
+            ).fetchone()
+            if fila is None:
+                return None
+            if ahora - fila[1] > REFRESCO_ACCESO_SEGUNDOS:
+                try:
+                    self.conexion.execute(
+                        'UPDATE resultados SET accedido = ? WHERE version = ? AND clave = ?',
+                        (ahora, version, clave),
+                    )
+                except sqlite3.OperationalError:
+                    # Base ocupada por otro escritor: la fecha de acceso puede esperar
+                    pass
+        return json.loads(fila[0])
+
+    def guardar(self, datos_estudiante, resultado, version=None):
+        """Guarda un resultado exitoso; los errores no se almacenan."""
+        if not resultado.get('success'):
+            return
+        ahora = time.time()
+        with self.lock:
+            self.conexion.execute(
+                'INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)',
+                (version or self.version, clave_perfil(datos_estudiante),
+                 json.dumps(resultado, ensure_ascii=False), ahora, ahora),
+            )
+            self.inserciones += 1
+            if self.inserciones % INSERCIONES_POR_REVISION == 0:
+                self._aplicar_limite()
+
+    def _aplicar_limite(self):
+        """Borra las entradas de acceso más antiguo por encima de max_entradas."""
+        (total,) = self.conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()
+        exceso = total - self.max_entradas
+        if exceso > 0:
+            self.conexion.execute(
+                'DELETE FROM resultados WHERE (version, clave) IN ('
+                'SELECT version, clave FROM resultados ORDER BY accedido LIMIT ?)',
+                (exceso,),
+            )
+
+    def predecir(self, datos_estudiante, predecir, version=None):
+        """
+        Devuelve el resultado guardado o llama a `predecir(datos_estudiante)`
+        y guarda lo que devuelva. Si la base falla se predice igual.
+        """
+        try:
+            resultado = self.obtener(datos_estudiante, version)
+        except sqlite3.Error:
+            resultado = None
+        if resultado is not None:
+            return resultado
+
+        resultado = predecir(datos_estudiante)
+        try:
+            self.guardar(datos_estudiante, resultado, version)
+        except sqlite3.Error:
+            pass
+        return resultado
+
+    def limpiar_versiones_viejas(self, versiones):
+        """
+        Borra por lotes las entradas de otras versiones del modelo (`versiones`
+        es una versión o un conjunto de versiones a conservar). Usa su propia
+        conexión y transacciones cortas para no bloquear a los lectores.
+        """
+        versiones = [versiones] if isinstance(versiones, str) else sorted(versiones)
+        if not versiones:
+            return
+        marcadores = ', '.join('?' * len(versiones))
+        conexion = self._conectar()
+        try:
+            while True:
+                cursor = conexion.execute(
+                    'DELETE FROM resultados WHERE (version, clave) IN ('
+                    f'SELECT version, clave FROM resultados WHERE version NOT IN ({marcadores}) LIMIT ?)',
+                    (*versiones, LOTE_LIMPIEZA),
+                )
+                if cursor.rowcount < LOTE_LIMPIEZA:
+                    break
+                time.sleep(0.01)
+        except sqlite3.OperationalError:
+            # Otro proceso está limpiando o escribiendo; se reintenta en el próximo arranque
+            pass
+        finally:
+            conexion.close()
+
+    def estadisticas(self):
+        """Entradas de la versión actual y totales."""
+        with self.lock:
+            (actuales,) = self.conexion.execute(
+                'SELECT COUNT(*) FROM resultados WHERE version = ?', (self.version,)
+            ).fetchone()
+            (total,) = self.conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()
+        return {'version': self.version, 'entradas': actuales, 'total': total,
+                'max_entradas': self.max_entradas}
+
+    def cerrar(self):
+        if self.hilo_limpieza is not None:
+            self.hilo_limpieza.join(timeout=5)
+        self.conexion.close()
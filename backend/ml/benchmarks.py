@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks del pipeline de predicción, etapa por etapa.
+
+Cada etapa se mide por separado con filas del dataset de 3500 estudiantes:
+arranque en frío (intérprete + import de predict), load_models(),
+calcular_promedios, predecir (lote de 1), predecir_lote, las reglas de negocio
+de una fila (aplicar_reglas_negocio) y la serialización JSON de la respuesta. Por etapa se reportan latencias
+p50/p95/p99, throughput y memoria pico.
+
+Los resultados se guardan como JSON (línea base) y se pueden comparar contra
+una línea base anterior: el comando termina con código 1 si alguna etapa
+empeora más que el umbral.
+
+Uso:
+    python benchmarks.py
+    python benchmarks.py --guardar base.json
+    python benchmarks.py --comparar base.json --umbral 0.2
+    python benchmarks.py --comparar base.json --actual nuevo.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from predict import (DIMENSION_MAP, FEATURE_ORDER, SCRIPT_DIR, calcular_promedios, load_models,
+                     predecir, predecir_lote)
+from reglas_negocio import motor_reglas
+
+DATASET = SCRIPT_DIR.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+ETAPAS = (
+    'arranque_en_frio',
+    'load_models',
+    'calcular_promedios',
+    'predecir',
+    'predecir_lote',
+    'aplicar_reglas_negocio',
+    'serializacion_json',
+)
+
+# Llamadas sin cronometrar antes de medir (cachés de CPU, imports perezosos)
+CALENTAMIENTO = 10
+
+# Llamadas medidas con tracemalloc para la memoria pico
+LLAMADAS_MEMORIA = 100
+
+def cargar_perfiles(n_filas):
+    """Primeras n_filas del dataset como matriz (n, 14) en el orden FEATURE_ORDER."""
+    with open(DATASET, 'r', encoding='utf-8-sig') as f:
+        columnas = f.readline().strip().split(',')
+        indices = [columnas.index(c) for c in FEATURE_ORDER]
+        filas = []
+        for linea in f:
+            if len(filas) >= n_filas:
+                break
+            valores = linea.strip().split(',')
+            filas.append([float(valores[i]) for i in indices])
+    return np.array(filas)
+
+def respuestas_desde_perfil(perfil):
+    """
+    Respuestas q1..q62 coherentes con un perfil: cada pregunta toma el promedio
+    de su dimensión redondeado a 1-5.
+    """
+    valores = dict(zip(FEATURE_ORDER, perfil))
+    respuestas = {}
+    for dimension, preguntas in DIMENSION_MAP.items():
+        for pregunta in preguntas:
+            respuestas[f'q{pregunta}'] = int(min(max(round(valores[dimension]), 1), 5))
+    return respuestas
+
+def percentiles(tiempos_ns, filas_por_operacion, memoria_pico_kb):
+    """Resumen de una etapa a partir de las duraciones en nanosegundos."""
+    tiempos_us = np.asarray(tiempos_ns, dtype=np.float64) / 1e3
+    p50, p95, p99 = np.percentile(tiempos_us, [50, 95, 99])
+    total_s = tiempos_us.sum() / 1e6
+    return {
+        'n': int(len(tiempos_us)),
+        'p50_us': round(float(p50), 3),
+        'p95_us': round(float(p95), 3),
+        'p99_us': round(float(p99), 3),
+        'media_us': round(float(tiempos_us.mean()), 3),
+        'filas_por_s': round(len(tiempos_us) * filas_por_operacion / total_s, 1) if total_s else None,
+        'memoria_pico_kb': int(memoria_pico_kb),
+    }
+
+def medir(operacion, argumentos, filas_por_operacion=1):
+    """
+    Cronometra operacion(*args) para cada tupla de `argumentos`. La memoria
+    pico se mide aparte con tracemalloc (que distorsiona los tiempos) sobre las
+    primeras LLAMADAS_MEMORIA llamadas.
+    """
+    for args in argumentos[:CALENTAMIENTO]:
+        operacion(*args)
+
+    reloj = time.perf_counter_ns
+    tiempos = np.empty(len(argumentos), dtype=np.int64)
+    for i, args in enumerate(argumentos):
+        inicio = reloj()
+        operacion(*args)
+        tiempos[i] = reloj() - inicio
+
+    tracemalloc.start()
+    try:
+        for args in argumentos[:LLAMADAS_MEMORIA]:
+            operacion(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return percentiles(tiempos, filas_por_operacion, pico / 1024)
+
+def medir_arranque(repeticiones):
+    """
+    Intérprete nuevo + `import predict`, en subprocesos. La memoria pico es el
+    RSS máximo del subproceso (incluye el intérprete).
+    """
+    tiempos = []
+    memoria = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        proceso = subprocess.Popen([sys.executable, '-c', 'import predict'], cwd=SCRIPT_DIR)
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        tiempos.append(time.perf_counter_ns() - inicio)
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        if proceso.returncode != 0:
+            raise RuntimeError(f'import predict terminó con código {proceso.returncode}')
+        memoria = max(memoria, uso.ru_maxrss)
+    return percentiles(tiempos, 1, memoria)
+
+def ejecutar(etapas=ETAPAS, n_filas=1000, tamano_lote=256, arranques=5, cargas=20):
+    """
+    Ejecuta las etapas pedidas.
+
+    Retorna:
+    --------
+    dict : {'metadatos': {...}, 'etapas': {nombre: resumen}}
+    """
+    perfiles = cargar_perfiles(n_filas)
+    modelo, label_encoder = load_models()
+    resultados = {}
+
+    if 'arranque_en_frio' in etapas:
+        resultados['arranque_en_frio'] = medir_arranque(arranques)
+
+    if 'load_models' in etapas:
+        resultados['load_models'] = medir(load_models, [()] * cargas)
+
+    if 'calcular_promedios' in etapas:
+        respuestas = [(respuestas_desde_perfil(p),) for p in perfiles]
+        resultados['calcular_promedios'] = medir(calcular_promedios, respuestas)
+
+    diccionarios = [dict(zip(FEATURE_ORDER, p.tolist())) for p in perfiles]
+
+    if 'predecir' in etapas:
+        resultados['predecir'] = medir(
+            predecir, [(d, modelo, label_encoder) for d in diccionarios])
+
+    if 'predecir_lote' in etapas:
+        # Al menos 30 lotes para que los percentiles signifiquen algo
+        lotes = [perfiles[i:i + tamano_lote] for i in range(0, len(perfiles), tamano_lote)]
+        lotes = [l for l in lotes if len(l) == tamano_lote] or [perfiles]
+        lotes = (lotes * (30 // len(lotes) + 1))[:max(30, len(lotes))]
+        resultados['predecir_lote'] = medir(
+            predecir_lote, [(l, modelo, label_encoder) for l in lotes], len(lotes[0]))
+
+    if 'aplicar_reglas_negocio' in etapas:
+        # Reglas de una fila, como en predecir(): valores, aplicar y razones
+        motor = motor_reglas(label_encoder.classes_)
+        probabilidades = modelo.predict_proba(perfiles)
+
+        def aplicar_reglas(datos, fila):
+            valores = motor.valores([datos])
+            _, _, activas = motor.aplicar(fila, valores)
+            return motor.razones(activas, valores)
+
+        argumentos = [(datos, fila[None, :]) for datos, fila in zip(diccionarios, probabilidades)]
+        resultados['aplicar_reglas_negocio'] = medir(aplicar_reglas, argumentos)
+
+    if 'serializacion_json' in etapas:
+        # La misma línea que escribe servir() por cada solicitud
+        respuestas = [({'id': i, **predecir(d, modelo, label_encoder)},)
+                      for i, d in enumerate(diccionarios)]
+        resultados['serializacion_json'] = medir(
+            lambda r: json.dumps(r, ensure_ascii=False) + '\n', respuestas)
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'modelo': type(modelo).__name__,
+            'filas': len(perfiles),
+            'tamano_lote': tamano_lote,
+            'memoria_pico_proceso_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'etapas': resultados,
+    }
+
+def comparar(base, actual, umbral=0.2, metrica='p50_us', umbrales_etapa=None, umbral_memoria=None):
+    """
+    Compara dos ejecuciones etapa por etapa.
+
+    Parámetros:
+    -----------
+    umbral : float
+        Aumento relativo permitido de `metrica` (0.2 = 20 % más lento).
+    umbrales_etapa : dict, opcional
+        Umbral propio para algunas etapas ({'arranque_en_frio': 0.5}).
+    umbral_memoria : float, opcional
+        Si se indica, también falla si memoria_pico_kb crece más que esto.
+
+    Retorna:
+    --------
+    list : (etapa, fila_reporte, es_regresion) por cada etapa común.
+    """
+    umbrales_etapa = umbrales_etapa or {}
+    filas = []
+    for etapa in ETAPAS:
+        if etapa not in base['etapas'] or etapa not in actual['etapas']:
+            continue
+        antes, ahora = base['etapas'][etapa], actual['etapas'][etapa]
+        limite = umbrales_etapa.get(etapa, umbral)
+        cambio = ahora[metrica] / antes[metrica] - 1 if antes[metrica] else 0.0
+        regresion = cambio > limite
+
+        cambio_memoria = None
+        if antes['memoria_pico_kb']:
+            cambio_memoria = ahora['memoria_pico_kb'] / antes['memoria_pico_kb'] - 1
+            if umbral_memoria is not None and cambio_memoria > umbral_memoria:
+                regresion = True
+
+        filas.append((etapa, {
+            'antes': antes[metrica], 'ahora': ahora[metrica], 'cambio': cambio,
+            'limite': limite, 'cambio_memoria': cambio_memoria,
+        }, regresion))
+    return filas
+
+def imprimir_resultados(resultado):
+    print(f"{'Etapa':<24} {'p50 µs':>11} {'p95 µs':>11} {'p99 µs':>11} "
+          f"{'filas/s':>12} {'Mem. pico KB':>13}")
+    print('-' * 86)
+    for etapa, r in resultado['etapas'].items():
+        print(f"{etapa:<24} {r['p50_us']:>11.1f} {r['p95_us']:>11.1f} {r['p99_us']:>11.1f} "
+              f"{r['filas_por_s'] or 0:>12.0f} {r['memoria_pico_kb']:>13}")
+    meta = resultado['metadatos']
+    print(f"\nModelo: {meta['modelo']}  Filas: {meta['filas']}  Lote: {meta['tamano_lote']}  "
+          f"Python {meta['python']}  NumPy {meta['numpy']}")
+
+def imprimir_comparacion(filas, metrica):
+    print(f"\n{'Etapa':<24} {'base':>11} {'actual':>11} {'cambio':>9} {'límite':>8} {'mem.':>8}")
+    print('-' * 76)
+    for etapa, f, regresion in filas:
+        memoria = f"{f['cambio_memoria']:+.0%}" if f['cambio_memoria'] is not None else '-'
+        print(f"{etapa:<24} {f['antes']:>11.1f} {f['ahora']:>11.1f} {f['cambio']:>+9.1%} "
+              f"{f['limite']:>+8.0%} {memoria:>8}  {'❌ REGRESIÓN' if regresion else '✅'}")
+    print(f'(métrica: {metrica})')
+
+def leer_umbrales_etapa(valores):
+    """['predecir=0.3', ...] -> {'predecir': 0.3}"""
+    umbrales = {}
+    for valor in valores or []:
+        etapa, _, umbral = valor.partition('=')
+        if etapa not in ETAPAS:
+            raise SystemExit(f'Etapa desconocida: {etapa}')
+        umbrales[etapa] = float(umbral)
+    return umbrales
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks del pipeline de predicción')
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=list(ETAPAS))
+    parser.add_argument('--filas', type=int, default=1000, help='Filas del dataset a usar')
+    parser.add_argument('--lote', type=int, default=256, help='Tamaño de lote para predecir_lote')
+    parser.add_argument('--arranques', type=int, default=5, help='Subprocesos para el arranque en frío')
+    parser.add_argument('--guardar', help='Guardar los resultados como línea base JSON')
+    parser.add_argument('--comparar', help='Línea base JSON contra la que comparar')
+    parser.add_argument('--actual', help='Comparar este JSON guardado en lugar de ejecutar')
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help='Aumento relativo permitido antes de fallar (0.2 = 20%%)')
+    parser.add_argument('--umbral-etapa', nargs='+', metavar='ETAPA=UMBRAL',
+                        help='Umbral propio por etapa')
+    parser.add_argument('--umbral-memoria', type=float, default=None,
+                        help='Aumento relativo permitido de la memoria pico')
+    parser.add_argument('--metrica', choices=['p50_us', 'p95_us', 'p99_us', 'media_us'],
+                        default='p50_us')
+    args = parser.parse_args(argv)
+
+    if args.actual:
+        with open(args.actual, 'r', encoding='utf-8') as f:
+            resultado = json.load(f)
+    else:
+        resultado = ejecutar(args.etapas, args.filas, args.lote, args.arranques)
+    imprimir_resultados(resultado)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f'\n💾 Línea base guardada en {args.guardar}')
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        if base['metadatos'].get('modelo') != resultado['metadatos'].get('modelo'):
+            print(f"\n⚠️  Modelos distintos: {base['metadatos'].get('modelo')} (base) vs "
+                  f"{resultado['metadatos'].get('modelo')} (actual)")
+        filas = comparar(base, resultado, args.umbral, args.metrica,
+                         leer_umbrales_etapa(args.umbral_etapa), args.umbral_memoria)
+        imprimir_comparacion(filas, args.metrica)
+        regresiones = [etapa for etapa, _, regresion in filas if regresion]
+        if regresiones:
+            print(f"\n❌ Regresiones: {', '.join(regresiones)}")
+            return 1
+        print('\n✅ Sin regresiones')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runtime del Random Forest compilado a arrays de NumPy.
+
+El conversor aplana los árboles del RandomForestClassifier entrenado en arrays
+contiguos (feature, umbral, hijos y distribución de clases de cada hoja) y los
+guarda en un único .npz. El runtime evalúa lotes completos nivel por nivel con
+gathers de NumPy, de modo que el proceso de predicción solo importa numpy: ni
+sklearn ni pandas.
+
+El recorrido nivel por nivel gana en solicitudes sueltas y lotes chicos, pero
+en lotes grandes el Cython de sklearn es varias veces más rápido. Si el bosque
+se carga con la ruta del .pkl (ruta_sklearn), los lotes de más de
+LOTE_COMPILADO filas se evalúan con sklearn, que se importa y carga la primera
+vez que llega uno.
+
+Uso:
+    python bosque_compilado.py compilar
+    python bosque_compilado.py exportar
+    python bosque_compilado.py verificar --dataset ../../datasets/dataset_orientacion_vocacional_2500.csv
+    python bosque_compilado.py benchmark
+    python bosque_compilado.py memoria --workers 1 4 16
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+
+ARCHIVO_COMPILADO = 'modelo_compilado.npz'
+DIRECTORIO_MMAP = 'modelo_mmap'
+
+# Arrays del bosque que se guardan como .npy sueltos para abrirlos con mmap
+ARRAYS_MMAP = ('feature', 'umbral', 'izquierdo', 'hoja', 'valores', 'raices')
+
+# Filas evaluadas a la vez (acota la memoria de los gathers intermedios)
+FILAS_POR_BLOQUE = 1024
+
+# Lotes de más filas que esto van a sklearn si hay .pkl (con 1 núcleo el
+# compilado gana hasta ~256 filas y a partir de ~512 es más lento)
+LOTE_COMPILADO = int(os.environ.get('ML_LOTE_COMPILADO', '256'))
+
+class CodificadorEtiquetas:
+    """Reemplazo mínimo de LabelEncoder para decodificar índices de clase."""
+
+    def __init__(self, clases):
+        self.classes_ = np.asarray(clases)
+
+    def inverse_transform(self, indices):
+        return self.classes_[np.asarray(indices)]
+
+class BosqueCompilado:
+    """
+    Random Forest aplanado. Expone predict_proba y classes_ como sklearn.
+
+    Los nodos de cada árbol están numerados en anchura con los hermanos
+    contiguos: el hijo derecho es siempre `izquierdo + 1`. Las hojas apuntan a
+    sí mismas (umbral +inf), así que basta con iterar `profundidad` niveles
+    sin máscaras: las filas que ya llegaron a una hoja se quedan en ella.
+
+    Con ruta_sklearn, predict_proba evalúa los lotes de más de LOTE_COMPILADO
+    filas con el RandomForestClassifier de ese .pkl.
+    """
+
+    def __init__(self, feature, umbral, izquierdo, hoja, valores, raices,
+                 profundidad, classes_, feature_names=None, ruta_sklearn=None):
+        # En el .npz los índices se guardan compactos (int16/int32); en memoria se
+        # usan como intp para que los gathers no conviertan tipos. np.asarray no
+        # copia si ya vienen como intp (caso de los .npy mapeados con mmap) y
+        # devuelve un ndarray común sobre la misma memoria: indexar un np.memmap
+        # pasa por __getitem__ en Python en cada árbol.
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.umbral = np.asarray(umbral)
+        self.izquierdo = np.asarray(izquierdo, dtype=np.intp)
+        self.hoja = np.asarray(hoja, dtype=np.intp)
+        self.valores = np.asarray(valores)
+        self.raices = np.asarray(raices, dtype=np.intp)
+        self.profundidad = int(profundidad)
+        self.classes_ = classes_
+        self.feature_names_in_ = feature_names
+        self.n_estimators = len(raices)
+        self.ruta_sklearn = ruta_sklearn
+        self.modelo_sklearn = None
+
+    def predict_proba(self, X):
+        """Promedio de las distribuciones de hoja de todos los árboles."""
+        # sklearn compara en float32; los umbrales ya están redondeados hacia abajo
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if self.ruta_sklearn is not None and X.shape[0] > LOTE_COMPILADO:
+            return self.sklearn().predict_proba(X)
+
+        salida = np.empty((X.shape[0], self.valores.shape[1]), dtype=np.float64)
+        for inicio in range(0, X.shape[0], FILAS_POR_BLOQUE):
+            bloque = X[inicio:inicio + FILAS_POR_BLOQUE]
+            hojas = self.hoja[self.hojas(bloque)]
+
+            suma = np.zeros((len(bloque), self.valores.shape[1]), dtype=np.float64)
+            for arbol in range(self.n_estimators):
+                suma += self.valores[hojas[:, arbol]]
+            salida[inicio:inicio + len(bloque)] = suma / self.n_estimators
+        return salida
+
+    def sklearn(self):
+        """RandomForestClassifier de ruta_sklearn, cargado la primera vez."""
+        if self.modelo_sklearn is None:
+            import warnings
+            warnings.filterwarnings('ignore', category=UserWarning)
+            import joblib
+            self.modelo_sklearn = joblib.load(self.ruta_sklearn)
+        return self.modelo_sklearn
+
+    def hojas(self, X):
+        """Índice global del nodo hoja alcanzado en cada árbol, forma (n, árboles)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        plano = X.ravel()
+        base = (np.arange(n) * n_features)[:, None]
+
+        nodos = np.broadcast_to(self.raices, (n, self.n_estimators)).copy()
+        for _ in range(self.profundidad):
+            mayor = plano[base + self.feature[nodos]] > self.umbral[nodos]
+            nodos = self.izquierdo[nodos] + mayor
+        return nodos
+
+    def guardar(self, ruta, clases):
+        """Guarda los arrays y las etiquetas de clase en un único .npz."""
+        np.savez(
+            ruta,
+            feature=self.feature.astype(np.int16),
+            umbral=self.umbral,
+            izquierdo=self.izquierdo.astype(np.int32),
+            hoja=self.hoja.astype(np.int32),
+            valores=self.valores,
+            raices=self.raices.astype(np.int32),
+            profundidad=np.array(self.profundidad),
+            classes_=self.classes_,
+            feature_names=np.asarray(self.feature_names_in_, dtype=str),
+            clases=np.asarray(clases, dtype=str),
+        )
+
+    def guardar_mmap(self, directorio, clases):
+        """
+        Guarda cada array como un .npy en el tipo que usa el runtime, para que
+        cargar_mmap los abra con mmap_mode='r' sin copiarlos.
+
+        Cada archivo se escribe aparte y se reemplaza con os.replace: los
+        procesos que ya tienen mapeada la versión anterior siguen leyendo el
+        inodo viejo en lugar de recibir SIGBUS por un archivo truncado.
+        """
+        directorio = Path(directorio)
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        for nombre in ARRAYS_MMAP:
+            destino = directorio / f'{nombre}.npy'
+            temporal = directorio / f'{nombre}.npy.tmp'
+            with open(temporal, 'wb') as f:
+                np.save(f, np.ascontiguousarray(getattr(self, nombre)))
+            os.replace(temporal, destino)
+
+        # Los metadatos se escriben al final: su fecha marca una exportación completa
+        metadatos = {
+            'profundidad': self.profundidad,
+            'classes_': self.classes_.tolist(),
+            'feature_names': [str(f) for f in self.feature_names_in_],
+            'clases': [str(c) for c in clases],
+        }
+        temporal = directorio / 'metadatos.json.tmp'
+        temporal.write_text(json.dumps(metadatos, ensure_ascii=False), encoding='utf-8')
+        os.replace(temporal, directorio / 'metadatos.json')
+
+def cargar_compilado(ruta, ruta_sklearn=None):
+    """
+    Carga un bosque compilado. Con ruta_sklearn (el .pkl del que se compiló),
+    los lotes grandes se evalúan con sklearn.
+
+    Retorna:
+    --------
+    tuple : (BosqueCompilado, CodificadorEtiquetas)
+    """
+    with np.load(ruta) as datos:
+        arrays = {nombre: datos[nombre] for nombre in datos.files}
+
+    bosque = BosqueCompilado(
+        arrays['feature'], arrays['umbral'], arrays['izquierdo'], arrays['hoja'],
+        arrays['valores'], arrays['raices'], arrays['profundidad'],
+        arrays['classes_'], arrays['feature_names'], ruta_sklearn,
+    )
+    return bosque, CodificadorEtiquetas(arrays['clases'])
+
+def cargar_mmap(directorio, ruta_sklearn=None):
+    """
+    Abre un bosque exportado con guardar_mmap sin leerlo a memoria privada.
+
+    Los arrays quedan mapeados desde el page cache, así que todos los procesos
+    de predicción del nodo comparten las mismas páginas físicas. ruta_sklearn
+    como en cargar_compilado.
+
+    Retorna:
+    --------
+    tuple : (BosqueCompilado, CodificadorEtiquetas)
+    """
+    directorio = Path(directorio)
+    metadatos = json.loads((directorio / 'metadatos.json').read_text(encoding='utf-8'))
+    arrays = {
+        nombre: np.load(directorio / f'{nombre}.npy', mmap_mode='r')
+        for nombre in ARRAYS_MMAP
+    }
+
+    bosque = BosqueCompilado(
+        arrays['feature'], arrays['umbral'], arrays['izquierdo'], arrays['hoja'],
+        arrays['valores'], arrays['raices'], metadatos['profundidad'],
+        np.asarray(metadatos['classes_']), np.asarray(metadatos['feature_names']), ruta_sklearn,
+    )
+    return bosque, CodificadorEtiquetas(metadatos['clases'])
+
+def orden_hermanos_contiguos(arbol):
+    """
+    Recorre el árbol en anchura y devuelve el orden de nodos en el que cada
+    par de hijos queda en posiciones consecutivas.
+    """
+    orden = [0]
+    i = 0
+    while i < len(orden):
+        nodo = orden[i]
+        i += 1
+        if arbol.children_left[nodo] != -1:
+            orden.append(arbol.children_left[nodo])
+            orden.append(arbol.children_right[nodo])
+    return np.array(orden, dtype=np.int64)
+
+def compilar(modelo):
+    """
+    Aplana un RandomForestClassifier entrenado en un BosqueCompilado.
+    """
+    features, umbrales, izquierdos, hojas, valores, raices = [], [], [], [], [], []
+    desplazamiento = 0
+    hojas_totales = 0
+    profundidad = 0
+
+    for estimador in modelo.estimators_:
+        arbol = estimador.tree_
+        orden = orden_hermanos_contiguos(arbol)
+        posicion = np.empty(arbol.node_count, dtype=np.int64)
+        posicion[orden] = np.arange(len(orden))
+
+        es_hoja = arbol.children_left[orden] == -1
+
+        # Umbral float32 más grande <= umbral float64: x32 <= t64 ⟺ x32 <= t32
+        umbral_original = arbol.threshold[orden]
+        umbral = umbral_original.astype(np.float32)
+        redondeado_arriba = umbral.astype(np.float64) > umbral_original
+        umbral[redondeado_arriba] = np.nextafter(umbral[redondeado_arriba], np.float32(-np.inf))
+        umbral[es_hoja] = np.inf
+
+        feature = np.where(es_hoja, 0, arbol.feature[orden])
+        izquierdo = np.where(es_hoja, np.arange(len(orden)), posicion[arbol.children_left[orden]])
+
+        # Distribución de clases por hoja. sklearn >= 1.4 ya guarda fracciones y
+        # las devuelve tal cual; versiones anteriores guardaban conteos que
+        # tree.predict_proba normalizaba. Solo se normaliza en ese caso.
+        valor_hoja = arbol.value[orden[es_hoja], 0, :].copy()
+        suma = valor_hoja.sum(axis=1, keepdims=True)
+        conteos = (np.abs(suma - 1.0) > 1e-9).ravel()
+        suma[suma == 0] = 1.0
+        valor_hoja[conteos] /= suma[conteos]
+        hoja = np.full(len(orden), -1, dtype=np.int64)
+        hoja[es_hoja] = np.arange(es_hoja.sum()) + hojas_totales
+
+        features.append(feature)
+        umbrales.append(umbral)
+        izquierdos.append(izquierdo + desplazamiento)
+        hojas.append(hoja)
+        valores.append(valor_hoja)
+        raices.append(desplazamiento)
+
+        desplazamiento += len(orden)
+        hojas_totales += int(es_hoja.sum())
+        profundidad = max(profundidad, arbol.max_depth)
+
+    return BosqueCompilado(
+        feature=np.concatenate(features).astype(np.int16),
+        umbral=np.concatenate(umbrales).astype(np.float32),
+        izquierdo=np.concatenate(izquierdos).astype(np.int32),
+        hoja=np.concatenate(hojas).astype(np.int32),
+        valores=np.concatenate(valores),
+        raices=np.array(raices, dtype=np.int32),
+        profundidad=profundidad,
+        classes_=np.asarray(modelo.classes_),
+        feature_names=np.asarray(getattr(modelo, 'feature_names_in_', []), dtype=str),
+    )
+
+def cargar_sklearn(modelo_path, encoder_path):
+    """Carga el modelo y el encoder originales con joblib (solo herramientas offline)."""
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    import joblib
+    return joblib.load(modelo_path), joblib.load(encoder_path)
+
+def leer_features(dataset, feature_names):
+    """Lee las columnas de features de un CSV de datasets/ como float64."""
+    import pandas as pd
+    df = pd.read_csv(dataset, encoding='utf-8-sig')
+    return df[list(feature_names)].to_numpy(dtype=np.float64)
+
+def comando_compilar(args):
+    modelo, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    bosque = compilar(modelo)
+    bosque.guardar(args.salida, label_encoder.classes_)
+
+    tamano = Path(args.salida).stat().st_size
+    print(f'✅ Bosque compilado: {bosque.n_estimators} árboles, {len(bosque.feature)} nodos, '
+          f'{len(bosque.valores)} hojas, profundidad {bosque.profundidad}')
+    print(f'   Guardado en {args.salida} ({tamano / 1024 / 1024:.2f} MB)')
+
+def comando_exportar(args):
+    modelo, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    bosque = compilar(modelo)
+    bosque.guardar_mmap(args.directorio, label_encoder.classes_)
+
+    tamano = sum(f.stat().st_size for f in Path(args.directorio).iterdir())
+    print(f'✅ Bosque exportado para mmap: {len(ARRAYS_MMAP)} arrays .npy + metadatos.json')
+    print(f'   Guardado en {args.directorio} ({tamano / 1024 / 1024:.2f} MB)')
+
+    # Aportes por nodo para explicar cada predicción (explicaciones.py)
+    from explicaciones import compilar_explicaciones
+    explicador = compilar_explicaciones(modelo, label_encoder.classes_)
+    explicador.guardar(args.explicaciones)
+    print(f'✅ Aportes por nodo para explicaciones guardados en {args.explicaciones}')
+
+    # Índice de vecinos de los perfiles de referencia (indice_vecinos.py). En
+    # una imagen sin datasets/ se exporta solo lo que sale del .pkl
+    if args.referencia and not Path(args.referencia).exists():
+        print(f'⚠️  No se encuentra {args.referencia}: sin índice de vecinos ni perfiles por carrera',
+              file=sys.stderr)
+    elif args.referencia:
+        from indice_vecinos import construir_indice
+        indice = construir_indice(args.referencia, label_encoder, [str(f) for f in modelo.feature_names_in_])
+        indice.guardar(args.indice)
+        print(f'✅ Índice de vecinos: {len(indice)} perfiles de {Path(args.referencia).name}, '
+              f'{len(indice.particiones)} particiones')
+        print(f'   Guardado en {args.indice} ({Path(args.indice).stat().st_size / 1024 / 1024:.2f} MB)')
+
+        # Centroide, dispersión e inversa de la covarianza por carrera (perfiles_carrera.py)
+        from perfiles_carrera import construir_perfiles
+        perfiles = construir_perfiles(args.referencia, label_encoder, indice.features)
+        perfiles.guardar(args.perfiles)
+        print(f'✅ Perfiles de {len(perfiles.clases)} carreras guardados en {args.perfiles}')
+
+def comando_verificar(args):
+    modelo, _ = cargar_sklearn(args.modelo, args.encoder)
+    bosque, _ = cargar_compilado(args.compilado)
+
+    correcto = True
+    for dataset in args.dataset:
+        X = leer_features(dataset, modelo.feature_names_in_)
+        esperado = modelo.predict_proba(X)
+        obtenido = bosque.predict_proba(X)
+
+        error_max = np.abs(esperado - obtenido).max()
+        argmax_igual = (esperado.argmax(axis=1) == obtenido.argmax(axis=1)).mean()
+        ok = np.allclose(esperado, obtenido, rtol=0, atol=1e-6)
+        correcto &= ok
+
+        print(f'{"✅" if ok else "❌"} {Path(dataset).name}: {len(X)} filas, '
+              f'error máximo {error_max:.2e}, argmax idéntico {argmax_igual * 100:.2f}%')
+
+    sys.exit(0 if correcto else 1)
+
+def medir(funcion, repeticiones):
+    """Devuelve la mediana en segundos de varias ejecuciones."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+def comando_benchmark(args):
+    import subprocess
+
+    modelo, _ = cargar_sklearn(args.modelo, args.encoder)
+    bosque, _ = cargar_compilado(args.compilado)
+    X_base = leer_features(args.dataset[0], modelo.feature_names_in_)
+
+    print(f"{'Lote':>7} {'sklearn ms':>12} {'compilado ms':>14} {'aceleración':>12}")
+    print('-' * 48)
+    for n in (1, 64, 10000):
+        X = X_base[np.arange(n) % len(X_base)]
+        repeticiones = 50 if n < 10000 else 5
+        t_sklearn = medir(lambda: modelo.predict_proba(X), repeticiones)
+        t_bosque = medir(lambda: bosque.predict_proba(X), repeticiones)
+        print(f'{n:>7} {t_sklearn * 1000:>12.2f} {t_bosque * 1000:>14.2f} {t_sklearn / t_bosque:>11.1f}x')
+
+    # Arranque en frío: importar y cargar el modelo en un proceso nuevo
+    arranques = {
+        'sklearn': f"import joblib, sklearn.ensemble; joblib.load(r'{args.modelo}')",
+        'compilado': (f"import sys; sys.path.insert(0, r'{SCRIPT_DIR}'); "
+                      f"import bosque_compilado as b; b.cargar_compilado(r'{args.compilado}')"),
+    }
+    print('\nArranque en frío (import + carga del modelo):')
+    for nombre, codigo in arranques.items():
+        # VmHWM: pico de memoria residente del proceso nuevo (kB)
+        comando = [sys.executable, '-c', codigo + "; print([l.split()[1] for l in "
+                   "open('/proc/self/status') if l.startswith('VmHWM')][0])"]
+        inicio = time.perf_counter()
+        salida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+        segundos = time.perf_counter() - inicio
+        print(f'   {nombre:<10} {segundos * 1000:8.0f} ms   memoria máxima {int(salida.split()[-1]) / 1024:6.1f} MB')
+
+# Proceso de medición: carga el modelo en el formato pedido, predice un lote
+# para tocar sus páginas, informa el tiempo de carga y espera a que el padre
+# lea su memoria y le cierre stdin.
+CODIGO_WORKER_MEMORIA = """
+import sys, time
+sys.path.insert(0, {directorio!r})
+import numpy as np
+import bosque_compilado as b
+formato, ruta = {formato!r}, {ruta!r}
+inicio = time.perf_counter()
+if formato == 'pkl':
+    modelo, _ = b.cargar_sklearn(ruta, {encoder!r})
+elif formato == 'npz':
+    modelo, _ = b.cargar_compilado(ruta)
+else:
+    modelo, _ = b.cargar_mmap(ruta)
+carga = time.perf_counter() - inicio
+X = np.random.default_rng(0).uniform(1, 5, (2000, len(modelo.feature_names_in_)))
+modelo.predict_proba(X)
+print(carga * 1000, flush=True)
+sys.stdin.read()
+"""
+
+def comando_memoria(args):
+    import subprocess
+    from memoria import leer_memoria
+
+    rutas = {'pkl': args.modelo, 'npz': args.compilado, 'mmap': args.directorio}
+
+    print(f"{'Formato':<8} {'Workers':>8} {'Carga ms':>10} {'PSS/proceso MB':>15} {'PSS total MB':>13}")
+    print('-' * 58)
+    for n in args.workers:
+        for formato in args.formatos:
+            codigo = CODIGO_WORKER_MEMORIA.format(
+                directorio=str(SCRIPT_DIR), formato=formato,
+                ruta=str(rutas[formato]), encoder=args.encoder,
+            )
+            procesos = [
+                subprocess.Popen([sys.executable, '-c', codigo], stdin=subprocess.PIPE,
+                                 stdout=subprocess.PIPE, text=True)
+                for _ in range(n)
+            ]
+            try:
+                cargas = [float(p.stdout.readline()) for p in procesos]
+                # Todos siguen vivos: el PSS reparte las páginas compartidas entre ellos
+                pss = [leer_memoria(p.pid)['pss'] for p in procesos]
+            finally:
+                for p in procesos:
+                    p.stdin.close()
+                    p.wait()
+
+            print(f'{formato:<8} {n:>8} {np.mean(cargas):>10.1f} '
+                  f'{np.mean(pss) / 1024:>15.1f} {sum(pss) / 1024:>13.1f}')
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Conversor y runtime del bosque compilado')
+    parser.add_argument('comando', choices=['compilar', 'exportar', 'verificar', 'benchmark', 'memoria'])
+    parser.add_argument('--modelo', default=str(SCRIPT_DIR / 'modelo_random_forest.pkl'))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--compilado', default=str(SCRIPT_DIR / ARCHIVO_COMPILADO))
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_COMPILADO))
+    parser.add_argument('--directorio', default=str(SCRIPT_DIR / DIRECTORIO_MMAP),
+                        help='Directorio de los .npy para mmap')
+    parser.add_argument('--referencia',
+                        default=str(DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'),
+                        help='CSV del índice de vecinos y de los perfiles por carrera al exportar '
+                             '("" para no construirlos)')
+    parser.add_argument('--indice', default=str(SCRIPT_DIR / 'indice_vecinos.pkl'),
+                        help='Archivo del índice de vecinos (comando exportar)')
+    parser.add_argument('--perfiles', default=str(SCRIPT_DIR / 'perfiles_carrera.npz'),
+                        help='Tabla de perfiles por carrera (comando exportar)')
+    parser.add_argument('--explicaciones', default=str(SCRIPT_DIR / 'explicaciones.npz'),
+                        help='Aportes por nodo para explicaciones (comando exportar)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16],
+                        help='Cantidades de procesos a medir (comando memoria)')
+    parser.add_argument('--formatos', nargs='+', choices=['pkl', 'npz', 'mmap'],
+                        default=['pkl', 'npz', 'mmap'])
+    parser.add_argument('--dataset', action='append', default=None,
+                        help='CSV para verificar o medir (se puede repetir)')
+    args = parser.parse_args()
+
+    if args.dataset is None:
+        args.dataset = [
+            str(DATASETS_DIR / 'dataset_orientacion_vocacional_2500.csv'),
+            str(DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'),
+        ]
+
+    comandos = {
+        'compilar': comando_compilar,
+        'exportar': comando_exportar,
+        'verificar': comando_verificar,
+        'benchmark': comando_benchmark,
+        'memoria': comando_memoria,
+    }
+    comandos[args.comando](args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de hiperparámetros del Random Forest con puntaje out-of-bag y
+successive halving.
+
+En lugar de validar cada configuración con k-fold (k ajustes completos), cada
+candidato se ajusta una sola vez con bootstrap y se puntúa con sus
+predicciones out-of-bag: cada fila se evalúa solo con los árboles que no la
+vieron. La búsqueda va por rondas: en la primera todos los candidatos usan
+una fracción de las filas y de los árboles, y a la ronda siguiente pasa el
+mejor 1/FACTOR con FACTOR veces más recursos, más los candidatos que ninguno
+supera a la vez en exactitud y en costo estimado (árboles × profundidad, lo
+que recorre el runtime compilado), para que la tabla final no tenga solo los
+bosques más grandes. Los candidatos de cada ronda se ajustan en paralelo en
+un pool de procesos.
+
+Los finalistas (ajustados con todas las filas y todos sus árboles) van a una
+tabla de exactitud OOB y recall del top 5 contra nodos, tamaño del bosque
+compilado y latencia de predict_proba de una fila (el runtime de
+bosque_compilado.py que usa predict.py). Se marcan los puntos de la frontera
+de Pareto y se recomienda el más rápido dentro de la tolerancia de exactitud.
+
+Uso:
+    python busqueda_hiperparametros.py
+    python busqueda_hiperparametros.py --candidatos 81 --factor 3 --workers 4
+    python busqueda_hiperparametros.py --tolerancia 0.01 --exportar modelo_rapido.pkl
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bosque_compilado import compilar, medir
+
+SCRIPT_DIR = Path(__file__).parent
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+
+# Espacio de búsqueda (None = sin límite / todas las filas)
+ESPACIO = {
+    'n_estimators': [50, 100, 200, 400],
+    'max_depth': [8, 12, 16, 20, None],
+    'min_samples_leaf': [1, 2, 4, 8],
+    'max_features': ['sqrt', 'log2', 0.5],
+    'max_samples': [0.5, 0.8, None],
+}
+
+# Parámetros fijos del modelo actual (datasets/ejemplo_entrenamiento_modelo.py)
+FIJOS = {'min_samples_split': 5, 'random_state': 42}
+
+# Árboles mínimos en las rondas reducidas (con menos, muchas filas no tienen OOB)
+MIN_ARBOLES = 16
+
+# Repeticiones de predict_proba de una fila para la latencia
+REPETICIONES_LATENCIA = 200
+
+def candidatos_aleatorios(cantidad, semilla=42, espacio=ESPACIO):
+    """`cantidad` configuraciones distintas del espacio (todas si hay menos)."""
+    nombres = list(espacio)
+    todas = list(itertools.product(*(espacio[n] for n in nombres)))
+    azar = np.random.default_rng(semilla)
+    elegidas = azar.permutation(len(todas))[:cantidad]
+    return [dict(zip(nombres, todas[i])) for i in sorted(elegidas)]
+
+def rondas(factor, n_candidatos, min_fraccion):
+    """
+    Fracción de recursos de cada ronda: la última usa todo y cada anterior
+    1/factor de la siguiente, sin bajar de min_fraccion ni hacer más rondas
+    de las que permiten los candidatos.
+    """
+    cantidad = 1
+    while factor ** cantidad <= n_candidatos and factor ** -cantidad >= min_fraccion:
+        cantidad += 1
+    return [factor ** -(cantidad - 1 - r) for r in range(cantidad)]
+
+def metricas_oob(modelo, y):
+    """Exactitud y recall del top 5 out-of-bag, sobre las filas que tienen OOB."""
+    oob = modelo.oob_decision_function_
+    validas = np.isfinite(oob).all(axis=1) & (oob.sum(axis=1) > 0)
+    oob, y = oob[validas], y[validas]
+    top5 = np.argsort(-oob, axis=1, kind='stable')[:, :5]
+    return {
+        'exactitud_oob': float((oob.argmax(axis=1) == y).mean()),
+        'top5_oob': float((top5 == y[:, None]).any(axis=1).mean()),
+        'filas_oob': int(validas.sum()),
+    }
+
+# Datos del proceso worker (se copian una vez por proceso, no por tarea)
+_DATOS = {}
+
+def iniciar_worker(X, y):
+    import warnings
+    warnings.filterwarnings('ignore')
+    _DATOS['X'], _DATOS['y'] = X, y
+
+def evaluar(parametros, fraccion, semilla, final=False):
+    """
+    Ajusta un candidato con una fracción de las filas y de los árboles y
+    devuelve sus métricas OOB. En la ronda final también devuelve el bosque
+    compilado, para medir su latencia fuera del pool.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    X, y = _DATOS['X'], _DATOS['y']
+    if fraccion < 1:
+        X, _, y, _ = train_test_split(X, y, train_size=fraccion, stratify=y, random_state=semilla)
+    arboles = max(MIN_ARBOLES, round(parametros['n_estimators'] * fraccion))
+    modelo = RandomForestClassifier(
+        **dict(parametros, n_estimators=arboles), **FIJOS, bootstrap=True, oob_score=True, n_jobs=1,
+    )
+    inicio = time.perf_counter()
+    modelo.fit(X, y)
+    profundidad = max(arbol.tree_.max_depth for arbol in modelo.estimators_)
+    resultado = dict(metricas_oob(modelo, y), parametros=parametros, filas=len(y), arboles=arboles,
+                     costo=parametros['n_estimators'] * (profundidad + 1),
+                     segundos_ajuste=time.perf_counter() - inicio)
+    if final:
+        resultado['bosque'] = compilar(modelo)
+    return resultado
+
+def medir_bosque(bosque, X, repeticiones=REPETICIONES_LATENCIA):
+    """Nodos, bytes del .npz compilado y mediana en µs de predict_proba de una fila."""
+    archivo = io.BytesIO()
+    bosque.guardar(archivo, [str(c) for c in bosque.classes_])
+    filas = iter(itertools.cycle(X[:, None, :]))
+    for _ in range(10):
+        bosque.predict_proba(next(filas))
+    return {
+        'nodos': int(len(bosque.feature)),
+        'profundidad': bosque.profundidad,
+        'bytes': len(archivo.getvalue()),
+        'latencia_us': medir(lambda: bosque.predict_proba(next(filas)), repeticiones) * 1e6,
+    }
+
+def dominada(fila, tabla, costos, metrica='exactitud_oob'):
+    """True si otra fila tiene igual o más `metrica` y costos iguales o menores, y no es idéntica."""
+    clave = (fila[metrica], *(fila[c] for c in costos))
+    return any(
+        otra[metrica] >= fila[metrica] and all(otra[c] <= fila[c] for c in costos)
+        and (otra[metrica], *(otra[c] for c in costos)) != clave
+        for otra in tabla
+    )
+
+def frontera_pareto(tabla, metrica='exactitud_oob'):
+    """Marca 'pareto' en las filas que ninguna otra supera en exactitud, bytes y latencia."""
+    for fila in tabla:
+        fila['pareto'] = not dominada(fila, tabla, ('bytes', 'latencia_us'), metrica)
+    return tabla
+
+def recomendar(tabla, tolerancia):
+    """La fila más rápida con exactitud OOB a no más de `tolerancia` de la mejor."""
+    mejor = max(fila['exactitud_oob'] for fila in tabla)
+    aceptables = [fila for fila in tabla if fila['exactitud_oob'] >= mejor - tolerancia]
+    return min(aceptables, key=lambda fila: (fila['latencia_us'], fila['bytes']))
+
+def buscar(X, y, candidatos, factor=3, min_fraccion=0.1, workers=None, semilla=42, progreso=print):
+    """
+    Successive halving sobre `candidatos`.
+
+    Parámetros:
+    -----------
+    X, y : np.ndarray
+        Features y clases codificadas (enteros).
+    candidatos : list
+        Diccionarios de hiperparámetros (ver ESPACIO).
+    factor : int
+        Cada ronda conserva 1/factor de los candidatos con factor veces más recursos.
+    workers : int, opcional
+        Procesos del pool (por defecto, os.cpu_count()).
+
+    Retorna:
+    --------
+    dict : {'rondas': [...], 'tabla': [...]} con la tabla de finalistas
+    ordenada por exactitud OOB.
+    """
+    fracciones = rondas(factor, len(candidatos), min_fraccion)
+    historial = []
+    vivos = list(candidatos)
+    with ProcessPoolExecutor(workers or os.cpu_count(), initializer=iniciar_worker,
+                             initargs=(X, y)) as pool:
+        for r, fraccion in enumerate(fracciones):
+            final = r == len(fracciones) - 1
+            inicio = time.perf_counter()
+            resultados = list(pool.map(evaluar, vivos, itertools.repeat(fraccion),
+                                       itertools.repeat(semilla + r), itertools.repeat(final)))
+            historial.append({
+                'fraccion': fraccion, 'candidatos': len(vivos),
+                'segundos': round(time.perf_counter() - inicio, 2),
+                'mejor_exactitud_oob': max(res['exactitud_oob'] for res in resultados),
+            })
+            progreso(f"   Ronda {r + 1}/{len(fracciones)}: {len(vivos):3d} candidatos con "
+                     f"{fraccion:.0%} de filas y árboles, mejor OOB "
+                     f"{historial[-1]['mejor_exactitud_oob']:.4f} ({historial[-1]['segundos']:.1f} s)")
+            if final:
+                break
+            resultados.sort(key=lambda res: -res['exactitud_oob'])
+            conservar = max(1, len(vivos) // factor)
+            vivos = [res['parametros'] for res in resultados[:conservar]] + [
+                res['parametros'] for res in resultados[conservar:]
+                if not dominada(res, resultados, ('costo',))
+            ]
+
+    # Latencias en el proceso principal, una a la vez: sin competir por CPU
+    tabla = []
+    for resultado in resultados:
+        bosque = resultado.pop('bosque')
+        tabla.append(dict(resultado, **medir_bosque(bosque, X)))
+    tabla.sort(key=lambda fila: (-fila['exactitud_oob'], fila['latencia_us']))
+    return {'rondas': historial, 'tabla': frontera_pareto(tabla)}
+
+def exportar(parametros, X, y, features, ruta):
+    """Ajusta la configuración elegida con todas las filas y la guarda con joblib."""
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    modelo = RandomForestClassifier(**parametros, **FIJOS, n_jobs=-1)
+    modelo.fit(pd.DataFrame(X, columns=features), y)
+    joblib.dump(modelo, ruta)
+    return modelo
+
+def imprimir_tabla(tabla, recomendada):
+    print(f"\n{'':2}{'árboles':>7} {'prof':>5} {'hoja':>4} {'feat':>5} {'muestras':>8} "
+          f"{'OOB':>7} {'top5':>7} {'nodos':>8} {'KB':>8} {'µs/fila':>8}")
+    for fila in tabla:
+        p = fila['parametros']
+        marca = '→' if fila is recomendada else ('*' if fila['pareto'] else ' ')
+        print(f"{marca:2}{p['n_estimators']:>7} {str(p['max_depth']):>5} {p['min_samples_leaf']:>4} "
+              f"{str(p['max_features']):>5} {str(p['max_samples']):>8} {fila['exactitud_oob']:7.4f} "
+              f"{fila['top5_oob']:7.4f} {fila['nodos']:8d} {fila['bytes'] / 1024:8.0f} "
+              f"{fila['latencia_us']:8.0f}")
+    print('   * frontera de Pareto (exactitud, tamaño, latencia)   → recomendada')
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Búsqueda de hiperparámetros con OOB y successive halving')
+    parser.add_argument('--dataset',
+                        default=str(DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--candidatos', type=int, default=54, help='Configuraciones al azar del espacio')
+    parser.add_argument('--factor', type=int, default=3, help='Reducción de candidatos por ronda')
+    parser.add_argument('--min-fraccion', type=float, default=0.1,
+                        help='Fracción mínima de filas y árboles de la primera ronda')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--tolerancia', type=float, default=0.005,
+                        help='Pérdida de exactitud OOB aceptada para recomendar un modelo más rápido')
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / 'busqueda_hiperparametros.json'))
+    parser.add_argument('--exportar', help='Guardar el modelo recomendado en este .pkl')
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    from carga_datos import cargar_matrices
+    from predict import FEATURE_ORDER
+
+    label_encoder = joblib.load(args.encoder)
+    X, y = cargar_matrices(args.dataset, label_encoder)
+    candidatos = candidatos_aleatorios(args.candidatos, args.semilla)
+    print(f'Búsqueda: {len(candidatos)} candidatos, {len(y)} filas, {args.workers} workers')
+
+    inicio = time.perf_counter()
+    resultado = buscar(X, y, candidatos, args.factor, args.min_fraccion, args.workers, args.semilla)
+    recomendada = recomendar(resultado['tabla'], args.tolerancia)
+    imprimir_tabla(resultado['tabla'], recomendada)
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'dataset': str(args.dataset),
+        'filas': len(y),
+        'candidatos': len(candidatos),
+        'factor': args.factor,
+        'tolerancia': args.tolerancia,
+        'segundos': round(time.perf_counter() - inicio, 1),
+        'rondas': resultado['rondas'],
+        'tabla': resultado['tabla'],
+        'recomendada': recomendada['parametros'],
+    }
+    Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Búsqueda en {reporte['segundos']:.1f} s; tabla en {args.salida}")
+    print(f"   Recomendada: {recomendada['parametros']} (OOB {recomendada['exactitud_oob']:.4f}, "
+          f"{recomendada['latencia_us']:.0f} µs/fila)")
+
+    if args.exportar:
+        exportar(recomendada['parametros'], X, y, FEATURE_ORDER, args.exportar)
+        print(f'   Modelo guardado en {args.exportar} (codificador: {args.encoder})')
+    return reporte
+
+if __name__ == '__main__':
+    main()
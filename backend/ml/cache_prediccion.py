@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché exacta de predicciones indexada por intervalos de umbrales del bosque.
+
+Cada árbol solo compara cada feature contra sus umbrales de corte, así que dos
+perfiles que caen en el mismo intervalo entre umbrales consecutivos para las
+14 features recorren exactamente los mismos nodos en todos los árboles y
+obtienen el mismo predict_proba. La firma de un perfil es el índice de ese
+intervalo por feature.
+
+La caché guarda la fila de probabilidades (no el resultado final): las reglas
+de negocio y el campo 'perfil' dependen de los valores exactos, así que en
+cada acierto se vuelve a ejecutar construir_resultado(). Un acierto es por lo
+tanto idéntico a una predicción nueva.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from metricas import CRONOMETRO_NULO
+from predict import FEATURE_ORDER, SCRIPT_DIR, construir_resultado, load_models
+
+# Archivos de los que puede salir el modelo cargado por load_models(), con sus
+# artefactos adjuntos (los mismos que la versión de almacen_resultados.py)
+ARCHIVOS_MODELO = (
+    SCRIPT_DIR / 'modelo_random_forest.pkl',
+    SCRIPT_DIR / 'label_encoder.pkl',
+    SCRIPT_DIR / 'modelo_compilado.npz',
+    SCRIPT_DIR / 'modelo_mmap' / 'metadatos.json',
+    SCRIPT_DIR / 'calibracion.npz',
+    SCRIPT_DIR / 'indice_vecinos.pkl',
+    SCRIPT_DIR / 'perfiles_carrera.npz',
+    SCRIPT_DIR / 'explicaciones.npz',
+)
+
+def umbrales_por_feature(modelo, n_features=len(FEATURE_ORDER)):
+    """
+    Umbrales de corte ordenados y sin repetir de cada feature, como float64.
+
+    Funciona con el RandomForestClassifier de sklearn y con BosqueCompilado
+    (cuyos umbrales float32 ya están redondeados hacia abajo).
+    """
+    if hasattr(modelo, 'estimators_'):
+        features, umbrales = [], []
+        for estimador in modelo.estimators_:
+            arbol = estimador.tree_
+            internos = arbol.children_left != -1
+            features.append(arbol.feature[internos])
+            umbrales.append(arbol.threshold[internos])
+        features = np.concatenate(features)
+        umbrales = np.concatenate(umbrales)
+    else:
+        internos = np.isfinite(modelo.umbral)
+        features = np.asarray(modelo.feature)[internos]
+        umbrales = np.asarray(modelo.umbral)[internos].astype(np.float64)
+
+    return [np.unique(umbrales[features == f]) for f in range(n_features)]
+
+def huella_archivos(rutas):
+    """(mtime_ns, tamaño) de cada archivo existente; cambia si se reemplaza alguno."""
+    huella = []
+    for ruta in rutas:
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        huella.append((str(ruta), estado.st_mtime_ns, estado.st_size))
+    return tuple(huella)
+
+class CachePrediccion:
+    """
+    LRU acotada delante de predecir(), segura para varios hilos.
+
+    - Las solicitudes simultáneas con la misma firma esperan a un único cálculo.
+    - Si cambia algún archivo del modelo (revisado como mucho cada
+      `intervalo_verificacion` segundos), se recarga el modelo, se vacía la
+      caché y se llama a `al_recargar(modelo, label_encoder)` si se indicó.
+      Con intervalo_verificacion=None no se revisan archivos (los modelos
+      del registro se recargan desde RegistroModelos, con una caché nueva).
+    - Con `plan` (PlanFeatures de registro_modelos) el vector sigue el orden
+      de features del manifiesto en lugar de FEATURE_ORDER.
+    """
+
+    def __init__(self, modelo, label_encoder, capacidad=4096, cargar=load_models,
+                 rutas_modelo=ARCHIVOS_MODELO, intervalo_verificacion=1.0, al_recargar=None,
+                 plan=None):
+        self.capacidad = capacidad
+        self.plan = plan
+        self.features = plan.features if plan is not None else tuple(FEATURE_ORDER)
+        self.cargar = cargar
+        self.al_recargar = al_recargar
+        self.rutas_modelo = rutas_modelo
+        self.intervalo_verificacion = intervalo_verificacion
+
+        self.lock = threading.Lock()
+        self.entradas = OrderedDict()
+        self.en_curso = {}
+        self.contadores = dict.fromkeys(
+            ('aciertos', 'fallos', 'desalojos', 'colapsadas', 'recargas'), 0
+        )
+
+        self.huella = huella_archivos(self.rutas_modelo)
+        self.ultima_verificacion = time.monotonic()
+        self._usar_modelo(modelo, label_encoder)
+
+    def _usar_modelo(self, modelo, label_encoder):
+        # Se reemplaza como una tupla: una recarga concurrente no mezcla versiones
+        self.estado = (modelo, label_encoder, umbrales_por_feature(modelo, len(self.features)))
+
+    def firma(self, datos_estudiante, umbrales_features):
+        """
+        Índice de intervalo de cada feature. El árbol va a la izquierda si
+        float32(x) <= umbral, así que el índice es la cantidad de umbrales
+        estrictamente menores que float32(x).
+
+        Retorna None si algún valor no es finito (esos perfiles no se cachean).
+        """
+        x = np.array([datos_estudiante[f] for f in self.features], dtype=np.float32)
+        if not np.isfinite(x).all():
+            return None
+        x = x.astype(np.float64)
+        return tuple(
+            int(np.searchsorted(umbrales, valor, side='left'))
+            for umbrales, valor in zip(umbrales_features, x)
+        )
+
+    def predecir(self, datos_estudiante, cronometro=CRONOMETRO_NULO):
+        """
+        Equivalente a predict.predecir() usando la caché. La etapa 'cache' del
+        cronómetro incluye el recorrido del bosque cuando la firma no está.
+        """
+        self.verificar_modelo()
+        try:
+            modelo, label_encoder, umbrales = self.estado
+            probabilidades = self.probabilidades(datos_estudiante, modelo, umbrales)
+            cronometro.marcar('cache')
+            return construir_resultado(datos_estudiante, probabilidades, modelo, label_encoder,
+                                       cronometro)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error en predicción: {str(e)}'
+            }
+
+    def probabilidades(self, datos_estudiante, modelo, umbrales):
+        """Fila de predict_proba, desde la caché o calculada una sola vez."""
+        firma = self.firma(datos_estudiante, umbrales)
+        if firma is None:
+            return self._calcular(datos_estudiante, modelo)
+
+        propietario = False
+        with self.lock:
+            fila = self.entradas.get(firma)
+            if fila is not None:
+                self.entradas.move_to_end(firma)
+                self.contadores['aciertos'] += 1
+                return fila
+
+            futuro = self.en_curso.get(firma)
+            if futuro is not None:
+                self.contadores['colapsadas'] += 1
+            else:
+                futuro = Future()
+                self.en_curso[firma] = futuro
+                self.contadores['fallos'] += 1
+                propietario = True
+
+        if not propietario:
+            # Otro hilo ya está calculando esta firma: esperar su resultado
+            return futuro.result()
+
+        try:
+            fila = self._calcular(datos_estudiante, modelo)
+            futuro.set_result(fila)
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.en_curso.pop(firma, None)
+                if futuro.exception() is None and modelo is self.estado[0]:
+                    self.entradas[firma] = fila
+                    while len(self.entradas) > self.capacidad:
+                        self.entradas.popitem(last=False)
+                        self.contadores['desalojos'] += 1
+        return fila
+
+    def _calcular(self, datos_estudiante, modelo):
+        x = np.array([[datos_estudiante[f] for f in self.features]], dtype=np.float64)
+        fila = modelo.predict_proba(x)[0]
+        fila.setflags(write=False)
+        return fila
+
+    def verificar_modelo(self):
+        """Recarga el modelo y vacía la caché si cambió algún archivo del modelo."""
+        if self.intervalo_verificacion is None:
+            return False
+        ahora = time.monotonic()
+        if ahora - self.ultima_verificacion < self.intervalo_verificacion:
+            return False
+        self.ultima_verificacion = ahora
+
+        huella = huella_archivos(self.rutas_modelo)
+        if huella == self.huella:
+            return False
+
+        modelo, label_encoder = self.cargar()
+        with self.lock:
+            self.huella = huella
+            self._usar_modelo(modelo, label_encoder)
+            self.entradas.clear()
+            self.contadores['recargas'] += 1
+        if self.al_recargar is not None:
+            self.al_recargar(modelo, label_encoder)
+        return True
+
+    def vaciar(self):
+        """Elimina todas las entradas (los contadores se conservan)."""
+        with self.lock:
+            self.entradas.clear()
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos, desalojos, colapsos y recargas."""
+        with self.lock:
+            consultas = self.contadores['aciertos'] + self.contadores['fallos']
+            return {
+                **self.contadores,
+                'tamano': len(self.entradas),
+                'capacidad': self.capacidad,
+                'tasa_aciertos': self.contadores['aciertos'] / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibración de las probabilidades del Random Forest.
+
+Las probabilidades del bosque (promedio de las hojas de 200 árboles) no son
+frecuencias: un 40 % no acierta 4 de cada 10 veces. Este módulo ajusta offline
+una calibración sobre las probabilidades out-of-bag del bosque y la guarda
+junto al modelo en calibracion.npz:
+
+- 'isotonica': una regresión isotónica por clase (uno contra el resto),
+  guardada como una tabla (clases × PUNTOS_TABLA) sobre una grilla uniforme
+  de [0, 1]. Al servir se interpola linealmente y se renormaliza cada fila.
+- 'temperatura': p ** (1 / T) renormalizado, con T elegida por log-loss.
+
+En el servidor solo se importa numpy: aplicar() trabaja sobre la matriz
+completa (n, clases) con unas pocas operaciones de arrays. Al ajustar se
+separa un conjunto de prueba estratificado y se escribe un reporte de
+confiabilidad (ECE, Brier y curva por bins) antes y después de calibrar, que
+incluye la confianza que mostraba predict.py sin calibración.
+
+Uso:
+    python calibracion.py ajustar
+    python calibracion.py ajustar --metodo temperatura --dataset ../../datasets/dataset_orientacion_vocacional_2500.csv
+    python calibracion.py reporte
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+
+ARCHIVO_CALIBRACION = 'calibracion.npz'
+ARCHIVO_REPORTE = 'calibracion_reporte.json'
+
+METODOS = ('isotonica', 'temperatura')
+
+# Puntos de la grilla de cada tabla isotónica (paso de 0.005)
+PUNTOS_TABLA = 201
+
+# Bins de la curva de confiabilidad y del ECE
+BINS = 10
+
+class Calibracion:
+    """
+    Calibración ajustada para una lista de clases.
+
+    Parámetros:
+    -----------
+    metodo : str
+        'isotonica' o 'temperatura'.
+    clases : sequence
+        Carreras en el orden de las columnas de predict_proba.
+    tabla : np.ndarray, opcional
+        (clases, PUNTOS_TABLA) con la probabilidad calibrada de cada clase en
+        la grilla uniforme de [0, 1] (método 'isotonica').
+    temperatura : float, opcional
+        Temperatura T (método 'temperatura').
+    """
+
+    def __init__(self, metodo, clases, tabla=None, temperatura=None):
+        if metodo not in METODOS:
+            raise ValueError(f'Método de calibración desconocido: {metodo}')
+        self.metodo = metodo
+        self.clases = [str(c) for c in clases]
+        if metodo == 'isotonica':
+            self.tabla = np.ascontiguousarray(tabla, dtype=np.float64)
+            self.segmentos = self.tabla.shape[1] - 1
+            # Tabla aplanada y desplazamiento de cada columna para un solo gather
+            self.plana = self.tabla.ravel()
+            self.desplazamientos = np.arange(len(self.clases)) * self.tabla.shape[1]
+            self.temperatura = None
+        else:
+            self.tabla = None
+            self.temperatura = float(temperatura)
+            self.inverso = 1.0 / self.temperatura
+
+    def aplicar(self, probabilidades):
+        """
+        Calibra una matriz de probabilidades (n, clases).
+
+        Retorna:
+        --------
+        np.ndarray : (n, clases) con filas que suman 1 (una fila que queda en
+        cero conserva sus probabilidades originales).
+        """
+        if self.tabla is None:
+            ajustadas = probabilidades ** self.inverso
+        else:
+            # Las probabilidades del bosque ya están en [0, 1]
+            posicion = probabilidades * self.segmentos
+            inferior = np.minimum(posicion.astype(np.intp), self.segmentos - 1)
+            peso = posicion - inferior
+            indices = inferior + self.desplazamientos
+            izquierda = self.plana[indices]
+            ajustadas = izquierda + (self.plana[indices + 1] - izquierda) * peso
+        suma = ajustadas.sum(axis=1, keepdims=True)
+        return np.where(suma > 0, ajustadas / np.where(suma > 0, suma, 1.0), probabilidades)
+
+    def guardar(self, ruta, metadatos=None):
+        """Guarda la calibración en un .npz (metadatos: dict serializable a JSON)."""
+        arrays = {
+            'metodo': np.array(self.metodo),
+            'clases': np.array(self.clases),
+            'metadatos': np.array(json.dumps(metadatos or {}, ensure_ascii=False)),
+        }
+        if self.tabla is not None:
+            arrays['tabla'] = self.tabla
+        else:
+            arrays['temperatura'] = np.array(self.temperatura)
+        with open(ruta, 'wb') as archivo:
+            np.savez(archivo, **arrays)
+
+def cargar_calibracion(ruta):
+    """Lee una calibración guardada con Calibracion.guardar()."""
+    with np.load(ruta, allow_pickle=False) as arrays:
+        calibracion = Calibracion(
+            str(arrays['metodo']),
+            arrays['clases'].tolist(),
+            tabla=arrays['tabla'] if 'tabla' in arrays else None,
+            temperatura=float(arrays['temperatura']) if 'temperatura' in arrays else None,
+        )
+        calibracion.metadatos = json.loads(str(arrays['metadatos']))
+    return calibracion
+
+def adjuntar_calibracion(modelo, label_encoder, ruta):
+    """
+    Carga la calibración de `ruta` en modelo.calibracion si sus clases son las
+    del label encoder; si no coinciden se ignora (con un aviso en stderr).
+    """
+    calibracion = cargar_calibracion(ruta)
+    if calibracion.clases != [str(c) for c in label_encoder.classes_]:
+        print(f'⚠️  {ruta} no corresponde a las clases del modelo; se ignora', file=sys.stderr)
+        return modelo
+    modelo.calibracion = calibracion
+    return modelo
+
+# ---------------------------------------------------------------------------
+# Ajuste offline (importa sklearn y pandas)
+# ---------------------------------------------------------------------------
+
+def confiabilidad(probabilidades, y, bins=BINS):
+    """
+    Métricas de calibración de la carrera más probable.
+
+    Parámetros:
+    -----------
+    probabilidades : np.ndarray
+        (n, clases), o (n,) con la confianza mostrada de la primera carrera.
+    y : np.ndarray
+        (n,) columna de la clase real o, si probabilidades es (n,), aciertos.
+
+    Retorna:
+    --------
+    dict : exactitud, ece, confianza_media, brier (solo con la matriz) y la
+    curva de confiabilidad (confianza media y exactitud de cada bin).
+    """
+    y = np.asarray(y)
+    if probabilidades.ndim == 2:
+        confianza = probabilidades.max(axis=1)
+        aciertos = (probabilidades.argmax(axis=1) == y).astype(np.float64)
+    else:
+        confianza = probabilidades
+        aciertos = y.astype(np.float64)
+
+    bin_de = np.minimum((confianza * bins).astype(np.intp), bins - 1)
+    curva = []
+    ece = 0.0
+    for b in range(bins):
+        en_bin = bin_de == b
+        cantidad = int(en_bin.sum())
+        if cantidad == 0:
+            continue
+        media = float(confianza[en_bin].mean())
+        exactitud = float(aciertos[en_bin].mean())
+        ece += cantidad / len(confianza) * abs(media - exactitud)
+        curva.append({
+            'desde': b / bins, 'hasta': (b + 1) / bins, 'filas': cantidad,
+            'confianza': round(media, 4), 'exactitud': round(exactitud, 4),
+        })
+
+    resultado = {
+        'exactitud': round(float(aciertos.mean()), 4),
+        'confianza_media': round(float(confianza.mean()), 4),
+        'ece': round(ece, 4),
+    }
+    if probabilidades.ndim == 2:
+        real = np.zeros_like(probabilidades)
+        real[np.arange(len(y)), y] = 1.0
+        resultado['brier'] = round(float(((probabilidades - real) ** 2).sum(axis=1).mean()), 4)
+    resultado['curva'] = curva
+    return resultado
+
+def ajustar_isotonica(probabilidades, y, clases, puntos=PUNTOS_TABLA):
+    """Una regresión isotónica por clase, evaluada en la grilla de la tabla."""
+    from sklearn.isotonic import IsotonicRegression
+
+    grilla = np.linspace(0.0, 1.0, puntos)
+    tabla = np.empty((len(clases), puntos))
+    for c in range(len(clases)):
+        regresion = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+        regresion.fit(probabilidades[:, c], (y == c).astype(np.float64))
+        tabla[c] = regresion.predict(grilla)
+    return Calibracion('isotonica', clases, tabla=tabla)
+
+def ajustar_temperatura(probabilidades, y, clases):
+    """Temperatura con menor log-loss en una grilla logarítmica de [0.1, 10]."""
+    # Las probabilidades 0 del bosque darían log(0): se acotan para el ajuste
+    acotadas = np.clip(probabilidades, 1e-4, 1.0)
+    filas = np.arange(len(y))
+    mejor, mejor_perdida = 1.0, np.inf
+    for temperatura in np.logspace(-1, 1, 401):
+        escaladas = acotadas ** (1.0 / temperatura)
+        perdida = -np.mean(np.log(escaladas[filas, y] / escaladas.sum(axis=1)))
+        if perdida < mejor_perdida:
+            mejor, mejor_perdida = float(temperatura), perdida
+    return Calibracion('temperatura', clases, temperatura=mejor)
+
+AJUSTES = {'isotonica': ajustar_isotonica, 'temperatura': ajustar_temperatura}
+
+def probabilidades_oob(modelo, X, y):
+    """
+    Probabilidades out-of-bag de una copia del modelo entrenada sobre (X, y):
+    cada fila se evalúa solo con los árboles que no la vieron, así que se
+    parecen a las de un perfil nuevo. Descarta las filas sin árboles OOB.
+    """
+    from sklearn.base import clone
+
+    copia = clone(modelo).set_params(oob_score=True)
+    copia.fit(X, y)
+    oob = copia.oob_decision_function_
+    validas = np.isfinite(oob).all(axis=1) & (oob.sum(axis=1) > 0)
+    return copia, oob[validas], y[validas]
+
+def comando_ajustar(args):
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    from sklearn.model_selection import train_test_split
+
+    from bosque_compilado import cargar_sklearn
+    from carga_datos import cargar_matrices
+    from predict import FEATURE_ORDER, predecir_lote
+
+    modelo, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    features = list(getattr(modelo, 'feature_names_in_', FEATURE_ORDER))
+    clases = [str(c) for c in label_encoder.classes_]
+    X, y = cargar_matrices(args.dataset, label_encoder, features)
+
+    # Conjunto de prueba estratificado: solo se usa para el reporte
+    X_ajuste, X_prueba, y_ajuste, y_prueba = train_test_split(
+        X, y, test_size=args.prueba, stratify=y, random_state=args.semilla)
+    copia, oob, y_oob = probabilidades_oob(modelo, X_ajuste, y_ajuste)
+    prueba = copia.predict_proba(X_prueba)
+
+    # Confianza que muestra predict.py sin calibración (top 5 renormalizado + boost)
+    mostradas = predecir_lote(X_prueba, copia, label_encoder) if features == FEATURE_ORDER else None
+
+    reporte_prueba = {'bosque': confiabilidad(prueba, y_prueba)}
+    if mostradas is not None:
+        confianza = np.array([r['confianza'] for r in mostradas])
+        aciertos = np.array([r['carrera_recomendada'] for r in mostradas]) == label_encoder.classes_[y_prueba]
+        reporte_prueba['confianza_mostrada'] = confiabilidad(confianza, aciertos)
+    candidatos = {}
+    for metodo in (METODOS if args.metodo == 'auto' else (args.metodo,)):
+        candidatos[metodo] = AJUSTES[metodo](oob, y_oob, clases)
+        reporte_prueba[metodo] = confiabilidad(candidatos[metodo].aplicar(prueba), y_prueba)
+    # Brier en lugar de ECE: la isotónica por clase puede cambiar la carrera
+    # más probable, y el ECE no lo penaliza
+    metodo = min(candidatos, key=lambda m: reporte_prueba[m]['brier'])
+
+    # Calibración final: OOB de todo el dataset, como el modelo que se sirve
+    _, oob, y_oob = probabilidades_oob(modelo, X, y)
+    calibracion = AJUSTES[metodo](oob, y_oob, clases)
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'modelo': str(args.modelo),
+        'dataset': str(args.dataset),
+        'filas': len(y),
+        'filas_prueba': len(y_prueba),
+        'semilla': args.semilla,
+        'metodo': metodo,
+        'temperatura': calibracion.temperatura,
+        'prueba': reporte_prueba,
+    }
+    salida = Path(args.salida)
+    calibracion.guardar(salida, {k: reporte[k] for k in ('fecha', 'dataset', 'filas', 'metodo')})
+    reporte_path = salida.with_name(ARCHIVO_REPORTE)
+    reporte_path.write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    imprimir_reporte(reporte)
+    print(f'✅ Calibración {metodo} guardada en {salida} ({salida.stat().st_size / 1024:.1f} KB)')
+    print(f'   Reporte en {reporte_path}')
+    return reporte
+
+def imprimir_reporte(reporte):
+    """Tabla de métricas y curvas de confiabilidad del conjunto de prueba."""
+    print(f"Conjunto de prueba: {reporte['filas_prueba']} de {reporte['filas']} filas "
+          f"(semilla {reporte['semilla']})")
+    print(f"{'':<20} {'exactitud':>10} {'confianza':>10} {'ECE':>8} {'Brier':>8}")
+    for nombre, metricas in reporte['prueba'].items():
+        brier = f"{metricas['brier']:8.4f}" if 'brier' in metricas else f"{'-':>8}"
+        print(f"{nombre:<20} {metricas['exactitud']:10.4f} {metricas['confianza_media']:10.4f} "
+              f"{metricas['ece']:8.4f} {brier}")
+    for nombre, metricas in reporte['prueba'].items():
+        print(f'\nCurva de confiabilidad: {nombre}')
+        for punto in metricas['curva']:
+            print(f"   {punto['desde']:.1f}-{punto['hasta']:.1f}  {punto['filas']:5d} filas  "
+                  f"confianza {punto['confianza']:.3f}  exactitud {punto['exactitud']:.3f}")
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Calibración de las probabilidades del modelo')
+    parser.add_argument('comando', choices=['ajustar', 'reporte'])
+    parser.add_argument('--modelo', default=str(SCRIPT_DIR / 'modelo_random_forest.pkl'))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--dataset',
+                        default=str(DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'))
+    parser.add_argument('--metodo', choices=('auto',) + METODOS, default='auto',
+                        help='auto elige el de menor Brier en el conjunto de prueba')
+    parser.add_argument('--prueba', type=float, default=0.2, help='Fracción del conjunto de prueba')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_CALIBRACION))
+    args = parser.parse_args(argv)
+
+    if args.comando == 'ajustar':
+        return comando_ajustar(args)
+    reporte = json.loads(Path(args.salida).with_name(ARCHIVO_REPORTE).read_text(encoding='utf-8'))
+    imprimir_reporte(reporte)
+    return reporte
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura por bloques de los datasets de entrenamiento con tipos compactos.
+
+pd.read_csv sin dtype deja las 14 dimensiones en float64, los Rendimiento en
+int64 y Carrera en object (un str de Python por fila). Aquí cada bloque se lee
+con tipos explícitos:
+
+- las 14 dimensiones en float32 (los árboles de sklearn comparan en float32,
+  así que entrenar con float32 da los mismos árboles);
+- Rendimiento_General, Rendimiento_STEM y Rendimiento_Humanidades en uint8;
+- Carrera como categórica con las clases del label encoder, así que sus
+  códigos ya son las etiquetas del modelo (-1 si la carrera no la conoce).
+
+La memoria de leer_bloques() depende del tamaño de bloque, no del archivo.
+
+Uso:
+    python carga_datos.py resumen ../../datasets/dataset_orientacion_vocacional_17carreras_3500.csv
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from predict import FEATURE_ORDER, SCRIPT_DIR
+
+COLUMNAS_RENDIMIENTO = ('Rendimiento_General', 'Rendimiento_STEM', 'Rendimiento_Humanidades')
+COLUMNA_CARRERA = 'Carrera'
+
+# Filas por bloque
+TAMANO_BLOQUE = 100_000
+
+def tipos_columnas(carreras=None, features=FEATURE_ORDER):
+    """dtype de cada columna conocida del dataset."""
+    import pandas as pd
+
+    tipos = {feature: np.float32 for feature in features}
+    tipos.update({columna: np.uint8 for columna in COLUMNAS_RENDIMIENTO})
+    tipos[COLUMNA_CARRERA] = (pd.CategoricalDtype([str(c) for c in carreras])
+                              if carreras is not None else 'category')
+    return tipos
+
+def leer_bloques(ruta, tamano_bloque=TAMANO_BLOQUE, columnas=None, carreras=None):
+    """
+    Genera DataFrames de hasta `tamano_bloque` filas con tipos compactos.
+
+    Parámetros:
+    -----------
+    columnas : list, opcional
+        Columnas a leer (por defecto todas).
+    carreras : sequence, opcional
+        Categorías fijas de Carrera (las clases del label encoder): los
+        códigos coinciden en todos los bloques.
+    """
+    import pandas as pd
+
+    tipos = tipos_columnas(carreras)
+    with pd.read_csv(ruta, encoding='utf-8-sig', chunksize=tamano_bloque, usecols=columnas,
+                     dtype={c: t for c, t in tipos.items() if columnas is None or c in columnas}) as lector:
+        yield from lector
+
+def matrices_bloque(bloque, features=FEATURE_ORDER):
+    """
+    (X, y) de un bloque leído con `carreras`: X (n, features) float32 contigua
+    e y int16 con el código de la carrera; descarta las carreras desconocidas.
+    """
+    codigos = bloque[COLUMNA_CARRERA].cat.codes.to_numpy()
+    conocidas = codigos >= 0
+    X = np.ascontiguousarray(bloque[list(features)].to_numpy(dtype=np.float32)[conocidas])
+    return X, codigos[conocidas].astype(np.int16)
+
+def cargar_matrices(ruta, label_encoder, features=FEATURE_ORDER, tamano_bloque=TAMANO_BLOQUE):
+    """
+    (X, y) de todo el CSV para las carreras del label encoder, leído por
+    bloques: en memoria solo quedan las matrices compactas.
+    """
+    columnas = list(features) + [COLUMNA_CARRERA]
+    partes = [matrices_bloque(bloque, features)
+              for bloque in leer_bloques(ruta, tamano_bloque, columnas, label_encoder.classes_)]
+    if not partes:
+        return np.empty((0, len(features)), dtype=np.float32), np.empty(0, dtype=np.int16)
+    return np.concatenate([X for X, _ in partes]), np.concatenate([y for _, y in partes])
+
+def contar_filas(ruta, tamano_lectura=1 << 20):
+    """Filas de datos del CSV (sin el encabezado), leyendo bloques de bytes."""
+    lineas = 0
+    ultimo = b'\n'
+    with open(ruta, 'rb') as f:
+        while True:
+            bloque = f.read(tamano_lectura)
+            if not bloque:
+                break
+            lineas += bloque.count(b'\n')
+            ultimo = bloque[-1:]
+    # Una última línea sin salto también cuenta
+    return lineas + (ultimo != b'\n') - 1
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Lectura por bloques de los datasets')
+    parser.add_argument('comando', choices=['resumen'])
+    parser.add_argument('dataset')
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args(argv)
+
+    import joblib
+    label_encoder = joblib.load(args.encoder)
+    filas = 0
+    descartadas = 0
+    bytes_compactos = 0
+    por_carrera = np.zeros(len(label_encoder.classes_), dtype=np.int64)
+    for bloque in leer_bloques(args.dataset, args.bloque, carreras=label_encoder.classes_):
+        X, y = matrices_bloque(bloque)
+        filas += len(bloque)
+        descartadas += len(bloque) - len(y)
+        bytes_compactos += bloque.memory_usage(deep=True).sum()
+        por_carrera += np.bincount(y, minlength=len(por_carrera))
+
+    print(f'{Path(args.dataset).name}: {filas} filas, {descartadas} con carrera desconocida, '
+          f'{bytes_compactos / 1024 / 1024:.1f} MB con tipos compactos')
+    for carrera, cantidad in zip(label_encoder.classes_, por_carrera.tolist()):
+        print(f'   {cantidad:8d}  {carrera}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
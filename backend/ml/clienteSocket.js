@@ -0,0 +1,155 @@
+import net from 'net';
+
+// Tipos de solicitud del protocolo binario de servidor_async.py
+const TIPO_RESPUESTAS = 1;
+const TIPO_PROMEDIOS = 2;
+
+const DIMENSIONES = [
+  'R', 'I', 'A', 'S', 'E', 'C',
+  'LM', 'L', 'ES', 'M', 'CK', 'IP', 'IA', 'N'
+];
+
+/**
+ * Codifica una solicitud: [uint32 largo][uint32 id][uint8 tipo][datos]
+ * @param {number} id - Identificador de la solicitud
+ * @param {Object} respuestas - Respuestas individuales (q1..q62) o promedios
+ * @returns {Buffer}
+ */
+export function codificarSolicitud(id, respuestas) {
+  let tipo;
+  let datos;
+
+  if (respuestas.q1 !== undefined) {
+    // Las 62 respuestas como uint8 (los promedios los calcula Python)
+    tipo = TIPO_RESPUESTAS;
+    datos = Buffer.alloc(62);
+    for (let i = 1; i <= 62; i++) {
+      datos.writeUInt8(respuestas[`q${i}`] || 0, i - 1);
+    }
+  } else {
+    // Los 14 promedios como float32
+    tipo = TIPO_PROMEDIOS;
+    datos = Buffer.alloc(DIMENSIONES.length * 4);
+    DIMENSIONES.forEach((dimension, i) => {
+      datos.writeFloatLE(respuestas[dimension], i * 4);
+    });
+  }
+
+  const trama = Buffer.alloc(4 + 4 + 1 + datos.length);
+  trama.writeUInt32BE(4 + 1 + datos.length, 0);
+  trama.writeUInt32BE(id, 4);
+  trama.writeUInt8(tipo, 8);
+  datos.copy(trama, 9);
+  return trama;
+}
+
+/**
+ * Cliente del servidor de predicción asyncio (servidor_async.py)
+ */
+export class ClienteSocketPrediccion {
+  /**
+   * @param {string} rutaSocket - Ruta del socket Unix del servidor
+   * @param {number} timeoutMs - Tiempo máximo por solicitud
+   */
+  constructor(rutaSocket, timeoutMs = 10000) {
+    this.rutaSocket = rutaSocket;
+    this.timeoutMs = timeoutMs;
+    this.socket = null;
+    this.buffer = Buffer.alloc(0);
+    this.pendientes = new Map();
+    this.siguienteId = 0;
+  }
+
+  /**
+   * Envía una solicitud y espera su respuesta
+   * @param {Object} respuestas - Respuestas individuales o promedios
+   * @returns {Promise<Object>} - Resultado de la predicción
+   */
+  predecir(respuestas) {
+    if (!this.socket) {
+      this._conectar();
+    }
+
+    return new Promise((resolve, reject) => {
+      // Ids de 32 bits sin signo
+      this.siguienteId = (this.siguienteId + 1) >>> 0;
+      const id = this.siguienteId;
+
+      const timer = setTimeout(() => {
+        this.pendientes.delete(id);
+        reject(new Error(`Tiempo de espera agotado en predicción (${this.timeoutMs} ms)`));
+      }, this.timeoutMs);
+
+      this.pendientes.set(id, { resolve, reject, timer });
+      this.socket.write(codificarSolicitud(id, respuestas));
+    });
+  }
+
+  /**
+   * Cierra la conexión con el servidor
+   */
+  cerrar() {
+    if (this.socket) {
+      this.socket.destroy();
+      this.socket = null;
+    }
+  }
+
+  /**
+   * Abre la conexión y procesa las tramas de respuesta
+   * @private
+   */
+  _conectar() {
+    const socket = net.createConnection(this.rutaSocket);
+    this.socket = socket;
+    this.buffer = Buffer.alloc(0);
+
+    socket.on('data', (data) => {
+      this.buffer = Buffer.concat([this.buffer, data]);
+      while (this.buffer.length >= 4) {
+        const largo = this.buffer.readUInt32BE(0);
+        if (this.buffer.length < 4 + largo) break;
+
+        const id = this.buffer.readUInt32BE(4);
+        const cuerpo = this.buffer.subarray(8, 4 + largo).toString('utf8');
+        this.buffer = this.buffer.subarray(4 + largo);
+        this._resolver(id, cuerpo);
+      }
+    });
+
+    const alCerrar = (error) => {
+      if (this.socket === socket) {
+        this.socket = null;
+      }
+      for (const { reject, timer } of this.pendientes.values()) {
+        clearTimeout(timer);
+        reject(new Error(`Conexión con el servidor de predicción cerrada${error ? `: ${error.message}` : ''}`));
+      }
+      this.pendientes.clear();
+    };
+
+    socket.on('error', alCerrar);
+    socket.on('close', () => alCerrar());
+  }
+
+  /**
+   * Resuelve la solicitud pendiente con la respuesta recibida
+   * @private
+   */
+  _resolver(id, cuerpo) {
+    const pendiente = this.pendientes.get(id);
+    if (!pendiente) return;
+    this.pendientes.delete(id);
+    clearTimeout(pendiente.timer);
+
+    try {
+      const resultado = JSON.parse(cuerpo);
+      if (!resultado.success) {
+        return pendiente.reject(new Error(resultado.error || 'Error desconocido en predicción'));
+      }
+      pendiente.resolve(resultado);
+    } catch (error) {
+      pendiente.reject(new Error(`Error al parsear resultado del servidor: ${error.message}`));
+    }
+  }
+}
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Poda y compactación del Random Forest con una tabla de exactitud vs. costo.
+
+A partir de un .pkl entrenado:
+
+1. Ordena los árboles por su aporte (selección hacia adelante): en cada paso
+   agrega el árbol que más sube la exactitud del sub-bosque (desempate: la
+   probabilidad media de la carrera correcta). Con --criterio oob el aporte se
+   mide solo en las filas out-of-bag de cada árbol, reconstruyendo el
+   bootstrap con su random_state (vale si --dataset es el conjunto con el que
+   se entrenó, en el mismo orden); con --criterio validacion, en todas las
+   filas de --dataset, que debería ser un conjunto no visto.
+2. Compacta cada árbol: colapsa los subárboles cuyas hojas coinciden en la
+   clase más probable (queda una hoja con la distribución del nodo, así que la
+   clase que vota el árbol no cambia) y opcionalmente corta la profundidad.
+3. Para cada cantidad de árboles (los primeros del orden) y cada profundidad
+   máxima, mide exactitud y recall del top 5, nodos, bytes del .npz compilado
+   y latencia de predict_proba de una fila con el runtime de
+   bosque_compilado.py, y marca la frontera de Pareto.
+4. Elige el modelo más chico (en bytes) con exactitud a no más de
+   --tolerancia de la del modelo original y, con --exportar, lo guarda como
+   .pkl de sklearn, utilizable por predict.py, bosque_compilado.py y el
+   registro de modelos.
+
+Las probabilidades del modelo compactado cambian: después de exportarlo hay
+que regenerar el bosque compilado y la calibración.
+
+Uso:
+    python compactacion_bosque.py
+    python compactacion_bosque.py --tolerancia 0.01 --exportar modelo_compacto.pkl
+    python compactacion_bosque.py --criterio validacion --dataset validacion.csv
+    python compactacion_bosque.py --arboles 10 25 50 100 --profundidades 0 14 10
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bosque_compilado import DATASETS_DIR, SCRIPT_DIR, cargar_sklearn, compilar
+from busqueda_hiperparametros import frontera_pareto, medir_bosque
+
+ARCHIVO_REPORTE = 'compactacion_bosque.json'
+
+CRITERIOS = ('oob', 'validacion')
+
+# Cantidades de árboles y profundidades máximas de la tabla (0 = sin límite)
+ARBOLES = (10, 20, 30, 50, 75, 100, 150, 200)
+PROFUNDIDADES = (0, 16, 12, 10, 8)
+
+# Constantes de sklearn.tree._tree para nodos hoja
+HOJA = -1
+SIN_FEATURE = -2
+
+def mascaras_oob(modelo, n_filas):
+    """
+    Máscara (árboles, n_filas) de las filas que cada árbol no vio, rehaciendo
+    el bootstrap de sklearn con el random_state de cada árbol.
+    """
+    from sklearn.ensemble._forest import _generate_sample_indices, _get_n_samples_bootstrap
+
+    n_bootstrap = _get_n_samples_bootstrap(n_filas, modelo.max_samples)
+    mascaras = np.ones((len(modelo.estimators_), n_filas), dtype=bool)
+    for t, arbol in enumerate(modelo.estimators_):
+        mascaras[t, _generate_sample_indices(arbol.random_state, n_filas, n_bootstrap)] = False
+    return mascaras
+
+def probabilidades_arboles(arboles, X):
+    """predict_proba de cada árbol, forma (árboles, filas, clases) en float32."""
+    return np.stack([arbol.predict_proba(X).astype(np.float32) for arbol in arboles])
+
+def diferencia_bootstrap(P, y, mascaras):
+    """
+    Exactitud media de cada árbol en las filas de su bootstrap menos en las
+    out-of-bag. Si el bootstrap reconstruido no es el real, ronda 0.
+    """
+    aciertos = P.argmax(axis=2) == y[None, :]
+    dentro = np.where(~mascaras, aciertos, False).sum(axis=1) / np.maximum((~mascaras).sum(axis=1), 1)
+    fuera = np.where(mascaras, aciertos, False).sum(axis=1) / np.maximum(mascaras.sum(axis=1), 1)
+    return float((dentro - fuera).mean())
+
+def ordenar_arboles(P, y, mascaras):
+    """
+    Orden de selección hacia adelante de los árboles.
+
+    Una fila cuenta como acierto si su clase es la más votada entre los
+    árboles elegidos que no la vieron; las filas sin árboles todavía cuentan
+    como error, así que el orden también busca cubrirlas.
+
+    Retorna:
+    --------
+    list : índices de los árboles, del que más aporta al que menos
+    """
+    n_arboles, n_filas, _ = P.shape
+    P = P * mascaras[..., None]
+    filas = np.arange(n_filas)
+    suma = np.zeros(P.shape[1:], dtype=np.float32)
+    cuenta = np.zeros(n_filas, dtype=np.float32)
+    restantes = np.arange(n_arboles)
+    orden = []
+    while len(restantes):
+        candidatos = suma[None] + P[restantes]
+        aciertos = (candidatos.argmax(axis=2) == y[None, :]).sum(axis=1)
+        cuentas = cuenta[None] + mascaras[restantes]
+        correcta = (candidatos[:, filas, y] / np.maximum(cuentas, 1)).mean(axis=1)
+        # aciertos es entero y correcta < 1: correcta solo desempata
+        mejor = int(np.argmax(aciertos + correcta))
+        elegido = restantes[mejor]
+        orden.append(int(elegido))
+        suma += P[elegido]
+        cuenta += mascaras[elegido]
+        restantes = np.delete(restantes, mejor)
+    return orden
+
+def metricas_prefijos(P, y, mascaras, orden, tamanos):
+    """
+    Exactitud y recall del top 5 de los primeros `tamano` árboles de `orden`.
+
+    Retorna:
+    --------
+    dict : {tamano: (exactitud, top5)}
+    """
+    P = P[orden] * mascaras[orden][..., None]
+    acumulado = np.cumsum(P, axis=0)
+    cubiertas = np.cumsum(mascaras[orden], axis=0) > 0
+    filas = np.arange(len(y))
+    resultado = {}
+    for tamano in tamanos:
+        suma = acumulado[tamano - 1]
+        cubierta = cubiertas[tamano - 1]
+        exactitud = ((suma.argmax(axis=1) == y) & cubierta).mean()
+        # Posición de la clase correcta: cuántas clases tienen más probabilidad
+        posicion = (suma > suma[filas, y][:, None]).sum(axis=1)
+        top5 = ((posicion < 5) & cubierta).mean()
+        resultado[tamano] = (float(exactitud), float(top5))
+    return resultado
+
+def compactar_arbol(estimador, profundidad_maxima=None, colapsar=True):
+    """
+    Copia de un DecisionTreeClassifier con los subárboles de clase única
+    colapsados y la profundidad cortada en `profundidad_maxima`.
+
+    Un nodo pasa a ser hoja si está a `profundidad_maxima`, o si todas las
+    hojas debajo de él votan la misma clase (argmax); la hoja conserva la
+    distribución del nodo, que es la mezcla de las de sus hojas.
+    """
+    from sklearn.tree._tree import Tree
+
+    estado = estimador.tree_.__getstate__()
+    nodos, valores = estado['nodes'], estado['values']
+    izquierdo, derecho = nodos['left_child'], nodos['right_child']
+    n_nodos = len(nodos)
+
+    # sklearn numera en profundidad: los hijos siempre tienen índice mayor
+    clase_unica = np.full(n_nodos, -1, dtype=np.int64)
+    for nodo in range(n_nodos - 1, -1, -1):
+        if izquierdo[nodo] == HOJA:
+            clase_unica[nodo] = np.argmax(valores[nodo, 0])
+        elif clase_unica[izquierdo[nodo]] == clase_unica[derecho[nodo]]:
+            clase_unica[nodo] = clase_unica[izquierdo[nodo]]
+
+    conservados = []
+    nuevo_izquierdo, nuevo_derecho, es_hoja = [], [], []
+    pila = [(0, 0, -1, False)]
+    profundidad = 0
+    while pila:
+        nodo, nivel, padre, es_derecho = pila.pop()
+        indice = len(conservados)
+        conservados.append(nodo)
+        nuevo_izquierdo.append(HOJA)
+        nuevo_derecho.append(HOJA)
+        if padre >= 0:
+            (nuevo_derecho if es_derecho else nuevo_izquierdo)[padre] = indice
+        profundidad = max(profundidad, nivel)
+        hoja = (izquierdo[nodo] == HOJA or (colapsar and clase_unica[nodo] >= 0)
+                or (profundidad_maxima is not None and nivel >= profundidad_maxima))
+        es_hoja.append(hoja)
+        if not hoja:
+            # El izquierdo se procesa primero: orden en profundidad como sklearn
+            pila.append((derecho[nodo], nivel + 1, indice, True))
+            pila.append((izquierdo[nodo], nivel + 1, indice, False))
+
+    conservados = np.array(conservados)
+    es_hoja = np.array(es_hoja)
+    nuevos = nodos[conservados].copy()
+    nuevos['left_child'] = nuevo_izquierdo
+    nuevos['right_child'] = nuevo_derecho
+    nuevos['feature'][es_hoja] = SIN_FEATURE
+    nuevos['threshold'][es_hoja] = SIN_FEATURE
+    if 'missing_go_to_left' in nuevos.dtype.names:
+        nuevos['missing_go_to_left'][es_hoja] = 0
+
+    arbol = Tree(estimador.n_features_in_, np.asarray(estimador.tree_.n_classes, dtype=np.intp),
+                 estimador.n_outputs_)
+    arbol.__setstate__({'max_depth': profundidad, 'node_count': len(conservados),
+                        'nodes': np.ascontiguousarray(nuevos),
+                        'values': np.ascontiguousarray(valores[conservados])})
+    compacto = copy.copy(estimador)
+    compacto.tree_ = arbol
+    return compacto
+
+def construir_bosque(modelo, arboles):
+    """Copia superficial de `modelo` con otros estimators_."""
+    bosque = copy.copy(modelo)
+    bosque.estimators_ = list(arboles)
+    bosque.n_estimators = len(bosque.estimators_)
+    return bosque
+
+def compactar(modelo, X, y, criterio='oob', tamanos=ARBOLES, profundidades=PROFUNDIDADES, colapsar=True,
+              progreso=print):
+    """
+    Ordena, compacta y mide las variantes del bosque.
+
+    Retorna:
+    --------
+    dict : orden de los árboles, diferencia del bootstrap reconstruido (solo
+           oob) y la tabla de variantes; la primera fila es el modelo original
+    """
+    n_arboles = len(modelo.estimators_)
+    tamanos = sorted({t for t in tamanos if 0 < t < n_arboles} | {n_arboles})
+    if criterio == 'oob':
+        mascaras = mascaras_oob(modelo, len(y))
+    else:
+        mascaras = np.ones((n_arboles, len(y)), dtype=bool)
+
+    inicio = time.perf_counter()
+    P = probabilidades_arboles(modelo.estimators_, X)
+    diferencia = diferencia_bootstrap(P, y, mascaras) if criterio == 'oob' else None
+    orden = ordenar_arboles(P, y, mascaras)
+    progreso(f'Orden de {n_arboles} árboles por aporte ({criterio}): {time.perf_counter() - inicio:.1f} s')
+
+    def fila(arboles, profundidad_maxima, colapsado, metricas):
+        bosque = compilar(construir_bosque(modelo, arboles))
+        return dict({'arboles': len(arboles), 'profundidad_maxima': profundidad_maxima,
+                     'colapsado': colapsado, 'exactitud': metricas[0], 'top5': metricas[1]},
+                    **medir_bosque(bosque, X))
+
+    completo = metricas_prefijos(P, y, mascaras, orden, [n_arboles])[n_arboles]
+    tabla = [dict(fila(modelo.estimators_, None, False, completo), original=True)]
+    for profundidad_maxima in profundidades:
+        inicio = time.perf_counter()
+        compactos = [compactar_arbol(arbol, profundidad_maxima or None, colapsar) for arbol in modelo.estimators_]
+        metricas = metricas_prefijos(probabilidades_arboles(compactos, X), y, mascaras, orden, tamanos)
+        for tamano in tamanos:
+            tabla.append(dict(fila([compactos[t] for t in orden[:tamano]], profundidad_maxima or None,
+                                   colapsar, metricas[tamano]), original=False))
+        progreso(f'   profundidad {profundidad_maxima or "sin límite"}: {len(tamanos)} variantes, '
+                 f'{time.perf_counter() - inicio:.1f} s')
+    return {'orden': orden, 'diferencia_bootstrap': diferencia, 'tabla': frontera_pareto(tabla, 'exactitud')}
+
+def elegir(tabla, tolerancia):
+    """La fila más chica (bytes, luego latencia) con exactitud a no más de `tolerancia` del original."""
+    original = next(fila for fila in tabla if fila['original'])
+    aceptables = [fila for fila in tabla if fila['exactitud'] >= original['exactitud'] - tolerancia]
+    return min(aceptables, key=lambda fila: (fila['bytes'], fila['latencia_us']))
+
+def exportar(modelo, orden, fila, ruta):
+    """Guarda con joblib la variante de `fila` como un RandomForestClassifier."""
+    import joblib
+
+    arboles = [modelo.estimators_[t] for t in orden[:fila['arboles']]]
+    if not fila['original']:
+        arboles = [compactar_arbol(arbol, fila['profundidad_maxima'], fila['colapsado']) for arbol in arboles]
+    bosque = construir_bosque(modelo, arboles)
+    bosque.n_jobs = modelo.n_jobs
+    joblib.dump(bosque, ruta)
+    return bosque
+
+def imprimir_tabla(tabla, elegida):
+    print(f"\n{'':2}{'árboles':>7} {'prof':>5} {'colapso':>7} {'exact.':>7} {'top5':>7} "
+          f"{'nodos':>8} {'KB':>8} {'µs/fila':>8}")
+    for fila in tabla:
+        marca = '→' if fila is elegida else ('*' if fila['pareto'] else ' ')
+        nombre = 'orig.' if fila['original'] else str(fila['profundidad_maxima'] or '-')
+        print(f"{marca:2}{fila['arboles']:>7} {nombre:>5} {'sí' if fila['colapsado'] else 'no':>7} "
+              f"{fila['exactitud']:7.4f} {fila['top5']:7.4f} {fila['nodos']:8d} "
+              f"{fila['bytes'] / 1024:8.0f} {fila['latencia_us']:8.0f}")
+    print('   * frontera de Pareto (exactitud, tamaño, latencia)   → elegida')
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Poda y compactación del Random Forest')
+    parser.add_argument('--modelo', default=str(SCRIPT_DIR / 'modelo_random_forest.pkl'))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--dataset',
+                        default=str(DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'))
+    parser.add_argument('--criterio', choices=CRITERIOS, default='oob',
+                        help='oob: filas que cada árbol no vio (dataset de entrenamiento); '
+                             'validacion: todas las filas (dataset no visto)')
+    parser.add_argument('--arboles', type=int, nargs='+', default=list(ARBOLES))
+    parser.add_argument('--profundidades', type=int, nargs='+', default=list(PROFUNDIDADES),
+                        help='Profundidades máximas (0 = sin límite)')
+    parser.add_argument('--sin-colapsar', action='store_true',
+                        help='No colapsar los subárboles de clase única')
+    parser.add_argument('--tolerancia', type=float, default=0.005,
+                        help='Pérdida de exactitud aceptada respecto del modelo original')
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_REPORTE))
+    parser.add_argument('--exportar', help='Guardar el modelo elegido en este .pkl')
+    args = parser.parse_args(argv)
+
+    from carga_datos import cargar_matrices
+    from predict import FEATURE_ORDER
+
+    modelo, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    features = list(getattr(modelo, 'feature_names_in_', FEATURE_ORDER))
+    X, y = cargar_matrices(args.dataset, label_encoder, features)
+    y = y.astype(np.int64)
+    print(f'Compactación: {len(modelo.estimators_)} árboles, {len(y)} filas, criterio {args.criterio}')
+
+    resultado = compactar(modelo, X, y, args.criterio, args.arboles, args.profundidades, not args.sin_colapsar)
+    if resultado['diferencia_bootstrap'] is not None and resultado['diferencia_bootstrap'] < 0.02:
+        print(f"⚠️  Los árboles aciertan casi igual dentro y fuera de su bootstrap "
+              f"({resultado['diferencia_bootstrap']:+.3f}): {Path(args.dataset).name} no parece el conjunto "
+              f"de entrenamiento; usar --criterio validacion con datos no vistos", file=sys.stderr)
+    tabla = resultado['tabla']
+    elegida = elegir(tabla, args.tolerancia)
+    original = tabla[0]
+    imprimir_tabla(tabla, elegida)
+    print(f"\nElegida: {elegida['arboles']} árboles, profundidad máxima {elegida['profundidad_maxima'] or '-'}: "
+          f"exactitud {elegida['exactitud']:.4f} (original {original['exactitud']:.4f}), "
+          f"{original['bytes'] / elegida['bytes']:.1f}x más chico, "
+          f"{original['latencia_us'] / elegida['latencia_us']:.1f}x más rápido")
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'modelo': str(args.modelo),
+        'dataset': str(args.dataset),
+        'criterio': args.criterio,
+        'filas': int(len(y)),
+        'tolerancia': args.tolerancia,
+        'diferencia_bootstrap': resultado['diferencia_bootstrap'],
+        'orden': resultado['orden'],
+        'elegida': {k: elegida[k] for k in ('arboles', 'profundidad_maxima', 'colapsado', 'original')},
+        'tabla': tabla,
+    }
+    Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f'Reporte: {args.salida}')
+    if args.exportar:
+        exportar(modelo, resultado['orden'], elegida, args.exportar)
+        print(f'Modelo exportado: {args.exportar} (regenerar el bosque compilado y la calibración)')
+    return reporte
+
+if __name__ == '__main__':
+    main()
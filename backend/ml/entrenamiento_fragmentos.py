@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Entrenamiento del Random Forest por fragmentos, sin cargar el dataset entero.
+
+El CSV se lee por bloques con carga_datos.leer_bloques() y cada bloque se
+envía a un pool de procesos, donde se ajusta un sub-bosque solo con esas
+filas. Al terminar, los estimators_ de todos los sub-bosques se juntan en un
+único RandomForestClassifier, que predict.py, bosque_compilado.py y el
+registro de modelos usan como cualquier otro .pkl.
+
+- Antes de entrenar, las filas se reparten al azar en particiones binarias
+  de ~--bloque filas en un directorio temporal (una pasada, con la memoria de
+  un bloque). Así cada sub-bosque ve todas las carreras aunque el CSV esté
+  ordenado, por ejemplo, por carrera o por año. Con --sin-mezclar se entrena
+  directamente sobre los bloques del CSV (para archivos ya mezclados).
+- A cada bloque le tocan árboles en proporción a sus filas (redondeo
+  acumulado: el total es exactamente --arboles).
+- Si hay menos bloques que workers, cada bloque se reparte en fragmentos
+  bootstrap (mismas filas, otra semilla) para ocupar todos los núcleos.
+- Las clases que no aparecen en un bloque se agregan con peso 0, así todos
+  los árboles tienen las mismas clases que el label encoder y predict_proba
+  promedia columnas equivalentes (solo cambian el sorteo del bootstrap, ver
+  ajustar_fragmento()).
+- Solo hay 2 × workers fragmentos en vuelo: la memoria depende del tamaño de
+  bloque y no del archivo (más los árboles ya ajustados).
+
+Los hiperparámetros (profundidad, hojas, max_features...) se copian del
+modelo de --modelo; solo cambia la cantidad de árboles.
+
+Uso:
+    python entrenamiento_fragmentos.py datos.csv --salida modelo_random_forest.pkl
+    python entrenamiento_fragmentos.py datos.csv --salida modelo.pkl --arboles 400 --bloque 500000 --workers 8
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from carga_datos import COLUMNA_CARRERA, TAMANO_BLOQUE, contar_filas, leer_bloques, matrices_bloque
+from predict import FEATURE_ORDER, SCRIPT_DIR
+
+# Parámetros del modelo base que no se copian a los sub-bosques
+PARAMETROS_PROPIOS = ('n_estimators', 'n_jobs', 'warm_start', 'oob_score', 'random_state', 'verbose')
+
+def parametros_base(modelo):
+    """Hiperparámetros de `modelo` para ajustar los sub-bosques."""
+    return {k: v for k, v in modelo.get_params().items() if k not in PARAMETROS_PROPIOS}
+
+def cuotas_arboles(filas_por_bloque, arboles):
+    """
+    Árboles de cada bloque, proporcionales a sus filas, con redondeo acumulado
+    para que la suma sea exactamente `arboles`.
+    """
+    total = sum(filas_por_bloque)
+    cuotas = []
+    acumuladas = 0
+    asignados = 0
+    for filas in filas_por_bloque:
+        acumuladas += filas
+        hasta = round(arboles * acumuladas / total) if total else 0
+        cuotas.append(hasta - asignados)
+        asignados = hasta
+    return cuotas
+
+def repartir(arboles, fragmentos):
+    """Divide `arboles` en hasta `fragmentos` partes casi iguales (sin partes vacías)."""
+    fragmentos = max(1, min(fragmentos, arboles))
+    base, resto = divmod(arboles, fragmentos)
+    return [base + (i < resto) for i in range(fragmentos)]
+
+def ajustar_fragmento(X, y, n_clases, arboles, semilla, parametros):
+    """
+    Ajusta un sub-bosque de `arboles` árboles sobre (X, y).
+
+    Las clases ausentes en y se agregan como filas de peso 0 (copias de la
+    primera fila), así classes_ es siempre 0..n_clases-1. El splitter de
+    sklearn descarta las filas de peso 0 antes de construir el árbol, de modo
+    que no cuentan para min_samples_split ni min_samples_leaf: sin bootstrap
+    los árboles son idénticos a los ajustados sin ellas. Con bootstrap sí
+    cambian: el muestreo sortea entre len(y) filas, relleno incluido, y las
+    extracciones que caen en el relleno se pierden. El efecto es el de otra
+    semilla, con a lo sumo n_clases - 1 filas sobre todo el bloque (ver
+    test_relleno en test_entrenamiento_fragmentos.py).
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    pesos = None
+    faltantes = np.setdiff1d(np.arange(n_clases), y)
+    if len(faltantes):
+        X = np.vstack([X, np.repeat(X[:1], len(faltantes), axis=0)])
+        y = np.concatenate([y, faltantes.astype(y.dtype)])
+        pesos = np.ones(len(y), dtype=np.float64)
+        pesos[-len(faltantes):] = 0.0
+
+    bosque = RandomForestClassifier(**parametros, n_estimators=arboles, random_state=semilla, n_jobs=1)
+    bosque.fit(X, y, sample_weight=pesos)
+    return bosque
+
+def unir_bosques(bosques, features):
+    """Junta los estimators_ de los sub-bosques en el primero y lo deja como un bosque normal."""
+    modelo = bosques[0]
+    modelo.estimators_ = [arbol for bosque in bosques for arbol in bosque.estimators_]
+    modelo.n_estimators = len(modelo.estimators_)
+    modelo.feature_names_in_ = np.asarray(features, dtype=object)
+    modelo.n_jobs = -1
+    return modelo
+
+def particionar(ruta, directorio, label_encoder, n_particiones, tamano_bloque=TAMANO_BLOQUE, semilla=42,
+                features=FEATURE_ORDER):
+    """
+    Reparte las filas del CSV al azar en `n_particiones` pares de archivos
+    binarios (X float32 e y int16) dentro de `directorio`, bloque a bloque.
+
+    Retorna:
+    --------
+    tuple : (particiones, filas, descartadas) con particiones = lista de
+            (ruta_X, ruta_y)
+    """
+    rng = np.random.default_rng(semilla)
+    directorio = Path(directorio)
+    particiones = [(directorio / f'X_{i:05d}.bin', directorio / f'y_{i:05d}.bin') for i in range(n_particiones)]
+    archivos = [(open(ruta_X, 'wb'), open(ruta_y, 'wb')) for ruta_X, ruta_y in particiones]
+    filas = descartadas = 0
+    try:
+        columnas = list(features) + [COLUMNA_CARRERA]
+        for bloque in leer_bloques(ruta, tamano_bloque, columnas, label_encoder.classes_):
+            X, y = matrices_bloque(bloque, features)
+            filas += len(bloque)
+            descartadas += len(bloque) - len(y)
+            destino = rng.integers(n_particiones, size=len(y))
+            orden = np.argsort(destino, kind='stable')
+            limites = np.cumsum(np.bincount(destino, minlength=n_particiones))[:-1]
+            for (archivo_X, archivo_y), X_parte, y_parte in zip(
+                    archivos, np.split(X[orden], limites), np.split(y[orden], limites)):
+                archivo_X.write(X_parte.tobytes())
+                archivo_y.write(y_parte.tobytes())
+    finally:
+        for archivo_X, archivo_y in archivos:
+            archivo_X.close()
+            archivo_y.close()
+    return particiones, filas, descartadas
+
+def entrenar_por_fragmentos(ruta, label_encoder, parametros, arboles=200, tamano_bloque=TAMANO_BLOQUE,
+                            workers=None, semilla=42, mezclar=True, features=FEATURE_ORDER):
+    """
+    Entrena un RandomForestClassifier leyendo `ruta` por bloques.
+
+    Parámetros:
+    -----------
+    parametros : dict
+        Hiperparámetros de RandomForestClassifier (sin n_estimators).
+    workers : int, opcional
+        Procesos del pool (por defecto, uno por núcleo; 0 = sin pool).
+    mezclar : bool
+        Repartir antes las filas al azar en particiones (ver particionar()).
+
+    Retorna:
+    --------
+    tuple : (modelo, resumen) con resumen = filas, descartadas, bloques,
+            fragmentos y segundos
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    n_clases = len(label_encoder.classes_)
+    filas_totales = contar_filas(ruta)
+    n_bloques = max(1, math.ceil(filas_totales / tamano_bloque))
+    fragmentos_por_bloque = max(1, math.ceil(max(workers, 1) / n_bloques))
+
+    resumen = {'filas': 0, 'descartadas': 0, 'bloques': 0, 'fragmentos': 0}
+    columnas = list(features) + [COLUMNA_CARRERA]
+
+    def bloques_csv():
+        for bloque in leer_bloques(ruta, tamano_bloque, columnas, label_encoder.classes_):
+            X, y = matrices_bloque(bloque, features)
+            resumen['filas'] += len(bloque)
+            resumen['descartadas'] += len(bloque) - len(y)
+            yield X, y
+
+    def bloques_particiones(particiones):
+        for ruta_X, ruta_y in particiones:
+            yield (np.fromfile(ruta_X, dtype=np.float32).reshape(-1, len(features)),
+                   np.fromfile(ruta_y, dtype=np.int16))
+
+    def fragmentos(bloques, cuotas):
+        """(X, y, árboles, semilla) de cada fragmento, bloque a bloque."""
+        for i, (X, y) in enumerate(bloques):
+            resumen['bloques'] += 1
+            cuota = cuotas[i] if i < len(cuotas) else 0
+            if not len(y) or not cuota:
+                continue
+            for arboles_fragmento in repartir(cuota, fragmentos_por_bloque):
+                resumen['fragmentos'] += 1
+                yield X, y, arboles_fragmento, semilla + resumen['fragmentos']
+
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='fragmentos_') as temporal:
+        if mezclar:
+            particiones, resumen['filas'], resumen['descartadas'] = particionar(
+                ruta, temporal, label_encoder, n_bloques, tamano_bloque, semilla, features)
+            bloques = bloques_particiones(particiones)
+            # Las cuotas salen de las filas reales de cada partición
+            filas_bloques = [ruta_y.stat().st_size // np.dtype(np.int16).itemsize for _, ruta_y in particiones]
+        else:
+            bloques = bloques_csv()
+            filas_bloques = [min(tamano_bloque, filas_totales - i * tamano_bloque) for i in range(n_bloques)]
+        cuotas = cuotas_arboles(filas_bloques, arboles)
+
+        bosques = []
+        if workers == 0:
+            for X, y, arboles_fragmento, semilla_fragmento in fragmentos(bloques, cuotas):
+                bosques.append(ajustar_fragmento(X, y, n_clases, arboles_fragmento, semilla_fragmento,
+                                                 parametros))
+        else:
+            # Ventana acotada de fragmentos en vuelo, como en puntuar_archivo.py
+            en_vuelo = deque()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for X, y, arboles_fragmento, semilla_fragmento in fragmentos(bloques, cuotas):
+                    en_vuelo.append(pool.submit(ajustar_fragmento, X, y, n_clases, arboles_fragmento,
+                                                semilla_fragmento, parametros))
+                    del X, y
+                    if len(en_vuelo) >= 2 * workers:
+                        bosques.append(en_vuelo.popleft().result())
+                while en_vuelo:
+                    bosques.append(en_vuelo.popleft().result())
+    if not bosques:
+        raise ValueError(f'{ruta} no tiene filas con carreras del label encoder')
+
+    modelo = unir_bosques(bosques, features)
+    resumen['segundos'] = time.perf_counter() - inicio
+    return modelo, resumen
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Entrenamiento del Random Forest por fragmentos')
+    parser.add_argument('dataset', help='CSV con las 14 dimensiones y Carrera')
+    parser.add_argument('--salida', required=True, help='Archivo .pkl del modelo entrenado')
+    parser.add_argument('--modelo', default=str(SCRIPT_DIR / 'modelo_random_forest.pkl'),
+                        help='Modelo del que se copian los hiperparámetros')
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--arboles', type=int, default=200)
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Filas por bloque')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos del pool (por defecto, uno por núcleo; 0 = sin pool)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sin-mezclar', action='store_true',
+                        help='Entrenar sobre los bloques del CSV sin repartir antes las filas al azar')
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    from bosque_compilado import cargar_sklearn
+
+    base, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    modelo, resumen = entrenar_por_fragmentos(
+        args.dataset, label_encoder, parametros_base(base), arboles=args.arboles,
+        tamano_bloque=args.bloque, workers=args.workers, semilla=args.semilla,
+        mezclar=not args.sin_mezclar)
+    joblib.dump(modelo, args.salida)
+
+    print(f"{resumen['filas']} filas en {resumen['bloques']} bloques, {resumen['fragmentos']} fragmentos, "
+          f"{modelo.n_estimators} árboles en {resumen['segundos']:.1f} s → {Path(args.salida).name}",
+          file=sys.stderr)
+    if resumen['descartadas']:
+        print(f"   {resumen['descartadas']} filas con carrera desconocida descartadas", file=sys.stderr)
+    return resumen
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Explicaciones de cada predicción a partir de aportes precalculados por nodo
+(al estilo de treeinterpreter).
+
+Al exportar el modelo (bosque_compilado.py exportar) se guarda en
+explicaciones.npz, para cada nodo de cada árbol del bosque compilado, la
+diferencia entre la distribución de clases del nodo y la de su padre. La
+probabilidad de una clase en un árbol es la de la raíz más la suma de esas
+diferencias a lo largo del camino de decisión, y cada diferencia se atribuye
+a la dimensión con la que el padre dividió. Promediando los árboles:
+
+    predict_proba(x)[c] = base[c] + Σ_dimensiones aporte[dimension, c]
+
+explicar() recorre el bosque nivel por nivel igual que BosqueCompilado.hojas()
+y en cada nivel suma el aporte del nodo al que pasa cada fila, solo para la
+clase a explicar: cuesta como un recorrido más del bosque, y funciona igual
+para una fila que para un lote.
+
+Los aportes por dimensión se reparten entre las preguntas q1..q62 con el mapa
+de calcular_promedios (DIMENSION_MAP): cada promedio pesa 1/n en cada una de
+sus n preguntas, así que cada pregunta recibe 1/n del aporte de su dimensión.
+
+Las explicaciones son de las probabilidades del bosque, antes de la
+calibración y de las reglas de negocio. Con el .pkl de sklearn el bosque se
+compila al cargar los aportes, para recorrerlo con la misma numeración.
+
+Uso:
+    python explicaciones.py compilar
+    python explicaciones.py explicar --perfil 3.2 4.1 2.5 3.0 2.8 3.4 4.2 3.1 3.9 2.2 2.9 3.3 3.6 3.0
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from bosque_compilado import FILAS_POR_BLOQUE, cargar_sklearn, orden_hermanos_contiguos
+from predict import DIMENSION_MAP, SCRIPT_DIR
+
+ARCHIVO_EXPLICACIONES = 'explicaciones.npz'
+
+class ExplicadorBosque:
+    """
+    Aportes por nodo de un bosque compilado.
+
+    Parámetros:
+    -----------
+    aportes : np.ndarray
+        (clases, nodos) float32: distribución del nodo menos la de su padre
+        (0 en las raíces), en la numeración de nodos del BosqueCompilado.
+    base : np.ndarray
+        (clases,) promedio de la distribución de las raíces.
+    clases : sequence
+        Carreras en el orden de las columnas de predict_proba.
+    features : sequence
+        Dimensiones, en el orden de las columnas del modelo.
+    bosque : BosqueCompilado, opcional
+        Bosque que se recorre al explicar (lo asigna adjuntar_explicaciones).
+    """
+
+    def __init__(self, aportes, base, clases, features, bosque=None):
+        self.aportes = np.ascontiguousarray(aportes, dtype=np.float32)
+        self.plano = self.aportes.ravel()
+        self.n_nodos = self.aportes.shape[1]
+        self.base = np.asarray(base, dtype=np.float64)
+        self.clases = [str(c) for c in clases]
+        self.features = [str(f) for f in features]
+        self.nombres_features = np.asarray(self.features, dtype=object)
+        self.preguntas, self.matriz_preguntas = matriz_preguntas(self.features)
+        self.bosque = bosque
+
+    def compatible(self, bosque):
+        """True si los aportes corresponden a la numeración de nodos de `bosque`."""
+        return hasattr(bosque, 'izquierdo') and len(bosque.izquierdo) == self.n_nodos
+
+    def contribuciones(self, X, clases):
+        """
+        Aporte de cada dimensión a la probabilidad de una clase por fila.
+
+        Parámetros:
+        -----------
+        X : np.ndarray
+            (n, features) en el orden del modelo.
+        clases : np.ndarray
+            (n,) índice de la clase a explicar en cada fila.
+
+        Retorna:
+        --------
+        np.ndarray : (n, features) con base[clases] + suma por fila igual a
+            predict_proba(X)[fila, clases].
+        """
+        bosque = self.bosque
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32)
+        clases = np.asarray(clases, dtype=np.intp)
+        n, n_features = X.shape
+        salida = np.empty((n, n_features), dtype=np.float64)
+        for inicio in range(0, n, FILAS_POR_BLOQUE):
+            bloque = X[inicio:inicio + FILAS_POR_BLOQUE]
+            desplazamiento = (clases[inicio:inicio + FILAS_POR_BLOQUE] * self.n_nodos)[:, None]
+            salida[inicio:inicio + len(bloque)] = self.recorrer(bosque, bloque, desplazamiento)
+        return salida / bosque.n_estimators
+
+    def recorrer(self, bosque, X, desplazamiento):
+        """Suma por fila y dimensión de los aportes del camino de cada árbol."""
+        n, n_features = X.shape
+        plano = X.ravel()
+        base = (np.arange(n) * n_features)[:, None]
+        suma = np.zeros(n * n_features, dtype=np.float64)
+
+        nodos = np.broadcast_to(bosque.raices, (n, bosque.n_estimators)).copy()
+        for _ in range(bosque.profundidad):
+            posiciones = base + bosque.feature[nodos]
+            mayor = plano[posiciones] > bosque.umbral[nodos]
+            siguientes = bosque.izquierdo[nodos] + mayor
+            # Las hojas apuntan a sí mismas: solo suma el paso a un hijo
+            movidos = siguientes != nodos
+            if not movidos.any():
+                break
+            suma += np.bincount(posiciones[movidos], weights=self.plano[(desplazamiento + siguientes)[movidos]],
+                                minlength=len(suma))
+            nodos = siguientes
+        return suma.reshape(n, n_features)
+
+    def explicar(self, X, clases):
+        """
+        Explicación de la clase `clases[i]` de cada fila de X, en el formato
+        del resultado de predecir(): una lista de dicts con 'carrera', 'base',
+        'probabilidad_bosque', 'dimensiones' (de mayor a menor aporte
+        absoluto) y 'preguntas' (q1..q62).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        clases = np.asarray(clases, dtype=np.intp)
+        contribuciones = self.contribuciones(X, clases)
+        base = self.base[clases]
+        probabilidades = base + contribuciones.sum(axis=1)
+
+        orden = np.argsort(-np.abs(contribuciones), axis=1, kind='stable')
+        nombres = self.nombres_features[orden].tolist()
+        valores = np.take_along_axis(X, orden, axis=1).tolist()
+        aportes = np.round(np.take_along_axis(contribuciones, orden, axis=1), 6).tolist()
+        preguntas = np.round(contribuciones @ self.matriz_preguntas, 6).tolist()
+        carreras = np.asarray(self.clases, dtype=object)[clases].tolist()
+        base = np.round(base, 6).tolist()
+        probabilidades = np.round(probabilidades, 6).tolist()
+
+        return [
+            {
+                'carrera': carreras[i],
+                'base': base[i],
+                'probabilidad_bosque': probabilidades[i],
+                'dimensiones': [
+                    {'dimension': dimension, 'valor': valor, 'contribucion': aporte}
+                    for dimension, valor, aporte in zip(nombres[i], valores[i], aportes[i])
+                ],
+                'preguntas': dict(zip(self.preguntas, preguntas[i])),
+            }
+            for i in range(len(X))
+        ]
+
+    def guardar(self, ruta):
+        """Guarda los aportes en un .npz."""
+        with open(ruta, 'wb') as archivo:
+            np.savez(
+                archivo,
+                aportes=self.aportes,
+                base=self.base,
+                clases=np.array(self.clases),
+                features=np.array(self.features),
+            )
+
+def matriz_preguntas(features):
+    """
+    (preguntas, matriz (features, preguntas)) que reparte el aporte de cada
+    dimensión en partes iguales entre sus preguntas de DIMENSION_MAP.
+    """
+    preguntas = sorted({q for f in features for q in DIMENSION_MAP.get(f, [])}, key=lambda q: int(q[1:]))
+    columna = {q: j for j, q in enumerate(preguntas)}
+    matriz = np.zeros((len(features), len(preguntas)))
+    for i, feature in enumerate(features):
+        claves = DIMENSION_MAP.get(feature, [])
+        for q in claves:
+            matriz[i, columna[q]] = 1.0 / len(claves)
+    return preguntas, matriz
+
+def cargar_explicaciones(ruta):
+    """Lee los aportes guardados con ExplicadorBosque.guardar()."""
+    with np.load(ruta, allow_pickle=False) as arrays:
+        return ExplicadorBosque(arrays['aportes'], arrays['base'], arrays['clases'].tolist(),
+                                arrays['features'].tolist())
+
+def adjuntar_explicaciones(modelo, label_encoder, ruta):
+    """
+    Carga los aportes de `ruta` en modelo.explicador si corresponden al bosque
+    y a sus clases; si no, se ignoran (con un aviso en stderr). Con el .pkl
+    de sklearn se compila el bosque para recorrerlo.
+    """
+    explicador = cargar_explicaciones(ruta)
+    if hasattr(modelo, 'estimators_'):
+        from bosque_compilado import compilar
+        explicador.bosque = compilar(modelo)
+    else:
+        explicador.bosque = modelo
+    if (not explicador.compatible(explicador.bosque)
+            or explicador.clases != [str(c) for c in label_encoder.classes_]
+            or explicador.features != [str(f) for f in modelo.feature_names_in_]):
+        print(f'⚠️  {ruta} no corresponde al bosque compilado cargado; se ignora', file=sys.stderr)
+        return modelo
+    modelo.explicador = explicador
+    return modelo
+
+def compilar_explicaciones(modelo, clases):
+    """
+    Aportes por nodo de un RandomForestClassifier, en la misma numeración de
+    nodos que bosque_compilado.compilar().
+    """
+    aportes = []
+    raices = []
+    for estimador in modelo.estimators_:
+        arbol = estimador.tree_
+        orden = orden_hermanos_contiguos(arbol)
+        posicion = np.empty(arbol.node_count, dtype=np.int64)
+        posicion[orden] = np.arange(len(orden))
+
+        # Distribución de cada nodo (fracciones; conteos en sklearn < 1.4)
+        valores = arbol.value[orden, 0, :].astype(np.float64)
+        suma = valores.sum(axis=1, keepdims=True)
+        valores /= np.where(suma > 0, suma, 1.0)
+
+        padre = np.zeros(len(orden), dtype=np.int64)
+        internos = np.flatnonzero(arbol.children_left[orden] != -1)
+        padre[posicion[arbol.children_left[orden[internos]]]] = internos
+        padre[posicion[arbol.children_right[orden[internos]]]] = internos
+
+        aporte = valores - valores[padre]
+        aporte[0] = 0.0
+        aportes.append(aporte)
+        raices.append(valores[0])
+
+    return ExplicadorBosque(
+        np.concatenate(aportes).T, np.mean(raices, axis=0), clases,
+        [str(f) for f in getattr(modelo, 'feature_names_in_', [])],
+    )
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Explicaciones por aportes de nodos del bosque')
+    parser.add_argument('comando', choices=['compilar', 'explicar'])
+    parser.add_argument('--modelo', default=str(SCRIPT_DIR / 'modelo_random_forest.pkl'))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_EXPLICACIONES))
+    parser.add_argument('--perfil', type=float, nargs='+', help='14 valores en el orden del modelo')
+    args = parser.parse_args(argv)
+
+    modelo, label_encoder = cargar_sklearn(args.modelo, args.encoder)
+    if args.comando == 'compilar':
+        explicador = compilar_explicaciones(modelo, label_encoder.classes_)
+        explicador.guardar(args.salida)
+        print(f'✅ Aportes de {explicador.n_nodos} nodos y {len(explicador.clases)} clases')
+        print(f'   Guardado en {args.salida} ({Path(args.salida).stat().st_size / 1024 / 1024:.2f} MB)')
+        return explicador
+
+    adjuntar_explicaciones(modelo, label_encoder, args.salida)
+    X = np.array([args.perfil])
+    clase = modelo.predict_proba(X).argmax(axis=1)
+    explicacion = modelo.explicador.explicar(X, clase)[0]
+    print(f"{explicacion['carrera']}: base {explicacion['base']:.3f} → {explicacion['probabilidad_bosque']:.3f}")
+    for dimension in explicacion['dimensiones']:
+        print(f"   {dimension['dimension']:<3} {dimension['valor']:4.1f}  {dimension['contribucion']:+.4f}")
+    return explicacion
+
+if __name__ == '__main__':
+    main()
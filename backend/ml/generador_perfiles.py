@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador de perfiles sintéticos para pruebas de carga y de escala.
+
+Ajusta una distribución por carrera a partir de un dataset real (por defecto
+datasets/dataset_orientacion_vocacional_17carreras_3500.csv):
+
+- normal multivariada de las 14 dimensiones (vector de medias y covarianza);
+- frecuencias conjuntas de (Rendimiento_General, Rendimiento_STEM,
+  Rendimiento_Humanidades), 125 combinaciones;
+- proporción de cada carrera.
+
+Después muestrea millones de filas por bloques, todo con operaciones de NumPy
+(sin bucles por fila) y una semilla: las dimensiones se redondean a 0.1 y se
+recortan al rango observado, como en el dataset. Con --respuestas, en lugar de
+los promedios se generan respuestas q1..q62 (1-5) cuya suma por dimensión es
+la del perfil muestreado (sorteadas entre las combinaciones con esa suma,
+favoreciendo las poco dispersas), más q63..q65 con el rendimiento; calcular_promedios
+las convierte de vuelta en el perfil.
+
+La salida se escribe bloque a bloque:
+
+- .csv: el esquema de datasets/ (R..N, Rendimiento_*, Carrera) o q1..q65 y
+  Carrera. Las filas se arman como bytes de ancho fijo con NumPy.
+- cualquier otra ruta: un directorio con .npy (perfiles o respuestas,
+  rendimiento, carrera) y meta.json, para np.load(..., mmap_mode='r').
+
+Uso:
+    python generador_perfiles.py perfiles_10M.csv --filas 10000000
+    python generador_perfiles.py respuestas_1M.csv --filas 1000000 --respuestas
+    python generador_perfiles.py perfiles_10M --filas 10000000 --semilla 7
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from carga_datos import COLUMNA_CARRERA, COLUMNAS_RENDIMIENTO, leer_bloques
+from predict import DIMENSION_MAP, FEATURE_ORDER, N_PREGUNTAS, RENDIMIENTO_MAP, SCRIPT_DIR
+
+DATASET_BASE = SCRIPT_DIR.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+# Filas por bloque de generación y escritura
+TAMANO_BLOQUE = 1_000_000
+
+# Niveles de cada columna de rendimiento (1-5)
+NIVELES_RENDIMIENTO = 5
+
+# Desviación típica aproximada de las respuestas de una dimensión alrededor de
+# su promedio: pesa las combinaciones de respuestas con la misma suma
+DISPERSION_RESPUESTAS = 0.8
+
+# Casillas por suma de la tabla de muestreo de respuestas (resolución de los pesos)
+CASILLAS = 1024
+
+# Preguntas de cada dimensión agrupadas por cantidad de preguntas:
+# {n: (columnas de FEATURE_ORDER, índices 0-based de sus d × n preguntas)}
+GRUPOS_PREGUNTAS = {}
+for _columna, _dimension in enumerate(FEATURE_ORDER):
+    _preguntas = [int(q[1:]) - 1 for q in DIMENSION_MAP[_dimension]]
+    _grupo = GRUPOS_PREGUNTAS.setdefault(len(_preguntas), ([], []))
+    _grupo[0].append(_columna)
+    _grupo[1].append(_preguntas)
+GRUPOS_PREGUNTAS = {n: (np.array(c), np.array(p).ravel()) for n, (c, p) in GRUPOS_PREGUNTAS.items()}
+
+def tabla_respuestas(cantidad, dispersion=DISPERSION_RESPUESTAS, casillas=CASILLAS):
+    """
+    Tabla de muestreo de respuestas de una dimensión de `cantidad` preguntas.
+
+    Las 5^cantidad combinaciones de respuestas 1-5 se pesan con
+    exp(-Σ(v - promedio)² / 2σ²) y, para cada suma posible, las `casillas`
+    entradas de su fila se reparten entre las combinaciones con esa suma en
+    proporción a su peso: sortear una casilla al azar es sortear una
+    combinación, con un solo índice y sin búsqueda binaria.
+
+    Retorna:
+    --------
+    tuple : (combinaciones (m, cantidad) uint8, casillas (5n+1, casillas) int16)
+    """
+    combinaciones = np.array(list(itertools.product(range(1, 6), repeat=cantidad)), dtype=np.uint8)
+    sumas = combinaciones.sum(axis=1, dtype=np.int64)
+    pesos = np.exp(-((combinaciones - sumas[:, None] / cantidad) ** 2).sum(axis=1) / (2 * dispersion ** 2))
+
+    tabla = np.zeros((5 * cantidad + 1, casillas), dtype=np.int16)
+    for suma in range(cantidad, 5 * cantidad + 1):
+        indices = np.flatnonzero(sumas == suma)
+        limites = np.rint(np.cumsum(pesos[indices]) / pesos[indices].sum() * casillas).astype(np.int64)
+        tabla[suma] = np.repeat(indices, np.diff(limites, prepend=0))
+    return combinaciones, tabla
+
+TABLAS_RESPUESTAS = {cantidad: tabla_respuestas(cantidad) for cantidad in GRUPOS_PREGUNTAS}
+
+class DistribucionCarreras:
+    """
+    Distribución ajustada por carrera.
+
+    Atributos:
+    ----------
+    carreras : list
+        Nombres de las carreras (orden de np.unique, como el label encoder).
+    proporciones : np.ndarray (k,)
+    medias : np.ndarray (k, 14)
+    cholesky : np.ndarray (k, 14, 14)
+        Factor de Cholesky de la covarianza de cada carrera.
+    rendimiento : np.ndarray (k, 125)
+        Frecuencias de las combinaciones de rendimiento (índice base 5).
+    minimos, maximos : np.ndarray (14,)
+        Rango observado de cada dimensión.
+    """
+
+    def __init__(self, carreras, proporciones, medias, cholesky, rendimiento, minimos, maximos):
+        self.carreras = list(carreras)
+        self.proporciones = proporciones
+        self.medias = medias
+        self.cholesky = cholesky
+        self.rendimiento = rendimiento
+        self.minimos = minimos
+        self.maximos = maximos
+        self._acumulado_rendimiento = np.cumsum(rendimiento, axis=1)
+
+    @classmethod
+    def ajustar(cls, ruta=DATASET_BASE):
+        """Ajusta la distribución de cada carrera del CSV."""
+        import pandas as pd
+
+        df = pd.concat(list(leer_bloques(ruta)), ignore_index=True)
+        carreras, y = np.unique(df[COLUMNA_CARRERA].astype(str).to_numpy(), return_inverse=True)
+        X = df[FEATURE_ORDER].to_numpy(dtype=np.float64)
+        niveles = df[list(COLUMNAS_RENDIMIENTO)].to_numpy().astype(np.int64) - 1
+        combinacion = (niveles * NIVELES_RENDIMIENTO ** np.arange(len(COLUMNAS_RENDIMIENTO))[::-1]).sum(axis=1)
+
+        k = len(carreras)
+        medias = np.zeros((k, X.shape[1]))
+        cholesky = np.zeros((k, X.shape[1], X.shape[1]))
+        rendimiento = np.zeros((k, NIVELES_RENDIMIENTO ** len(COLUMNAS_RENDIMIENTO)))
+        for c in range(k):
+            filas = X[y == c]
+            medias[c] = filas.mean(axis=0)
+            covarianza = np.cov(filas, rowvar=False)
+            # Regularización mínima por si alguna dimensión es casi constante
+            covarianza += np.eye(X.shape[1]) * 1e-6
+            cholesky[c] = np.linalg.cholesky(covarianza)
+            rendimiento[c] = np.bincount(combinacion[y == c], minlength=rendimiento.shape[1])
+        rendimiento /= rendimiento.sum(axis=1, keepdims=True)
+        proporciones = np.bincount(y, minlength=k) / len(y)
+        return cls(carreras, proporciones, medias, cholesky, rendimiento, X.min(axis=0), X.max(axis=0))
+
+    def muestrear(self, n, rng):
+        """
+        Muestrea n filas.
+
+        Retorna:
+        --------
+        tuple : (decimas, rendimiento, y) con decimas (n, 14) uint8 = perfil × 10,
+                rendimiento (n, 3) uint8 en 1-5 e y (n,) int16
+        """
+        k, d = self.medias.shape
+        cantidades = rng.multinomial(n, self.proporciones)
+        y = np.repeat(np.arange(k, dtype=np.int16), cantidades)
+        X = np.empty((n, d), dtype=np.float32)
+        u = rng.random(n)
+        combinacion = np.empty(n, dtype=np.int64)
+        inicio = 0
+        for c, cantidad in enumerate(cantidades.tolist()):
+            fin = inicio + cantidad
+            z = rng.standard_normal((cantidad, d), dtype=np.float32)
+            X[inicio:fin] = z @ self.cholesky[c].T.astype(np.float32) + self.medias[c].astype(np.float32)
+            combinacion[inicio:fin] = np.searchsorted(self._acumulado_rendimiento[c], u[inicio:fin], side='right')
+            inicio = fin
+
+        # Las filas salen agrupadas por carrera: se mezclan
+        orden = rng.permutation(n)
+        y = y[orden]
+        X = X[orden]
+        combinacion = np.minimum(combinacion[orden], self.rendimiento.shape[1] - 1)
+
+        decimas = np.clip(np.rint(X * 10), np.rint(self.minimos * 10), np.rint(self.maximos * 10)).astype(np.uint8)
+        rendimiento = np.empty((n, len(COLUMNAS_RENDIMIENTO)), dtype=np.uint8)
+        for j in range(len(COLUMNAS_RENDIMIENTO) - 1, -1, -1):
+            combinacion, nivel = np.divmod(combinacion, NIVELES_RENDIMIENTO)
+            rendimiento[:, j] = nivel + 1
+        return decimas, rendimiento, y
+
+def respuestas_desde_perfiles(decimas, rng, tablas=TABLAS_RESPUESTAS):
+    """
+    Respuestas q1..q62 (n, 62) uint8 en 1-5 cuya suma por dimensión es
+    round(perfil × preguntas): el promedio redondeado vuelve a dar el perfil
+    (salvo el redondeo a n preguntas y el recorte a 1-5). La combinación de
+    cada dimensión se sortea con la tabla de tabla_respuestas().
+    """
+    n = len(decimas)
+    respuestas = np.empty((n, N_PREGUNTAS), dtype=np.uint8)
+    for cantidad, (columnas, preguntas) in GRUPOS_PREGUNTAS.items():
+        combinaciones, casillas = tablas[cantidad]
+        suma = np.clip(np.rint(decimas[:, columnas] * (cantidad / 10)), cantidad, 5 * cantidad).astype(np.intp)
+        elegida = casillas[suma, rng.integers(0, casillas.shape[1], suma.shape, dtype=np.int16)]
+        valores = combinaciones[elegida].reshape(n, -1)
+        # En el cuestionario las preguntas de cada grupo son consecutivas
+        if np.array_equal(preguntas, np.arange(preguntas[0], preguntas[0] + len(preguntas))):
+            respuestas[:, preguntas[0]:preguntas[0] + len(preguntas)] = valores
+        else:
+            respuestas[:, preguntas] = valores
+    return respuestas
+
+def columnas_salida(respuestas):
+    """Encabezado del CSV en el esquema de datasets/ o de respuestas q1..q65."""
+    if respuestas:
+        rendimiento = [RENDIMIENTO_MAP[c] for c in COLUMNAS_RENDIMIENTO]
+        return [f'q{i}' for i in range(1, N_PREGUNTAS + 1)] + rendimiento + [COLUMNA_CARRERA]
+    return list(FEATURE_ORDER) + list(COLUMNAS_RENDIMIENTO) + [COLUMNA_CARRERA]
+
+def bytes_csv(campos, y, nombres):
+    """
+    Arma las líneas CSV de un bloque sin formatear fila por fila.
+
+    Cada fila se escribe en una matriz de ancho máximo (parte fija, nombre de
+    la carrera y salto de línea, con relleno) y una máscara booleana descarta
+    el relleno de una sola vez.
+
+    Parámetros:
+    -----------
+    campos : np.ndarray (n, w) uint8
+        Parte de ancho fijo de cada línea (con sus comas, incluida la última).
+    y : np.ndarray (n,)
+        Índice de la carrera de cada fila.
+    nombres : list of bytes
+        Nombre codificado de cada carrera.
+    """
+    n, ancho = campos.shape
+    largos = np.array([len(nombre) + 1 for nombre in nombres], dtype=np.int64)
+    finales = np.zeros((len(nombres), largos.max()), dtype=np.uint8)
+    for c, nombre in enumerate(nombres):
+        finales[c, :largos[c]] = np.frombuffer(nombre + b'\n', dtype=np.uint8)
+    lineas = np.empty((n, ancho + finales.shape[1]), dtype=np.uint8)
+    lineas[:, :ancho] = campos
+    lineas[:, ancho:] = finales[y]
+    return lineas[np.arange(lineas.shape[1]) < (ancho + largos[y])[:, None]].tobytes()
+
+def campos_perfiles(decimas, rendimiento):
+    """Parte fija de las líneas de perfiles: 'd.d,' por dimensión y 'd,' por rendimiento."""
+    n, d = decimas.shape
+    campos = np.empty((n, 4 * d + 2 * rendimiento.shape[1]), dtype=np.uint8)
+    unidades, decimales = np.divmod(decimas, 10)
+    campos[:, 0:4 * d:4] = unidades + ord('0')
+    campos[:, 1:4 * d:4] = ord('.')
+    campos[:, 2:4 * d:4] = decimales + ord('0')
+    campos[:, 3:4 * d:4] = ord(',')
+    campos[:, 4 * d::2] = rendimiento + ord('0')
+    campos[:, 4 * d + 1::2] = ord(',')
+    return campos
+
+def campos_respuestas(respuestas, rendimiento):
+    """Parte fija de las líneas de respuestas: 'd,' por pregunta q1..q65."""
+    digitos = np.hstack([respuestas, rendimiento])
+    campos = np.empty((len(digitos), 2 * digitos.shape[1]), dtype=np.uint8)
+    campos[:, 0::2] = digitos + ord('0')
+    campos[:, 1::2] = ord(',')
+    return campos
+
+class EscritorCSV:
+    def __init__(self, ruta, columnas, carreras):
+        self.archivo = open(ruta, 'wb')
+        self.archivo.write((','.join(columnas) + '\n').encode('utf-8'))
+        self.nombres = [str(carrera).encode('utf-8') for carrera in carreras]
+
+    def escribir(self, decimas, rendimiento, y, respuestas=None):
+        campos = (campos_respuestas(respuestas, rendimiento) if respuestas is not None
+                  else campos_perfiles(decimas, rendimiento))
+        self.archivo.write(bytes_csv(campos, y, self.nombres))
+
+    def cerrar(self):
+        self.archivo.close()
+
+class EscritorNpy:
+    """Directorio con un .npy por arreglo, escrito por bloques sobre memmaps."""
+
+    def __init__(self, directorio, filas, columnas, carreras, respuestas, semilla):
+        from numpy.lib.format import open_memmap
+
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        if respuestas:
+            self.datos = open_memmap(self.directorio / 'respuestas.npy', mode='w+', dtype=np.uint8,
+                                     shape=(filas, N_PREGUNTAS))
+        else:
+            self.datos = open_memmap(self.directorio / 'perfiles.npy', mode='w+', dtype=np.float32,
+                                     shape=(filas, len(FEATURE_ORDER)))
+        self.rendimiento = open_memmap(self.directorio / 'rendimiento.npy', mode='w+', dtype=np.uint8,
+                                       shape=(filas, len(COLUMNAS_RENDIMIENTO)))
+        self.carrera = open_memmap(self.directorio / 'carrera.npy', mode='w+', dtype=np.int16, shape=(filas,))
+        (self.directorio / 'meta.json').write_text(json.dumps({
+            'filas': filas, 'columnas': columnas, 'carreras': list(carreras),
+            'respuestas': respuestas, 'semilla': semilla,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        self.inicio = 0
+
+    def escribir(self, decimas, rendimiento, y, respuestas=None):
+        fin = self.inicio + len(y)
+        self.datos[self.inicio:fin] = respuestas if respuestas is not None else decimas / np.float32(10)
+        self.rendimiento[self.inicio:fin] = rendimiento
+        self.carrera[self.inicio:fin] = y
+        self.inicio = fin
+
+    def cerrar(self):
+        for arreglo in (self.datos, self.rendimiento, self.carrera):
+            arreglo.flush()
+        del self.datos, self.rendimiento, self.carrera
+
+def generar(salida, filas, distribucion=None, semilla=42, respuestas=False, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera `filas` filas sintéticas en `salida` (.csv o directorio .npy).
+
+    Retorna:
+    --------
+    dict : filas, bloques, segundos y filas_por_segundo
+    """
+    distribucion = distribucion or DistribucionCarreras.ajustar()
+    # Corrientes separadas: los perfiles de una semilla son los mismos con o sin --respuestas
+    rng, rng_respuestas = (np.random.default_rng(s) for s in np.random.SeedSequence(semilla).spawn(2))
+    columnas = columnas_salida(respuestas)
+    if Path(salida).suffix.lower() == '.csv':
+        escritor = EscritorCSV(salida, columnas, distribucion.carreras)
+    else:
+        escritor = EscritorNpy(salida, filas, columnas, distribucion.carreras, respuestas, semilla)
+
+    inicio = time.perf_counter()
+    bloques = 0
+    try:
+        for desde in range(0, filas, tamano_bloque):
+            decimas, rendimiento, y = distribucion.muestrear(min(tamano_bloque, filas - desde), rng)
+            escritor.escribir(decimas, rendimiento, y,
+                              respuestas_desde_perfiles(decimas, rng_respuestas) if respuestas else None)
+            bloques += 1
+    finally:
+        escritor.cerrar()
+    segundos = time.perf_counter() - inicio
+    return {'filas': filas, 'bloques': bloques, 'segundos': segundos,
+            'filas_por_segundo': filas / segundos if segundos else 0.0}
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Generador de perfiles sintéticos')
+    parser.add_argument('salida', help='Archivo .csv o directorio para los .npy')
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--dataset', default=str(DATASET_BASE), help='Dataset real para ajustar la distribución')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--respuestas', action='store_true', help='Generar respuestas q1..q65 en lugar de promedios')
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Filas por bloque')
+    args = parser.parse_args(argv)
+
+    distribucion = DistribucionCarreras.ajustar(args.dataset)
+    resumen = generar(args.salida, args.filas, distribucion, args.semilla, args.respuestas, args.bloque)
+    print(f"{resumen['filas']} filas en {resumen['bloques']} bloques, {resumen['segundos']:.1f} s "
+          f"({resumen['filas_por_segundo']:,.0f} filas/s) → {args.salida}", file=sys.stderr)
+    return resumen
+
+if __name__ == '__main__':
+    main()
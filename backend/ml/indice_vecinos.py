@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de vecinos más cercanos sobre los perfiles de referencia ("estudiantes
+como tú").
+
+Se construye una vez al exportar el modelo (bosque_compilado.py exportar) con
+un KD-tree (scipy.spatial.cKDTree) sobre las 14 dimensiones de FEATURE_ORDER
+del dataset de referencia, y se guarda ya construido en indice_vecinos.pkl.
+load_models() lo deja en modelo.vecinos y construir_resultado() agrega a cada
+resultado los perfiles de referencia más parecidos y sus carreras.
+
+Con particiones, además del árbol global hay uno por carrera para buscar
+solo entre los estudiantes de una carrera.
+
+Hasta FILAS_FUERZA_BRUTA perfiles no se construyen árboles: la búsqueda es
+por fuerza bruta con numpy (exacta, microsegundos con las 3500 filas de
+referencia) y el .pkl solo tiene arrays, así que cargarlo no importa scipy
+(unos 250 ms del arranque de cada proceso de predict.py).
+
+En 14 dimensiones la búsqueda exacta recorre muchas hojas: con 1M de perfiles
+tarda unos 2.5 ms por consulta. Con aproximacion=0.5 (eps de cKDTree) cada
+vecino devuelto está a lo sumo a 1.5 veces la distancia del vecino exacto; en
+la práctica coincide casi siempre y la consulta baja de 1 ms. Los índices
+chicos (el dataset de referencia tiene 3500 filas) consultan exacto por
+defecto: ahí la búsqueda exacta ya tarda microsegundos.
+
+Uso:
+    python indice_vecinos.py construir [--dataset CSV] [--salida indice_vecinos.pkl]
+    python indice_vecinos.py consultar --perfil 3.2 4.1 2.5 3.0 2.8 3.4 4.2 3.1 3.9 2.2 2.9 3.3 3.6 3.0
+    python indice_vecinos.py benchmark --filas 1000000
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from predict import FEATURE_ORDER, SCRIPT_DIR
+
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+DATASET_REFERENCIA = DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+ARCHIVO_INDICE = 'indice_vecinos.pkl'
+
+# Vecinos por consulta
+VECINOS = 5
+
+# eps de cKDTree.query: distancia hasta (1 + aproximacion) veces la exacta
+APROXIMACION = 0.5
+
+# Desde cuántos perfiles las consultas son aproximadas por defecto
+FILAS_APROXIMACION = 100_000
+
+# Perfiles por hoja del KD-tree
+TAMANO_HOJA = 32
+
+# Hasta cuántos perfiles se busca por fuerza bruta en lugar de con KD-trees
+FILAS_FUERZA_BRUTA = 20_000
+
+# Elementos de la matriz (consultas, perfiles, d) de diferencias por bloque
+ELEMENTOS_POR_BLOQUE = 1 << 22
+
+def construir_arbol(perfiles):
+    """cKDTree sobre los perfiles (sin reordenar por mediana: se construye más rápido)."""
+    from scipy.spatial import cKDTree
+    return cKDTree(perfiles, leafsize=TAMANO_HOJA, balanced_tree=False, compact_nodes=False)
+
+def fuerza_bruta(perfiles, X, k):
+    """
+    (distancias, filas) de los k perfiles más cercanos a cada fila de X,
+    comparando contra todos. Exacta; en los empates va primero la fila
+    anterior.
+    """
+    distancias = np.empty((len(X), k))
+    filas = np.empty((len(X), k), dtype=np.intp)
+    bloque = max(1, ELEMENTOS_POR_BLOQUE // max(perfiles.size, 1))
+    for inicio in range(0, len(X), bloque):
+        diferencias = X[inicio:inicio + bloque, None, :] - perfiles[None, :, :]
+        cuadrados = np.einsum('nmd,nmd->nm', diferencias, diferencias)
+        orden = np.argsort(cuadrados, axis=1, kind='stable')[:, :k]
+        filas[inicio:inicio + bloque] = orden
+        distancias[inicio:inicio + bloque] = np.sqrt(np.take_along_axis(cuadrados, orden, axis=1))
+    return distancias, filas
+
+class IndiceVecinos:
+    """
+    KD-tree de los perfiles de referencia con la carrera de cada uno.
+
+    Parámetros:
+    -----------
+    perfiles : np.ndarray
+        Matriz (n, d) de perfiles en el orden de `features`.
+    carreras : np.ndarray
+        (n,) códigos de carrera (índices de `clases`).
+    clases : list
+        Nombres de las carreras.
+    features : list
+        Nombre de cada columna de `perfiles`.
+    aproximacion : float, opcional
+        eps por defecto de las consultas (0 = exactas). Sin indicar,
+        APROXIMACION desde FILAS_APROXIMACION perfiles y 0 por debajo.
+    particionar : bool
+        Construir también un árbol por carrera (o, por fuerza bruta, guardar
+        las filas de cada carrera).
+    """
+
+    def __init__(self, perfiles, carreras, clases, features=FEATURE_ORDER,
+                 aproximacion=None, particionar=True):
+        self.carreras = np.asarray(carreras, dtype=np.int16)
+        self.clases = [str(c) for c in clases]
+        self.features = list(features)
+        perfiles = np.ascontiguousarray(perfiles, dtype=np.float64)
+        # Con árbol los perfiles quedan solo en arbol.data (se guardarían dos veces)
+        if len(perfiles) > FILAS_FUERZA_BRUTA:
+            self.arbol, self._perfiles = construir_arbol(perfiles), None
+        else:
+            self.arbol, self._perfiles = None, perfiles
+        if aproximacion is None:
+            aproximacion = APROXIMACION if len(perfiles) >= FILAS_APROXIMACION else 0.0
+        self.aproximacion = float(aproximacion)
+        self.particiones = {}
+        if particionar:
+            for codigo in np.unique(self.carreras).tolist():
+                filas = np.flatnonzero(self.carreras == codigo).astype(np.int32)
+                arbol = construir_arbol(perfiles[filas]) if self.arbol is not None else None
+                self.particiones[codigo] = (arbol, filas)
+
+    @property
+    def perfiles(self):
+        """Matriz (n, d) de los perfiles de referencia."""
+        return self.arbol.data if self.arbol is not None else self._perfiles
+
+    def __len__(self):
+        return len(self.perfiles)
+
+    def codigo_carrera(self, carrera):
+        """Código de una carrera dada por nombre o por código."""
+        if isinstance(carrera, str):
+            if carrera not in self.clases:
+                raise ValueError(f'Carrera desconocida: {carrera}')
+            return self.clases.index(carrera)
+        return int(carrera)
+
+    def consultar(self, X, k=VECINOS, carrera=None, aproximacion=None, workers=1):
+        """
+        Los k perfiles de referencia más cercanos (distancia euclídea) a cada
+        fila de X.
+
+        Parámetros:
+        -----------
+        X : np.ndarray
+            (d,) o (n, d) en el orden de self.features.
+        carrera : str o int, opcional
+            Buscar solo entre los estudiantes de esa carrera (requiere
+            particiones).
+        aproximacion : float, opcional
+            eps de la consulta (por defecto self.aproximacion).
+        workers : int
+            Hilos de cKDTree.query para consultas por lotes (-1 = todos).
+            Por fuerza bruta se ignoran aproximacion y workers.
+
+        Retorna:
+        --------
+        tuple : (distancias, filas), ambas (n, k) ordenadas de la más cercana
+            a la más lejana; filas son índices del dataset de referencia.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        eps = self.aproximacion if aproximacion is None else aproximacion
+        if carrera is None:
+            arbol, filas = self.arbol, None
+        else:
+            codigo = self.codigo_carrera(carrera)
+            if codigo not in self.particiones:
+                raise ValueError(f'El índice no tiene partición para la carrera {carrera}')
+            arbol, filas = self.particiones[codigo]
+
+        if arbol is None:
+            perfiles = self.perfiles if filas is None else self.perfiles[filas]
+            distancias, indices = fuerza_bruta(perfiles, X, min(k, len(perfiles)))
+        else:
+            k = min(k, arbol.n)
+            distancias, indices = arbol.query(X, k=k, eps=eps, workers=workers)
+            distancias = distancias.reshape(len(X), k)
+            indices = indices.reshape(len(X), k)
+        if filas is not None:
+            indices = filas[indices]
+        return distancias, indices
+
+    def similares(self, X, k=VECINOS, carrera=None, aproximacion=None, workers=1):
+        """
+        Igual que consultar() pero en el formato del resultado de predecir():
+        una lista por fila de X con {'fila', 'carrera', 'distancia', 'perfil'}.
+        """
+        distancias, filas = self.consultar(X, k, carrera, aproximacion, workers)
+        perfiles = np.round(self.perfiles[filas], 4).tolist()
+        carreras = np.asarray(self.clases, dtype=object)[self.carreras[filas]].tolist()
+        distancias = np.round(distancias, 4).tolist()
+        filas = filas.tolist()
+        return [
+            [
+                {'fila': fila, 'carrera': carrera, 'distancia': distancia,
+                 'perfil': dict(zip(self.features, perfil))}
+                for fila, carrera, distancia, perfil in zip(filas[i], carreras[i], distancias[i], perfiles[i])
+            ]
+            for i in range(len(filas))
+        ]
+
+    def guardar(self, ruta):
+        """
+        Guarda los árboles ya construidos (se reemplaza con os.replace). Se
+        guarda el estado y no la instancia, así el archivo no depende de
+        si la clase se importó como indice_vecinos o como __main__.
+        """
+        ruta = Path(ruta)
+        temporal = ruta.with_name(ruta.name + '.tmp')
+        with open(temporal, 'wb') as f:
+            pickle.dump(dict(vars(self)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+def cargar_indice(ruta):
+    """Carga un índice guardado con IndiceVecinos.guardar (sin reconstruir los árboles)."""
+    with open(ruta, 'rb') as f:
+        estado = pickle.load(f)
+    indice = IndiceVecinos.__new__(IndiceVecinos)
+    indice.__dict__.update(estado)
+    return indice
+
+def adjuntar_vecinos(modelo, ruta):
+    """
+    Carga el índice de `ruta` en modelo.vecinos si sus features son las del
+    modelo; si no coinciden se ignora (con un aviso en stderr).
+    """
+    indice = cargar_indice(ruta)
+    features = [str(f) for f in getattr(modelo, 'feature_names_in_', FEATURE_ORDER)]
+    if indice.features != features:
+        print(f'⚠️  {ruta} no corresponde a las features del modelo; se ignora', file=sys.stderr)
+        return modelo
+    modelo.vecinos = indice
+    return modelo
+
+def construir_indice(dataset, label_encoder, features=FEATURE_ORDER, aproximacion=None,
+                     particionar=True):
+    """Índice sobre las filas del CSV cuyas carreras conoce el label encoder."""
+    from carga_datos import cargar_matrices
+    X, y = cargar_matrices(dataset, label_encoder, features)
+    return IndiceVecinos(X, y, label_encoder.classes_, features, aproximacion, particionar)
+
+def medir_latencia(indice, consultas, k=VECINOS, aproximacion=None):
+    """Mediana en ms de una consulta individual y ms por fila de la consulta por lotes."""
+    for x in consultas[:10]:
+        indice.consultar(x, k, aproximacion=aproximacion)
+    tiempos = []
+    for x in consultas:
+        inicio = time.perf_counter()
+        indice.consultar(x, k, aproximacion=aproximacion)
+        tiempos.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    indice.consultar(consultas, k, aproximacion=aproximacion, workers=-1)
+    lote = time.perf_counter() - inicio
+    return float(np.median(tiempos)) * 1e3, lote / len(consultas) * 1e3
+
+def comando_construir(args):
+    import joblib
+    label_encoder = joblib.load(args.encoder)
+    inicio = time.perf_counter()
+    indice = construir_indice(args.dataset, label_encoder, aproximacion=args.aproximacion,
+                              particionar=not args.sin_particiones)
+    segundos = time.perf_counter() - inicio
+    indice.guardar(args.salida)
+    print(f'✅ Índice de vecinos: {len(indice)} perfiles, {len(indice.particiones)} particiones, '
+          f'{segundos:.2f} s')
+    print(f'   Guardado en {args.salida} ({Path(args.salida).stat().st_size / 1024 / 1024:.2f} MB)')
+
+def comando_consultar(args):
+    indice = cargar_indice(args.salida)
+    for vecino in indice.similares(args.perfil, args.k, args.carrera)[0]:
+        print(f"   fila {vecino['fila']:>8}  {vecino['distancia']:.3f}  {vecino['carrera']}")
+
+def comando_benchmark(args):
+    from generador_perfiles import DistribucionCarreras
+
+    distribucion = DistribucionCarreras.ajustar(args.dataset)
+    rng = np.random.default_rng(args.semilla)
+    decimas, _, y = distribucion.muestrear(args.filas, rng)
+    inicio = time.perf_counter()
+    indice = IndiceVecinos(decimas / np.float32(10), y, distribucion.carreras, particionar=False)
+    construccion = time.perf_counter() - inicio
+
+    consultas, _, _ = distribucion.muestrear(args.consultas, rng)
+    consultas = consultas / 10.0
+    exactas, _ = indice.consultar(consultas, args.k, aproximacion=0)
+    print(f'{args.filas} perfiles sintéticos, árbol construido en {construccion:.2f} s')
+    for aproximacion in (0, indice.aproximacion):
+        individual, lote = medir_latencia(indice, consultas, args.k, aproximacion)
+        distancias, _ = indice.consultar(consultas, args.k, aproximacion=aproximacion)
+        iguales = np.isclose(distancias[:, -1], exactas[:, -1]).mean()
+        print(f'   aproximación {aproximacion:.1f}: {individual:.3f} ms por consulta, '
+              f'{lote:.3f} ms por fila en lote, k-ésimo vecino exacto en {iguales:.1%}')
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Índice de vecinos de los perfiles de referencia')
+    parser.add_argument('comando', choices=['construir', 'consultar', 'benchmark'])
+    parser.add_argument('--dataset', default=str(DATASET_REFERENCIA))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_INDICE))
+    parser.add_argument('--aproximacion', type=float, default=None,
+                        help=f'eps de las consultas (0 = exactas; por defecto {APROXIMACION} '
+                             f'desde {FILAS_APROXIMACION} perfiles)')
+    parser.add_argument('--sin-particiones', action='store_true', help='Sin un árbol por carrera')
+    parser.add_argument('--perfil', type=float, nargs='+', help='14 valores en el orden FEATURE_ORDER')
+    parser.add_argument('--carrera', help='Buscar solo entre los estudiantes de una carrera')
+    parser.add_argument('-k', type=int, default=VECINOS)
+    parser.add_argument('--filas', type=int, default=1_000_000, help='Perfiles sintéticos (benchmark)')
+    parser.add_argument('--consultas', type=int, default=500)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    comandos = {
+        'construir': comando_construir,
+        'consultar': comando_consultar,
+        'benchmark': comando_benchmark,
+    }
+    comandos[args.comando](args)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Informe del tiempo de arranque de predict.py.
+
+mlService.js lanza un proceso de predict.py por solicitud (fuera del modo
+--serve), así que cada predicción paga el arranque del intérprete, las
+importaciones y la carga del modelo. Este informe lanza predict.py de la misma
+forma (JSON por stdin) y muestra:
+
+- el tiempo desde que se crea el proceso hasta que entrega el resultado
+  (mediana de varios procesos), junto al de un `python -c pass`;
+- con `python -X importtime`, el tiempo de importación por paquete de primer
+  nivel (numpy, json, sqlite3, ...), sumando el tiempo propio de cada
+  submódulo para no contar dos veces los anidados;
+- con ML_METRICAS=1, las etapas de metricas.Cronometro del proceso
+  (importar, cargar_modelo, bosque, ...).
+
+Los procesos se lanzan sin almacén de resultados (ML_ALMACEN_MAX=0), para
+que cada uno cargue el modelo y prediga.
+
+Uso:
+    python predict.py --startup-report
+    python informe_arranque.py --repeticiones 20 --entrada solicitud.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PREDICT = SCRIPT_DIR / 'predict.py'
+
+# Solicitud por defecto: las 62 respuestas del cuestionario
+SOLICITUD_EJEMPLO = {f'q{i}': 1 + (i * 7) % 5 for i in range(1, 63)}
+
+# Línea de -X importtime: "import time: <propio> | <acumulado> | <módulo>" (µs)
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+def entorno_medicion(**variables):
+    """Entorno de los procesos medidos: sin almacén y con las variables dadas."""
+    entorno = dict(os.environ, ML_ALMACEN_MAX='0', PYTHONIOENCODING='utf-8')
+    entorno.update(variables)
+    return entorno
+
+def lanzar(entrada, opciones=(), entorno=None, argumentos=(str(PREDICT),)):
+    """
+    Ejecuta un proceso de Python con `entrada` por stdin.
+
+    Retorna:
+    --------
+    tuple : (segundos desde que se crea el proceso hasta que termina,
+        subprocess.CompletedProcess)
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, *opciones, *argumentos], input=entrada,
+                             capture_output=True, text=True, encoding='utf-8',
+                             env=entorno or entorno_medicion(), cwd=SCRIPT_DIR)
+    return time.perf_counter() - inicio, proceso
+
+def mediana(valores):
+    valores = sorted(valores)
+    medio = len(valores) // 2
+    return valores[medio] if len(valores) % 2 else (valores[medio - 1] + valores[medio]) / 2
+
+def medir_arranque(entrada, repeticiones=10, entorno=None):
+    """
+    Mediana en ms del tiempo hasta el resultado de predict.py y de
+    `python -c pass`, con un proceso de calentamiento (caché de disco).
+    """
+    _, proceso = lanzar(entrada, entorno=entorno)
+    if proceso.returncode != 0:
+        raise RuntimeError(f'predict.py terminó con código {proceso.returncode}: {proceso.stdout}{proceso.stderr}')
+    tiempos = [lanzar(entrada, entorno=entorno)[0] for _ in range(repeticiones)]
+    vacios = [lanzar('', argumentos=('-c', 'pass'))[0] for _ in range(repeticiones)]
+    return mediana(tiempos) * 1e3, mediana(vacios) * 1e3
+
+def importaciones_por_paquete(texto):
+    """
+    Agrupa la salida de `python -X importtime` por paquete de primer nivel.
+
+    Retorna:
+    --------
+    list : dicts {'paquete', 'ms', 'modulos'} de mayor a menor tiempo, con
+        'ms' la suma del tiempo propio de sus módulos.
+    """
+    paquetes = defaultdict(lambda: [0, 0])
+    for linea in texto.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia is None:
+            continue
+        paquete = paquetes[coincidencia.group(4).split('.')[0]]
+        paquete[0] += int(coincidencia.group(1))
+        paquete[1] += 1
+    return sorted(
+        ({'paquete': nombre, 'ms': propio / 1e3, 'modulos': modulos}
+         for nombre, (propio, modulos) in paquetes.items()),
+        key=lambda paquete: -paquete['ms'],
+    )
+
+def informe(entrada, repeticiones=10):
+    """
+    Mide el arranque de predict.py con `entrada` (JSON de la solicitud).
+
+    Retorna:
+    --------
+    dict : 'arranque_ms' y 'interprete_ms' (medianas), 'importaciones' (ver
+        importaciones_por_paquete), 'importaciones_ms' (total), 'etapas_ms'
+        (de metricas.Cronometro) y 'resultado' (salida de predict.py).
+    """
+    arranque, interprete = medir_arranque(entrada, repeticiones)
+    _, proceso = lanzar(entrada, opciones=('-X', 'importtime'))
+    importaciones = importaciones_por_paquete(proceso.stderr)
+    _, proceso = lanzar(entrada, entorno=entorno_medicion(ML_METRICAS='1'))
+    resultado = json.loads(proceso.stdout)
+    return {
+        'arranque_ms': arranque,
+        'interprete_ms': interprete,
+        'importaciones': importaciones,
+        'importaciones_ms': sum(paquete['ms'] for paquete in importaciones),
+        'etapas_ms': resultado.pop('tiempos', {}).get('etapas_ms', {}),
+        'resultado': resultado,
+    }
+
+def imprimir(datos, paquetes=15):
+    """Muestra el informe en tablas."""
+    print(f"Arranque de predict.py hasta el resultado: {datos['arranque_ms']:.1f} ms "
+          f"(python -c pass: {datos['interprete_ms']:.1f} ms)")
+
+    total = datos['importaciones_ms']
+    print(f'\nImportaciones (-X importtime): {total:.1f} ms')
+    print(f"   {'Paquete':<22} {'ms':>8} {'módulos':>8} {'%':>7}")
+    for paquete in datos['importaciones'][:paquetes]:
+        print(f"   {paquete['paquete']:<22} {paquete['ms']:>8.1f} {paquete['modulos']:>8} "
+              f"{paquete['ms'] / total:>7.1%}")
+    resto = datos['importaciones'][paquetes:]
+    if resto:
+        ms = sum(paquete['ms'] for paquete in resto)
+        print(f"   {f'otros ({len(resto)})':<22} {ms:>8.1f} {sum(p['modulos'] for p in resto):>8} "
+              f"{ms / total:>7.1%}")
+
+    print('\nEtapas (ML_METRICAS=1):')
+    for etapa, ms in datos['etapas_ms'].items():
+        print(f'   {etapa:<22} {ms:>8.2f}')
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de predict.py por módulo')
+    parser.add_argument('--entrada', help='JSON de la solicitud (por defecto, 62 respuestas de ejemplo)')
+    parser.add_argument('--repeticiones', type=int, default=10, help='Procesos para la mediana')
+    parser.add_argument('--paquetes', type=int, default=15, help='Paquetes a mostrar')
+    args = parser.parse_args(argv)
+
+    if args.entrada:
+        entrada = Path(args.entrada).read_text(encoding='utf-8')
+    else:
+        entrada = json.dumps(SOLICITUD_EJEMPLO)
+    datos = informe(entrada, args.repeticiones)
+    imprimir(datos, args.paquetes)
+    return datos
+
+if __name__ == '__main__':
+    main()
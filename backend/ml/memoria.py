@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades para medir la memoria de los procesos de predicción (solo Linux).
+Lee /proc/<pid>/smaps_rollup para distinguir memoria compartida y privada.
+"""
+
+from pathlib import Path
+
+# Campos de smaps_rollup que nos interesan (valores en kB)
+CAMPOS_SMAPS = (
+    'Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'
+)
+
+def leer_memoria(pid='self'):
+    """
+    Lee el uso de memoria de un proceso.
+
+    Parámetros:
+    -----------
+    pid : int o str
+        PID del proceso ('self' para el proceso actual).
+
+    Retorna:
+    --------
+    dict : rss, pss, compartida y unica (USS) en kB.
+    """
+    rollup = Path(f'/proc/{pid}/smaps_rollup')
+    ruta = rollup if rollup.exists() else Path(f'/proc/{pid}/smaps')
+
+    valores = dict.fromkeys(CAMPOS_SMAPS, 0)
+    with open(ruta, 'r') as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[0].endswith(':'):
+                campo = partes[0][:-1]
+                if campo in valores:
+                    valores[campo] += int(partes[1])
+
+    return {
+        'rss': valores['Rss'],
+        'pss': valores['Pss'],
+        'compartida': valores['Shared_Clean'] + valores['Shared_Dirty'],
+        'unica': valores['Private_Clean'] + valores['Private_Dirty'],
+    }
+
+def formatear_reporte(filas):
+    """
+    Da formato de tabla a una lista de (etiqueta, memoria) con valores en MB.
+    """
+    lineas = [
+        f"{'Proceso':<20} {'RSS MB':>9} {'PSS MB':>9} {'Compart. MB':>12} {'Única MB':>10}",
+        '-' * 64,
+    ]
+    for etiqueta, mem in filas:
+        lineas.append(
+            f"{str(etiqueta):<20} {mem['rss'] / 1024:>9.1f} {mem['pss'] / 1024:>9.1f} "
+            f"{mem['compartida'] / 1024:>12.1f} {mem['unica'] / 1024:>10.1f}"
+        )
+    return '\n'.join(lineas)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiempos por etapa y métricas en formato Prometheus para predict.py.
+
+Cada solicitud lleva un Cronometro: cada llamada a marcar(etapa) suma a esa
+etapa el tiempo transcurrido desde la marca anterior (reloj monotónico), así
+que las etapas suman el total. Con las métricas desactivadas se usa
+CRONOMETRO_NULO, cuyos métodos no hacen nada.
+
+En el modo de larga duración los tiempos se acumulan en histogramas de buckets
+fijos y contadores (Metricas), que se exportan como texto Prometheus a un
+archivo y con el comando {"comando": "metricas"} de --serve.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# Buckets de latencia en segundos (límites superiores, '+Inf' implícito)
+BUCKETS_SEGUNDOS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+PREFIJO = 'ovp_ml'
+
+class Cronometro:
+    """Tiempos de las etapas de una solicitud."""
+
+    activo = True
+
+    def __init__(self, correlacion=None, inicio_ns=None):
+        self.correlacion = correlacion
+        self.inicio = self.ultimo = inicio_ns or time.perf_counter_ns()
+        self.etapas = {}
+
+    def marcar(self, etapa):
+        """Asigna a `etapa` el tiempo desde la marca anterior."""
+        ahora = time.perf_counter_ns()
+        self.etapas[etapa] = self.etapas.get(etapa, 0) + ahora - self.ultimo
+        self.ultimo = ahora
+
+    def total_ns(self):
+        return self.ultimo - self.inicio
+
+    def resumen(self):
+        """Tiempos en milisegundos para devolver junto al resultado."""
+        return {
+            'correlacion': self.correlacion,
+            'total_ms': round(self.total_ns() / 1e6, 3),
+            'etapas_ms': {etapa: round(ns / 1e6, 3) for etapa, ns in self.etapas.items()},
+        }
+
+class CronometroNulo:
+    """Cronómetro que no mide nada (métricas desactivadas)."""
+
+    activo = False
+    correlacion = None
+
+    def marcar(self, etapa):
+        pass
+
+CRONOMETRO_NULO = CronometroNulo()
+
+class Histograma:
+    """Histograma acumulado de buckets fijos (en segundos)."""
+
+    def __init__(self, buckets=BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.cantidad = 0
+
+    def observar(self, segundos):
+        indice = 0
+        while indice < len(self.buckets) and segundos > self.buckets[indice]:
+            indice += 1
+        self.conteos[indice] += 1
+        self.suma += segundos
+        self.cantidad += 1
+
+    def lineas(self, nombre, etiquetas):
+        """Líneas _bucket (acumuladas), _sum y _count en formato Prometheus."""
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(self.buckets + ('+Inf',), self.conteos):
+            acumulado += conteo
+            lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f'{nombre}_sum{{{etiquetas}}} {self.suma:.9g}')
+        lineas.append(f'{nombre}_count{{{etiquetas}}} {self.cantidad}')
+        return lineas
+
+class Metricas:
+    """
+    Histogramas por etapa, histograma del total y contador de solicitudes de
+    un proceso. Las series llevan la etiqueta worker=<pid> para que los
+    archivos de varios procesos no choquen.
+
+    Parámetros:
+    -----------
+    archivo : str o Path, opcional
+        Archivo .prom donde volcar las métricas ('{pid}' se reemplaza por el
+        PID del proceso). Se reescribe como mucho cada `intervalo` segundos.
+    """
+
+    def __init__(self, archivo=None, intervalo=10.0):
+        self.etapas = {}
+        self.total = Histograma()
+        self.solicitudes = {'ok': 0, 'error': 0}
+        self.lock = threading.Lock()
+        self.worker = str(os.getpid())
+        self.archivo = Path(str(archivo).replace('{pid}', self.worker)) if archivo else None
+        self.intervalo = intervalo
+        self.ultimo_volcado = time.monotonic()
+
+    def registrar(self, cronometro, exito=True):
+        """Suma los tiempos de una solicitud terminada."""
+        if not cronometro.activo:
+            return
+        with self.lock:
+            for etapa, ns in cronometro.etapas.items():
+                histograma = self.etapas.get(etapa)
+                if histograma is None:
+                    histograma = self.etapas[etapa] = Histograma()
+                histograma.observar(ns / 1e9)
+            self.total.observar(cronometro.total_ns() / 1e9)
+            self.solicitudes['ok' if exito else 'error'] += 1
+        if self.archivo and time.monotonic() - self.ultimo_volcado >= self.intervalo:
+            self.volcar()
+
+    def texto(self):
+        """Métricas en el formato de texto de Prometheus."""
+        worker = f'worker="{self.worker}"'
+        with self.lock:
+            lineas = [
+                f'# HELP {PREFIJO}_etapa_segundos Duración de cada etapa de la predicción',
+                f'# TYPE {PREFIJO}_etapa_segundos histogram',
+            ]
+            for etapa in sorted(self.etapas):
+                lineas += self.etapas[etapa].lineas(
+                    f'{PREFIJO}_etapa_segundos', f'{worker},etapa="{etapa}"')
+            lineas += [
+                f'# HELP {PREFIJO}_solicitud_segundos Duración total de cada solicitud',
+                f'# TYPE {PREFIJO}_solicitud_segundos histogram',
+                *self.total.lineas(f'{PREFIJO}_solicitud_segundos', worker),
+                f'# HELP {PREFIJO}_solicitudes_total Solicitudes atendidas por resultado',
+                f'# TYPE {PREFIJO}_solicitudes_total counter',
+            ]
+            for resultado, cantidad in self.solicitudes.items():
+                lineas.append(f'{PREFIJO}_solicitudes_total{{{worker},resultado="{resultado}"}} {cantidad}')
+        return '\n'.join(lineas) + '\n'
+
+    def volcar(self):
+        """Reescribe el archivo de métricas de forma atómica."""
+        self.ultimo_volcado = time.monotonic()
+        temporal = self.archivo.with_name(self.archivo.name + '.tmp')
+        try:
+            temporal.write_text(self.texto(), encoding='utf-8')
+            os.replace(temporal, self.archivo)
+        except OSError:
+            # Sin permisos o sin disco: las métricas siguen disponibles por --serve
+            pass
@@ -1,28 +1,367 @@
 import { spawn } from 'child_process';
+import { randomUUID } from 'crypto';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { ClienteSocketPrediccion } from './clienteSocket.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// Configuración del pool de procesos Python (modo --serve de predict.py)
+const POOL_SIZE = parseInt(process.env.ML_POOL_SIZE ?? '2', 10);
+const TIMEOUT_MS = parseInt(process.env.ML_TIMEOUT_MS ?? '10000', 10);
+const REINICIO_MS = parseInt(process.env.ML_RESTART_DELAY_MS ?? '1000', 10);
+// Tope de la espera entre reinicios de un proceso que termina antes de responder
+// (la espera se duplica en cada fallo seguido hasta este valor)
+const REINICIO_MAX_MS = parseInt(process.env.ML_RESTART_MAX_DELAY_MS ?? '30000', 10);
+
+// Transporte: 'pool' (procesos --serve) o 'socket' (servidor_async.py con micro-lotes)
+const TRANSPORTE = process.env.ML_TRANSPORT || 'pool';
+const ASYNC_SOCKET = process.env.ML_ASYNC_SOCKET || '/tmp/ovp_async.sock';
+
+// Con ML_METRICAS=1 Python devuelve los tiempos por etapa; se registran las
+// predicciones que tarden al menos esto
+const LENTO_MS = parseInt(process.env.ML_LENTO_MS ?? '1000', 10);
+
 /**
  * Servicio de Machine Learning para predicción de carreras
  */
 class MLService {
   constructor() {
     this.pythonScript = path.join(__dirname, 'predict.py');
+    this.poolSize = POOL_SIZE;
+    this.timeoutMs = TIMEOUT_MS;
+    this.reinicioMs = REINICIO_MS;
+    this.reinicioMaxMs = REINICIO_MAX_MS;
+    this.workers = [];
+    this.fallosArranque = [];
+    this.siguienteId = 0;
+    this.cerrando = false;
+    this.transporte = TRANSPORTE;
+    this.clienteSocket = null;
+    this.lentoMs = LENTO_MS;
   }
 
   /**
    * Realiza una predicción de carrera basada en las respuestas del test
    * @param {Object} respuestas - Respuestas del test (puede ser respuestas individuales o promedios)
+   * @param {Object} [opciones]
+   * @param {string} [opciones.correlacion] - Id para relacionar los tiempos de Python con la solicitud
+   * @param {string} [opciones.modelo] - Modelo del registro a usar (por defecto, ML_MODELO_PREDETERMINADO;
+   *   el transporte por socket usa siempre el predeterminado)
    * @returns {Promise<Object>} - Resultado de la predicción
    */
-  async predecir(respuestas) {
+  async predecir(respuestas, { correlacion = randomUUID(), modelo } = {}) {
+    if (this.transporte === 'socket') {
+      if (!this.clienteSocket) {
+        this.clienteSocket = new ClienteSocketPrediccion(ASYNC_SOCKET, this.timeoutMs);
+      }
+      return this.clienteSocket.predecir(respuestas);
+    }
+
+    // Con ML_POOL_SIZE=0 se conserva el modo anterior (un proceso por predicción)
+    if (this.poolSize <= 0) {
+      return this._predecirProcesoUnico(respuestas, correlacion, modelo);
+    }
+
+    if (this.workers.length === 0) {
+      this._iniciarPool();
+    }
+
+    const worker = this._seleccionarWorker();
+    if (!worker) {
+      throw new Error('No hay procesos de predicción Python disponibles');
+    }
+
     return new Promise((resolve, reject) => {
+      const id = ++this.siguienteId;
+      const mensaje = { id, correlacion, modelo, datos: respuestas };
+      this._enviar(worker, id, { resolve, reject, mensaje, inicio: process.hrtime.bigint() });
+    });
+  }
+
+  /**
+   * Contadores de la caché de predicciones de cada worker del pool
+   * @returns {Promise<Array<Object>>} - Un objeto por worker activo
+   */
+  async estadisticasCache() {
+    const activos = this.workers.filter((worker) => worker && worker.activo);
+
+    return Promise.all(activos.map((worker) => new Promise((resolve, reject) => {
+      const id = ++this.siguienteId;
+      const timer = setTimeout(() => {
+        worker.pendientes.delete(id);
+        reject(new Error(`Tiempo de espera agotado en estadísticas (${this.timeoutMs} ms)`));
+      }, this.timeoutMs);
+
+      worker.pendientes.set(id, {
+        resolve: (resultado) => resolve({ worker: worker.indice, ...resultado.cache }),
+        reject,
+        timer
+      });
+      worker.proceso.stdin.write(JSON.stringify({ id, comando: 'estadisticas' }) + '\n');
+    })));
+  }
+
+  /**
+   * Métricas de todos los workers del pool en formato de texto Prometheus
+   * (requiere ML_METRICAS=1 en los procesos Python)
+   * @returns {Promise<string|null>} - null si las métricas están desactivadas
+   */
+  async metricasPrometheus() {
+    const activos = this.workers.filter((worker) => worker && worker.activo);
+
+    const textos = await Promise.all(activos.map((worker) => new Promise((resolve, reject) => {
+      const id = ++this.siguienteId;
+      const timer = setTimeout(() => {
+        worker.pendientes.delete(id);
+        reject(new Error(`Tiempo de espera agotado en métricas (${this.timeoutMs} ms)`));
+      }, this.timeoutMs);
+
+      worker.pendientes.set(id, { resolve: (resultado) => resolve(resultado.metricas), reject, timer });
+      worker.proceso.stdin.write(JSON.stringify({ id, comando: 'metricas' }) + '\n');
+    })));
+
+    const disponibles = textos.filter((texto) => texto);
+    return disponibles.length > 0 ? unirMetricas(disponibles) : null;
+  }
+
+  /**
+   * Detiene todos los procesos del pool y cierra la conexión por socket
+   */
+  cerrar() {
+    this.cerrando = true;
+    for (const worker of this.workers) {
+      if (worker) {
+        worker.proceso.kill();
+      }
+    }
+    this.workers = [];
+
+    if (this.clienteSocket) {
+      this.clienteSocket.cerrar();
+      this.clienteSocket = null;
+    }
+  }
+
+  /**
+   * Crea los procesos del pool
+   * @private
+   */
+  _iniciarPool() {
+    this.cerrando = false;
+    this.fallosArranque = [];
+    for (let i = 0; i < this.poolSize; i++) {
+      this.workers[i] = this._crearWorker(i);
+    }
+  }
+
+  /**
+   * Elige el worker activo con menos solicitudes pendientes
+   * @private
+   */
+  _seleccionarWorker() {
+    let elegido = null;
+    for (const worker of this.workers) {
+      if (!worker || !worker.activo) continue;
+      if (!elegido || worker.pendientes.size < elegido.pendientes.size) {
+        elegido = worker;
+      }
+    }
+    return elegido;
+  }
+
+  /**
+   * Envía una predicción a un worker con su propio tiempo máximo
+   * @private
+   */
+  _enviar(worker, id, pendiente) {
+    clearTimeout(pendiente.timer);
+    pendiente.timer = setTimeout(() => this._vencer(id, pendiente), this.timeoutMs);
+    pendiente.worker = worker;
+    worker.pendientes.set(id, pendiente);
+    worker.proceso.stdin.write(JSON.stringify(pendiente.mensaje) + '\n');
+  }
+
+  /**
+   * Rechaza solo la predicción vencida y retira su worker: el proceso atiende
+   * las líneas en orden, así que las demás pendientes quedarían detrás de la
+   * que no responde
+   * @private
+   */
+  _vencer(id, pendiente) {
+    const { worker } = pendiente;
+    worker.pendientes.delete(id);
+    pendiente.reject(new Error(`Tiempo de espera agotado en predicción Python (${this.timeoutMs} ms)`));
+    if (worker.activo) {
+      console.error(`❌ Worker ML ${worker.indice} no respondió a tiempo, reiniciando...`);
+      this._retirarWorker(worker);
+    }
+  }
+
+  /**
+   * Deja de enviar trabajo a un worker, lo reemplaza, reenvía sus predicciones
+   * pendientes (con un nuevo tiempo máximo) al worker menos cargado y lo
+   * termina. Los comandos pendientes (estadísticas, métricas) son de ese
+   * proceso y se rechazan al terminar.
+   * @private
+   */
+  _retirarWorker(worker) {
+    worker.activo = false;
+    if (!this.cerrando && this.workers[worker.indice] === worker) {
+      this.workers[worker.indice] = this._crearWorker(worker.indice);
+    }
+
+    for (const [id, pendiente] of worker.pendientes) {
+      const destino = pendiente.mensaje && this._seleccionarWorker();
+      if (destino) {
+        worker.pendientes.delete(id);
+        this._enviar(destino, id, pendiente);
+      }
+    }
+    worker.proceso.kill('SIGKILL');
+  }
+
+  /**
+   * Lanza un proceso `predict.py --serve` y conecta su salida NDJSON
+   * @private
+   */
+  _crearWorker(indice) {
+    const proceso = spawn('python', [this.pythonScript, '--serve'], {
+      env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+    });
+
+    const worker = { indice, proceso, pendientes: new Map(), activo: true, respondio: false };
+    let buffer = '';
+
+    proceso.stdout.setEncoding('utf8');
+    proceso.stdout.on('data', (data) => {
+      buffer += data;
+      let fin;
+      while ((fin = buffer.indexOf('\n')) >= 0) {
+        const linea = buffer.slice(0, fin).trim();
+        buffer = buffer.slice(fin + 1);
+        if (linea.length > 0) {
+          this._procesarRespuesta(worker, linea);
+        }
+      }
+    });
+
+    proceso.stderr.setEncoding('utf8');
+    proceso.stderr.on('data', (data) => {
+      console.error(`Worker ML ${indice}:`, data.trim());
+    });
+
+    proceso.on('error', (error) => {
+      console.error(`❌ Error al ejecutar Python (worker ${indice}):`, error.message);
+    });
+
+    proceso.on('exit', (code, signal) => {
+      worker.activo = false;
+      for (const { reject, timer } of worker.pendientes.values()) {
+        clearTimeout(timer);
+        reject(new Error(`El proceso de predicción Python terminó (código ${code}, señal ${signal})`));
+      }
+      worker.pendientes.clear();
+
+      if (this.cerrando || this.workers[indice] !== worker) {
+        return;
+      }
+
+      // Un proceso que termina antes de responder (error al cargar el modelo,
+      // dependencia faltante) se reinicia con una espera que se duplica hasta
+      // un tope: el pool no pierde el proceso si la falla es pasajera
+      const fallos = worker.respondio ? 0 : (this.fallosArranque[indice] ?? 0) + 1;
+      this.fallosArranque[indice] = fallos;
+      const espera = this._esperaReinicio(fallos);
+      console.error(`❌ Worker ML ${indice} terminó inesperadamente, reiniciando en ${espera} ms`);
+      setTimeout(() => {
+        if (!this.cerrando && this.workers[indice] === worker) {
+          this.workers[indice] = this._crearWorker(indice);
+        }
+      }, espera);
+    });
+
+    // Evitar que una escritura sobre un proceso ya terminado tumbe el servidor
+    proceso.stdin.on('error', () => {});
+
+    return worker;
+  }
+
+  /**
+   * Espera antes de reiniciar un worker tras `fallos` salidas seguidas sin
+   * responder (0 si el proceso llegó a responder)
+   * @private
+   */
+  _esperaReinicio(fallos) {
+    return Math.min(this.reinicioMs * 2 ** Math.max(fallos - 1, 0), this.reinicioMaxMs);
+  }
+
+  /**
+   * Resuelve la solicitud pendiente correspondiente a una línea de respuesta
+   * @private
+   */
+  _procesarRespuesta(worker, linea) {
+    let respuesta;
+    try {
+      respuesta = JSON.parse(linea);
+    } catch (error) {
+      console.error('❌ Línea no reconocida desde Python:', linea);
+      return;
+    }
+    worker.respondio = true;
+
+    const pendiente = worker.pendientes.get(respuesta.id);
+    if (!pendiente) {
+      return;
+    }
+    worker.pendientes.delete(respuesta.id);
+    clearTimeout(pendiente.timer);
+
+    const { id, tiempos, ...resultado } = respuesta;
+    if (tiempos) {
+      this._registrarTiempos(tiempos, pendiente.inicio);
+    }
+    if (!resultado.success) {
+      return pendiente.reject(new Error(resultado.error || 'Error desconocido en predicción'));
+    }
+    pendiente.resolve(resultado);
+  }
+
+  /**
+   * Registra una predicción lenta con sus tiempos por etapa. La diferencia
+   * entre el total medido en Node y el de Python es la espera en el pool o,
+   * en modo de proceso único, el arranque del intérprete.
+   * @private
+   */
+  _registrarTiempos(tiempos, inicio) {
+    const totalMs = Number(process.hrtime.bigint() - inicio) / 1e6;
+    if (totalMs < this.lentoMs) {
+      return;
+    }
+    console.warn(
+      `⚠️ Predicción lenta (${tiempos.correlacion}): ${totalMs.toFixed(1)} ms en total, ` +
+      `${tiempos.total_ms} ms en Python`,
+      tiempos.etapas_ms
+    );
+  }
+
+  /**
+   * Realiza una predicción lanzando un proceso Python dedicado
+   * @private
+   */
+  async _predecirProcesoUnico(respuestas, correlacion, modelo) {
+    return new Promise((resolve, reject) => {
+      const inicio = process.hrtime.bigint();
+
       // Ejecutar script de Python con codificación UTF-8
       const pythonProcess = spawn('python', [this.pythonScript], {
-        env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+        env: {
+          ...process.env,
+          PYTHONIOENCODING: 'utf-8',
+          ML_CORRELACION: correlacion,
+          ...(modelo ? { ML_MODELO: modelo } : {})
+        }
       });
       
       let outputData = '';
@@ -50,17 +389,10 @@ class MLService {
         }
 
         try {
-          // Limpiar warnings de scikit-learn antes de parsear JSON
-          const lines = outputData.split('\n');
-          const jsonLines = lines.filter(line => 
-            !line.includes('InconsistentVersionWarning') &&
-            !line.includes('warnings.warn') &&
-            !line.includes('sklearn') &&
-            line.trim().length > 0
-          );
-          const cleanOutput = jsonLines.join('\n');
-          
-          const resultado = JSON.parse(cleanOutput);
+          const { tiempos, ...resultado } = JSON.parse(outputData.trim());
+          if (tiempos) {
+            this._registrarTiempos(tiempos, inicio);
+          }
           
           if (!resultado.success) {
             return reject(new Error(resultado.error || 'Error desconocido en predicción'));
@@ -170,6 +502,41 @@ class MLService {
   }
 }
 
+/**
+ * Une los textos Prometheus de varios workers: cada familia de métricas
+ * (# HELP, # TYPE y sus series) debe aparecer una sola vez y agrupada
+ * @param {Array<string>} textos - Un texto por worker
+ * @returns {string}
+ */
+export function unirMetricas(textos) {
+  const familias = new Map();
+  for (const texto of textos) {
+    let actual = null;
+    for (const linea of texto.split('\n')) {
+      if (linea.length === 0) continue;
+      const cabecera = linea.match(/^# (HELP|TYPE) (\S+)/);
+      if (cabecera) {
+        actual = cabecera[2];
+        if (!familias.has(actual)) {
+          familias.set(actual, { cabeceras: [], series: [] });
+        }
+        const familia = familias.get(actual);
+        if (!familia.cabeceras.includes(linea)) {
+          familia.cabeceras.push(linea);
+        }
+      } else if (actual) {
+        familias.get(actual).series.push(linea);
+      }
+    }
+  }
+
+  let salida = '';
+  for (const { cabeceras, series } of familias.values()) {
+    salida += [...cabeceras, ...series].join('\n') + '\n';
+  }
+  return salida;
+}
+
 // Exportar instancia única del servicio
 const mlService = new MLService();
 export default mlService;
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfilado por muestreo de las solicitudes de predicción.
+
+Con ML_PERFILADO=<fracción> (p. ej. 0.01) predict.py perfila con cProfile esa
+fracción de las solicitudes y guarda cada perfil como .pstats en un directorio
+rotativo con tope de tamaño. Junto a cada .pstats se escribe un .json con los
+tiempos por etapa, el perfil de entrada y, con ML_PERFILADO_MEMORIA=1, las
+líneas que más memoria reservaron (tracemalloc).
+
+El modo de agregación une los perfiles muestreados en un archivo de pilas
+colapsadas para flamegraph.pl o speedscope:
+
+    python perfilador.py agregar perfiles/ --salida predicciones.folded
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Líneas de tracemalloc guardadas por muestra
+TOP_MEMORIA = 15
+
+# Profundidad máxima de las pilas reconstruidas al agregar
+PROFUNDIDAD_MAXIMA = 64
+
+class Muestra:
+    """Una solicitud en perfilado: cProfile y, opcionalmente, tracemalloc."""
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria and not tracemalloc.is_tracing()
+        if self.memoria:
+            tracemalloc.start()
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+
+    def detener(self):
+        """Detiene el perfilado y devuelve el resumen de memoria (o None)."""
+        self.perfil.disable()
+        if not self.memoria:
+            return None
+        instantanea = tracemalloc.take_snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'actual_kb': round(actual / 1024, 1),
+            'pico_kb': round(pico / 1024, 1),
+            'top': [str(estadistica) for estadistica in
+                    instantanea.statistics('lineno')[:TOP_MEMORIA]],
+        }
+
+class Perfilador:
+    """
+    Decide qué solicitudes perfilar y guarda las muestras.
+
+    Parámetros:
+    -----------
+    fraccion : float
+        Fracción de solicitudes a perfilar (0.01 = 1 %).
+    directorio : str o Path
+        Donde se escriben los .pstats y .json.
+    max_bytes : int
+        Tamaño máximo del directorio; se borran las muestras más antiguas.
+    memoria : bool
+        Tomar también una instantánea de tracemalloc por muestra.
+    """
+
+    def __init__(self, fraccion, directorio, max_bytes=100 * 1024 * 1024, memoria=False):
+        self.fraccion = fraccion
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+        self.memoria = memoria
+        # Generador propio: los hijos pre-fork no comparten la secuencia del padre
+        self.azar = random.Random()
+        self.secuencia = 0
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+    def iniciar(self):
+        """Muestra en curso si esta solicitud toca perfilarla, si no None."""
+        if self.azar.random() >= self.fraccion:
+            return None
+        return Muestra(self.memoria)
+
+    def guardar(self, muestra, tiempos=None, entrada=None, correlacion=None):
+        """Detiene la muestra, escribe el .pstats y su .json y rota el directorio."""
+        memoria = muestra.detener()
+        self.secuencia += 1
+        base = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{os.getpid()}_{self.secuencia}"
+        try:
+            muestra.perfil.dump_stats(self.directorio / f'{base}.pstats')
+            metadatos = {
+                'fecha': datetime.now().isoformat(timespec='milliseconds'),
+                'pid': os.getpid(),
+                'correlacion': correlacion,
+                'tiempos': tiempos,
+                'entrada': entrada,
+                'memoria': memoria,
+            }
+            (self.directorio / f'{base}.json').write_text(
+                json.dumps(metadatos, ensure_ascii=False, default=str), encoding='utf-8')
+            self.rotar()
+        except OSError as e:
+            # Un disco lleno no debe tumbar la predicción
+            print(f'No se pudo guardar el perfil: {e}', file=sys.stderr)
+
+    def rotar(self):
+        """Borra las muestras más antiguas hasta quedar bajo max_bytes."""
+        archivos = []
+        total = 0
+        for ruta in self.directorio.iterdir():
+            if ruta.suffix in ('.pstats', '.json'):
+                try:
+                    estado = ruta.stat()
+                except FileNotFoundError:
+                    # Otro proceso ya la borró
+                    continue
+                archivos.append((estado.st_mtime, ruta, estado.st_size))
+                total += estado.st_size
+        archivos.sort()
+        for _, ruta, tamano in archivos:
+            if total <= self.max_bytes:
+                break
+            try:
+                ruta.unlink()
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+def nombre_funcion(funcion):
+    """('/ruta/predict.py', 390, 'predecir') -> 'predict.py:390(predecir)'"""
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        # Funciones de C: '<built-in method numpy.array>'
+        return nombre.replace(';', ',')
+    return f'{Path(archivo).name}:{linea}({nombre})'
+
+def pilas_colapsadas(estadisticas):
+    """
+    Reconstruye pilas colapsadas desde un pstats.Stats.
+
+    cProfile solo guarda las aristas llamador → llamado, así que el tiempo
+    propio de cada función se reparte entre sus llamadores en proporción al
+    tiempo acumulado que aportó cada arista.
+
+    Retorna:
+    --------
+    dict : {'a;b;c': microsegundos}
+    """
+    datos = estadisticas.stats
+    hijos = {}
+    for funcion, (_, _, _, _, llamadores) in datos.items():
+        for llamador, valores in llamadores.items():
+            hijos.setdefault(llamador, []).append((funcion, valores[3]))
+    raices = [funcion for funcion, (_, _, _, _, llamadores) in datos.items() if not llamadores]
+
+    pilas = {}
+
+    def visitar(funcion, pila, fraccion):
+        _, _, propio, acumulado, _ = datos[funcion]
+        pila = pila + (nombre_funcion(funcion),)
+        if propio > 0:
+            clave = ';'.join(pila)
+            pilas[clave] = pilas.get(clave, 0) + propio * fraccion * 1e6
+        # Ramas de menos de 1 µs no aparecerían en la salida
+        if len(pila) >= PROFUNDIDAD_MAXIMA or acumulado * fraccion < 1e-6:
+            return
+        for hijo, acumulado_arista in hijos.get(funcion, ()):
+            total_hijo = datos[hijo][3]
+            if total_hijo <= 0 or nombre_funcion(hijo) in pila:
+                continue
+            visitar(hijo, pila, min(acumulado_arista * fraccion / total_hijo, 1.0))
+
+    for raiz in raices:
+        visitar(raiz, (), 1.0)
+    return {pila: int(round(micro)) for pila, micro in pilas.items() if round(micro) > 0}
+
+def agregar(directorio, salida, desde=None, top=15):
+    """
+    Une los .pstats de `directorio` (opcionalmente solo los posteriores a
+    `desde`, AAAAMMDD) y escribe las pilas colapsadas en `salida`.
+
+    Retorna:
+    --------
+    pstats.Stats : Estadísticas unidas (None si no hay perfiles).
+    """
+    archivos = sorted(Path(directorio).glob('*.pstats'))
+    if desde:
+        archivos = [a for a in archivos if a.name[:8] >= desde]
+    if not archivos:
+        print(f'No hay perfiles en {directorio}', file=sys.stderr)
+        return None
+
+    estadisticas = pstats.Stats(str(archivos[0]), stream=sys.stderr)
+    for archivo in archivos[1:]:
+        estadisticas.add(str(archivo))
+
+    pilas = pilas_colapsadas(estadisticas)
+    with open(salida, 'w', encoding='utf-8') as f:
+        for pila, micro in sorted(pilas.items()):
+            f.write(f'{pila} {micro}\n')
+
+    print(f'✅ {len(archivos)} perfiles, {len(pilas)} pilas → {salida}', file=sys.stderr)
+    if top:
+        estadisticas.sort_stats('tottime').print_stats(top)
+    return estadisticas
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Perfiles muestreados de predict.py')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    agregar_parser = subcomandos.add_parser('agregar', help='Unir perfiles en pilas colapsadas')
+    agregar_parser.add_argument('directorio', nargs='?',
+                                default=os.environ.get('ML_PERFILADO_DIR', Path(__file__).parent / 'perfiles'))
+    agregar_parser.add_argument('--salida', default='perfiles.folded')
+    agregar_parser.add_argument('--desde', help='Solo perfiles desde esta fecha (AAAAMMDD)')
+    agregar_parser.add_argument('--top', type=int, default=15,
+                                help='Funciones con más tiempo propio a listar (0 = ninguna)')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    agregar(args.directorio, args.salida, args.desde, args.top)
+    print(f'({time.perf_counter() - inicio:.1f} s)', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
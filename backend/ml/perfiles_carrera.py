@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabla de perfiles por carrera: centroide, desviación estándar e inversa de
+la covarianza de las 14 dimensiones de cada carrera del dataset de
+referencia.
+
+Se calcula una vez al exportar el modelo (bosque_compilado.py exportar) y se
+guarda en perfiles_carrera.npz. load_models() la deja en
+modelo.perfiles_carrera y construir_resultado() agrega a cada resultado, con
+unas pocas operaciones de arrays sobre toda la matriz (n, carreras, 14):
+
+- la distancia euclídea y de Mahalanobis del estudiante al centroide de cada
+  carrera, de la más cercana a la más lejana;
+- las dimensiones en las que más se aparta de la carrera recomendada, en
+  desviaciones estándar de esa carrera (z).
+
+Una carrera sin estudiantes en el dataset (centroide NaN) no aparece en las
+distancias ni tiene dimensiones diferentes, para que el JSON del resultado no
+lleve NaN (JSON.parse de Node no lo acepta).
+
+Es la comparación de datasets/analisis_perfil_ingeniera.py, pero para todas
+las carreras y sin leer el dataset en cada solicitud. En el servidor solo se
+importa numpy.
+
+Uso:
+    python perfiles_carrera.py construir
+    python perfiles_carrera.py mostrar --carrera "Ingeniería en Sistemas"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+DATASET_REFERENCIA = DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+ARCHIVO_PERFILES = 'perfiles_carrera.npz'
+
+# Dimensiones que más se apartan de la carrera recomendada, por resultado
+DIMENSIONES_DIFERENTES = 3
+
+class PerfilesCarrera:
+    """
+    Centroide, dispersión e inversa de la covarianza de cada carrera.
+
+    Parámetros:
+    -----------
+    clases : sequence
+        Carreras en el orden del label encoder.
+    features : sequence
+        Dimensiones, en el orden de las columnas.
+    centroides : np.ndarray
+        (carreras, d) media de cada dimensión.
+    desviaciones : np.ndarray
+        (carreras, d) desviación estándar de cada dimensión.
+    precision : np.ndarray
+        (carreras, d, d) inversa (pseudo-inversa) de la covarianza.
+    conteos : np.ndarray
+        (carreras,) estudiantes de cada carrera en el dataset.
+    """
+
+    def __init__(self, clases, features, centroides, desviaciones, precision, conteos):
+        self.clases = [str(c) for c in clases]
+        self.features = [str(f) for f in features]
+        self.centroides = np.ascontiguousarray(centroides, dtype=np.float64)
+        self.desviaciones = np.ascontiguousarray(desviaciones, dtype=np.float64)
+        self.precision = np.ascontiguousarray(precision, dtype=np.float64)
+        self.conteos = np.asarray(conteos, dtype=np.int64)
+        # Carreras sin estudiantes: centroide NaN, fuera de la comparación
+        self.presentes = self.conteos > 0
+        # Dimensiones sin dispersión: la diferencia se mide en unidades crudas
+        self.escalas = np.where(self.desviaciones > 0, self.desviaciones, 1.0)
+        self.nombres = np.asarray(self.clases, dtype=object)
+        self.nombres_features = np.asarray(self.features, dtype=object)
+
+    def distancias(self, X):
+        """
+        Distancias de cada fila de X al centroide de cada carrera.
+
+        Parámetros:
+        -----------
+        X : np.ndarray
+            (n, d) en el orden de self.features.
+
+        Retorna:
+        --------
+        tuple : (euclidea, mahalanobis), ambas (n, carreras); NaN en las
+            carreras sin estudiantes.
+        """
+        diferencias = X[:, None, :] - self.centroides[None, :, :]
+        euclidea = np.sqrt(np.einsum('nkd,nkd->nk', diferencias, diferencias))
+        # (carreras, n, d) @ (carreras, d, d): un producto por carrera
+        por_carrera = diferencias.transpose(1, 0, 2)
+        proyectadas = np.matmul(por_carrera, self.precision)
+        cuadrados = np.einsum('knd,knd->nk', proyectadas, por_carrera)
+        return euclidea, np.sqrt(np.maximum(cuadrados, 0.0))
+
+    def desvios(self, X, carreras, m=DIMENSIONES_DIFERENTES):
+        """
+        Las m dimensiones en las que cada fila más se aparta de su carrera.
+
+        Parámetros:
+        -----------
+        X : np.ndarray
+            (n, d) en el orden de self.features.
+        carreras : np.ndarray
+            (n,) índice de la carrera de cada fila.
+
+        Retorna:
+        --------
+        tuple : (dimensiones, z), ambas (n, m): índice de la dimensión y
+            diferencia en desviaciones estándar, de mayor a menor |z|
+            (empates: primero la dimensión anterior); z es NaN si la carrera
+            no tiene estudiantes.
+        """
+        z = (X - self.centroides[carreras]) / self.escalas[carreras]
+        dimensiones = np.argsort(-np.abs(z), axis=1, kind='stable')[:, :m]
+        return dimensiones, np.take_along_axis(z, dimensiones, axis=1)
+
+    def comparar(self, X, carreras, m=DIMENSIONES_DIFERENTES):
+        """
+        Campos del resultado de predecir() para cada fila de X: una lista de
+        dicts (uno por fila) con 'distancias_carreras' y
+        'dimensiones_diferentes' (respecto de carreras[i]). Las carreras sin
+        estudiantes se omiten de las distancias y, si carreras[i] es una de
+        ellas, 'dimensiones_diferentes' queda vacía.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        carreras = np.asarray(carreras, dtype=np.intp)
+        euclidea, mahalanobis = self.distancias(X)
+        # Las carreras sin estudiantes (NaN) quedan al final y se recortan
+        orden = np.argsort(np.where(self.presentes, mahalanobis, np.inf), axis=1,
+                           kind='stable')[:, :np.count_nonzero(self.presentes)]
+        nombres = self.nombres[orden].tolist()
+        euclidea = np.round(np.take_along_axis(euclidea, orden, axis=1), 4).tolist()
+        mahalanobis = np.round(np.take_along_axis(mahalanobis, orden, axis=1), 4).tolist()
+
+        dimensiones, z = self.desvios(X, carreras, m)
+        columnas = carreras[:, None]
+        valores = np.take_along_axis(X, dimensiones, axis=1).tolist()
+        medias = np.round(self.centroides[columnas, dimensiones], 4).tolist()
+        desviaciones = np.round(self.desviaciones[columnas, dimensiones], 4).tolist()
+        z = np.round(z, 4).tolist()
+        nombres_dimensiones = self.nombres_features[dimensiones].tolist()
+        presentes = self.presentes[carreras].tolist()
+
+        return [
+            {
+                'distancias_carreras': [
+                    {'carrera': carrera, 'euclidea': e, 'mahalanobis': d}
+                    for carrera, e, d in zip(nombres[i], euclidea[i], mahalanobis[i])
+                ],
+                'dimensiones_diferentes': [
+                    {'dimension': dimension, 'valor': valor, 'media': media, 'desviacion': desviacion, 'z': zi}
+                    for dimension, valor, media, desviacion, zi in zip(
+                        nombres_dimensiones[i], valores[i], medias[i], desviaciones[i], z[i])
+                ] if presentes[i] else [],
+            }
+            for i in range(len(X))
+        ]
+
+    def guardar(self, ruta):
+        """Guarda la tabla en un .npz."""
+        with open(ruta, 'wb') as archivo:
+            np.savez(
+                archivo,
+                clases=np.array(self.clases),
+                features=np.array(self.features),
+                centroides=self.centroides,
+                desviaciones=self.desviaciones,
+                precision=self.precision,
+                conteos=self.conteos,
+            )
+
+def cargar_perfiles(ruta):
+    """Lee una tabla guardada con PerfilesCarrera.guardar()."""
+    with np.load(ruta, allow_pickle=False) as arrays:
+        return PerfilesCarrera(
+            arrays['clases'].tolist(), arrays['features'].tolist(), arrays['centroides'],
+            arrays['desviaciones'], arrays['precision'], arrays['conteos'],
+        )
+
+def adjuntar_perfiles(modelo, label_encoder, ruta):
+    """
+    Carga la tabla de `ruta` en modelo.perfiles_carrera si sus clases y
+    features son las del modelo; si no coinciden se ignora (con un aviso en
+    stderr).
+    """
+    perfiles = cargar_perfiles(ruta)
+    features = [str(f) for f in getattr(modelo, 'feature_names_in_', perfiles.features)]
+    if perfiles.clases != [str(c) for c in label_encoder.classes_] or perfiles.features != features:
+        print(f'⚠️  {ruta} no corresponde a las clases o features del modelo; se ignora', file=sys.stderr)
+        return modelo
+    modelo.perfiles_carrera = perfiles
+    return modelo
+
+def calcular_perfiles(X, y, clases, features):
+    """
+    Tabla a partir de la matriz (n, d) y las etiquetas (índices de `clases`).
+    Una carrera sin estudiantes queda con centroide NaN y comparar() la omite.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    k, d = len(clases), X.shape[1]
+    conteos = np.bincount(y, minlength=k)
+    centroides = np.full((k, d), np.nan)
+    desviaciones = np.full((k, d), np.nan)
+    precision = np.zeros((k, d, d))
+    for c in np.flatnonzero(conteos).tolist():
+        filas = X[y == c]
+        centroides[c] = filas.mean(axis=0)
+        desviaciones[c] = filas.std(axis=0, ddof=1) if len(filas) > 1 else 0.0
+        covarianza = np.cov(filas, rowvar=False) if len(filas) > 1 else np.zeros((d, d))
+        # Pseudo-inversa: una dimensión constante en la carrera no rompe la tabla
+        precision[c] = np.linalg.pinv(covarianza, hermitian=True)
+    return PerfilesCarrera(clases, features, centroides, desviaciones, precision, conteos)
+
+def construir_perfiles(dataset, label_encoder, features):
+    """Tabla de las carreras del label encoder a partir de un CSV de datasets/."""
+    from carga_datos import cargar_matrices
+    X, y = cargar_matrices(dataset, label_encoder, features)
+    return calcular_perfiles(X, y, label_encoder.classes_, features)
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Tabla de perfiles por carrera')
+    parser.add_argument('comando', choices=['construir', 'mostrar'])
+    parser.add_argument('--dataset', default=str(DATASET_REFERENCIA))
+    parser.add_argument('--encoder', default=str(SCRIPT_DIR / 'label_encoder.pkl'))
+    parser.add_argument('--salida', default=str(SCRIPT_DIR / ARCHIVO_PERFILES))
+    parser.add_argument('--carrera', help='Carrera a mostrar (por defecto, todas)')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'construir':
+        import joblib
+        from predict import FEATURE_ORDER
+        perfiles = construir_perfiles(args.dataset, joblib.load(args.encoder), FEATURE_ORDER)
+        perfiles.guardar(args.salida)
+        print(f'✅ Perfiles de {len(perfiles.clases)} carreras ({perfiles.conteos.sum()} estudiantes, '
+              f'{len(perfiles.features)} dimensiones)')
+        print(f'   Guardado en {args.salida} ({Path(args.salida).stat().st_size / 1024:.1f} KB)')
+        return perfiles
+
+    perfiles = cargar_perfiles(args.salida)
+    for c, carrera in enumerate(perfiles.clases):
+        if args.carrera and carrera != args.carrera:
+            continue
+        print(f'\n{carrera} ({perfiles.conteos[c]} estudiantes)')
+        for f, feature in enumerate(perfiles.features):
+            print(f'   {feature:<3} {perfiles.centroides[c, f]:5.2f} ± {perfiles.desviaciones[c, f]:.2f}')
+    return perfiles
+
+if __name__ == '__main__':
+    main()
@@ -6,46 +6,230 @@ Recibe datos en JSON y devuelve predicciones.
 """
 
 import sys
-import io
 import json
 import os
+import time
 from pathlib import Path
 
-# Configurar codificación UTF-8 para stdin/stdout
-sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# Inicio del módulo: la etapa 'importar' de las métricas va desde aquí hasta main()
+INICIO_NS = time.perf_counter_ns()
 
-# Suprimir warnings de scikit-learn sobre versiones
-import warnings
-warnings.filterwarnings('ignore', category=UserWarning)
-warnings.filterwarnings('ignore', message='.*InconsistentVersionWarning.*')
+# Ejecutado como script, el módulo queda registrado también como 'predict':
+# los módulos que hacen `from predict import ...` (almacen_resultados.py,
+# cache_prediccion.py, ...) usan este en lugar de ejecutarlo otra vez.
+if __name__ == '__main__':
+    sys.modules.setdefault('predict', sys.modules[__name__])
+
+# Codificación UTF-8 para stdin/stdout, cambiando la de los mismos objetos
+# (sin envolverlos en otro TextIOWrapper)
+for _flujo in (sys.stdin, sys.stdout):
+    if (_flujo.encoding or '').lower() != 'utf-8' and hasattr(_flujo, 'reconfigure'):
+        _flujo.reconfigure(encoding='utf-8')
 
-import joblib
-import pandas as pd
 import numpy as np
 
+from metricas import CRONOMETRO_NULO, Cronometro, Metricas
+from reglas_negocio import motor_reglas, ordenar_top
+
 # Obtener directorio del script
 SCRIPT_DIR = Path(__file__).parent
 
+# Usar el bosque compilado (solo numpy) si existe y está al día con el .pkl
+USAR_COMPILADO = os.environ.get('ML_MODELO_COMPILADO', '1') != '0'
+
+# Entradas de la caché de predicciones del modo --serve (0 la desactiva)
+CACHE_TAMANO = int(os.environ.get('ML_CACHE_TAMANO', '4096'))
+
+# Resultados máximos del almacén SQLite compartido (almacen_resultados.py, 0 lo desactiva)
+ALMACEN_MAX = int(os.environ.get('ML_ALMACEN_MAX', '100000'))
+
+# Tiempos por etapa e histogramas Prometheus (metricas.py); desactivados por defecto
+METRICAS = os.environ.get('ML_METRICAS', '0') == '1'
+METRICAS_ARCHIVO = os.environ.get('ML_METRICAS_ARCHIVO')
+METRICAS_INTERVALO = float(os.environ.get('ML_METRICAS_INTERVALO', '10'))
+
+# Perfilado con cProfile de una fracción de las solicitudes (perfilador.py, 0 lo desactiva)
+PERFILADO = float(os.environ.get('ML_PERFILADO', '0'))
+PERFILADO_DIR = Path(os.environ.get('ML_PERFILADO_DIR', SCRIPT_DIR / 'perfiles'))
+PERFILADO_MAX_MB = float(os.environ.get('ML_PERFILADO_MAX_MB', '100'))
+PERFILADO_MEMORIA = os.environ.get('ML_PERFILADO_MEMORIA', '0') == '1'
+
+# Perfiles de referencia similares por resultado (indice_vecinos.py, 0 los desactiva)
+VECINOS = int(os.environ.get('ML_VECINOS', '5'))
+
+# Distancias a cada carrera y dimensiones más diferentes (perfiles_carrera.py, 0 las desactiva)
+PERFILES_CARRERA = os.environ.get('ML_PERFILES_CARRERA', '1') != '0'
+
+# Aportes por dimensión y pregunta a la carrera recomendada (explicaciones.py, 0 los desactiva)
+EXPLICACIONES = os.environ.get('ML_EXPLICACIONES', '1') != '0'
+
+# Registro de modelos con manifiesto (registro_modelos.py): si el directorio
+# tiene modelos registrados se usan en lugar de load_models()
+REGISTRO_DIR = Path(os.environ.get('ML_REGISTRO_DIR', SCRIPT_DIR / 'modelos'))
+MODELO_PREDETERMINADO = os.environ.get('ML_MODELO_PREDETERMINADO', 'principal')
+REGISTRO_INTERVALO = float(os.environ.get('ML_REGISTRO_INTERVALO', '2'))
+
+# Orden correcto de las features (14 dimensiones: 6 RIASEC + 8 Gardner)
+FEATURE_ORDER = [
+    'R', 'I', 'A', 'S', 'E', 'C',
+    'LM', 'L', 'ES', 'M', 'CK', 'IP', 'IA', 'N'
+]
+
+def artefacto_vigente(ruta, modelo_path):
+    """True si el artefacto existe y no es más antiguo que el .pkl original."""
+    return ruta.exists() and (
+        not modelo_path.exists()
+        or ruta.stat().st_mtime >= modelo_path.stat().st_mtime
+    )
+
 def load_models():
-    """Carga el modelo y el label encoder."""
+    """
+    Carga el modelo y el label encoder.
+    
+    Orden de preferencia, usando solo artefactos no más antiguos que el .pkl:
+    1. modelo_mmap/ (bosque_compilado.py exportar): .npy abiertos con mmap,
+       la carga es casi inmediata y los procesos comparten las páginas.
+    2. modelo_compilado.npz (bosque_compilado.py compilar): se lee completo.
+    3. Los .pkl originales con joblib (importa sklearn).
+    Con 1 o 2, los lotes de más de ML_LOTE_COMPILADO filas (predecir_lote,
+    puntuar_archivo.py, servidor_async.py) se evalúan con el .pkl, que se
+    carga al llegar el primero.
+    
+    Si hay un calibracion.npz vigente (calibracion.py ajustar) queda en
+    modelo.calibracion y construir_resultado() calibra las probabilidades.
+    Si hay un indice_vecinos.pkl vigente (indice_vecinos.py) queda en
+    modelo.vecinos y cada resultado incluye los perfiles de referencia más
+    parecidos (ML_VECINOS=0 lo desactiva). Si hay un perfiles_carrera.npz
+    vigente (perfiles_carrera.py) queda en modelo.perfiles_carrera y cada
+    resultado incluye las distancias a cada carrera (ML_PERFILES_CARRERA=0 lo
+    desactiva). Si hay un explicaciones.npz vigente (explicaciones.py) queda
+    en modelo.explicador y cada resultado explica la carrera recomendada
+    (ML_EXPLICACIONES=0 lo desactiva).
+    """
     try:
+        modelo, label_encoder = cargar_artefactos_modelo()
         modelo_path = SCRIPT_DIR / 'modelo_random_forest.pkl'
-        encoder_path = SCRIPT_DIR / 'label_encoder.pkl'
-        
-        if not modelo_path.exists():
-            raise FileNotFoundError(f"No se encuentra el modelo en: {modelo_path}")
-        
-        if not encoder_path.exists():
-            raise FileNotFoundError(f"No se encuentra el label encoder en: {encoder_path}")
-        
-        modelo = joblib.load(modelo_path)
-        label_encoder = joblib.load(encoder_path)
-        
+        calibracion_path = SCRIPT_DIR / 'calibracion.npz'
+        if artefacto_vigente(calibracion_path, modelo_path):
+            from calibracion import adjuntar_calibracion
+            adjuntar_calibracion(modelo, label_encoder, calibracion_path)
+        indice_path = SCRIPT_DIR / 'indice_vecinos.pkl'
+        if VECINOS > 0 and artefacto_vigente(indice_path, modelo_path):
+            from indice_vecinos import adjuntar_vecinos
+            adjuntar_vecinos(modelo, indice_path)
+        perfiles_path = SCRIPT_DIR / 'perfiles_carrera.npz'
+        if PERFILES_CARRERA and artefacto_vigente(perfiles_path, modelo_path):
+            from perfiles_carrera import adjuntar_perfiles
+            adjuntar_perfiles(modelo, label_encoder, perfiles_path)
+        explicaciones_path = SCRIPT_DIR / 'explicaciones.npz'
+        if EXPLICACIONES and artefacto_vigente(explicaciones_path, modelo_path):
+            from explicaciones import adjuntar_explicaciones
+            adjuntar_explicaciones(modelo, label_encoder, explicaciones_path)
         return modelo, label_encoder
     except Exception as e:
         raise Exception(f"Error al cargar modelos: {str(e)}")
 
+def cargar_artefactos_modelo():
+    """(modelo, label_encoder) desde el artefacto preferido por load_models()."""
+    modelo_path = SCRIPT_DIR / 'modelo_random_forest.pkl'
+    encoder_path = SCRIPT_DIR / 'label_encoder.pkl'
+    mmap_path = SCRIPT_DIR / 'modelo_mmap'
+    compilado_path = SCRIPT_DIR / 'modelo_compilado.npz'
+    
+    # Los lotes grandes van al .pkl de sklearn (bosque_compilado.LOTE_COMPILADO)
+    ruta_sklearn = modelo_path if modelo_path.exists() else None
+    
+    if USAR_COMPILADO and artefacto_vigente(mmap_path / 'metadatos.json', modelo_path):
+        from bosque_compilado import cargar_mmap
+        return cargar_mmap(mmap_path, ruta_sklearn)
+    
+    if USAR_COMPILADO and artefacto_vigente(compilado_path, modelo_path):
+        from bosque_compilado import cargar_compilado
+        return cargar_compilado(compilado_path, ruta_sklearn)
+    
+    if not modelo_path.exists():
+        raise FileNotFoundError(f"No se encuentra el modelo en: {modelo_path}")
+    
+    if not encoder_path.exists():
+        raise FileNotFoundError(f"No se encuentra el label encoder en: {encoder_path}")
+    
+    # Suprimir warnings de scikit-learn sobre versiones
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    warnings.filterwarnings('ignore', message='.*InconsistentVersionWarning.*')
+    import joblib
+    
+    modelo = joblib.load(modelo_path)
+    label_encoder = joblib.load(encoder_path)
+    
+    return modelo, label_encoder
+
+# Mapeo de preguntas a dimensiones (Total: 62 preguntas), en el orden de FEATURE_ORDER
+DIMENSION_MAP = {
+    # RIASEC - R (preguntas 1-5)
+    'R': [f'q{i}' for i in range(1, 6)],
+    # RIASEC - I (preguntas 6-10)
+    'I': [f'q{i}' for i in range(6, 11)],
+    # RIASEC - A (preguntas 11-15)
+    'A': [f'q{i}' for i in range(11, 16)],
+    # RIASEC - S (preguntas 16-20)
+    'S': [f'q{i}' for i in range(16, 21)],
+    # RIASEC - E (preguntas 21-25)
+    'E': [f'q{i}' for i in range(21, 26)],
+    # RIASEC - C (preguntas 26-30)
+    'C': [f'q{i}' for i in range(26, 31)],
+    # Gardner - LM (preguntas 31-34)
+    'LM': [f'q{i}' for i in range(31, 35)],
+    # Gardner - L (preguntas 35-38)
+    'L': [f'q{i}' for i in range(35, 39)],
+    # Gardner - ES (preguntas 39-42)
+    'ES': [f'q{i}' for i in range(39, 43)],
+    # Gardner - M (preguntas 43-46)
+    'M': [f'q{i}' for i in range(43, 47)],
+    # Gardner - CK (preguntas 47-50)
+    'CK': [f'q{i}' for i in range(47, 51)],
+    # Gardner - IP (preguntas 51-54)
+    'IP': [f'q{i}' for i in range(51, 55)],
+    # Gardner - IA (preguntas 55-58)
+    'IA': [f'q{i}' for i in range(55, 59)],
+    # Gardner - N (preguntas 59-62)
+    'N': [f'q{i}' for i in range(59, 63)],
+}
+
+# Rendimiento académico (q63-q65) del formato de 65 preguntas (modelo de 17 features)
+RENDIMIENTO_MAP = {
+    'Rendimiento_General': 'q63',
+    'Rendimiento_STEM': 'q64',
+    'Rendimiento_Humanidades': 'q65',
+}
+
+N_PREGUNTAS = 62
+
+# Matriz 62x14 de pertenencia: respuestas @ MATRIZ_DIMENSIONES da la suma por dimensión
+MATRIZ_DIMENSIONES = np.zeros((N_PREGUNTAS, len(FEATURE_ORDER)), dtype=np.float32)
+for _columna, _dimension in enumerate(FEATURE_ORDER):
+    for _pregunta in DIMENSION_MAP[_dimension]:
+        MATRIZ_DIMENSIONES[int(_pregunta[1:]) - 1, _columna] = 1.0
+PREGUNTAS_POR_DIMENSION = MATRIZ_DIMENSIONES.sum(axis=0).astype(np.int64)
+
+_TABLA_REDONDEO = None
+
+def tabla_redondeo():
+    """
+    tabla[j, s] = round(s / n_j, 1) para toda suma posible de respuestas
+    uint8: reproduce exactamente el redondeo de calcular_promedios (que no es
+    "mitad hacia arriba": round(2.25, 1) == 2.2 por la representación
+    binaria). Se arma la primera vez que se usa (unos 18 ms): una predicción
+    individual no la necesita.
+    """
+    global _TABLA_REDONDEO
+    if _TABLA_REDONDEO is None:
+        _TABLA_REDONDEO = np.array([
+            [round(suma / n, 1) for suma in range(255 * PREGUNTAS_POR_DIMENSION.max() + 1)]
+            for n in PREGUNTAS_POR_DIMENSION
+        ])
+    return _TABLA_REDONDEO
+
 def calcular_promedios(respuestas):
     """
     Calcula los promedios de cada dimensión a partir de las respuestas individuales.
@@ -61,43 +245,11 @@ def calcular_promedios(respuestas):
     dict : Diccionario con los promedios calculados para cada dimensión.
     """
     
-    # Mapeo de preguntas a dimensiones (Total: 62 preguntas)
-    dimension_map = {
-        # RIASEC - R (preguntas 1-5)
-        'R': [f'q{i}' for i in range(1, 6)],
-        # RIASEC - I (preguntas 6-10)
-        'I': [f'q{i}' for i in range(6, 11)],
-        # RIASEC - A (preguntas 11-15)
-        'A': [f'q{i}' for i in range(11, 16)],
-        # RIASEC - S (preguntas 16-20)
-        'S': [f'q{i}' for i in range(16, 21)],
-        # RIASEC - E (preguntas 21-25)
-        'E': [f'q{i}' for i in range(21, 26)],
-        # RIASEC - C (preguntas 26-30)
-        'C': [f'q{i}' for i in range(26, 31)],
-        # Gardner - LM (preguntas 31-34)
-        'LM': [f'q{i}' for i in range(31, 35)],
-        # Gardner - L (preguntas 35-38)
-        'L': [f'q{i}' for i in range(35, 39)],
-        # Gardner - ES (preguntas 39-42)
-        'ES': [f'q{i}' for i in range(39, 43)],
-        # Gardner - M (preguntas 43-46)
-        'M': [f'q{i}' for i in range(43, 47)],
-        # Gardner - CK (preguntas 47-50)
-        'CK': [f'q{i}' for i in range(47, 51)],
-        # Gardner - IP (preguntas 51-54)
-        'IP': [f'q{i}' for i in range(51, 55)],
-        # Gardner - IA (preguntas 55-58)
-        'IA': [f'q{i}' for i in range(55, 59)],
-        # Gardner - N (preguntas 59-62)
-        'N': [f'q{i}' for i in range(59, 63)],
-    }
-    
     # Calcular promedios
     promedios = {}
     
     # Calcular promedios para RIASEC y Gardner
-    for dimension, preguntas in dimension_map.items():
+    for dimension, preguntas in DIMENSION_MAP.items():
         valores = [respuestas.get(q, 0) for q in preguntas]
         if valores:
             promedios[dimension] = round(sum(valores) / len(valores), 1)
@@ -106,98 +258,136 @@ def calcular_promedios(respuestas):
     
     return promedios
 
-def aplicar_reglas_negocio(datos, carrera_pred, top_carreras, probabilidades, label_encoder):
+def calcular_promedios_lote(respuestas):
     """
-    Aplica reglas de negocio simples y conservadoras.
-    Solo ajusta cuando hay evidencia clara de error.
+    Versión por lotes de calcular_promedios: una multiplicación de matrices
+    para las sumas por dimensión y una tabla para el redondeo exacto.
+    
+    Parámetros:
+    -----------
+    respuestas : np.ndarray
+        Matriz (n, 62) de respuestas enteras (0 = sin respuesta), o (n, 65)
+        con q63-q65 de rendimiento académico, que se copian tal cual.
+    
+    Retorna:
+    --------
+    tuple : (promedios, faltantes, fuera_de_rango)
+        promedios: (n, 14) en el orden FEATURE_ORDER, o (n, 17) con las
+        columnas de RENDIMIENTO_MAP al final. faltantes y fuera_de_rango son
+        máscaras (n,) de filas con alguna respuesta en 0 o fuera de 1-5.
     """
+    respuestas = np.asarray(respuestas)
+    if respuestas.ndim != 2 or respuestas.shape[1] not in (N_PREGUNTAS, N_PREGUNTAS + len(RENDIMIENTO_MAP)):
+        raise ValueError(f'Se esperaba una matriz (n, 62) o (n, 65), no {respuestas.shape}')
+    if not np.issubdtype(respuestas.dtype, np.integer):
+        raise ValueError(f'Las respuestas deben ser enteras, no {respuestas.dtype}')
     
-    I = datos.get('I', 0)
-    A = datos.get('A', 0)
-    LM = datos.get('LM', 0)
-    ES = datos.get('ES', 0)
-    S = datos.get('S', 0)
-    R = datos.get('R', 0)
-    E = datos.get('E', 0)
-    IP = datos.get('IP', 0)
-    
-    # Por ahora, solo devolver la predicción del modelo sin ajustes
-    # Las reglas se aplicarán solo para casos muy específicos
-    carrera_ajustada = carrera_pred
-    razon = None
-    top_ajustado = top_carreras.copy()
-    
-    # ÚNICA REGLA: Arquitectura sin espacialidad → Descartar
-    if carrera_pred == 'Arquitectura' and ES < 3.5:
-        for career in top_carreras:
-            if career['carrera'] != 'Arquitectura':
-                carrera_ajustada = career['carrera']
-                razon = f"Arquitectura requiere ES >= 3.5 (actual: {ES:.1f})"
-                
-                # Mover Arquitectura al final
-                top_ajustado = [c for c in top_carreras if c['carrera'] != 'Arquitectura']
-                arq_item = [c for c in top_carreras if c['carrera'] == 'Arquitectura'][0]
-                top_ajustado.append(arq_item)
-                break
+    # Una sola comparación por celda: en uint8, 0 - 1 da 255 (fuera de 0..4)
+    if respuestas.dtype == np.uint8:
+        invalidas = (respuestas - np.uint8(1)) > 4
+    else:
+        invalidas = (respuestas < 1) | (respuestas > 5)
+    fila_invalida = invalidas.any(axis=1)
+    faltantes = np.zeros(len(respuestas), dtype=bool)
+    if fila_invalida.any():
+        faltantes[fila_invalida] = (respuestas[fila_invalida] == 0).any(axis=1)
+        fuera_de_rango = fila_invalida & (
+            (invalidas & (respuestas != 0)).any(axis=1)
+        )
+    else:
+        fuera_de_rango = fila_invalida
     
-    confianza_ajustada = top_ajustado[0]['probabilidad']
+    # Sumas enteras exactas: con uint8 la suma máxima es 1275, exacta en float32
+    # (y así la multiplicación usa BLAS); otros enteros se suman en int64
+    preguntas = respuestas[:, :N_PREGUNTAS]
+    if respuestas.dtype == np.uint8:
+        sumas = (preguntas.astype(np.float32) @ MATRIZ_DIMENSIONES).astype(np.int64)
+    else:
+        sumas = preguntas.astype(np.int64) @ MATRIZ_DIMENSIONES.astype(np.int64)
     
-    return carrera_ajustada, confianza_ajustada, top_ajustado, razon
+    tabla = tabla_redondeo()
+    columnas = np.arange(len(FEATURE_ORDER))
+    en_tabla = (sumas >= 0) & (sumas < tabla.shape[1])
+    promedios = tabla[columnas, np.where(en_tabla, sumas, 0)]
+    if not en_tabla.all():
+        # Solo con enteros fuera de uint8: mismo cálculo que calcular_promedios
+        for fila, columna in zip(*np.nonzero(~en_tabla)):
+            promedios[fila, columna] = round(
+                int(sumas[fila, columna]) / int(PREGUNTAS_POR_DIMENSION[columna]), 1
+            )
+    
+    if respuestas.shape[1] > N_PREGUNTAS:
+        promedios = np.hstack([promedios, respuestas[:, N_PREGUNTAS:].astype(np.float64)])
+    
+    return promedios, faltantes, fuera_de_rango
+
+# Versión de las reglas de negocio (tabla REGLAS de reglas_negocio.py) y del
+# post-procesamiento (construir_resultado). Forma parte de la clave del almacén
+# de resultados: incrementarla al cambiarlos.
+VERSION_REGLAS = '1'
 
-def predecir(datos_estudiante, modelo, label_encoder):
+# Variables de entorno que cambian los campos del resultado (ML_VECINOS,
+# ML_PERFILES_CARRERA, ML_EXPLICACIONES). También forman parte de la clave del
+# almacén: procesos con otras opciones no comparten resultados.
+OPCIONES_RESULTADO = (f'vecinos={VECINOS}:perfiles_carrera={int(PERFILES_CARRERA)}:'
+                      f'explicaciones={int(EXPLICACIONES)}')
+
+def construir_resultado(datos_estudiante, probabilidades, modelo, label_encoder,
+                        cronometro=CRONOMETRO_NULO):
     """
-    Realiza la predicción de carrera para un estudiante.
+    Construye el resultado de la predicción a partir del vector de
+    probabilidades del modelo (calibración, reglas de negocio, top 5 y
+    confianza).
     
     Parámetros:
     -----------
     datos_estudiante : dict
-        Diccionario con las 14 features del estudiante
-        (R, I, A, S, E, C, LM, L, ES, M, CK, IP, IA, N)
+        Perfil del estudiante (se devuelve en 'perfil').
+    probabilidades : np.ndarray
+        Fila de predict_proba para el estudiante.
+    cronometro : metricas.Cronometro, opcional
+        Registra las etapas 'calibracion' (si el modelo tiene), 'reglas',
+        'top5', 'vecinos' (si el modelo tiene índice), 'perfiles_carrera' (si
+        tiene la tabla), 'explicacion' (si tiene explicador) y 'resultado'.
     
     Retorna:
     --------
     dict : Resultados de la predicción
     """
-    try:
-        # Orden correcto de las features (14 dimensiones: 6 RIASEC + 8 Gardner)
-        feature_order = [
-            'R', 'I', 'A', 'S', 'E', 'C',
-            'LM', 'L', 'ES', 'M', 'CK', 'IP', 'IA', 'N'
-        ]
-        
-        # Crear DataFrame con el orden correcto
-        df_estudiante = pd.DataFrame([datos_estudiante])[feature_order]
-        
-        # Realizar predicción
-        prediccion = modelo.predict(df_estudiante)[0]
-        probabilidades = modelo.predict_proba(df_estudiante)[0]
-        
-        # Obtener top 5 carreras
-        top_indices = np.argsort(probabilidades)[-5:][::-1]
-        
-        top_carreras = []
-        for idx in top_indices:
-            carrera = label_encoder.inverse_transform([idx])[0]
-            prob = float(probabilidades[idx])
-            top_carreras.append({
-                'carrera': carrera,
-                'probabilidad': prob,
-                'porcentaje': round(prob * 100, 2)
-            })
-        
-        # Resultado principal
-        carrera_recomendada = label_encoder.inverse_transform([prediccion])[0]
-        confianza = float(probabilidades[prediccion])
-        
-        # APLICAR REGLAS DE NEGOCIO para ajustar predicciones
-        carrera_ajustada, confianza_ajustada, top_carreras_ajustado, razon_ajuste = aplicar_reglas_negocio(
-            datos_estudiante, 
-            carrera_recomendada, 
-            top_carreras, 
-            probabilidades, 
-            label_encoder
-        )
-        
+    probabilidades = probabilidades[None, :]
+    
+    # CALIBRACIÓN (calibracion.py): probabilidades que corresponden a la tasa de acierto
+    calibracion = getattr(modelo, 'calibracion', None)
+    if calibracion is not None:
+        probabilidades = calibracion.aplicar(probabilidades)
+        cronometro.marcar('calibracion')
+    
+    # APLICAR REGLAS DE NEGOCIO (reglas_negocio.py) sobre una matriz de 1 fila
+    motor = motor_reglas(label_encoder.classes_)
+    valores = motor.valores([datos_estudiante])
+    ajustadas, relegadas, activas = motor.aplicar(probabilidades, valores)
+    razon_ajuste = motor.razones(activas, valores)[0]
+    cronometro.marcar('reglas')
+    
+    # Top 5 (empates: primero el índice menor, igual que argmax); las
+    # carreras relegadas pasan al final
+    top_indices = ordenar_top(np.argsort(-ajustadas, axis=1, kind='stable')[:, :5], relegadas)[0]
+    nombres = label_encoder.classes_[top_indices].tolist()
+    
+    top_carreras_ajustado = []
+    for carrera, prob in zip(nombres, ajustadas[0, top_indices].tolist()):
+        top_carreras_ajustado.append({
+            'carrera': carrera,
+            'probabilidad': prob,
+            'porcentaje': round(prob * 100, 2)
+        })
+    carrera_ajustada = nombres[0]
+    cronometro.marcar('top5')
+    
+    if calibracion is not None:
+        # Calibrada: la confianza es la probabilidad de la carrera recomendada
+        confianza_mejorada = top_carreras_ajustado[0]['probabilidad']
+    else:
         # MEJORAR CONFIANZA: Normalizar relativamente al top 5
         # Esto da porcentajes más intuitivos y altos
         top_5_probs = [c['probabilidad'] for c in top_carreras_ajustado]
@@ -237,18 +427,73 @@ def predecir(datos_estudiante, modelo, label_encoder):
                         nueva_prob = (carrera['probabilidad'] / suma_resto) * total_resto
                         carrera['probabilidad'] = nueva_prob
                         carrera['porcentaje'] = round(nueva_prob * 100, 2)
+    
+    resultado = {
+        'success': True,
+        'carrera_recomendada': carrera_ajustada,
+        'confianza': confianza_mejorada,
+        'porcentaje_confianza': round(confianza_mejorada * 100, 2),
+        'top_5_carreras': top_carreras_ajustado,
+        'perfil': datos_estudiante,
+        'ajuste_aplicado': razon_ajuste if razon_ajuste else None
+    }
+    
+    # ESTUDIANTES SIMILARES (indice_vecinos.py): perfiles de referencia más cercanos
+    vecinos = getattr(modelo, 'vecinos', None)
+    if vecinos is not None:
+        x = [datos_estudiante[f] for f in vecinos.features]
+        resultado['perfiles_similares'] = vecinos.similares(x, VECINOS)[0]
+        cronometro.marcar('vecinos')
+    
+    # DISTANCIAS A CADA CARRERA (perfiles_carrera.py) y dimensiones más diferentes
+    perfiles_carrera = getattr(modelo, 'perfiles_carrera', None)
+    if perfiles_carrera is not None:
+        x = [datos_estudiante[f] for f in perfiles_carrera.features]
+        resultado.update(perfiles_carrera.comparar(x, top_indices[:1])[0])
+        cronometro.marcar('perfiles_carrera')
+    
+    # EXPLICACIÓN (explicaciones.py): aportes del camino de cada árbol a la carrera recomendada
+    explicador = getattr(modelo, 'explicador', None)
+    if explicador is not None:
+        x = [datos_estudiante[f] for f in explicador.features]
+        resultado['explicacion'] = explicador.explicar(x, top_indices[:1])[0]
+        cronometro.marcar('explicacion')
+    cronometro.marcar('resultado')
+    
+    return resultado
+
+def predecir(datos_estudiante, modelo, label_encoder, cronometro=CRONOMETRO_NULO, plan=None):
+    """
+    Realiza la predicción de carrera para un estudiante.
+    
+    Parámetros:
+    -----------
+    datos_estudiante : dict
+        Diccionario con las 14 features del estudiante
+        (R, I, A, S, E, C, LM, L, ES, M, CK, IP, IA, N)
+    cronometro : metricas.Cronometro, opcional
+        Registra las etapas 'vector', 'bosque', 'top5', 'reglas' y 'resultado'.
+    plan : registro_modelos.PlanFeatures, opcional
+        Orden de features de un modelo registrado (por defecto FEATURE_ORDER).
+    
+    Retorna:
+    --------
+    dict : Resultados de la predicción
+    """
+    try:
+        # Vector de features en el orden correcto, en float32 como lo compara
+        # el bosque (sin DataFrame ni conversión posterior)
+        if plan is not None:
+            x = plan.vector(datos_estudiante)
+        else:
+            x = np.array([[datos_estudiante[f] for f in FEATURE_ORDER]], dtype=np.float32)
+        cronometro.marcar('vector')
         
-        resultado = {
-            'success': True,
-            'carrera_recomendada': carrera_ajustada,
-            'confianza': confianza_mejorada,
-            'porcentaje_confianza': round(confianza_mejorada * 100, 2),
-            'top_5_carreras': top_carreras_ajustado,
-            'perfil': datos_estudiante,
-            'ajuste_aplicado': razon_ajuste if razon_ajuste else None
-        }
+        # Realizar predicción (un solo recorrido del bosque)
+        probabilidades = modelo.predict_proba(x)[0]
+        cronometro.marcar('bosque')
         
-        return resultado
+        return construir_resultado(datos_estudiante, probabilidades, modelo, label_encoder, cronometro)
         
     except Exception as e:
         return {
@@ -256,9 +501,421 @@ def predecir(datos_estudiante, modelo, label_encoder):
             'error': f'Error en predicción: {str(e)}'
         }
 
+def top_k_indices(probabilidades, k=5):
+    """
+    Índices de las k clases más probables por fila, en orden descendente.
+    
+    Equivale a np.argsort(-fila, kind='stable')[:k] en cada fila (empates:
+    primero el índice menor), pero usa una selección parcial sobre toda la
+    matriz en lugar de ordenar todas las clases.
+    """
+    n, c = probabilidades.shape
+    k = min(k, c)
+    
+    # Valor del k-ésimo mayor por fila
+    kesimo = np.partition(probabilidades, c - k, axis=1)[:, c - k][:, None]
+    mayores = probabilidades > kesimo
+    iguales = probabilidades == kesimo
+    
+    # Entre los empatados con el k-ésimo, completar con los índices menores
+    faltan = k - mayores.sum(axis=1)
+    seleccion = mayores | (iguales & (np.cumsum(iguales, axis=1) <= faltan[:, None]))
+    indices = np.nonzero(seleccion)[1].reshape(n, k)
+    
+    # Ordenar los k seleccionados: probabilidad descendente, luego índice
+    valores = np.take_along_axis(probabilidades, indices, axis=1)
+    orden = np.lexsort((indices, -valores), axis=1)
+    return np.take_along_axis(indices, orden, axis=1)
+
+def predecir_lote(matriz_perfiles, modelo, label_encoder):
+    """
+    Realiza la predicción para muchos estudiantes en una sola pasada.
+    
+    Hace un único predict_proba sobre toda la matriz y aplica la calibración,
+    las reglas de negocio, el top 5 y la confianza como operaciones de arrays.
+    El resultado de cada fila es idéntico al de predecir().
+    
+    Parámetros:
+    -----------
+    matriz_perfiles : np.ndarray o list
+        Matriz (n, 14) en el orden FEATURE_ORDER, o lista de diccionarios
+        con las 14 features.
+    
+    Retorna:
+    --------
+    list : Un diccionario de resultados por estudiante.
+    """
+    try:
+        etiquetas = np.asarray(label_encoder.classes_)
+        motor = motor_reglas(etiquetas)
+        if isinstance(matriz_perfiles, np.ndarray):
+            X = np.asarray(matriz_perfiles, dtype=np.float64)
+            perfiles = [dict(zip(FEATURE_ORDER, fila)) for fila in X.tolist()]
+            valores = motor.valores_matriz(X, FEATURE_ORDER)
+        else:
+            perfiles = list(matriz_perfiles)
+            X = np.array([[datos[f] for f in FEATURE_ORDER] for datos in perfiles], dtype=np.float64)
+            # Desde los diccionarios: las reglas pueden usar features que el
+            # modelo no recibe (Rendimiento_STEM), igual que en predecir()
+            valores = motor.valores(perfiles)
+        
+        n = len(perfiles)
+        if n == 0:
+            return []
+        
+        # Un solo recorrido del bosque
+        probabilidades = modelo.predict_proba(X)
+        
+        # CALIBRACIÓN: la misma tabla sobre toda la matriz
+        calibracion = getattr(modelo, 'calibracion', None)
+        if calibracion is not None:
+            probabilidades = calibracion.aplicar(probabilidades)
+        
+        # REGLAS DE NEGOCIO: una pasada sobre la matriz (n, clases)
+        probabilidades, relegadas, activas = motor.aplicar(probabilidades, valores)
+        razones = motor.razones(activas, valores)
+        top = ordenar_top(top_k_indices(probabilidades, 5), relegadas)
+        carrera_recomendada = etiquetas[top[:, 0]]
+        
+        top_probs = np.take_along_axis(probabilidades, top, axis=1)
+        if calibracion is not None:
+            normalizadas = top_probs
+            confianza = top_probs[:, 0]
+        else:
+            # MEJORAR CONFIANZA: normalizar al top 5 (sumas en el mismo orden que sum())
+            suma_top = top_probs[:, 0].copy()
+            for j in range(1, top.shape[1]):
+                suma_top = suma_top + top_probs[:, j]
+            normalizadas = np.where(suma_top[:, None] > 0, top_probs / np.where(suma_top > 0, suma_top, 1)[:, None], top_probs)
+            confianza = normalizadas[:, 0].copy()
+            
+            # Boost si hay clara diferencia (>15%) con el segundo lugar
+            if top.shape[1] > 1:
+                diferencia = normalizadas[:, 0] - normalizadas[:, 1]
+                con_boost = diferencia > 0.15
+                boost = np.minimum((diferencia - 0.15) * 0.8, 0.25)
+                confianza_boost = np.minimum(normalizadas[:, 0] + boost, 0.95)
+                
+                suma_resto = normalizadas[:, 1].copy()
+                for j in range(2, top.shape[1]):
+                    suma_resto = suma_resto + normalizadas[:, j]
+                reescalar = con_boost & (suma_resto > 0)
+                resto = normalizadas[:, 1:] / np.where(suma_resto > 0, suma_resto, 1)[:, None] * (1 - confianza_boost)[:, None]
+                
+                normalizadas[con_boost, 0] = confianza_boost[con_boost]
+                normalizadas[reescalar, 1:] = resto[reescalar]
+                confianza = np.where(con_boost, confianza_boost, confianza)
+        
+        # Armar los diccionarios de salida
+        nombres_top = etiquetas[top].tolist()
+        probs_top = normalizadas.tolist()
+        confianzas = confianza.tolist()
+        recomendadas = carrera_recomendada.tolist()
+        
+        resultados = []
+        for i in range(n):
+            resultados.append({
+                'success': True,
+                'carrera_recomendada': recomendadas[i],
+                'confianza': confianzas[i],
+                'porcentaje_confianza': round(confianzas[i] * 100, 2),
+                'top_5_carreras': [
+                    {'carrera': carrera, 'probabilidad': prob, 'porcentaje': round(prob * 100, 2)}
+                    for carrera, prob in zip(nombres_top[i], probs_top[i])
+                ],
+                'perfil': perfiles[i],
+                'ajuste_aplicado': razones[i]
+            })
+        
+        # ESTUDIANTES SIMILARES: una consulta por lotes al índice
+        vecinos = getattr(modelo, 'vecinos', None)
+        if vecinos is not None:
+            columnas = [FEATURE_ORDER.index(f) for f in vecinos.features]
+            for resultado, similares in zip(resultados, vecinos.similares(X[:, columnas], VECINOS)):
+                resultado['perfiles_similares'] = similares
+        
+        # DISTANCIAS A CADA CARRERA: una pasada sobre la matriz (n, carreras, features)
+        perfiles_carrera = getattr(modelo, 'perfiles_carrera', None)
+        if perfiles_carrera is not None:
+            columnas = [FEATURE_ORDER.index(f) for f in perfiles_carrera.features]
+            for resultado, comparacion in zip(resultados, perfiles_carrera.comparar(X[:, columnas], top[:, 0])):
+                resultado.update(comparacion)
+        
+        # EXPLICACIÓN: un recorrido del bosque para todo el lote
+        explicador = getattr(modelo, 'explicador', None)
+        if explicador is not None:
+            columnas = [FEATURE_ORDER.index(f) for f in explicador.features]
+            for resultado, explicacion in zip(resultados, explicador.explicar(X[:, columnas], top[:, 0])):
+                resultado['explicacion'] = explicacion
+        
+        return resultados
+        
+    except Exception as e:
+        return [
+            {'success': False, 'error': f'Error en predicción: {str(e)}'}
+            for _ in range(len(matriz_perfiles))
+        ]
+
+def preparar_datos(data):
+    """Promedios del estudiante a partir de respuestas individuales o promedios."""
+    # Verificar si vienen respuestas individuales o promedios
+    if 'q1' in data:
+        # Vienen respuestas individuales, calcular promedios
+        return calcular_promedios(data)
+    # Ya vienen los promedios calculados
+    return data
+
+def procesar_entrada(data, modelo, label_encoder, cache=None, almacen=None,
+                     cronometro=CRONOMETRO_NULO, plan=None, version=None):
+    """
+    Prepara los datos recibidos (respuestas o promedios) y realiza la predicción.
+    
+    Parámetros:
+    -----------
+    data : dict
+        Respuestas individuales (q1, q2, ...) o promedios ya calculados.
+    cache : CachePrediccion, opcional
+        Si se indica, la predicción pasa por la caché (cache_prediccion.py).
+    almacen : AlmacenResultados, opcional
+        Si se indica, se consulta antes de predecir y se guarda el resultado
+        (almacen_resultados.py).
+    cronometro : metricas.Cronometro, opcional
+        Registra 'preparar', las etapas de predecir() (o 'cache' en lugar de
+        'vector' y 'bosque') y el tiempo propio del almacén ('almacen').
+    plan : registro_modelos.PlanFeatures, opcional
+        Cuestionario y orden de features de un modelo registrado.
+    version : str, opcional
+        Versión del modelo registrado para el almacén (por defecto la del
+        modelo de load_models()).
+    
+    Retorna:
+    --------
+    dict : Resultado de predecir()
+    """
+    datos_estudiante = plan.preparar(data) if plan is not None else preparar_datos(data)
+    cronometro.marcar('preparar')
+    
+    if cache is not None:
+        calcular = lambda datos: cache.predecir(datos, cronometro)
+    else:
+        calcular = lambda datos: predecir(datos, modelo, label_encoder, cronometro, plan)
+    
+    if almacen is not None:
+        resultado = almacen.predecir(datos_estudiante, calcular, version)
+        cronometro.marcar('almacen')
+        return resultado
+    return calcular(datos_estudiante)
+
+def crear_cache(modelo, label_encoder, almacen=None):
+    """
+    Caché de predicciones para un proceso de larga duración (None si
+    CACHE_TAMANO es 0). Si hay almacén, su versión se actualiza cuando la
+    caché recarga el modelo.
+    """
+    if CACHE_TAMANO <= 0:
+        return None
+    from cache_prediccion import CachePrediccion
+    al_recargar = almacen.actualizar_version if almacen is not None else None
+    return CachePrediccion(modelo, label_encoder, capacidad=CACHE_TAMANO, al_recargar=al_recargar)
+
+def crear_almacen(registro=None):
+    """
+    Almacén SQLite de resultados (None si ALMACEN_MAX es 0 o no se puede
+    abrir la base: en ese caso se predice sin almacén). Con registro de
+    modelos se conservan los resultados de los modelos cargados y se limpian
+    los de versiones reemplazadas.
+    """
+    if ALMACEN_MAX <= 0:
+        return None
+    try:
+        from almacen_resultados import AlmacenResultados
+        almacen = AlmacenResultados(max_entradas=ALMACEN_MAX, limpiar=registro is None)
+    except Exception as e:
+        print(f'Almacén de resultados desactivado: {e}', file=sys.stderr)
+        return None
+    if registro is not None:
+        almacen.conservar_versiones(registro.versiones())
+        registro.al_cambiar = lambda registro: almacen.conservar_versiones(registro.versiones())
+    return almacen
+
+def crear_registro():
+    """
+    Registro de modelos con manifiesto (None si REGISTRO_DIR no tiene modelos
+    registrados o ninguno se pudo cargar: en ese caso se usa load_models()).
+    Cada modelo registrado tiene su propia caché.
+    """
+    if not any(REGISTRO_DIR.glob('*/manifiesto.json')):
+        return None
+    from registro_modelos import RegistroModelos
+    
+    def crear_cache_modelo(entrada):
+        if CACHE_TAMANO <= 0:
+            return None
+        from cache_prediccion import CachePrediccion
+        return CachePrediccion(entrada.modelo, entrada.label_encoder, capacidad=CACHE_TAMANO,
+                               intervalo_verificacion=None, plan=entrada.plan)
+    
+    registro = RegistroModelos(REGISTRO_DIR, MODELO_PREDETERMINADO, crear_cache=crear_cache_modelo)
+    registro.revisar()
+    if not registro.modelos:
+        print('Registro de modelos sin modelos válidos, se usa load_models()', file=sys.stderr)
+        return None
+    return registro
+
+def crear_metricas():
+    """Registro de métricas del proceso (None si ML_METRICAS no es 1)."""
+    if not METRICAS:
+        return None
+    return Metricas(archivo=METRICAS_ARCHIVO, intervalo=METRICAS_INTERVALO)
+
+def crear_perfilador():
+    """
+    Perfilador por muestreo (None si ML_PERFILADO es 0 o el directorio no se
+    puede crear: en ese caso se predice sin perfilar).
+    """
+    if PERFILADO <= 0:
+        return None
+    try:
+        from perfilador import Perfilador
+        return Perfilador(PERFILADO, PERFILADO_DIR, int(PERFILADO_MAX_MB * 1024 * 1024),
+                          memoria=PERFILADO_MEMORIA)
+    except OSError as e:
+        print(f'Perfilado desactivado: {e}', file=sys.stderr)
+        return None
+
+def servir(modelo, label_encoder, entrada=None, salida=None, cache=None, almacen=None,
+           metricas=None, perfilador=None, registro=None):
+    """
+    Modo de larga duración (--serve): atiende solicitudes NDJSON.
+    
+    Cada línea de entrada es un objeto {"id": ..., "datos": {...}} y por cada
+    una se escribe una línea con el resultado de la predicción y el mismo "id".
+    Los modelos se cargan una sola vez al arrancar el proceso.
+    
+    La línea {"id": ..., "comando": "estadisticas"} responde con los contadores
+    de la caché en "cache" y los del almacén en "almacen" (null si no hay).
+    
+    Con métricas, cada respuesta lleva en "tiempos" las etapas de la solicitud
+    y la "correlacion" recibida, los tiempos se suman a los histogramas y
+    {"id": ..., "comando": "metricas"} responde con el texto Prometheus en
+    "metricas".
+    
+    Con perfilador, las solicitudes muestreadas se perfilan con cProfile y se
+    guardan con sus tiempos y su entrada (perfilador.py).
+    
+    Con registro de modelos (registro_modelos.py) se ignoran modelo, label_encoder
+    y cache: cada solicitud usa el modelo indicado en "modelo" (o el
+    predeterminado) con su caché, y la respuesta indica en "modelo" cuál se
+    usó. El modelo se toma una vez al empezar la solicitud, así que una
+    recarga en caliente no afecta a la solicitud en curso.
+    """
+    entrada = entrada or sys.stdin
+    salida = salida or sys.stdout
+    
+    for linea in entrada:
+        linea = linea.strip()
+        if not linea:
+            continue
+        
+        id_solicitud = None
+        medir = metricas is not None or perfilador is not None
+        cronometro = Cronometro() if medir else CRONOMETRO_NULO
+        try:
+            solicitud = json.loads(linea)
+            id_solicitud = solicitud.get('id')
+            cronometro.correlacion = solicitud.get('correlacion')
+            cronometro.marcar('leer_entrada')
+            if solicitud.get('comando') == 'estadisticas':
+                cronometro = CRONOMETRO_NULO
+                resultado = {
+                    'success': True,
+                    'cache': cache.estadisticas() if cache is not None else None,
+                    'almacen': almacen.estadisticas() if almacen is not None else None
+                }
+                if registro is not None:
+                    resultado['modelos'] = registro.estadisticas()
+            elif solicitud.get('comando') == 'metricas':
+                cronometro = CRONOMETRO_NULO
+                resultado = {
+                    'success': True,
+                    'metricas': metricas.texto() if metricas is not None else None
+                }
+            else:
+                muestra = perfilador.iniciar() if perfilador is not None else None
+                try:
+                    if registro is not None:
+                        registrado = registro.obtener(solicitud.get('modelo'))
+                        resultado = procesar_entrada(
+                            solicitud['datos'], registrado.modelo, registrado.label_encoder,
+                            registrado.cache, almacen, cronometro, registrado.plan,
+                            registrado.version)
+                        resultado = {**resultado, 'modelo': registrado.nombre}
+                    else:
+                        resultado = procesar_entrada(solicitud['datos'], modelo, label_encoder,
+                                                     cache, almacen, cronometro)
+                finally:
+                    if muestra is not None:
+                        perfilador.guardar(muestra, cronometro.resumen(), solicitud['datos'],
+                                           cronometro.correlacion)
+        except json.JSONDecodeError as e:
+            resultado = {
+                'success': False,
+                'error': f'Error al parsear JSON: {str(e)}'
+            }
+        except Exception as e:
+            resultado = {
+                'success': False,
+                'error': str(e)
+            }
+        
+        respuesta = {'id': id_solicitud, **resultado}
+        if metricas is not None and cronometro.activo:
+            # La etapa 'salida' de esta solicitud solo llega a los histogramas
+            respuesta['tiempos'] = cronometro.resumen()
+        salida.write(json.dumps(respuesta, ensure_ascii=False) + '\n')
+        salida.flush()
+        if metricas is not None and cronometro.activo:
+            cronometro.marcar('salida')
+            metricas.registrar(cronometro, resultado.get('success', False))
+
 def main():
     """Función principal."""
     try:
+        # Puntuación masiva de archivos (ver puntuar_archivo.py)
+        if len(sys.argv) > 1 and sys.argv[1] == 'score-file':
+            from puntuar_archivo import main as puntuar_archivo
+            puntuar_archivo(sys.argv[2:])
+            return
+        
+        # Tiempo de arranque por módulo importado (ver informe_arranque.py)
+        if len(sys.argv) > 1 and sys.argv[1] == '--startup-report':
+            from informe_arranque import main as informe_arranque
+            informe_arranque(sys.argv[2:])
+            return
+        
+        # Modo servidor: cargar modelos una vez y atender solicitudes por stdin
+        if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+            registro = crear_registro()
+            if registro is not None:
+                registro.iniciar_vigilancia(REGISTRO_INTERVALO)
+                servir(None, None, almacen=crear_almacen(registro), metricas=crear_metricas(),
+                       perfilador=crear_perfilador(), registro=registro)
+                return
+            modelo, label_encoder = load_models()
+            almacen = crear_almacen()
+            cache = crear_cache(modelo, label_encoder, almacen)
+            servir(modelo, label_encoder, cache=cache, almacen=almacen,
+                   metricas=crear_metricas(), perfilador=crear_perfilador())
+            return
+        
+        # Tiempos por etapa con la correlación que envía mlService.js
+        perfilador = crear_perfilador()
+        if METRICAS or perfilador is not None:
+            cronometro = Cronometro(os.environ.get('ML_CORRELACION'), inicio_ns=INICIO_NS)
+        else:
+            cronometro = CRONOMETRO_NULO
+        cronometro.marcar('importar')
+        
         # Leer datos de entrada desde stdin
         if len(sys.argv) > 1:
             # Si se pasa como argumento
@@ -269,20 +926,54 @@ def main():
         
         # Parsear JSON
         data = json.loads(input_data)
+        cronometro.marcar('leer_entrada')
         
-        # Cargar modelos
-        modelo, label_encoder = load_models()
-        
-        # Verificar si vienen respuestas individuales o promedios
-        if 'q1' in data:
-            # Vienen respuestas individuales, calcular promedios
-            datos_estudiante = calcular_promedios(data)
+        # Modelo registrado (ML_MODELO o el predeterminado): solo se lee su
+        # manifiesto, los artefactos se cargan si el almacén no tiene el resultado.
+        # Un ML_MODELO sin manifiesto es un error, como en --serve
+        manifiesto = None
+        nombre_modelo = os.environ.get('ML_MODELO')
+        ruta_manifiesto = REGISTRO_DIR / (nombre_modelo or MODELO_PREDETERMINADO) / 'manifiesto.json'
+        if nombre_modelo and not ruta_manifiesto.exists():
+            raise LookupError(f'Modelo desconocido: {nombre_modelo}')
+        if ruta_manifiesto.exists():
+            from registro_modelos import PlanFeatures, cargar_modelo, version_manifiesto
+            manifiesto = json.loads(ruta_manifiesto.read_text(encoding='utf-8'))
+            plan = PlanFeatures(manifiesto['features'], manifiesto['cuestionario'])
+            version = version_manifiesto(manifiesto)
         else:
-            # Ya vienen los promedios calculados
-            datos_estudiante = data
+            plan = version = None
+        
+        # Si el resultado ya está en el almacén no hace falta cargar los modelos
+        almacen = crear_almacen()
+        cronometro.marcar('almacen')
+        datos_estudiante = plan.preparar(data) if plan is not None else preparar_datos(data)
+        cronometro.marcar('preparar')
+        
+        def calcular(datos):
+            if manifiesto is not None:
+                registrado = cargar_modelo(ruta_manifiesto, verificar_hashes=False,
+                                           manifiesto=manifiesto)
+                modelo, label_encoder = registrado.modelo, registrado.label_encoder
+            else:
+                modelo, label_encoder = load_models()
+            cronometro.marcar('cargar_modelo')
+            return predecir(datos, modelo, label_encoder, cronometro, plan)
         
         # Realizar predicción
-        resultado = predecir(datos_estudiante, modelo, label_encoder)
+        muestra = perfilador.iniciar() if perfilador is not None else None
+        try:
+            if almacen is not None:
+                resultado = almacen.predecir(datos_estudiante, calcular, version)
+                cronometro.marcar('almacen')
+            else:
+                resultado = calcular(datos_estudiante)
+        finally:
+            if muestra is not None:
+                perfilador.guardar(muestra, cronometro.resumen(), data, cronometro.correlacion)
+        
+        if METRICAS:
+            resultado = {**resultado, 'tiempos': cronometro.resumen()}
         
         # Imprimir resultado como JSON
         print(json.dumps(resultado, ensure_ascii=False, indent=2))
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Puntuación masiva de archivos de cuestionarios (CSV o JSONL).
+
+Lee el archivo por bloques de tamaño fijo, los puntúa en un pool de procesos
+(cada worker carga el modelo una sola vez) y escribe los resultados en orden,
+bloque a bloque, como JSONL o CSV. Solo hay una cantidad acotada de bloques en
+vuelo, así que la memoria no depende del tamaño del archivo.
+
+Cada fila puede traer las respuestas q1..q62 (q63-q65 se ignoran) o los
+promedios R..N, como en datasets/dataset_orientacion_vocacional_*.csv.
+
+Uso:
+    python puntuar_archivo.py entrada.csv salida.jsonl --workers 4
+    python puntuar_archivo.py entrada.jsonl salida.csv --bloque 2000
+    python puntuar_archivo.py entrada.csv salida.jsonl --reanudar
+    python predict.py score-file entrada.csv salida.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from predict import (FEATURE_ORDER, N_PREGUNTAS, calcular_promedios_lote, load_models,
+                     predecir_lote)
+
+# Columnas de la salida CSV (el top 5 se aplana en carrera_N / porcentaje_N)
+COLUMNAS_CSV = (
+    ['fila', 'id', 'success', 'carrera_recomendada', 'porcentaje_confianza']
+    + [f'{campo}_{i}' for i in range(1, 6) for campo in ('carrera', 'porcentaje')]
+    + ['ajuste_aplicado', 'error']
+)
+
+# Modelo del proceso worker (se carga una vez en inicializar_worker)
+_modelo = None
+_label_encoder = None
+
+def inicializar_worker():
+    global _modelo, _label_encoder
+    _modelo, _label_encoder = load_models()
+
+def detectar_formato(ruta):
+    return 'jsonl' if Path(ruta).suffix.lower() in ('.jsonl', '.ndjson', '.json') else 'csv'
+
+def leer_registros(ruta, formato):
+    """Genera un diccionario por registro del archivo de entrada, sin cargarlo entero."""
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+        if formato == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+def convertir_fila(registro):
+    """
+    Convierte un registro en respuestas (62 enteros) o promedios (14 floats).
+    Una respuesta con decimales (3.7) es un error: no se trunca.
+
+    Retorna:
+    --------
+    tuple : ('respuestas' | 'promedios', valores) o ('error', mensaje)
+    """
+    if 'q1' in registro:
+        valores = []
+        for i in range(1, N_PREGUNTAS + 1):
+            valor = registro.get(f'q{i}')
+            if valor in (None, ''):
+                valores.append(0)
+                continue
+            try:
+                numero = float(valor)
+            except ValueError:
+                return 'error', f'La respuesta q{i} no es numérica: {valor!r}'
+            if not numero.is_integer():
+                return 'error', f'La respuesta q{i} no es un entero: {valor!r}'
+            valores.append(int(numero))
+        return 'respuestas', valores
+
+    valores = []
+    for dimension in FEATURE_ORDER:
+        valor = registro.get(dimension)
+        if valor in (None, ''):
+            return 'error', f'Falta la dimensión {dimension}'
+        try:
+            valores.append(float(valor))
+        except ValueError:
+            return 'error', f'La dimensión {dimension} no es numérica: {valor!r}'
+    return 'promedios', valores
+
+def puntuar_bloque(inicio, registros, columna_id=None, modelo=None, label_encoder=None):
+    """
+    Puntúa un bloque de registros.
+
+    Retorna:
+    --------
+    list : Un resultado por registro, en orden, con 'fila' (índice en el archivo)
+        y, si se indicó columna_id, 'id'.
+    """
+    modelo = modelo or _modelo
+    label_encoder = label_encoder or _label_encoder
+
+    resultados = [None] * len(registros)
+    filas_respuestas, respuestas = [], []
+    filas_promedios, promedios = [], []
+
+    for i, registro in enumerate(registros):
+        tipo, valores = convertir_fila(registro)
+        if tipo == 'respuestas':
+            filas_respuestas.append(i)
+            respuestas.append(valores)
+        elif tipo == 'promedios':
+            filas_promedios.append(i)
+            promedios.append(valores)
+        else:
+            resultados[i] = {'success': False, 'error': valores}
+
+    if respuestas:
+        matriz = np.array(respuestas, dtype=np.int64)
+        if matriz.min() >= 0 and matriz.max() <= 255:
+            matriz = matriz.astype(np.uint8)
+        perfiles, faltantes, fuera_de_rango = calcular_promedios_lote(matriz)
+        for i, falta, fuera in zip(filas_respuestas, faltantes, fuera_de_rango):
+            if falta:
+                resultados[i] = {'success': False, 'error': 'Faltan respuestas'}
+            elif fuera:
+                resultados[i] = {'success': False, 'error': 'Las respuestas deben estar entre 1 y 5'}
+        validas = ~(faltantes | fuera_de_rango)
+        filas_promedios.extend(np.asarray(filas_respuestas)[validas].tolist())
+        promedios.extend(perfiles[validas].tolist())
+
+    if promedios:
+        for i, resultado in zip(filas_promedios, predecir_lote(np.array(promedios), modelo, label_encoder)):
+            resultados[i] = resultado
+
+    salida = []
+    for i, (registro, resultado) in enumerate(zip(registros, resultados)):
+        fila = {'fila': inicio + i}
+        if columna_id:
+            fila['id'] = registro.get(columna_id)
+        fila.update(resultado)
+        salida.append(fila)
+    return salida
+
+def fila_csv(resultado):
+    """Aplana un resultado en las columnas de COLUMNAS_CSV."""
+    fila = {
+        'fila': resultado['fila'],
+        'id': resultado.get('id', ''),
+        'success': resultado['success'],
+        'carrera_recomendada': resultado.get('carrera_recomendada', ''),
+        'porcentaje_confianza': resultado.get('porcentaje_confianza', ''),
+        'ajuste_aplicado': resultado.get('ajuste_aplicado') or '',
+        'error': resultado.get('error', ''),
+    }
+    for i, carrera in enumerate(resultado.get('top_5_carreras', []), start=1):
+        fila[f'carrera_{i}'] = carrera['carrera']
+        fila[f'porcentaje_{i}'] = carrera['porcentaje']
+    return fila
+
+class EscritorResultados:
+    """Escribe resultados en JSONL o CSV, en modo agregar si se reanuda."""
+
+    def __init__(self, ruta, formato, agregar=False):
+        self.formato = formato
+        escribir_cabecera = not (agregar and Path(ruta).exists() and Path(ruta).stat().st_size > 0)
+        self.archivo = open(ruta, 'a' if agregar else 'w', encoding='utf-8', newline='')
+        if formato == 'csv':
+            self.csv = csv.DictWriter(self.archivo, fieldnames=COLUMNAS_CSV, extrasaction='ignore')
+            if escribir_cabecera:
+                self.csv.writeheader()
+
+    def escribir(self, resultados):
+        if self.formato == 'csv':
+            self.csv.writerows(fila_csv(r) for r in resultados)
+        else:
+            self.archivo.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in resultados)
+        # Cada bloque queda completo en disco: --reanudar parte del último escrito
+        self.archivo.flush()
+
+    def cerrar(self):
+        self.archivo.close()
+
+def ultima_fila_escrita(ruta, formato):
+    """
+    Índice de la siguiente fila a puntuar según la salida existente. Si la
+    última línea quedó cortada (proceso interrumpido), se elimina. Solo se
+    lee el final del archivo.
+    """
+    ruta = Path(ruta)
+    if not ruta.exists() or ruta.stat().st_size == 0:
+        return 0
+
+    with open(ruta, 'rb+') as f:
+        tamano = f.seek(0, os.SEEK_END)
+        leer = 1 << 16
+        while True:
+            inicio = max(0, tamano - leer)
+            f.seek(inicio)
+            final = f.read()
+            completas = final[:final.rfind(b'\n') + 1]
+            # Hace falta al menos una línea completa (o haber leído todo el archivo)
+            if completas.count(b'\n') >= 2 or inicio == 0:
+                break
+            leer *= 2
+        if len(completas) < len(final):
+            f.truncate(inicio + len(completas))
+
+    lineas = completas.decode('utf-8', errors='replace').splitlines()
+    if inicio > 0:
+        # La primera línea leída puede estar incompleta
+        lineas = lineas[1:]
+    if not lineas:
+        return 0
+    if formato == 'csv':
+        ultima = next(csv.reader([lineas[-1]]))[0]
+        return int(ultima) + 1 if ultima != 'fila' else 0
+    return json.loads(lineas[-1])['fila'] + 1
+
+class Progreso:
+    """Reporta por stderr filas procesadas y filas/s cada `intervalo` segundos."""
+
+    def __init__(self, desde, intervalo):
+        self.desde = desde
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self.ultimo_reporte = self.inicio
+        self.filas = 0
+        self.errores = 0
+
+    def sumar(self, resultados):
+        self.filas += len(resultados)
+        self.errores += sum(1 for r in resultados if not r['success'])
+        ahora = time.perf_counter()
+        if self.intervalo and ahora - self.ultimo_reporte >= self.intervalo:
+            self.ultimo_reporte = ahora
+            print(f'   {self.desde + self.filas} filas  ({self.filas / (ahora - self.inicio):.0f} filas/s)',
+                  file=sys.stderr)
+
+    def resumen(self):
+        segundos = time.perf_counter() - self.inicio
+        return (f'✅ {self.filas} filas puntuadas en {segundos:.1f} s '
+                f'({self.filas / segundos if segundos else 0:.0f} filas/s), {self.errores} con error')
+
+def puntuar_archivo(entrada, salida, workers=None, tamano_bloque=1000, desde=0,
+                    formato_entrada=None, formato_salida=None, columna_id=None,
+                    intervalo_progreso=2.0):
+    """
+    Puntúa un archivo completo y devuelve el objeto Progreso con los totales.
+    Con workers=0 todo se hace en el proceso actual.
+    """
+    formato_entrada = formato_entrada or detectar_formato(entrada)
+    formato_salida = formato_salida or detectar_formato(salida)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    registros = islice(leer_registros(entrada, formato_entrada), desde, None)
+    escritor = EscritorResultados(salida, formato_salida, agregar=desde > 0)
+    progreso = Progreso(desde, intervalo_progreso)
+
+    def bloques():
+        inicio = desde
+        while True:
+            bloque = list(islice(registros, tamano_bloque))
+            if not bloque:
+                return
+            yield inicio, bloque
+            inicio += len(bloque)
+
+    try:
+        if workers == 0:
+            modelo, label_encoder = load_models()
+            for inicio, bloque in bloques():
+                resultados = puntuar_bloque(inicio, bloque, columna_id, modelo, label_encoder)
+                escritor.escribir(resultados)
+                progreso.sumar(resultados)
+            return progreso
+
+        # Ventana acotada de bloques en vuelo; se escriben en el orden de envío
+        en_vuelo = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker) as pool:
+            for inicio, bloque in bloques():
+                en_vuelo.append(pool.submit(puntuar_bloque, inicio, bloque, columna_id))
+                if len(en_vuelo) >= 2 * workers:
+                    resultados = en_vuelo.popleft().result()
+                    escritor.escribir(resultados)
+                    progreso.sumar(resultados)
+            while en_vuelo:
+                resultados = en_vuelo.popleft().result()
+                escritor.escribir(resultados)
+                progreso.sumar(resultados)
+        return progreso
+    finally:
+        escritor.cerrar()
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Puntuación masiva de cuestionarios CSV/JSONL')
+    parser.add_argument('entrada', help='Archivo CSV o JSONL con respuestas q1..q62 o promedios R..N')
+    parser.add_argument('salida', help='Archivo de resultados (.jsonl o .csv)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos del pool (por defecto, uno por núcleo; 0 = sin pool)')
+    parser.add_argument('--bloque', type=int, default=1000, help='Filas por bloque')
+    parser.add_argument('--desde', type=int, default=0,
+                        help='Saltar las primeras N filas y agregar a la salida')
+    parser.add_argument('--reanudar', action='store_true',
+                        help='Continuar desde la última fila escrita en la salida')
+    parser.add_argument('--formato-entrada', choices=['csv', 'jsonl'])
+    parser.add_argument('--formato-salida', choices=['csv', 'jsonl'])
+    parser.add_argument('--id', dest='columna_id', help='Columna a copiar como "id" en la salida')
+    parser.add_argument('--progreso', type=float, default=2.0,
+                        help='Segundos entre reportes de progreso (0 = sin reportes)')
+    args = parser.parse_args(argv)
+
+    formato_salida = args.formato_salida or detectar_formato(args.salida)
+    desde = args.desde
+    if args.reanudar:
+        desde = ultima_fila_escrita(args.salida, formato_salida)
+        print(f'Reanudando desde la fila {desde}', file=sys.stderr)
+
+    progreso = puntuar_archivo(
+        args.entrada, args.salida, workers=args.workers, tamano_bloque=args.bloque,
+        desde=desde, formato_entrada=args.formato_entrada, formato_salida=formato_salida,
+        columna_id=args.columna_id, intervalo_progreso=args.progreso,
+    )
+    print(progreso.resumen(), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reentrenamiento incremental del Random Forest con resultados etiquetados.
+
+En lugar de volver a ajustar los 200 árboles con todo el CSV, cada ciclo:
+
+1. Lee los registros nuevos (CSV o JSONL exportado de los resultados del test,
+   con respuestas q1..q62 o promedios R..N y la carrera confirmada).
+2. Ajusta `--arboles` árboles nuevos con warm_start sobre los registros nuevos
+   más una muestra estratificada del histórico acumulado.
+3. Retira la misma cantidad de árboles, los más antiguos, así que el bosque
+   mantiene su tamaño (y su latencia).
+4. Mide la exactitud antes y después sobre una partición de validación que se
+   congela al iniciar y nunca se usa para entrenar, y la compara con la del
+   ciclo 0: si cae más de `--max-caida`, el ciclo no se publica.
+5. Guarda el bosque en versiones/<versión>/ como modelo_random_forest.pkl y
+   label_encoder.pkl, los mismos archivos que lee load_models(), y agrega los
+   registros nuevos al histórico.
+
+El estado vive en reentrenamiento/ (ML_REENTRENAMIENTO_DIR): validacion.npz,
+historico.npz, ciclos.json y versiones/.
+
+Uso:
+    python reentrenamiento_incremental.py iniciar
+    python reentrenamiento_incremental.py ciclo resultados_2025_2.csv --arboles 40
+    python reentrenamiento_incremental.py ciclo resultados.jsonl --instalar
+    python reentrenamiento_incremental.py ciclo resultados.jsonl --registrar principal
+    python reentrenamiento_incremental.py historial
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from predict import FEATURE_ORDER, SCRIPT_DIR, calcular_promedios_lote
+from puntuar_archivo import convertir_fila, detectar_formato, leer_registros
+
+DATASETS_DIR = SCRIPT_DIR.parent.parent / 'datasets'
+ESTADO_DIR = Path(os.environ.get('ML_REENTRENAMIENTO_DIR', SCRIPT_DIR / 'reentrenamiento'))
+
+# Columnas con la carrera confirmada, en orden de preferencia
+COLUMNAS_CARRERA = ('carrera_confirmada', 'Carrera')
+
+# Versiones que se conservan en versiones/ (la actual y las dos anteriores)
+VERSIONES_CONSERVADAS = 3
+
+# Filas mínimas por carrera en la muestra del histórico: warm_start recalcula
+# classes_ con las etiquetas del ciclo, así que todas tienen que estar
+MIN_POR_CARRERA = 5
+
+class EstadoReentrenamiento:
+    """
+    Archivos del reentrenamiento incremental.
+
+    Parámetros:
+    -----------
+    directorio : Path
+        Directorio del estado (por defecto ESTADO_DIR).
+    """
+
+    def __init__(self, directorio=ESTADO_DIR):
+        self.directorio = Path(directorio)
+        self.versiones = self.directorio / 'versiones'
+        self.validacion_path = self.directorio / 'validacion.npz'
+        self.historico_path = self.directorio / 'historico.npz'
+        self.ciclos_path = self.directorio / 'ciclos.json'
+
+    def existe(self):
+        return self.ciclos_path.exists()
+
+    def ciclos(self):
+        return json.loads(self.ciclos_path.read_text(encoding='utf-8'))
+
+    def guardar_ciclos(self, ciclos):
+        temporal = self.ciclos_path.with_suffix('.tmp')
+        temporal.write_text(json.dumps(ciclos, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temporal, self.ciclos_path)
+
+    def cargar(self, ruta):
+        with np.load(ruta) as arrays:
+            return {nombre: arrays[nombre] for nombre in arrays.files}
+
+    def guardar(self, ruta, **arrays):
+        temporal = ruta.with_suffix('.tmp.npz')
+        np.savez(temporal, **arrays)
+        os.replace(temporal, ruta)
+
+    def version_actual(self):
+        """Directorio de la última versión publicada."""
+        return self.versiones / self.ciclos()[-1]['version']
+
+def leer_etiquetados(ruta, label_encoder, columna=None):
+    """
+    Lee un CSV/JSONL de resultados con carrera confirmada.
+
+    Retorna:
+    --------
+    tuple : (X, y, rechazados) con X (n, 14) en el orden FEATURE_ORDER, y
+    codificada con el label encoder y un conteo de motivos de rechazo.
+    """
+    conocidas = {str(c): i for i, c in enumerate(label_encoder.classes_)}
+    promedios, respuestas, y, y_respuestas = [], [], [], []
+    rechazados = {}
+
+    def rechazar(motivo):
+        rechazados[motivo] = rechazados.get(motivo, 0) + 1
+
+    for registro in leer_registros(ruta, detectar_formato(ruta)):
+        # Exportación del backend: el perfil calculado viene en 'profile'
+        if isinstance(registro.get('profile'), dict) and 'q1' not in registro:
+            registro = dict(registro['profile'], **{k: v for k, v in registro.items() if k != 'profile'})
+        carrera = next((registro[c] for c in ([columna] if columna else COLUMNAS_CARRERA)
+                        if registro.get(c) not in (None, '')), None)
+        if carrera is None:
+            rechazar('sin carrera confirmada')
+            continue
+        if str(carrera) not in conocidas:
+            rechazar(f'carrera desconocida: {carrera}')
+            continue
+        tipo, valores = convertir_fila(registro)
+        if tipo == 'respuestas':
+            respuestas.append(valores)
+            y_respuestas.append(conocidas[str(carrera)])
+        elif tipo == 'promedios':
+            promedios.append(valores)
+            y.append(conocidas[str(carrera)])
+        else:
+            rechazar(valores)
+
+    X = np.array(promedios, dtype=np.float64).reshape(-1, len(FEATURE_ORDER))
+    if respuestas:
+        matriz = np.array(respuestas, dtype=np.int64)
+        if matriz.min() >= 0 and matriz.max() <= 255:
+            matriz = matriz.astype(np.uint8)
+        perfiles, faltantes, fuera_de_rango = calcular_promedios_lote(matriz)
+        validas = ~(faltantes | fuera_de_rango)
+        for _ in range(int((~validas).sum())):
+            rechazar('respuestas incompletas o fuera de rango')
+        X = np.vstack([X, perfiles[validas, :len(FEATURE_ORDER)]])
+        y = y + np.asarray(y_respuestas)[validas].tolist()
+    return X, np.asarray(y, dtype=np.int64), rechazados
+
+def muestra_historico(y_historico, cantidad, clases, azar):
+    """
+    Índices de una muestra estratificada del histórico de `cantidad` filas,
+    con al menos MIN_POR_CARRERA por carrera.
+    """
+    cantidad = min(cantidad, len(y_historico))
+    indices = []
+    for clase in range(clases):
+        propias = np.flatnonzero(y_historico == clase)
+        cuota = max(MIN_POR_CARRERA, round(cantidad * len(propias) / len(y_historico)))
+        indices.append(azar.choice(propias, min(cuota, len(propias)), replace=False))
+    return np.concatenate(indices)
+
+def evaluar(modelo, X, y):
+    """Exactitud y recall del top 5."""
+    probabilidades = modelo.predict_proba(X)
+    top5 = np.argsort(-probabilidades, axis=1, kind='stable')[:, :5]
+    return {
+        'exactitud': round(float((probabilidades.argmax(axis=1) == y).mean()), 4),
+        'top5': round(float((top5 == y[:, None]).any(axis=1).mean()), 4),
+    }
+
+def agregar_arboles(modelo, X, y, arboles, semilla):
+    """
+    Ajusta `arboles` árboles nuevos con warm_start sobre (X, y) y retira los
+    `arboles` más antiguos (sklearn agrega los nuevos al final de estimators_).
+    """
+    import pandas as pd
+
+    tamano = len(modelo.estimators_)
+    # Sin una semilla por ciclo, warm_start daría a los árboles nuevos las
+    # mismas semillas en cada ciclo (el bosque siempre vuelve a tener 200)
+    modelo.set_params(warm_start=True, oob_score=False, n_estimators=tamano + arboles,
+                      random_state=semilla)
+    modelo.fit(pd.DataFrame(X, columns=FEATURE_ORDER), y)
+    modelo.estimators_ = modelo.estimators_[arboles:]
+    modelo.set_params(warm_start=False, n_estimators=tamano)
+    return modelo
+
+def publicar_version(estado, modelo, label_encoder, version, metadatos):
+    """Escribe versiones/<version>/ completa antes de moverla a su lugar."""
+    import joblib
+
+    estado.versiones.mkdir(parents=True, exist_ok=True)
+    temporal = estado.versiones / f'.{version}.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    temporal.mkdir()
+    joblib.dump(modelo, temporal / 'modelo_random_forest.pkl')
+    joblib.dump(label_encoder, temporal / 'label_encoder.pkl')
+    (temporal / 'ciclo.json').write_text(json.dumps(metadatos, ensure_ascii=False, indent=2),
+                                         encoding='utf-8')
+    destino = estado.versiones / version
+    os.replace(temporal, destino)
+
+    anteriores = sorted((d for d in estado.versiones.iterdir()
+                         if d.is_dir() and not d.name.startswith('.')), key=lambda d: d.name)
+    for directorio in anteriores[:-VERSIONES_CONSERVADAS]:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return destino
+
+def instalar(directorio_version, destino=SCRIPT_DIR):
+    """
+    Copia la versión sobre los .pkl de `destino` con os.replace. Los artefactos
+    compilados y la calibración quedan más antiguos que el .pkl, así que
+    load_models() los ignora hasta regenerarlos.
+    """
+    for nombre in ('label_encoder.pkl', 'modelo_random_forest.pkl'):
+        temporal = Path(destino) / f'.{nombre}.tmp'
+        shutil.copy2(directorio_version / nombre, temporal)
+        os.replace(temporal, Path(destino) / nombre)
+        os.utime(Path(destino) / nombre)
+
+def iniciar(estado, modelo_path, encoder_path, dataset, fraccion_validacion=0.15, semilla=42):
+    """
+    Congela la partición de validación, guarda el resto como histórico y ajusta
+    el bosque base (ciclo 0) con los parámetros de `modelo_path` solo sobre el
+    histórico, para que la validación no la haya visto ningún árbol.
+    """
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    import pandas as pd
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split
+
+    from bosque_compilado import cargar_sklearn
+    from carga_datos import cargar_matrices
+
+    if estado.existe():
+        raise FileExistsError(f'{estado.directorio} ya tiene un reentrenamiento iniciado')
+    modelo, label_encoder = cargar_sklearn(modelo_path, encoder_path)
+    X, y = cargar_matrices(dataset, label_encoder)
+    X_historico, X_validacion, y_historico, y_validacion = train_test_split(
+        X, y, test_size=fraccion_validacion, stratify=y, random_state=semilla)
+
+    inicio = time.perf_counter()
+    base = clone(modelo).set_params(random_state=semilla)
+    base.fit(pd.DataFrame(X_historico, columns=FEATURE_ORDER), y_historico)
+    segundos = time.perf_counter() - inicio
+
+    estado.directorio.mkdir(parents=True, exist_ok=True)
+    estado.guardar(estado.validacion_path, X=X_validacion, y=y_validacion)
+    estado.guardar(estado.historico_path, X=X_historico, y=y_historico,
+                   ciclo=np.zeros(len(y_historico), dtype=np.int32))
+
+    validacion = evaluar(base, X_validacion, y_validacion)
+    ciclo = {
+        'ciclo': 0,
+        'version': f'{datetime.now():%Y%m%d-%H%M%S}-c0000',
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'origen': str(dataset),
+        'arboles': len(base.estimators_),
+        'filas_historico': len(y_historico),
+        'filas_validacion': len(y_validacion),
+        'segundos_ajuste': round(segundos, 2),
+        'validacion': validacion,
+    }
+    publicar_version(estado, base, label_encoder, ciclo['version'], ciclo)
+    estado.guardar_ciclos([ciclo])
+    return ciclo
+
+def ciclo_incremental(estado, ruta_nuevos, arboles=40, proporcion_historico=3.0, max_caida=0.02,
+                      columna=None, forzar=False):
+    """
+    Un ciclo de reentrenamiento (ver el docstring del módulo).
+
+    Parámetros:
+    -----------
+    arboles : int
+        Árboles nuevos (y retirados) en el ciclo.
+    proporcion_historico : float
+        Filas del histórico muestreadas por cada registro nuevo.
+    max_caida : float
+        Caída máxima de exactitud de validación respecto del ciclo 0.
+
+    Retorna:
+    --------
+    dict : Reporte del ciclo ('publicado' indica si se escribió la versión).
+    """
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    import joblib
+
+    ciclos = estado.ciclos()
+    anterior = estado.version_actual()
+    modelo = joblib.load(anterior / 'modelo_random_forest.pkl')
+    label_encoder = joblib.load(anterior / 'label_encoder.pkl')
+    if arboles >= len(modelo.estimators_):
+        raise ValueError(f'--arboles debe ser menor que el tamaño del bosque ({len(modelo.estimators_)})')
+
+    X_nuevos, y_nuevos, rechazados = leer_etiquetados(ruta_nuevos, label_encoder, columna)
+    if len(y_nuevos) == 0:
+        raise ValueError(f'{ruta_nuevos} no tiene registros con carrera confirmada válidos')
+    validacion = estado.cargar(estado.validacion_path)
+    historico = estado.cargar(estado.historico_path)
+    numero = ciclos[-1]['ciclo'] + 1
+    semilla = 42 + numero
+
+    # Los nuevos registros, con el bosque actual, antes de aprender de ellos
+    nuevos_antes = evaluar(modelo, X_nuevos, y_nuevos)
+    validacion_antes = evaluar(modelo, validacion['X'], validacion['y'])
+
+    azar = np.random.default_rng(semilla)
+    muestra = muestra_historico(historico['y'], round(len(y_nuevos) * proporcion_historico),
+                                len(label_encoder.classes_), azar)
+    X_ciclo = np.vstack([X_nuevos, historico['X'][muestra]])
+    y_ciclo = np.concatenate([y_nuevos, historico['y'][muestra]])
+
+    inicio = time.perf_counter()
+    agregar_arboles(modelo, X_ciclo, y_ciclo, arboles, semilla)
+    segundos = time.perf_counter() - inicio
+
+    validacion_despues = evaluar(modelo, validacion['X'], validacion['y'])
+    base = ciclos[0]['validacion']['exactitud']
+    deriva = round(validacion_despues['exactitud'] - base, 4)
+    publicado = forzar or deriva >= -max_caida
+
+    reporte = {
+        'ciclo': numero,
+        'version': f'{datetime.now():%Y%m%d-%H%M%S}-c{numero:04d}',
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'origen': str(ruta_nuevos),
+        'anterior': anterior.name,
+        'filas_nuevas': len(y_nuevos),
+        'rechazados': rechazados,
+        'filas_historico_muestreadas': len(muestra),
+        'arboles': len(modelo.estimators_),
+        'arboles_reemplazados': arboles,
+        'segundos_ajuste': round(segundos, 2),
+        'nuevos_antes': nuevos_antes,
+        'validacion_antes': validacion_antes,
+        'validacion': validacion_despues,
+        'deriva_vs_ciclo_0': deriva,
+        'publicado': publicado,
+    }
+    if not publicado:
+        return reporte
+
+    publicar_version(estado, modelo, label_encoder, reporte['version'], reporte)
+    estado.guardar(
+        estado.historico_path,
+        X=np.vstack([historico['X'], X_nuevos]),
+        y=np.concatenate([historico['y'], y_nuevos]),
+        ciclo=np.concatenate([historico['ciclo'], np.full(len(y_nuevos), numero, dtype=np.int32)]),
+    )
+    estado.guardar_ciclos(ciclos + [reporte])
+    return reporte
+
+def imprimir_ciclo(reporte):
+    print(f"Ciclo {reporte['ciclo']} → versión {reporte['version']}")
+    if 'filas_nuevas' in reporte:
+        print(f"   Registros nuevos: {reporte['filas_nuevas']} "
+              f"(+{reporte['filas_historico_muestreadas']} del histórico)")
+        for motivo, cantidad in sorted(reporte['rechazados'].items()):
+            print(f"   Rechazados: {cantidad:5d} × {motivo}")
+        print(f"   Árboles: {reporte['arboles_reemplazados']} nuevos, "
+              f"{reporte['arboles_reemplazados']} retirados, {reporte['arboles']} en total "
+              f"({reporte['segundos_ajuste']:.1f} s)")
+        print(f"   Exactitud en los nuevos antes del ciclo: {reporte['nuevos_antes']['exactitud']:.4f}")
+        print(f"   Validación: {reporte['validacion_antes']['exactitud']:.4f} → "
+              f"{reporte['validacion']['exactitud']:.4f} (top 5 {reporte['validacion']['top5']:.4f}), "
+              f"deriva vs ciclo 0: {reporte['deriva_vs_ciclo_0']:+.4f}")
+    else:
+        print(f"   Bosque base: {reporte['arboles']} árboles, {reporte['filas_historico']} filas "
+              f"de histórico, {reporte['filas_validacion']} de validación congelada")
+        print(f"   Validación: {reporte['validacion']['exactitud']:.4f} "
+              f"(top 5 {reporte['validacion']['top5']:.4f})")
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Reentrenamiento incremental del modelo')
+    parser.add_argument('--directorio', default=ESTADO_DIR, help='Directorio del estado')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    iniciar_parser = subcomandos.add_parser('iniciar', help='Congelar la validación y ajustar el ciclo 0')
+    iniciar_parser.add_argument('--modelo', default=SCRIPT_DIR / 'modelo_random_forest.pkl',
+                                help='Modelo del que se toman los hiperparámetros')
+    iniciar_parser.add_argument('--encoder', default=SCRIPT_DIR / 'label_encoder.pkl')
+    iniciar_parser.add_argument('--dataset',
+                                default=DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv')
+    iniciar_parser.add_argument('--validacion', type=float, default=0.15,
+                                help='Fracción congelada para medir la deriva')
+
+    ciclo_parser = subcomandos.add_parser('ciclo', help='Agregar árboles con registros nuevos')
+    ciclo_parser.add_argument('nuevos', help='CSV o JSONL con carrera confirmada')
+    ciclo_parser.add_argument('--arboles', type=int, default=40, help='Árboles nuevos (y retirados)')
+    ciclo_parser.add_argument('--historico', type=float, default=3.0,
+                              help='Filas del histórico por cada registro nuevo')
+    ciclo_parser.add_argument('--columna', help='Columna de la carrera confirmada')
+    ciclo_parser.add_argument('--max-caida', type=float, default=0.02,
+                              help='Caída de exactitud de validación tolerada respecto del ciclo 0')
+    ciclo_parser.add_argument('--forzar', action='store_true', help='Publicar aunque supere --max-caida')
+    ciclo_parser.add_argument('--instalar', action='store_true',
+                              help='Copiar la versión sobre los .pkl de backend/ml')
+    ciclo_parser.add_argument('--registrar', metavar='NOMBRE',
+                              help='Publicar la versión en el registro de modelos')
+
+    subcomandos.add_parser('historial', help='Mostrar los ciclos')
+    args = parser.parse_args(argv)
+    estado = EstadoReentrenamiento(args.directorio)
+
+    if args.comando == 'iniciar':
+        reporte = iniciar(estado, args.modelo, args.encoder, args.dataset, args.validacion)
+        imprimir_ciclo(reporte)
+        print(f"✅ Reentrenamiento iniciado en {estado.directorio}")
+        return reporte
+
+    if args.comando == 'historial':
+        print(f"{'ciclo':>5} {'versión':<24} {'nuevas':>7} {'validación':>10} {'deriva':>8}")
+        for ciclo in estado.ciclos():
+            print(f"{ciclo['ciclo']:>5} {ciclo['version']:<24} {ciclo.get('filas_nuevas', 0):>7} "
+                  f"{ciclo['validacion']['exactitud']:>10.4f} {ciclo.get('deriva_vs_ciclo_0', 0):>+8.4f}")
+        return estado.ciclos()
+
+    reporte = ciclo_incremental(estado, args.nuevos, args.arboles, args.historico, args.max_caida,
+                                args.columna, args.forzar)
+    imprimir_ciclo(reporte)
+    if not reporte['publicado']:
+        print(f"❌ La exactitud de validación cayó {-reporte['deriva_vs_ciclo_0']:.4f} "
+              f"(máximo {args.max_caida}); no se publicó la versión", file=sys.stderr)
+        sys.exit(1)
+
+    directorio_version = estado.versiones / reporte['version']
+    print(f"✅ Versión guardada en {directorio_version}")
+    if args.instalar:
+        instalar(directorio_version)
+        print(f"   Instalada en {SCRIPT_DIR}; regenera el bosque compilado y la calibración")
+    if args.registrar:
+        from registro_modelos import registrar
+        manifiesto = registrar(args.registrar, directorio_version / 'modelo_random_forest.pkl',
+                               directorio_version / 'label_encoder.pkl')
+        print(f"   Registrada como {manifiesto['nombre']} versión {manifiesto['version']}")
+    return reporte
+
+if __name__ == '__main__':
+    main()
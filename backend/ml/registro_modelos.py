@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de modelos con manifiesto y recarga en caliente.
+
+Cada modelo vive en modelos/<nombre>/ con un manifiesto.json que describe sus
+artefactos (pkl, npz o directorio mmap, en un subdirectorio por versión), el
+orden de features, la lista de clases, el mapeo del cuestionario y el hash
+sha256 del contenido. A partir del manifiesto se compila una sola vez un
+PlanFeatures que arma el vector de entrada del modelo.
+
+Los procesos de larga duración revisan el directorio en un hilo: un modelo
+nuevo o actualizado se carga, se verifica y se calienta antes de reemplazar
+al anterior con una sola asignación, así que las solicitudes en curso
+terminan con el modelo con el que empezaron y ninguna se pierde. Varios
+modelos pueden estar cargados a la vez y elegirse por solicitud
+({"modelo": "<nombre>", "datos": {...}}).
+
+Uso:
+    python registro_modelos.py registrar principal --modelo modelo_random_forest.pkl \\
+        --codificador label_encoder.pkl --formato mmap
+    python registro_modelos.py listar
+"""
+
+import argparse
+import hashlib
+import json
+import operator
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from calibracion import ARCHIVO_CALIBRACION
+from explicaciones import ARCHIVO_EXPLICACIONES
+from indice_vecinos import ARCHIVO_INDICE
+from perfiles_carrera import ARCHIVO_PERFILES
+from predict import (DIMENSION_MAP, EXPLICACIONES, FEATURE_ORDER, MODELO_PREDETERMINADO,
+                     OPCIONES_RESULTADO, PERFILES_CARRERA, REGISTRO_DIR, RENDIMIENTO_MAP, SCRIPT_DIR,
+                     VECINOS, VERSION_REGLAS, artefacto_vigente, predecir)
+
+MANIFIESTO = 'manifiesto.json'
+FORMATOS = ('pkl', 'npz', 'mmap')
+
+# Versiones (subdirectorios) que se conservan por modelo al registrar una nueva:
+# la actual y la anterior, que otros procesos pueden estar terminando de cargar
+VERSIONES_CONSERVADAS = 2
+
+class PlanFeatures:
+    """
+    Arma el vector de features de un modelo según su manifiesto. Se compila
+    una vez por modelo: el orden de features queda en un itemgetter y el
+    cuestionario en tuplas de claves.
+
+    Parámetros:
+    -----------
+    features : list
+        Orden de las columnas del modelo.
+    cuestionario : dict
+        {'promedios': {feature: ['q1', ...]}, 'directas': {feature: 'q63'}}.
+    """
+
+    def __init__(self, features, cuestionario):
+        self.features = tuple(features)
+        self.extraer = operator.itemgetter(*self.features)
+        self.promedios = tuple(
+            (feature, tuple(preguntas))
+            for feature, preguntas in cuestionario.get('promedios', {}).items()
+        )
+        self.directas = tuple(cuestionario.get('directas', {}).items())
+
+        faltantes = set(self.features) - {f for f, _ in self.promedios} - {f for f, _ in self.directas}
+        if faltantes:
+            raise ValueError(f'El cuestionario no define las features: {sorted(faltantes)}')
+
+    def preparar(self, data):
+        """Promedios (y respuestas directas) si vienen respuestas q1..; si no, los datos tal cual."""
+        if 'q1' not in data:
+            return data
+        perfil = {}
+        for feature, preguntas in self.promedios:
+            valores = [data.get(q, 0) for q in preguntas]
+            perfil[feature] = round(sum(valores) / len(valores), 1)
+        for feature, pregunta in self.directas:
+            perfil[feature] = data.get(pregunta, 0)
+        return perfil
+
+    def vector(self, datos):
+        """Fila (1, n_features) float32 en el orden del modelo."""
+        valores = self.extraer(datos)
+        if len(self.features) == 1:
+            valores = (valores,)
+        return np.array([valores], dtype=np.float32)
+
+def cuestionario_predeterminado(features):
+    """Mapeo del cuestionario actual (62 preguntas + rendimiento q63-q65)."""
+    return {
+        'promedios': {f: DIMENSION_MAP[f] for f in features if f in DIMENSION_MAP},
+        'directas': {f: RENDIMIENTO_MAP[f] for f in features if f in RENDIMIENTO_MAP},
+    }
+
+def hash_archivo(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+def hashes_artefactos(directorio):
+    """sha256 de cada archivo del directorio de una versión, por ruta relativa."""
+    directorio = Path(directorio)
+    return {
+        ruta.relative_to(directorio).as_posix(): hash_archivo(ruta)
+        for ruta in sorted(directorio.rglob('*')) if ruta.is_file()
+    }
+
+def hash_contenido(hashes):
+    """Hash único del conjunto de artefactos."""
+    texto = '\n'.join(f'{ruta}:{valor}' for ruta, valor in sorted(hashes.items()))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def cargar_artefactos(directorio_version, manifiesto):
+    """
+    Carga (modelo, label_encoder) según el formato del manifiesto, con su
+    calibración (calibracion.py), su índice de vecinos (indice_vecinos.py),
+    su tabla de perfiles por carrera (perfiles_carrera.py) y sus aportes por
+    nodo (explicaciones.py) si la versión los incluye.
+    """
+    modelo, label_encoder = cargar_formato(directorio_version, manifiesto)
+    calibracion = manifiesto['archivos'].get('calibracion')
+    if calibracion:
+        from calibracion import adjuntar_calibracion
+        adjuntar_calibracion(modelo, label_encoder, directorio_version / calibracion)
+    vecinos = manifiesto['archivos'].get('vecinos')
+    if vecinos and VECINOS > 0:
+        from indice_vecinos import adjuntar_vecinos
+        adjuntar_vecinos(modelo, directorio_version / vecinos)
+    perfiles = manifiesto['archivos'].get('perfiles_carrera')
+    if perfiles and PERFILES_CARRERA:
+        from perfiles_carrera import adjuntar_perfiles
+        adjuntar_perfiles(modelo, label_encoder, directorio_version / perfiles)
+    explicaciones = manifiesto['archivos'].get('explicaciones')
+    if explicaciones and EXPLICACIONES:
+        from explicaciones import adjuntar_explicaciones
+        adjuntar_explicaciones(modelo, label_encoder, directorio_version / explicaciones)
+    return modelo, label_encoder
+
+def cargar_formato(directorio_version, manifiesto):
+    formato = manifiesto['formato']
+    if formato == 'mmap':
+        from bosque_compilado import cargar_mmap
+        return cargar_mmap(directorio_version / manifiesto['archivos']['modelo'])
+    if formato == 'npz':
+        from bosque_compilado import cargar_compilado
+        return cargar_compilado(directorio_version / manifiesto['archivos']['modelo'])
+    if formato == 'pkl':
+        import warnings
+        warnings.filterwarnings('ignore', category=UserWarning)
+        import joblib
+        return (joblib.load(directorio_version / manifiesto['archivos']['modelo']),
+                joblib.load(directorio_version / manifiesto['archivos']['codificador']))
+    raise ValueError(f'Formato de modelo desconocido: {formato}')
+
+class ModeloRegistrado:
+    """Un modelo cargado con su manifiesto, plan de features y caché propia."""
+
+    def __init__(self, nombre, manifiesto, modelo, label_encoder, plan, huella):
+        self.nombre = nombre
+        self.manifiesto = manifiesto
+        self.modelo = modelo
+        self.label_encoder = label_encoder
+        self.plan = plan
+        self.huella = huella
+        self.version = version_manifiesto(manifiesto)
+        self.cache = None
+
+    def predecir(self, datos_estudiante):
+        return predecir(datos_estudiante, self.modelo, self.label_encoder, plan=self.plan)
+
+    def descripcion(self):
+        return {
+            'nombre': self.nombre,
+            'version': self.manifiesto['version'],
+            'formato': self.manifiesto['formato'],
+            'features': len(self.plan.features),
+            'clases': len(self.manifiesto['clases']),
+            'cache': self.cache.estadisticas() if self.cache is not None else None,
+        }
+
+def version_manifiesto(manifiesto):
+    """Versión para el almacén de resultados: artefactos + reglas de negocio + opciones del resultado."""
+    return hashlib.sha256(
+        f"reglas:{VERSION_REGLAS}:{OPCIONES_RESULTADO}:{manifiesto['hash']}".encode('utf-8')
+    ).hexdigest()[:32]
+
+def huella_manifiesto(ruta):
+    estado = os.stat(ruta)
+    return (estado.st_mtime_ns, estado.st_size)
+
+def cargar_modelo(ruta_manifiesto, verificar_hashes=True, manifiesto=None):
+    """
+    Carga y valida un modelo desde su manifiesto (o desde `manifiesto`, si ya
+    se leyó, para no mezclar versiones si se publica otra mientras tanto).
+
+    Retorna:
+    --------
+    ModeloRegistrado
+
+    Lanza ValueError si los hashes, las clases o las features no coinciden
+    con los artefactos.
+    """
+    ruta_manifiesto = Path(ruta_manifiesto)
+    huella = huella_manifiesto(ruta_manifiesto)
+    if manifiesto is None:
+        manifiesto = json.loads(ruta_manifiesto.read_text(encoding='utf-8'))
+    directorio_version = ruta_manifiesto.parent / manifiesto['directorio']
+
+    if verificar_hashes:
+        hashes = hashes_artefactos(directorio_version)
+        if hashes != manifiesto['hashes'] or hash_contenido(hashes) != manifiesto['hash']:
+            raise ValueError(f'Los artefactos de {directorio_version} no coinciden con el manifiesto')
+
+    modelo, label_encoder = cargar_artefactos(directorio_version, manifiesto)
+    if list(label_encoder.classes_) != manifiesto['clases']:
+        raise ValueError('Las clases del codificador no coinciden con el manifiesto')
+    nombres_modelo = getattr(modelo, 'feature_names_in_', None)
+    if nombres_modelo is not None and list(nombres_modelo) != manifiesto['features']:
+        raise ValueError('El orden de features del modelo no coincide con el manifiesto')
+
+    plan = PlanFeatures(manifiesto['features'], manifiesto['cuestionario'])
+    return ModeloRegistrado(manifiesto['nombre'], manifiesto, modelo, label_encoder, plan, huella)
+
+def calentar(entrada, repeticiones=3):
+    """
+    Predicciones de prueba antes de publicar el modelo: trae las páginas del
+    mmap a memoria y falla aquí, y no en una solicitud, si algo está mal.
+    """
+    datos = {feature: 3.0 for feature in entrada.plan.features}
+    for _ in range(repeticiones):
+        resultado = entrada.predecir(datos)
+        if not resultado.get('success'):
+            raise ValueError(f"El modelo {entrada.nombre} falló al calentar: {resultado.get('error')}")
+    entrada.modelo.predict_proba(np.full((256, len(entrada.plan.features)), 3.0))
+
+class RegistroModelos:
+    """
+    Modelos cargados por nombre, con recarga en caliente.
+
+    Parámetros:
+    -----------
+    directorio : str o Path
+        Directorio con un subdirectorio (y su manifiesto.json) por modelo.
+    predeterminado : str
+        Modelo usado cuando la solicitud no indica uno.
+    crear_cache : callable, opcional
+        crear_cache(entrada) -> CachePrediccion o None, para cada modelo cargado.
+    al_cambiar : callable, opcional
+        Se llama con el registro después de cada alta, reemplazo o baja.
+    """
+
+    def __init__(self, directorio=REGISTRO_DIR, predeterminado=MODELO_PREDETERMINADO,
+                 crear_cache=None, al_cambiar=None, verificar_hashes=True):
+        self.directorio = Path(directorio)
+        self.predeterminado = predeterminado
+        self.crear_cache = crear_cache
+        self.al_cambiar = al_cambiar
+        self.verificar_hashes = verificar_hashes
+        # Se reemplaza el diccionario completo: quien lo lee ve el anterior o el nuevo
+        self.modelos = {}
+        self.lock = threading.Lock()
+        self.hilo = None
+        self.detenido = threading.Event()
+        self.contadores = {'cargas': 0, 'errores': 0}
+        # Huella del último manifiesto que falló por modelo: no se reintenta hasta que cambie
+        self.fallidos = {}
+
+    def manifiestos(self):
+        """{nombre: ruta del manifiesto} de los modelos presentes en el directorio."""
+        if not self.directorio.is_dir():
+            return {}
+        return {ruta.parent.name: ruta for ruta in sorted(self.directorio.glob(f'*/{MANIFIESTO}'))}
+
+    def revisar(self):
+        """
+        Carga los modelos nuevos o modificados y quita los borrados.
+
+        Retorna:
+        --------
+        list : Nombres de los modelos que cambiaron.
+        """
+        with self.lock:
+            presentes = self.manifiestos()
+            modelos = dict(self.modelos)
+            cambios = []
+
+            for nombre in set(modelos) - set(presentes):
+                del modelos[nombre]
+                cambios.append(nombre)
+
+            for nombre, ruta in presentes.items():
+                actual = modelos.get(nombre)
+                try:
+                    huella = huella_manifiesto(ruta)
+                    if (actual is not None and actual.huella == huella) or self.fallidos.get(nombre) == huella:
+                        continue
+                    entrada = cargar_modelo(ruta, self.verificar_hashes)
+                    calentar(entrada)
+                    if self.crear_cache is not None:
+                        entrada.cache = self.crear_cache(entrada)
+                except Exception as e:
+                    # Se sigue sirviendo con la versión anterior (si había)
+                    self.contadores['errores'] += 1
+                    self.fallidos[nombre] = huella
+                    print(f'❌ No se pudo cargar el modelo {nombre}: {e}', file=sys.stderr)
+                    continue
+                modelos[nombre] = entrada
+                self.contadores['cargas'] += 1
+                cambios.append(nombre)
+
+            if cambios:
+                self.modelos = modelos
+        if cambios and self.al_cambiar is not None:
+            self.al_cambiar(self)
+        return cambios
+
+    def obtener(self, nombre=None):
+        """Modelo pedido (o el predeterminado). LookupError si no está cargado."""
+        nombre = nombre or self.predeterminado
+        modelos = self.modelos
+        entrada = modelos.get(nombre)
+        if entrada is None:
+            if len(modelos) == 1 and nombre == self.predeterminado:
+                return next(iter(modelos.values()))
+            raise LookupError(f'Modelo desconocido: {nombre}')
+        return entrada
+
+    def versiones(self):
+        return {entrada.version for entrada in self.modelos.values()}
+
+    def iniciar_vigilancia(self, intervalo=2.0):
+        """Revisa el directorio cada `intervalo` segundos en un hilo aparte."""
+        def vigilar():
+            while not self.detenido.wait(intervalo):
+                try:
+                    self.revisar()
+                except Exception as e:
+                    print(f'❌ Error al revisar el registro de modelos: {e}', file=sys.stderr)
+
+        self.detenido.clear()
+        self.hilo = threading.Thread(target=vigilar, name='registro-modelos', daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.detenido.set()
+        if self.hilo is not None:
+            self.hilo.join(timeout=5)
+
+    def estadisticas(self):
+        return {
+            'predeterminado': self.predeterminado,
+            **self.contadores,
+            'modelos': [entrada.descripcion() for entrada in self.modelos.values()],
+        }
+
+def registrar(nombre, modelo_path, encoder_path, formato='mmap', directorio=REGISTRO_DIR,
+              features=None, version=None, calibracion_path=None, indice_path=None,
+              perfiles_path=None):
+    """
+    Copia (o compila) los artefactos en una nueva versión y publica el
+    manifiesto. El manifiesto se escribe al final con os.replace, así que los
+    procesos que vigilan el registro nunca ven una versión a medias.
+    
+    Sin `calibracion_path` se incluye el calibracion.npz que esté junto al
+    modelo, si no es más antiguo que él; lo mismo con `indice_path` y el
+    indice_vecinos.pkl y con `perfiles_path` y el perfiles_carrera.npz. Los
+    aportes por nodo de explicaciones.py se calculan siempre.
+
+    Retorna:
+    --------
+    dict : Manifiesto publicado.
+    """
+    from bosque_compilado import cargar_sklearn, compilar
+    from explicaciones import compilar_explicaciones
+
+    directorio_modelo = Path(directorio) / nombre
+    directorio_modelo.mkdir(parents=True, exist_ok=True)
+    modelo, label_encoder = cargar_sklearn(modelo_path, encoder_path)
+    features = list(features or getattr(modelo, 'feature_names_in_', FEATURE_ORDER))
+    clases = [str(c) for c in label_encoder.classes_]
+
+    temporal = Path(tempfile.mkdtemp(prefix='.nueva-', dir=directorio_modelo))
+    try:
+        if formato == 'pkl':
+            archivos = {'modelo': Path(modelo_path).name, 'codificador': Path(encoder_path).name}
+            shutil.copy2(modelo_path, temporal / archivos['modelo'])
+            shutil.copy2(encoder_path, temporal / archivos['codificador'])
+        elif formato == 'npz':
+            archivos = {'modelo': 'modelo_compilado.npz'}
+            compilar(modelo).guardar(temporal / archivos['modelo'], clases)
+        elif formato == 'mmap':
+            archivos = {'modelo': 'modelo_mmap'}
+            compilar(modelo).guardar_mmap(temporal / archivos['modelo'], clases)
+        else:
+            raise ValueError(f'Formato desconocido: {formato}')
+        archivos['explicaciones'] = ARCHIVO_EXPLICACIONES
+        compilar_explicaciones(modelo, clases).guardar(temporal / ARCHIVO_EXPLICACIONES)
+
+        if calibracion_path is None:
+            candidata = Path(modelo_path).with_name(ARCHIVO_CALIBRACION)
+            if artefacto_vigente(candidata, Path(modelo_path)):
+                calibracion_path = candidata
+        if calibracion_path:
+            archivos['calibracion'] = ARCHIVO_CALIBRACION
+            shutil.copy2(calibracion_path, temporal / ARCHIVO_CALIBRACION)
+
+        if indice_path is None:
+            candidata = Path(modelo_path).with_name(ARCHIVO_INDICE)
+            if artefacto_vigente(candidata, Path(modelo_path)):
+                indice_path = candidata
+        if indice_path:
+            archivos['vecinos'] = ARCHIVO_INDICE
+            shutil.copy2(indice_path, temporal / ARCHIVO_INDICE)
+
+        if perfiles_path is None:
+            candidata = Path(modelo_path).with_name(ARCHIVO_PERFILES)
+            if artefacto_vigente(candidata, Path(modelo_path)):
+                perfiles_path = candidata
+        if perfiles_path:
+            archivos['perfiles_carrera'] = ARCHIVO_PERFILES
+            shutil.copy2(perfiles_path, temporal / ARCHIVO_PERFILES)
+
+        hashes = hashes_artefactos(temporal)
+        contenido = hash_contenido(hashes)
+        version = version or f"{datetime.now():%Y%m%d-%H%M%S}-{contenido[:8]}"
+        destino = directorio_modelo / version
+        if destino.exists():
+            raise FileExistsError(f'La versión {version} ya existe')
+        os.replace(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    manifiesto = {
+        'nombre': nombre,
+        'version': version,
+        'formato': formato,
+        'directorio': version,
+        'archivos': archivos,
+        'features': features,
+        'clases': clases,
+        'cuestionario': cuestionario_predeterminado(features),
+        'hashes': hashes,
+        'hash': contenido,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+    }
+    PlanFeatures(features, manifiesto['cuestionario'])
+
+    temporal_manifiesto = directorio_modelo / f'.{MANIFIESTO}.tmp'
+    temporal_manifiesto.write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(temporal_manifiesto, directorio_modelo / MANIFIESTO)
+
+    limpiar_versiones(directorio_modelo, version)
+    return manifiesto
+
+def limpiar_versiones(directorio_modelo, actual):
+    """Borra las versiones más antiguas, conservando VERSIONES_CONSERVADAS."""
+    versiones = sorted(
+        (d for d in directorio_modelo.iterdir() if d.is_dir() and not d.name.startswith('.')),
+        key=lambda d: d.stat().st_mtime,
+    )
+    for directorio in versiones[:-VERSIONES_CONSERVADAS]:
+        if directorio.name != actual:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Registro de modelos de predicción')
+    parser.add_argument('--directorio', default=REGISTRO_DIR)
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    registrar_parser = subcomandos.add_parser('registrar', help='Publicar una nueva versión de un modelo')
+    registrar_parser.add_argument('nombre')
+    registrar_parser.add_argument('--modelo', default=SCRIPT_DIR / 'modelo_random_forest.pkl')
+    registrar_parser.add_argument('--codificador', default=SCRIPT_DIR / 'label_encoder.pkl')
+    registrar_parser.add_argument('--formato', choices=FORMATOS, default='mmap')
+    registrar_parser.add_argument('--features', nargs='+',
+                                  help='Orden de features (por defecto, el del modelo)')
+    registrar_parser.add_argument('--calibracion',
+                                  help='calibracion.npz (por defecto, el que esté junto al modelo)')
+    registrar_parser.add_argument('--indice',
+                                  help='indice_vecinos.pkl (por defecto, el que esté junto al modelo)')
+    registrar_parser.add_argument('--perfiles',
+                                  help='perfiles_carrera.npz (por defecto, el que esté junto al modelo)')
+
+    subcomandos.add_parser('listar', help='Mostrar los modelos registrados')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'registrar':
+        inicio = time.perf_counter()
+        manifiesto = registrar(args.nombre, args.modelo, args.codificador, args.formato,
+                               args.directorio, args.features, calibracion_path=args.calibracion,
+                               indice_path=args.indice, perfiles_path=args.perfiles)
+        print(f"✅ {manifiesto['nombre']} versión {manifiesto['version']} ({manifiesto['formato']}, "
+              f"{len(manifiesto['features'])} features, {len(manifiesto['clases'])} clases) "
+              f"en {time.perf_counter() - inicio:.1f} s")
+        return
+
+    registro = RegistroModelos(args.directorio, verificar_hashes=True)
+    for nombre, ruta in registro.manifiestos().items():
+        manifiesto = json.loads(ruta.read_text(encoding='utf-8'))
+        print(f"{nombre:<20} {manifiesto['version']:<28} {manifiesto['formato']:<5} "
+              f"{len(manifiesto['features'])} features  {len(manifiesto['clases'])} clases  "
+              f"hash {manifiesto['hash'][:12]}")
+
+if __name__ == '__main__':
+    main()
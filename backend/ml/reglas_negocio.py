@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reglas de negocio declarativas sobre las probabilidades del modelo.
+
+Cada regla de REGLAS es una fila de la tabla:
+
+- 'si': condición sobre las dimensiones del perfil. Una lista es un Y de sus
+  elementos; una lista anidada es un O. Cada comparación es
+  (feature, operador, umbral) con operador en <, <=, >, >=, ==.
+- 'carreras': carreras a las que afecta.
+- 'accion':
+    'vetar'     → su probabilidad pasa a 0 (salen del top 5);
+    'relegar'   → si están en el top 5 pasan al final, con su probabilidad;
+    'potenciar' → su probabilidad se multiplica por 'factor'.
+- 'solo_predicha': la regla solo se aplica si el modelo predijo (antes de
+  las reglas) una de sus carreras.
+- 'razon': texto de 'ajuste_aplicado'; se formatea con las features que usa
+  la condición ({ES:.1f}).
+- 'activa': las reglas inactivas no se compilan.
+
+MotorReglas compila la tabla una vez por lista de clases: las comparaciones
+quedan como vectores de columnas y umbrales, los O y los Y como matrices de
+incidencia, y las acciones como matrices (reglas × clases). Aplicarlas a una
+matriz de probabilidades (n, clases) son unas pocas operaciones de arrays,
+cuyo costo por fila no crece con cada regla nueva como lo haría un if por
+regla. Cambiar la tabla cambia resultados: incrementar VERSION_REGLAS en
+predict.py para invalidar el almacén de resultados.
+"""
+
+import operator
+
+import numpy as np
+
+# Carreras favorecidas por las reglas de perfil técnico
+INGENIERIAS = (
+    'Ingeniería Civil', 'Ingeniería Industrial', 'Ingeniería Mecánica', 'Ingeniería en Sistemas',
+)
+
+REGLAS = (
+    {
+        'nombre': 'arquitectura_sin_espacialidad',
+        'si': [('ES', '<', 3.5)],
+        'carreras': ['Arquitectura'],
+        'accion': 'relegar',
+        'solo_predicha': True,
+        'razon': 'Arquitectura requiere ES >= 3.5 (actual: {ES:.1f})',
+        'activa': True,
+    },
+    # Propuestas de test_reglas_negocio.py y datasets/analisis_perfil_ingeniera.py.
+    # Inactivas hasta validarlas: cambian recomendaciones que hoy da el modelo, y
+    # la primera necesita Rendimiento_STEM (q64), que solo trae el modelo de 17 features.
+    {
+        'nombre': 'stem_tecnico',
+        'si': [('Rendimiento_STEM', '>=', 4), [('I', '>=', 4.0), ('LM', '>=', 4.0)]],
+        'carreras': list(INGENIERIAS),
+        'accion': 'potenciar',
+        'factor': 1.25,
+        'razon': 'Perfil técnico con rendimiento STEM alto (STEM: {Rendimiento_STEM:.0f}, '
+                 'I: {I:.1f}, LM: {LM:.1f})',
+        'activa': False,
+    },
+    {
+        'nombre': 'artistico_espacial',
+        'si': [('A', '>=', 4.0), ('ES', '>=', 4.0)],
+        'carreras': ['Arquitectura', 'Diseño Gráfico'],
+        'accion': 'potenciar',
+        'factor': 1.25,
+        'razon': 'Perfil artístico y espacial (A: {A:.1f}, ES: {ES:.1f})',
+        'activa': False,
+    },
+)
+
+ACCIONES = ('vetar', 'relegar', 'potenciar')
+
+OPERADORES = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+}
+
+class MotorReglas:
+    """
+    Tabla de reglas compilada para una lista de clases.
+
+    Parámetros:
+    -----------
+    clases : sequence
+        Nombres de las carreras en el orden de las columnas de predict_proba.
+    reglas : sequence, opcional
+        Tabla de reglas (por defecto REGLAS).
+    """
+
+    def __init__(self, clases, reglas=REGLAS):
+        self.clases = [str(c) for c in clases]
+        self.reglas = [r for r in reglas if r.get('activa', True)]
+        columna_clase = {clase: j for j, clase in enumerate(self.clases)}
+
+        # Comparaciones sin repetir, agrupadas por operador
+        comparaciones = []
+        clausulas = []
+        clausulas_por_regla = []
+        for regla in self.reglas:
+            if regla['accion'] not in ACCIONES:
+                raise ValueError(f"Acción desconocida en {regla['nombre']}: {regla['accion']}")
+            propias = []
+            for elemento in regla['si']:
+                alternativas = elemento if isinstance(elemento, list) else [elemento]
+                indices = []
+                for comparacion in alternativas:
+                    feature, op, umbral = comparacion
+                    if op not in OPERADORES:
+                        raise ValueError(f'Operador desconocido en {regla["nombre"]}: {op}')
+                    clave = (feature, op, float(umbral))
+                    if clave not in comparaciones:
+                        comparaciones.append(clave)
+                    indices.append(comparaciones.index(clave))
+                propias.append(len(clausulas))
+                clausulas.append(indices)
+            clausulas_por_regla.append(propias)
+
+        self.features = sorted({feature for feature, _, _ in comparaciones})
+        columna_feature = {feature: j for j, feature in enumerate(self.features)}
+        self.por_operador = []
+        for op, funcion in OPERADORES.items():
+            indices = [i for i, (_, o, _) in enumerate(comparaciones) if o == op]
+            if indices:
+                self.por_operador.append((
+                    funcion,
+                    np.array(indices),
+                    np.array([columna_feature[comparaciones[i][0]] for i in indices]),
+                    np.array([comparaciones[i][2] for i in indices]),
+                ))
+        self.n_comparaciones = len(comparaciones)
+
+        # comparación → cláusula (O) y cláusula → regla (Y)
+        n_reglas = len(self.reglas)
+        self.incidencia_o = np.zeros((len(comparaciones), len(clausulas)), dtype=np.float32)
+        for k, indices in enumerate(clausulas):
+            self.incidencia_o[indices, k] = 1.0
+        self.incidencia_y = np.zeros((len(clausulas), n_reglas), dtype=np.float32)
+        for r, propias in enumerate(clausulas_por_regla):
+            self.incidencia_y[propias, r] = 1.0
+        self.clausulas_requeridas = self.incidencia_y.sum(axis=0)
+        # Sin O ni comparaciones repetidas entre cláusulas, cada cláusula es su comparación
+        self.sin_o = (self.incidencia_o.shape[0] == self.incidencia_o.shape[1]
+                      and (self.incidencia_o == np.eye(len(clausulas))).all())
+
+        # Matrices de acción (reglas × clases); las carreras que el modelo no
+        # conoce se ignoran
+        n_clases = len(self.clases)
+        self.objetivos = np.zeros((n_reglas, n_clases), dtype=bool)
+        for r, regla in enumerate(self.reglas):
+            for carrera in regla['carreras']:
+                if carrera in columna_clase:
+                    self.objetivos[r, columna_clase[carrera]] = True
+        accion = np.array([regla['accion'] for regla in self.reglas])
+        self.veto = (self.objetivos & (accion == 'vetar')[:, None]).astype(np.float32)
+        self.relegar = (self.objetivos & (accion == 'relegar')[:, None]).astype(np.float32)
+        factores = np.array([float(regla.get('factor', 1.0)) for regla in self.reglas])
+        self.log_factores = np.where(
+            self.objetivos & (accion == 'potenciar')[:, None], np.log(factores)[:, None], 0.0)
+        self.solo_predicha = np.array([bool(regla.get('solo_predicha')) for regla in self.reglas])
+        self.hay_solo_predicha = bool(self.solo_predicha.any())
+        self.hay_veto = bool(self.veto.any())
+        self.hay_relegar = bool(self.relegar.any())
+        self.hay_potenciar = bool(self.log_factores.any())
+
+    def valores(self, perfiles):
+        """Matriz (n, features de las reglas) desde diccionarios; NaN si falta la feature."""
+        nan = float('nan')
+        return np.array(
+            [[datos.get(f, nan) for f in self.features] for datos in perfiles], dtype=np.float64,
+        ).reshape(len(perfiles), len(self.features))
+
+    def valores_matriz(self, X, features):
+        """Matriz (n, features de las reglas) desde X con columnas `features`."""
+        valores = np.full((len(X), len(self.features)), np.nan)
+        for j, feature in enumerate(self.features):
+            if feature in features:
+                valores[:, j] = X[:, features.index(feature)]
+        return valores
+
+    def activas(self, valores, prediccion):
+        """
+        Reglas que se cumplen en cada fila.
+
+        Parámetros:
+        -----------
+        valores : np.ndarray
+            Salida de valores() o valores_matriz(). Con NaN la comparación es falsa.
+        prediccion : np.ndarray
+            Columna predicha por el modelo (argmax) de cada fila.
+
+        Retorna:
+        --------
+        np.ndarray : (n, reglas) booleana.
+        """
+        # Comparar con NaN da False sin advertencias
+        comparaciones = np.zeros((len(valores), self.n_comparaciones), dtype=np.float32)
+        for funcion, indices, columnas, umbrales in self.por_operador:
+            comparaciones[:, indices] = funcion(valores[:, columnas], umbrales)
+        if not self.sin_o:
+            comparaciones = ((comparaciones @ self.incidencia_o) > 0).astype(np.float32)
+        activas = (comparaciones @ self.incidencia_y) == self.clausulas_requeridas
+        if self.hay_solo_predicha:
+            activas &= ~self.solo_predicha | self.objetivos[:, prediccion].T
+        return activas
+
+    def aplicar(self, probabilidades, valores):
+        """
+        Aplica las reglas a una matriz de probabilidades.
+
+        Retorna:
+        --------
+        tuple : (probabilidades, relegadas, activas)
+            probabilidades ajustadas (la misma matriz si ninguna regla las
+            cambia), máscara (n, clases) de carreras a relegar o None, y la
+            máscara (n, reglas) de reglas aplicadas.
+        """
+        activas = self.activas(valores, np.argmax(probabilidades, axis=1))
+        if not activas.any():
+            return probabilidades, None, activas
+
+        pesos = activas.astype(np.float32)
+        if self.hay_potenciar or self.hay_veto:
+            probabilidades = probabilidades.copy()
+            if self.hay_potenciar:
+                probabilidades *= np.exp(pesos @ self.log_factores)
+            if self.hay_veto:
+                probabilidades[(pesos @ self.veto) > 0] = 0.0
+        relegadas = (pesos @ self.relegar) > 0 if self.hay_relegar else None
+        return probabilidades, relegadas, activas
+
+    def razones(self, activas, valores):
+        """Texto de 'ajuste_aplicado' de cada fila (None si no se aplicó ninguna regla)."""
+        razones = [None] * len(activas)
+        filas, reglas = np.nonzero(activas)
+        for fila, regla in zip(filas.tolist(), reglas.tolist()):
+            perfil = dict(zip(self.features, valores[fila].tolist()))
+            texto = self.reglas[regla]['razon'].format(**perfil)
+            razones[fila] = texto if razones[fila] is None else f'{razones[fila]}; {texto}'
+        return razones
+
+def ordenar_top(top, relegadas):
+    """Pasa al final del top (en su orden) las carreras relegadas de cada fila."""
+    if relegadas is None:
+        return top
+    en_top = np.take_along_axis(relegadas, top, axis=1)
+    filas = en_top.any(axis=1)
+    if filas.any():
+        orden = np.argsort(en_top[filas], axis=1, kind='stable')
+        top = top.copy()
+        top[filas] = np.take_along_axis(top[filas], orden, axis=1)
+    return top
+
+_MOTORES = {}
+_POR_OBJETO = {}
+
+def motor_reglas(clases):
+    """
+    MotorReglas compilado para `clases` (se compila una vez por lista de
+    clases). Se busca primero por identidad del objeto, para no recorrer las
+    clases en cada predicción.
+    """
+    entrada = _POR_OBJETO.get(id(clases))
+    if entrada is not None and entrada[0] is clases:
+        return entrada[1]
+    clave = tuple(str(c) for c in clases)
+    motor = _MOTORES.get(clave)
+    if motor is None:
+        motor = _MOTORES[clave] = MotorReglas(clave)
+    # Se guarda la referencia a `clases` para que su id no se reutilice
+    _POR_OBJETO[id(clases)] = (clases, motor)
+    return motor
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de predicción asyncio sobre socket Unix con micro-lotes.
+
+Las solicitudes que llegan dentro de una ventana corta (por defecto 2 ms, o
+hasta N solicitudes) se combinan en una sola llamada a predict_proba del
+bosque, y luego se separan los resultados por fila. Con lotes de tamaño 1 el
+costo del Random Forest está dominado por el overhead por llamada, así que
+agrupar solicitudes concurrentes multiplica el throughput por núcleo.
+
+Protocolo (enteros big-endian, floats little-endian):
+
+    Solicitud: [uint32 largo][uint32 id][uint8 tipo][datos]
+        tipo 1: las 62 respuestas q1..q62 como uint8 (una por byte, 1 a 5)
+        tipo 2: 14 promedios como float32 en el orden FEATURE_ORDER
+    Respuesta: [uint32 largo][uint32 id][JSON compacto en UTF-8]
+
+`largo` cuenta los bytes que siguen al propio campo de largo. Una solicitud
+inválida (tipo desconocido, largo incorrecto, respuestas fuera de 1-5) se
+responde con su id y {"success": false, "error": ...}.
+
+Uso:
+    python servidor_async.py --socket /tmp/ovp_async.sock --ventana-ms 2 --max-lote 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from predict import FEATURE_ORDER, N_PREGUNTAS, calcular_promedios, load_models, predecir_lote
+
+SOCKET_POR_DEFECTO = os.environ.get('ML_ASYNC_SOCKET', '/tmp/ovp_async.sock')
+
+TIPO_RESPUESTAS = 1
+TIPO_PROMEDIOS = 2
+
+CABECERA = struct.Struct('>I')
+CABECERA_SOLICITUD = struct.Struct('>IB')
+MAX_TRAMA = 4096
+
+def decodificar_solicitud(trama):
+    """
+    Decodifica una trama de solicitud.
+
+    Retorna:
+    --------
+    tuple : (id, datos_estudiante) con los promedios por dimensión.
+    """
+    id_solicitud, tipo = CABECERA_SOLICITUD.unpack_from(trama)
+    datos = trama[CABECERA_SOLICITUD.size:]
+
+    if tipo == TIPO_RESPUESTAS:
+        # calcular_promedios toma las respuestas ausentes como 0: se rechazan antes
+        if len(datos) != N_PREGUNTAS:
+            raise ValueError(f'Se esperaban {N_PREGUNTAS} respuestas uint8')
+        if 0 in datos:
+            raise ValueError('Faltan respuestas')
+        if max(datos) > 5:
+            raise ValueError('Las respuestas deben estar entre 1 y 5')
+        respuestas = {f'q{i}': valor for i, valor in enumerate(datos, start=1)}
+        return id_solicitud, calcular_promedios(respuestas)
+
+    if tipo == TIPO_PROMEDIOS:
+        if len(datos) != 4 * len(FEATURE_ORDER):
+            raise ValueError(f'Se esperaban {len(FEATURE_ORDER)} promedios float32')
+        valores = np.frombuffer(datos, dtype='<f4')
+        # float32 tiene ~7 cifras; redondear recupera el valor enviado (ej. 3.4)
+        return id_solicitud, {
+            feature: round(float(valor), 4) for feature, valor in zip(FEATURE_ORDER, valores)
+        }
+
+    raise ValueError(f'Tipo de solicitud desconocido: {tipo}')
+
+def codificar_respuesta(id_solicitud, resultado):
+    """Codifica una respuesta con su cabecera de largo."""
+    cuerpo = json.dumps(resultado, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return CABECERA.pack(4 + len(cuerpo)) + CABECERA.pack(id_solicitud) + cuerpo
+
+class ServidorPrediccion:
+    """Servidor asyncio que agrupa solicitudes concurrentes en micro-lotes."""
+
+    def __init__(self, modelo, label_encoder, ventana_ms=2.0, max_lote=64):
+        self.modelo = modelo
+        self.label_encoder = label_encoder
+        self.ventana = ventana_ms / 1000.0
+        self.max_lote = max_lote
+        self.cola = asyncio.Queue()
+        # Un solo hilo: los lotes se ejecutan en orden sin bloquear el event loop
+        self.ejecutor = ThreadPoolExecutor(max_workers=1)
+
+    async def predecir(self, datos_estudiante):
+        """Encola un perfil y espera su resultado."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((datos_estudiante, futuro))
+        return await futuro
+
+    async def bucle_lotes(self):
+        """Junta solicitudes durante la ventana y las predice en un solo lote."""
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.cola.get()]
+            limite = loop.time() + self.ventana
+
+            while len(lote) < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            perfiles = [datos for datos, _ in lote]
+            try:
+                resultados = await loop.run_in_executor(self.ejecutor, self.predecir_lote, perfiles)
+            except Exception as e:
+                resultados = [{'success': False, 'error': f'Error en predicción: {str(e)}'}] * len(lote)
+
+            for (_, futuro), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+
+    def predecir_lote(self, perfiles):
+        """Una sola llamada a predict_proba para todo el lote."""
+        return predecir_lote(perfiles, self.modelo, self.label_encoder)
+
+    async def atender_solicitud(self, trama, writer):
+        """Decodifica, predice y responde una trama."""
+        # El id va en la respuesta aunque el resto de la trama sea inválido
+        (id_solicitud,) = CABECERA.unpack_from(trama)
+        try:
+            _, datos = decodificar_solicitud(trama)
+            resultado = await self.predecir(datos)
+        except Exception as e:
+            resultado = {'success': False, 'error': str(e)}
+        writer.write(codificar_respuesta(id_solicitud, resultado))
+
+    async def manejar_conexion(self, reader, writer):
+        """Lee tramas de una conexión; cada una se atiende concurrentemente."""
+        tareas = set()
+        try:
+            while True:
+                (largo,) = CABECERA.unpack(await reader.readexactly(CABECERA.size))
+                if largo > MAX_TRAMA or largo < CABECERA_SOLICITUD.size:
+                    break
+                trama = await reader.readexactly(largo)
+                tarea = asyncio.create_task(self.atender_solicitud(trama, writer))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            if tareas:
+                await asyncio.gather(*tareas, return_exceptions=True)
+            writer.close()
+
+async def ejecutar(args):
+    """Carga el modelo y arranca el servidor."""
+    modelo, label_encoder = load_models()
+    servidor_prediccion = ServidorPrediccion(
+        modelo, label_encoder, ventana_ms=args.ventana_ms, max_lote=args.max_lote
+    )
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    servidor = await asyncio.start_unix_server(servidor_prediccion.manejar_conexion, path=args.socket)
+    tarea_lotes = asyncio.create_task(servidor_prediccion.bucle_lotes())
+
+    print(f'✅ Servidor asyncio escuchando en {args.socket} '
+          f'(ventana {args.ventana_ms} ms, lote máximo {args.max_lote})', file=sys.stderr)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        tarea_lotes.cancel()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Servidor de predicción asyncio con micro-lotes')
+    parser.add_argument('--socket', default=SOCKET_POR_DEFECTO,
+                        help='Ruta del socket Unix de escucha')
+    parser.add_argument('--ventana-ms', type=float,
+                        default=float(os.environ.get('ML_VENTANA_MS', '2')),
+                        help='Tiempo máximo de espera para completar un lote')
+    parser.add_argument('--max-lote', type=int,
+                        default=int(os.environ.get('ML_MAX_LOTE', '64')),
+                        help='Número máximo de solicitudes por lote')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(ejecutar(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de predicción pre-fork.
+
+El proceso padre importa numpy/pandas/sklearn, carga el modelo una sola vez,
+hace una predicción de calentamiento y congela el heap con gc.freeze().
+Después crea procesos hijos con fork(): todos comparten las páginas del
+bosque (copy-on-write) sin volver a cargarlo.
+
+Los hijos atienden conexiones en un socket Unix con el mismo protocolo NDJSON
+que `predict.py --serve` (una solicitud {"id", "datos"} por línea).
+
+Uso:
+    python servidor_prefork.py --socket /tmp/ovp_prediccion.sock --workers 4
+
+Con modelos registrados (registro_modelos.py) el padre carga y calienta el
+registro antes del fork y cada hijo vigila el directorio por su cuenta: un
+modelo nuevo se carga en cada hijo y reemplaza al anterior sin reiniciarlo.
+
+Enviar SIGUSR1 al proceso padre imprime el uso de memoria de cada hijo.
+
+Un hijo que termina se reemplaza. Si termina antes de VIDA_MINIMA_S (error al
+arrancar), el siguiente se crea tras una espera que se duplica en cada falla
+seguida hasta ML_RESTART_MAX_DELAY_MS, como el pool de mlService.js.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+from memoria import formatear_reporte, leer_memoria
+from predict import (FEATURE_ORDER, REGISTRO_INTERVALO, crear_almacen, crear_cache,
+                     crear_metricas, crear_perfilador, crear_registro, load_models, predecir,
+                     servir)
+
+SOCKET_POR_DEFECTO = os.environ.get('ML_SOCKET', '/tmp/ovp_prediccion.sock')
+
+# Perfil neutro usado para calentar el modelo antes de hacer fork
+PERFIL_CALENTAMIENTO = {feature: 3.0 for feature in FEATURE_ORDER}
+
+# Espera inicial y máxima antes de reemplazar a un hijo que falló al arrancar
+# (mismas variables que el pool de mlService.js)
+REINICIO_S = int(os.environ.get('ML_RESTART_DELAY_MS', '1000')) / 1000
+REINICIO_MAX_S = int(os.environ.get('ML_RESTART_MAX_DELAY_MS', '30000')) / 1000
+
+# Un hijo que vive menos que esto cuenta como falla al arrancar
+VIDA_MINIMA_S = 5.0
+
+def preparar_modelo():
+    """
+    Carga los modelos, hace una predicción de calentamiento y congela el heap
+    para que el recolector de basura no toque las páginas compartidas.
+
+    Retorna:
+    --------
+    tuple : (modelo, label_encoder, registro); con registro de modelos los
+    dos primeros son None (el registro ya calienta cada modelo al cargarlo).
+    """
+    registro = crear_registro()
+    if registro is not None:
+        gc.collect()
+        gc.freeze()
+        return None, None, registro
+
+    modelo, label_encoder = load_models()
+
+    resultado = predecir(dict(PERFIL_CALENTAMIENTO), modelo, label_encoder)
+    if not resultado['success']:
+        raise RuntimeError(f"Falló la predicción de calentamiento: {resultado['error']}")
+
+    gc.collect()
+    gc.freeze()
+    return modelo, label_encoder, None
+
+def crear_socket(ruta):
+    """Crea el socket Unix de escucha compartido por todos los hijos."""
+    if os.path.exists(ruta):
+        os.unlink(ruta)
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(ruta)
+    servidor.listen(128)
+    return servidor
+
+def bucle_hijo(servidor, modelo, label_encoder, registro=None):
+    """Atiende conexiones una a una hasta que el padre termine el proceso."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+    # Cada hijo tiene su propia caché, conexión SQLite, métricas, perfilador
+    # e hilo de vigilancia del registro (se crean después del fork)
+    if registro is not None:
+        almacen = crear_almacen(registro)
+        cache = None
+        registro.iniciar_vigilancia(REGISTRO_INTERVALO)
+    else:
+        almacen = crear_almacen()
+        cache = crear_cache(modelo, label_encoder, almacen)
+    metricas = crear_metricas()
+    perfilador = crear_perfilador()
+
+    while True:
+        conexion, _ = servidor.accept()
+        with conexion:
+            entrada = conexion.makefile('r', encoding='utf-8')
+            salida = conexion.makefile('w', encoding='utf-8')
+            try:
+                servir(modelo, label_encoder, entrada, salida, cache, almacen, metricas, perfilador,
+                       registro)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+def lanzar_hijo(servidor, modelo, label_encoder, registro=None):
+    """Crea un hijo con fork() y devuelve su PID (solo en el padre)."""
+    pid = os.fork()
+    if pid == 0:
+        codigo = 0
+        try:
+            bucle_hijo(servidor, modelo, label_encoder, registro)
+        except Exception as e:
+            print(f'❌ Error en hijo {os.getpid()}: {e}', file=sys.stderr)
+            codigo = 1
+        finally:
+            os._exit(codigo)
+    return pid
+
+def espera_reinicio(fallos):
+    """Segundos antes de crear un hijo tras `fallos` hijos seguidos que fallaron al arrancar."""
+    if fallos == 0:
+        return 0.0
+    return min(REINICIO_S * 2 ** (fallos - 1), REINICIO_MAX_S)
+
+def supervisar(hijos, lanzar):
+    """
+    Espera a que termine cada hijo y lo reemplaza con lanzar() (que devuelve
+    el PID del nuevo). Los que viven menos de VIDA_MINIMA_S alargan la espera
+    (espera_reinicio), así un error al arrancar no hace fork en un bucle
+    cerrado; uno que vivió más la vuelve a cero.
+    """
+    inicios = {pid: time.monotonic() for pid in hijos}
+    fallos = 0
+    while True:
+        pid, estado = os.wait()
+        hijos.discard(pid)
+        vida = time.monotonic() - inicios.pop(pid, time.monotonic())
+        fallos = fallos + 1 if vida < VIDA_MINIMA_S else 0
+        espera = espera_reinicio(fallos)
+        print(f'❌ Hijo {pid} terminó (estado {estado}) tras {vida:.1f} s, '
+              f'creando uno nuevo en {espera:g} s', file=sys.stderr)
+        time.sleep(espera)
+        nuevo = lanzar()
+        hijos.add(nuevo)
+        inicios[nuevo] = time.monotonic()
+
+def reporte_memoria(hijos):
+    """Devuelve la tabla de memoria del padre y de cada hijo."""
+    filas = [(f'padre {os.getpid()}', leer_memoria(os.getpid()))]
+    total_rss = 0
+    total_pss = 0
+    for pid in sorted(hijos):
+        try:
+            mem = leer_memoria(pid)
+        except OSError:
+            continue
+        filas.append((f'hijo {pid}', mem))
+        total_rss += mem['rss']
+        total_pss += mem['pss']
+
+    reporte = formatear_reporte(filas)
+    reporte += (
+        f'\nHijos: RSS total {total_rss / 1024:.1f} MB, PSS total {total_pss / 1024:.1f} MB '
+        f'(la diferencia es memoria compartida con el padre)'
+    )
+    return reporte
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description='Servidor de predicción pre-fork')
+    parser.add_argument('--socket', default=SOCKET_POR_DEFECTO,
+                        help='Ruta del socket Unix de escucha')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Número de procesos hijos')
+    args = parser.parse_args()
+
+    modelo, label_encoder, registro = preparar_modelo()
+    servidor = crear_socket(args.socket)
+
+    hijos = set()
+    for _ in range(args.workers):
+        hijos.add(lanzar_hijo(servidor, modelo, label_encoder, registro))
+
+    print(f'✅ Servidor pre-fork escuchando en {args.socket} con {len(hijos)} hijos',
+          file=sys.stderr)
+    print(reporte_memoria(hijos), file=sys.stderr)
+
+    def terminar(signum, frame):
+        raise SystemExit(0)
+
+    def imprimir_memoria(signum, frame):
+        print(reporte_memoria(hijos), file=sys.stderr)
+
+    signal.signal(signal.SIGTERM, terminar)
+    signal.signal(signal.SIGINT, terminar)
+    signal.signal(signal.SIGUSR1, imprimir_memoria)
+
+    try:
+        # Supervisar a los hijos y reemplazar los que terminen
+        supervisar(hijos, lambda: lanzar_hijo(servidor, modelo, label_encoder, registro))
+    finally:
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        servidor.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba del almacén SQLite de resultados: resultados idénticos a predecir(),
+límite de tamaño, limpieza de versiones viejas (también al cambiar las opciones
+que agregan campos al resultado) y varios procesos a la vez.
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import almacen_resultados
+from almacen_resultados import AlmacenResultados
+from predict import FEATURE_ORDER, calcular_promedios, load_models, predecir
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def perfiles_dataset(n=None):
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    return df[FEATURE_ORDER].head(n).to_dict('records')
+
+def test_resultados_identicos(directorio):
+    """El resultado guardado es idéntico y se devuelve sin llamar al modelo."""
+    print("="*70)
+    print("TEST 1: Resultado almacenado == predecir()")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    almacen = AlmacenResultados(Path(directorio) / 'r.sqlite3')
+    llamadas = []
+
+    def calcular(datos):
+        llamadas.append(1)
+        return predecir(datos, modelo, label_encoder)
+
+    perfiles = perfiles_dataset(500)
+    diferencias = 0
+    for _ in range(2):
+        for datos in perfiles:
+            esperado = json.dumps(predecir(dict(datos), modelo, label_encoder), ensure_ascii=False)
+            obtenido = json.dumps(almacen.predecir(dict(datos), calcular), ensure_ascii=False)
+            diferencias += obtenido != esperado
+
+    print(f"   Consultas: {2 * len(perfiles)}  Llamadas al modelo: {len(llamadas)}")
+    print(f"   Diferencias: {diferencias}")
+    ok = diferencias == 0 and len(llamadas) == len(perfiles)
+    print("✅ Resultados idénticos" if ok else "❌ Hay diferencias")
+    almacen.cerrar()
+    return ok
+
+def test_clave_por_promedios(directorio):
+    """Respuestas distintas con los mismos promedios comparten resultado."""
+    print("\n" + "="*70)
+    print("TEST 2: Clave canónica por promedios")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    almacen = AlmacenResultados(Path(directorio) / 'r.sqlite3')
+
+    respuestas_a = {f'q{i}': 3 for i in range(1, 63)}
+    # Mismos promedios: se intercambian dos respuestas de la misma dimensión
+    respuestas_b = dict(respuestas_a, q1=2, q2=4)
+
+    llamadas = []
+    def calcular(datos):
+        llamadas.append(1)
+        return predecir(datos, modelo, label_encoder)
+
+    almacen.predecir(calcular_promedios(respuestas_a), calcular)
+    almacen.predecir(calcular_promedios(respuestas_b), calcular)
+
+    print(f"   Llamadas al modelo para dos vectores de respuestas: {len(llamadas)}")
+    ok = len(llamadas) == 1
+    print("✅ Misma clave" if ok else "❌ Claves distintas")
+    almacen.cerrar()
+    return ok
+
+def test_limite_y_limpieza(directorio):
+    """El tamaño queda acotado y las versiones viejas se borran."""
+    print("\n" + "="*70)
+    print("TEST 3: Límite de tamaño y limpieza de versiones viejas")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    almacen = AlmacenResultados(Path(directorio) / 'limite.sqlite3', max_entradas=50)
+    for datos in perfiles_dataset(300):
+        almacen.predecir(dict(datos), lambda d: predecir(d, modelo, label_encoder))
+    tras_limite = almacen.estadisticas()
+
+    # Simular el despliegue de nuevas reglas de negocio
+    version_original = almacen_resultados.VERSION_REGLAS
+    almacen_resultados.VERSION_REGLAS = version_original + '-nueva'
+    try:
+        almacen.actualizar_version()
+        almacen.hilo_limpieza.join(timeout=10)
+        tras_limpieza = almacen.estadisticas()
+    finally:
+        almacen_resultados.VERSION_REGLAS = version_original
+
+    # Procesos con otras opciones del resultado (ML_VECINOS, ...) usan otra versión
+    codigo = (f"import sys; sys.path.insert(0, {str(Path(__file__).parent)!r}); "
+              f"from almacen_resultados import AlmacenResultados; "
+              f"print(AlmacenResultados({str(Path(directorio) / 'opciones.sqlite3')!r}, limpiar=False).version)")
+    versiones = {
+        subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True,
+                       env=dict(os.environ, **variables)).stdout.strip()
+        for variables in ({}, {'ML_VECINOS': '0'}, {'ML_VECINOS': '3'}, {'ML_PERFILES_CARRERA': '0'},
+                          {'ML_EXPLICACIONES': '0'})
+    }
+
+    print(f"   Tras 300 inserciones (máx 50): {tras_limite['total']} entradas")
+    print(f"   Tras cambiar de versión: {tras_limpieza['total']} entradas")
+    print(f"   Versiones con 5 combinaciones de opciones del resultado: {len(versiones - {''})}")
+    ok = (tras_limite['total'] <= 50 + almacen_resultados.INSERCIONES_POR_REVISION
+          and tras_limpieza['total'] == 0 and len(versiones - {''}) == 5)
+    print("✅ Límite y limpieza correctos" if ok else "❌ Límite o limpieza incorrectos")
+    almacen.cerrar()
+    return ok
+
+def trabajador(ruta, inicio, resultados):
+    """Proceso que lee y escribe en el almacén compartido."""
+    modelo, label_encoder = load_models()
+    almacen = AlmacenResultados(ruta)
+    perfiles = perfiles_dataset(400)
+    distintos = 0
+    for datos in perfiles[inicio:] + perfiles[:inicio]:
+        esperado = predecir(dict(datos), modelo, label_encoder)
+        obtenido = almacen.predecir(dict(datos), lambda d: predecir(d, modelo, label_encoder))
+        distintos += json.dumps(obtenido) != json.dumps(esperado)
+    resultados.put(distintos)
+
+def test_procesos_concurrentes(directorio):
+    """Varios procesos usan la misma base a la vez sin errores."""
+    print("\n" + "="*70)
+    print("TEST 4: 4 procesos sobre la misma base")
+    print("="*70)
+
+    ruta = Path(directorio) / 'compartido.sqlite3'
+    AlmacenResultados(ruta).cerrar()
+    resultados = multiprocessing.Queue()
+    procesos = [multiprocessing.Process(target=trabajador, args=(ruta, i * 100, resultados))
+                for i in range(4)]
+    inicio = time.perf_counter()
+    for p in procesos:
+        p.start()
+    for p in procesos:
+        p.join()
+
+    codigos = [p.exitcode for p in procesos]
+    distintos = sum(resultados.get() for _ in procesos if not resultados.empty())
+    almacen = AlmacenResultados(ruta, limpiar=False)
+    print(f"   Códigos de salida: {codigos}  Resultados distintos: {distintos}")
+    print(f"   Entradas: {almacen.estadisticas()['entradas']}  "
+          f"({time.perf_counter() - inicio:.1f} s)")
+    ok = codigos == [0, 0, 0, 0] and distintos == 0 and almacen.estadisticas()['entradas'] == 400
+    print("✅ Acceso concurrente correcto" if ok else "❌ Falló el acceso concurrente")
+    almacen.cerrar()
+    return ok
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = [
+            test_resultados_identicos(directorio),
+            test_clave_por_promedios(directorio),
+            test_limite_y_limpieza(directorio),
+            test_procesos_concurrentes(directorio),
+        ]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
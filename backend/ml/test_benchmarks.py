@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de benchmarks.py: ejecución de las etapas, formato de la línea base y
+detección de regresiones al comparar.
+"""
+
+import copy
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import ETAPAS, comparar, ejecutar, main
+
+def test_ejecucion():
+    """Todas las etapas producen percentiles ordenados y throughput."""
+    print("="*70)
+    print("TEST 1: Ejecución de todas las etapas")
+    print("="*70)
+
+    resultado = ejecutar(n_filas=100, tamano_lote=32, arranques=2, cargas=2)
+    correcto = set(resultado['etapas']) == set(ETAPAS)
+    for etapa, r in resultado['etapas'].items():
+        ordenado = r['p50_us'] <= r['p95_us'] <= r['p99_us'] and r['filas_por_s'] > 0
+        correcto &= ordenado
+        print(f"   {etapa:<24} p50 {r['p50_us']:>10.1f} µs  {'ok' if ordenado else 'MAL'}")
+
+    print("✅ Etapas correctas" if correcto else "❌ Etapas incorrectas")
+    return correcto, resultado
+
+def test_comparacion(resultado):
+    """Una etapa más lenta que el umbral se marca como regresión y main() devuelve 1."""
+    print("\n" + "="*70)
+    print("TEST 2: Comparación contra una línea base")
+    print("="*70)
+
+    iguales = comparar(resultado, resultado)
+    sin_regresiones = not any(regresion for _, _, regresion in iguales)
+
+    # Línea base en la que 'predecir' era el doble de rápido
+    base = copy.deepcopy(resultado)
+    base['etapas']['predecir']['p50_us'] /= 2
+    regresiones = [etapa for etapa, _, regresion in comparar(base, resultado) if regresion]
+    tolerada = [etapa for etapa, _, regresion in
+                comparar(base, resultado, umbrales_etapa={'predecir': 1.5}) if regresion]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_base = Path(directorio) / 'base.json'
+        ruta_actual = Path(directorio) / 'actual.json'
+        ruta_base.write_text(json.dumps(base), encoding='utf-8')
+        ruta_actual.write_text(json.dumps(resultado), encoding='utf-8')
+        codigo = main(['--actual', str(ruta_actual), '--comparar', str(ruta_base)])
+
+    print(f"\n   Contra sí misma: {'sin regresiones' if sin_regresiones else 'CON regresiones'}")
+    print(f"   predecir 2x más lento: {regresiones}  con umbral 150%: {tolerada}  código: {codigo}")
+    correcto = sin_regresiones and regresiones == ['predecir'] and tolerada == [] and codigo == 1
+    print("✅ Regresiones detectadas" if correcto else "❌ Comparación incorrecta")
+    return correcto
+
+if __name__ == '__main__':
+    ok, resultado = test_ejecucion()
+    resultados = [ok, test_comparacion(resultado)]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
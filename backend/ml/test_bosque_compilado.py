@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de bosque_compilado.py: predict_proba del bosque compilado es idéntico
+al de sklearn en los dos datasets, el bosque abierto con mmap da el mismo
+resultado que el .npz, y con la ruta del .pkl los lotes grandes se evalúan con
+sklearn y los chicos sin cargarlo.
+"""
+
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import bosque_compilado
+from bosque_compilado import (DATASETS_DIR, cargar_compilado, cargar_mmap, cargar_sklearn, compilar,
+                              leer_features)
+from predict import SCRIPT_DIR
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+MODELO = SCRIPT_DIR / 'modelo_random_forest.pkl'
+CODIFICADOR = SCRIPT_DIR / 'label_encoder.pkl'
+DATASETS = (
+    DATASETS_DIR / 'dataset_orientacion_vocacional_2500.csv',
+    DATASETS_DIR / 'dataset_orientacion_vocacional_17carreras_3500.csv',
+)
+
+def test_sklearn(directorio):
+    """predict_proba del .npz = sklearn (un hilo, mismo orden de suma) en ambos datasets."""
+    print("="*70)
+    print("TEST 1: Bosque compilado = sklearn")
+    print("="*70)
+
+    modelo, label_encoder = cargar_sklearn(MODELO, CODIFICADOR)
+    modelo.n_jobs = 1
+    ruta = Path(directorio) / 'modelo_compilado.npz'
+    compilar(modelo).guardar(ruta, label_encoder.classes_)
+    bosque, codificador = cargar_compilado(ruta)
+
+    correcto = list(codificador.classes_) == list(label_encoder.classes_)
+    for dataset in DATASETS:
+        X = leer_features(dataset, modelo.feature_names_in_)
+        iguales = np.array_equal(bosque.predict_proba(X), modelo.predict_proba(X))
+        correcto &= iguales
+        print(f"   {dataset.name:<52} {len(X):>5} filas  idéntico: {iguales}")
+
+    print("✅ Probabilidades idénticas" if correcto else "❌ Probabilidades diferentes")
+    return correcto
+
+def test_mmap(directorio):
+    """El bosque exportado para mmap = el .npz, sin copiar los arrays."""
+    print("\n" + "="*70)
+    print("TEST 2: Carga con mmap")
+    print("="*70)
+
+    modelo, label_encoder = cargar_sklearn(MODELO, CODIFICADOR)
+    bosque = compilar(modelo)
+    bosque.guardar(Path(directorio) / 'modelo_compilado.npz', label_encoder.classes_)
+    bosque.guardar_mmap(Path(directorio) / 'modelo_mmap', label_encoder.classes_)
+    compilado, _ = cargar_compilado(Path(directorio) / 'modelo_compilado.npz')
+    mapeado, codificador = cargar_mmap(Path(directorio) / 'modelo_mmap')
+
+    X = np.concatenate([leer_features(dataset, modelo.feature_names_in_) for dataset in DATASETS])
+    iguales = np.array_equal(mapeado.predict_proba(X), compilado.predict_proba(X))
+    compartido = all(isinstance(getattr(mapeado, nombre).base, np.memmap)
+                     for nombre in ('feature', 'izquierdo', 'valores'))
+
+    print(f"   {len(X)} filas, mmap = npz: {iguales}, arrays sobre el archivo mapeado: {compartido}")
+    ok = iguales and compartido and list(codificador.classes_) == list(label_encoder.classes_)
+    print("✅ mmap correcto" if ok else "❌ mmap incorrecto")
+    return ok
+
+def test_lotes(directorio):
+    """Con ruta_sklearn, solo los lotes de más de LOTE_COMPILADO filas cargan sklearn."""
+    print("\n" + "="*70)
+    print("TEST 3: Runtime según el tamaño del lote")
+    print("="*70)
+
+    modelo, label_encoder = cargar_sklearn(MODELO, CODIFICADOR)
+    ruta = Path(directorio) / 'modelo_compilado.npz'
+    compilar(modelo).guardar(ruta, label_encoder.classes_)
+    bosque, _ = cargar_compilado(ruta, ruta_sklearn=MODELO)
+    solo_compilado, _ = cargar_compilado(ruta)
+
+    X = leer_features(DATASETS[1], modelo.feature_names_in_)
+    limite = bosque_compilado.LOTE_COMPILADO
+    chico = bosque.predict_proba(X[:limite])
+    sin_sklearn = bosque.modelo_sklearn is None
+    grande = bosque.predict_proba(X)
+    esperado = modelo.predict_proba(X)
+
+    # Con varios hilos sklearn puede sumar los árboles en otro orden
+    chico_ok = np.array_equal(chico, solo_compilado.predict_proba(X[:limite]))
+    grande_ok = (bosque.modelo_sklearn is not None and np.allclose(grande, esperado, rtol=0, atol=1e-12)
+                 and (grande.argmax(axis=1) == solo_compilado.predict_proba(X).argmax(axis=1)).all())
+
+    print(f"   {limite} filas: compilado sin cargar sklearn: {chico_ok and sin_sklearn}")
+    print(f"   {len(X)} filas: sklearn = compilado: {grande_ok}")
+    ok = chico_ok and sin_sklearn and grande_ok
+    print("✅ Runtime por lote correcto" if ok else "❌ Runtime por lote incorrecto")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_sklearn, test_mmap, test_lotes):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
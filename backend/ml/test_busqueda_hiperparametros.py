@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de busqueda_hiperparametros.py: las rondas de successive halving
+reducen los candidatos, la tabla marca bien la frontera de Pareto, el puntaje
+OOB se parece al de 5-fold costando un solo ajuste, y el modelo exportado
+funciona con el bosque compilado.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bosque_compilado import compilar
+from busqueda_hiperparametros import FIJOS, dominada, main, metricas_oob, rondas
+from carga_datos import cargar_matrices
+from predict import FEATURE_ORDER, SCRIPT_DIR
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_busqueda(directorio):
+    """Rondas decrecientes, tabla con Pareto correcto y modelo exportado utilizable."""
+    print("="*70)
+    print("TEST 1: Successive halving, tabla y exportación")
+    print("="*70)
+
+    salida = Path(directorio) / 'busqueda.json'
+    exportado = Path(directorio) / 'modelo.pkl'
+    reporte = main(['--candidatos', '8', '--factor', '2', '--min-fraccion', '0.25', '--workers', '2',
+                    '--salida', str(salida), '--exportar', str(exportado)])
+
+    candidatos = [r['candidatos'] for r in reporte['rondas']]
+    tabla = reporte['tabla']
+    pareto_ok = all(fila['pareto'] == (not dominada(fila, tabla, ('bytes', 'latencia_us')))
+                    for fila in tabla) and any(fila['pareto'] for fila in tabla)
+    mejor = max(fila['exactitud_oob'] for fila in tabla)
+    recomendada = next(f for f in tabla if f['parametros'] == reporte['recomendada'])
+
+    modelo = joblib.load(exportado)
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    X, _ = cargar_matrices(DATASET, label_encoder)
+    compilado_igual = np.allclose(compilar(modelo).predict_proba(X[:500]), modelo.predict_proba(X[:500]))
+
+    print(f"\n   Fracciones: {[r['fraccion'] for r in reporte['rondas']]}, candidatos: {candidatos}")
+    print(f"   Finalistas: {len(tabla)}, Pareto: {sum(f['pareto'] for f in tabla)}")
+    print(f"   Exportado: {list(modelo.feature_names_in_) == FEATURE_ORDER}, compilado igual: {compilado_igual}")
+    ok = (candidatos[0] == 8 and all(a > b for a, b in zip(candidatos, candidatos[1:]))
+          and len(tabla) == candidatos[-1] and pareto_ok
+          and recomendada['exactitud_oob'] >= mejor - reporte['tolerancia']
+          and json.loads(salida.read_text(encoding='utf-8'))['recomendada'] == reporte['recomendada']
+          and list(modelo.feature_names_in_) == FEATURE_ORDER and compilado_igual)
+    print("✅ Búsqueda correcta" if ok else "❌ Búsqueda incorrecta")
+    return ok
+
+def test_rondas():
+    """Fracciones de recursos de cada ronda."""
+    print("\n" + "="*70)
+    print("TEST 2: Fracciones por ronda")
+    print("="*70)
+
+    casos = {
+        (3, 54, 0.1): [1 / 9, 1 / 3, 1],
+        (3, 3, 0.1): [1 / 3, 1],
+        (2, 8, 0.25): [0.25, 0.5, 1],
+        (3, 1, 0.1): [1],
+        (3, 1000, 0.3): [1 / 3, 1],
+    }
+    ok = True
+    for argumentos, esperado in casos.items():
+        obtenido = rondas(*argumentos)
+        correcto = np.allclose(obtenido, esperado) and len(obtenido) == len(esperado)
+        print(f"   factor {argumentos[0]}, {argumentos[1]:4d} candidatos, mínimo {argumentos[2]}: "
+              f"{[round(f, 3) for f in obtenido]} {'✓' if correcto else '✗'}")
+        ok &= correcto
+    print("✅ Rondas correctas" if ok else "❌ Rondas incorrectas")
+    return ok
+
+def test_oob_vs_kfold():
+    """La exactitud OOB queda cerca de la de 5-fold con un solo ajuste."""
+    print("\n" + "="*70)
+    print("TEST 3: Puntaje OOB vs 5-fold")
+    print("="*70)
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import cross_val_score
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    X, y = cargar_matrices(DATASET, label_encoder)
+    parametros = dict(n_estimators=100, max_depth=20, min_samples_leaf=2, max_features='sqrt', **FIJOS)
+
+    inicio = time.perf_counter()
+    modelo = RandomForestClassifier(**parametros, oob_score=True, n_jobs=1).fit(X, y)
+    oob = metricas_oob(modelo, y)['exactitud_oob']
+    t_oob = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    kfold = cross_val_score(RandomForestClassifier(**parametros, n_jobs=1), X, y, cv=5).mean()
+    t_kfold = time.perf_counter() - inicio
+
+    print(f"   OOB    {oob:.4f} en {t_oob:.1f} s")
+    print(f"   5-fold {kfold:.4f} en {t_kfold:.1f} s")
+    ok = abs(oob - kfold) < 0.02 and t_oob < t_kfold / 2
+    print("✅ OOB equivalente y más barato" if ok else "❌ OOB no equivalente")
+    return ok
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = [test_busqueda(directorio)]
+    resultados += [test_rondas(), test_oob_vs_kfold()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
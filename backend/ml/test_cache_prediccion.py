@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de la caché de predicciones por intervalos de umbrales: los aciertos
+deben ser idénticos a predecir(), y se verifican el LRU, el colapso de
+solicitudes simultáneas y la recarga al cambiar el archivo del modelo.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from almacen_resultados import ARCHIVOS_VERSION, ARCHIVOS_VERSION_COMPILADO
+from predict import FEATURE_ORDER, load_models, predecir
+from cache_prediccion import ARCHIVOS_MODELO, CachePrediccion
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def perfiles_dataset():
+    """Perfiles del dataset más Arquitectura con ES bajo (regla de negocio)."""
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    arquitectura = df[df['Carrera'] == 'Arquitectura'][FEATURE_ORDER].copy()
+    arquitectura['ES'] = 3.0
+    return pd.concat([df[FEATURE_ORDER], arquitectura]).to_dict('records')
+
+def test_aciertos_identicos():
+    """Cada resultado de la caché (acierto o fallo) es igual a predecir()."""
+    print("="*70)
+    print("TEST 1: Resultados de la caché == predecir()")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    cache = CachePrediccion(modelo, label_encoder, capacidad=100000)
+
+    # Perfiles en la grilla de 0.1 de calcular_promedios, con repeticiones
+    rng = np.random.default_rng(0)
+    grilla = np.round(rng.integers(10, 51, size=(3000, len(FEATURE_ORDER))) / 10, 1)
+    perfiles = perfiles_dataset() + [dict(zip(FEATURE_ORDER, fila)) for fila in grilla]
+    perfiles = perfiles + perfiles[::3]
+
+    diferencias = 0
+    for datos in perfiles:
+        esperado = json.dumps(predecir(dict(datos), modelo, label_encoder), ensure_ascii=False)
+        obtenido = json.dumps(cache.predecir(dict(datos)), ensure_ascii=False)
+        if obtenido != esperado:
+            diferencias += 1
+
+    stats = cache.estadisticas()
+    print(f"   Perfiles: {len(perfiles)}")
+    print(f"   Aciertos: {stats['aciertos']}  Fallos: {stats['fallos']}  "
+          f"Tasa: {stats['tasa_aciertos'] * 100:.1f}%")
+    print(f"   Diferencias: {diferencias}")
+    print("✅ Resultados idénticos" if diferencias == 0 else "❌ Hay diferencias")
+    return diferencias == 0 and stats['aciertos'] > 0
+
+def test_lru():
+    """La caché no supera su capacidad y cuenta los desalojos."""
+    print("\n" + "="*70)
+    print("TEST 2: Límite de tamaño y desalojos LRU")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    cache = CachePrediccion(modelo, label_encoder, capacidad=10)
+    perfiles = perfiles_dataset()[:50]
+
+    for datos in perfiles:
+        cache.predecir(dict(datos))
+    # El último perfil sigue en la caché; el primero fue desalojado
+    cache.predecir(dict(perfiles[-1]))
+    stats = cache.estadisticas()
+
+    print(f"   Tamaño: {stats['tamano']}/{stats['capacidad']}  Desalojos: {stats['desalojos']}  "
+          f"Aciertos: {stats['aciertos']}")
+    ok = stats['tamano'] == 10 and stats['desalojos'] == stats['fallos'] - 10 and stats['aciertos'] >= 1
+    print("✅ LRU correcto" if ok else "❌ LRU incorrecto")
+    return ok
+
+class ModeloLento:
+    """Envuelve un modelo y demora predict_proba para simular concurrencia."""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.llamadas = 0
+
+    def __getattr__(self, nombre):
+        return getattr(self.modelo, nombre)
+
+    def predict_proba(self, X):
+        self.llamadas += 1
+        time.sleep(0.2)
+        return self.modelo.predict_proba(X)
+
+def test_colapso_en_curso():
+    """Solicitudes simultáneas con la misma firma hacen un solo cálculo."""
+    print("\n" + "="*70)
+    print("TEST 3: Colapso de solicitudes simultáneas")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    lento = ModeloLento(modelo)
+    cache = CachePrediccion(lento, label_encoder)
+    datos = perfiles_dataset()[0]
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cache.predecir(dict(datos))))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    stats = cache.estadisticas()
+    iguales = len({json.dumps(r, ensure_ascii=False) for r in resultados}) == 1
+    print(f"   Hilos: 8  Llamadas a predict_proba: {lento.llamadas}  "
+          f"Colapsadas: {stats['colapsadas']}  Aciertos: {stats['aciertos']}")
+    ok = lento.llamadas == 1 and iguales and stats['colapsadas'] + stats['aciertos'] == 7
+    print("✅ Un solo cálculo" if ok else "❌ Se repitió el cálculo")
+    return ok
+
+def test_recarga_modelo():
+    """Si cambia el archivo del modelo, se recarga y se vacía la caché."""
+    print("\n" + "="*70)
+    print("TEST 4: Vaciado al cambiar el archivo del modelo")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = Path(directorio) / 'modelo.npz'
+        archivo.write_bytes(b'v1')
+        cargas = []
+
+        def cargar():
+            cargas.append(1)
+            return modelo, label_encoder
+
+        cache = CachePrediccion(modelo, label_encoder, cargar=cargar,
+                                rutas_modelo=(archivo,), intervalo_verificacion=0)
+        datos = perfiles_dataset()[0]
+        cache.predecir(dict(datos))
+        cache.predecir(dict(datos))
+        antes = cache.estadisticas()
+
+        archivo.write_bytes(b'version 2')
+        cache.predecir(dict(datos))
+        despues = cache.estadisticas()
+
+    print(f"   Antes: tamaño {antes['tamano']}, aciertos {antes['aciertos']}")
+    print(f"   Después: recargas {despues['recargas']}, fallos {despues['fallos']}, tamaño {despues['tamano']}")
+    # Se vigilan todos los archivos que definen la versión del almacén de resultados
+    vigilados = set(ARCHIVOS_VERSION + ARCHIVOS_VERSION_COMPILADO) <= set(ARCHIVOS_MODELO)
+    print(f"   Vigila los archivos de la versión del almacén: {vigilados}")
+    ok = (antes['aciertos'] == 1 and len(cargas) == 1 and despues['recargas'] == 1
+          and despues['fallos'] == 2 and vigilados)
+    print("✅ Caché vaciada al cambiar el modelo" if ok else "❌ La caché no se vació")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [
+        test_aciertos_identicos(),
+        test_lru(),
+        test_colapso_en_curso(),
+        test_recarga_modelo(),
+    ]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
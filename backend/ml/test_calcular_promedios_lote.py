@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de calcular_promedios_lote(): mismos promedios (incluido el redondeo)
+que calcular_promedios() fila por fila, máscaras de validación y formato de
+65 preguntas.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from predict import (FEATURE_ORDER, N_PREGUNTAS, RENDIMIENTO_MAP, calcular_promedios,
+                     calcular_promedios_lote)
+
+def como_dicts(matriz):
+    return [{f'q{i + 1}': int(v) for i, v in enumerate(fila)} for fila in matriz]
+
+def matriz_respuestas(lista_respuestas):
+    """Matriz (n, 62) uint8 desde diccionarios {'q1': 3, ...}; las que faltan quedan en 0."""
+    return np.array([[respuestas.get(f'q{i}') or 0 for i in range(1, N_PREGUNTAS + 1)]
+                     for respuestas in lista_respuestas], dtype=np.uint8)
+
+def test_equivalencia():
+    """Compara con calcular_promedios en respuestas válidas, faltantes y fuera de rango."""
+    print("="*70)
+    print("TEST 1: calcular_promedios_lote == calcular_promedios")
+    print("="*70)
+
+    rng = np.random.default_rng(0)
+    casos = {
+        'válidas 1-5': rng.integers(1, 6, size=(20000, 62), dtype=np.uint8),
+        'con faltantes (0)': rng.integers(0, 6, size=(20000, 62), dtype=np.uint8),
+        'uint8 completo': rng.integers(0, 256, size=(5000, 62), dtype=np.uint8),
+        'int64 negativos/grandes': rng.integers(-300, 1000, size=(500, 62)),
+        'todas en 3': np.full((1, 62), 3, dtype=np.uint8),
+    }
+
+    correcto = True
+    for nombre, matriz in casos.items():
+        promedios, _, _ = calcular_promedios_lote(matriz)
+        esperado = np.array([[calcular_promedios(r)[f] for f in FEATURE_ORDER]
+                             for r in como_dicts(matriz)])
+        diferencias = int((promedios != esperado).any(axis=1).sum())
+        correcto &= diferencias == 0
+        print(f"   {nombre:<26} {len(matriz):>6} filas  diferencias: {diferencias}")
+
+    # Desde diccionarios (con claves ausentes y None)
+    dicts = como_dicts(casos['válidas 1-5'][:200])
+    del dicts[0]['q5']
+    dicts[1]['q7'] = None
+    promedios, faltantes, _ = calcular_promedios_lote(matriz_respuestas(dicts))
+    esperado = np.array([[calcular_promedios({k: v or 0 for k, v in r.items()})[f]
+                          for f in FEATURE_ORDER] for r in dicts])
+    desde_dicts = (promedios == esperado).all() and faltantes[:2].all() and not faltantes[2:].any()
+    correcto &= bool(desde_dicts)
+    print(f"   {'desde diccionarios':<26} {len(dicts):>6} filas  "
+          f"{'iguales' if desde_dicts else 'DIFERENTES'}")
+
+    print("✅ Promedios idénticos" if correcto else "❌ Hay diferencias")
+    return correcto
+
+def test_mascaras():
+    """Las máscaras coinciden con la validación de respuestas de mlService."""
+    print("\n" + "="*70)
+    print("TEST 2: Máscaras de faltantes y fuera de rango")
+    print("="*70)
+
+    rng = np.random.default_rng(1)
+    matriz = rng.integers(1, 6, size=(1000, 62), dtype=np.uint8)
+    matriz[rng.random(1000) < 0.1, rng.integers(0, 62)] = 0
+    matriz[rng.random(1000) < 0.1, rng.integers(0, 62)] = 7
+
+    _, faltantes, fuera_de_rango = calcular_promedios_lote(matriz)
+    esperado_faltantes = (matriz == 0).any(axis=1)
+    esperado_fuera = ((matriz > 5)).any(axis=1)
+
+    ok = (faltantes == esperado_faltantes).all() and (fuera_de_rango == esperado_fuera).all()
+    print(f"   Filas con faltantes: {faltantes.sum()}  Filas fuera de rango: {fuera_de_rango.sum()}")
+    print("✅ Máscaras correctas" if ok else "❌ Máscaras incorrectas")
+    return bool(ok)
+
+def test_formato_65():
+    """Con 65 columnas, q63-q65 se agregan como columnas de rendimiento."""
+    print("\n" + "="*70)
+    print("TEST 3: Formato de 65 preguntas (rendimiento q63-q65)")
+    print("="*70)
+
+    rng = np.random.default_rng(2)
+    matriz = rng.integers(1, 6, size=(500, 65), dtype=np.uint8)
+    promedios, _, _ = calcular_promedios_lote(matriz)
+
+    columnas = FEATURE_ORDER + list(RENDIMIENTO_MAP)
+    esperado = []
+    for r in como_dicts(matriz):
+        fila = calcular_promedios(r)
+        fila.update({clave: r[pregunta] for clave, pregunta in RENDIMIENTO_MAP.items()})
+        esperado.append([fila[c] for c in columnas])
+
+    ok = promedios.shape == (500, 17) and (promedios == np.array(esperado)).all()
+    print(f"   Forma: {promedios.shape}")
+    print("✅ Formato de 65 correcto" if ok else "❌ Formato de 65 incorrecto")
+    return bool(ok)
+
+def test_throughput():
+    """Compara el costo por fila con el cálculo por diccionarios."""
+    print("\n" + "="*70)
+    print("TEST 4: Throughput")
+    print("="*70)
+
+    rng = np.random.default_rng(3)
+    matriz = rng.integers(1, 6, size=(100000, 62), dtype=np.uint8)
+    dicts = como_dicts(matriz[:10000])
+
+    inicio = time.perf_counter()
+    for r in dicts:
+        calcular_promedios(r)
+    por_fila_dict = (time.perf_counter() - inicio) / len(dicts)
+
+    inicio = time.perf_counter()
+    calcular_promedios_lote(matriz)
+    por_fila_lote = (time.perf_counter() - inicio) / len(matriz)
+
+    print(f"   calcular_promedios:      {por_fila_dict * 1e6:8.2f} µs/fila")
+    print(f"   calcular_promedios_lote: {por_fila_lote * 1e6:8.2f} µs/fila "
+          f"({por_fila_dict / por_fila_lote:.0f}x)")
+    return True
+
+if __name__ == '__main__':
+    resultados = [test_equivalencia(), test_mascaras(), test_formato_65(), test_throughput()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de calibracion.py: el ajuste baja el ECE en el conjunto de prueba,
+predecir() y predecir_lote() dan lo mismo con la calibración cargada, aplicar
+la tabla cuesta microsegundos por fila y el registro de modelos la publica
+junto al modelo.
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import calibracion
+from bosque_compilado import cargar_sklearn, compilar
+from calibracion import ARCHIVO_CALIBRACION, adjuntar_calibracion, cargar_calibracion
+from explicaciones import compilar_explicaciones
+from predict import FEATURE_ORDER, SCRIPT_DIR, load_models, predecir, predecir_lote
+from registro_modelos import RegistroModelos, registrar
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_ajuste(directorio):
+    """La calibración elegida tiene menor ECE que el bosque y que la confianza actual."""
+    print("="*70)
+    print("TEST 1: Ajuste y reporte de confiabilidad")
+    print("="*70)
+
+    salida = Path(directorio) / ARCHIVO_CALIBRACION
+    reporte = calibracion.main(['ajustar', '--salida', str(salida)])
+    prueba = reporte['prueba']
+    elegida = prueba[reporte['metodo']]
+    cargada = cargar_calibracion(salida)
+
+    print(f"\n   Método: {reporte['metodo']}, {salida.stat().st_size / 1024:.1f} KB")
+    print(f"   ECE bosque {prueba['bosque']['ece']:.4f}, mostrada {prueba['confianza_mostrada']['ece']:.4f}, "
+          f"calibrada {elegida['ece']:.4f}")
+    ok = (elegida['ece'] < prueba['bosque']['ece']
+          and elegida['ece'] < prueba['confianza_mostrada']['ece']
+          and elegida['brier'] < prueba['bosque']['brier']
+          and cargada.metodo == reporte['metodo']
+          and (Path(directorio) / 'calibracion_reporte.json').exists())
+    print("✅ Calibración mejora el ECE" if ok else "❌ La calibración no mejora el ECE")
+    return ok
+
+def test_lote_y_costo(directorio):
+    """Con calibración, predecir() == predecir_lote() y la confianza es la probabilidad calibrada."""
+    print("\n" + "="*70)
+    print("TEST 2: predecir vs predecir_lote calibrados y costo por fila")
+    print("="*70)
+
+    ok = True
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    perfiles = df[FEATURE_ORDER].head(1500).to_dict('records')
+    for metodo in calibracion.METODOS:
+        ruta = Path(directorio) / f'{metodo}.npz'
+        calibracion.main(['ajustar', '--metodo', metodo, '--salida', str(ruta)])
+        modelo, label_encoder = load_models()
+        adjuntar_calibracion(modelo, label_encoder, ruta)
+
+        lote = predecir_lote(perfiles, modelo, label_encoder)
+        diferencias = sum(
+            json.dumps(r, ensure_ascii=False) != json.dumps(predecir(dict(d), modelo, label_encoder),
+                                                          ensure_ascii=False)
+            for d, r in zip(perfiles, lote)
+        )
+        X = df[FEATURE_ORDER].head(1500).to_numpy(dtype=np.float64)
+        calibradas = modelo.calibracion.aplicar(modelo.predict_proba(X))
+        confianza_correcta = np.allclose([r['confianza'] for r in lote], calibradas.max(axis=1))
+        sumas_correctas = np.allclose(calibradas.sum(axis=1), 1.0)
+
+        # Costo: una fila (como en predecir) y la matriz completa (como en predecir_lote)
+        fila = modelo.predict_proba(X[:1])
+        mejor_fila = min(medir(modelo.calibracion.aplicar, fila, 2000) for _ in range(3))
+        probabilidades = modelo.predict_proba(X)
+        mejor_lote = min(medir(modelo.calibracion.aplicar, probabilidades, 20) for _ in range(3)) / len(X)
+
+        print(f"\n   {metodo}: diferencias {diferencias}/{len(perfiles)}, confianza = probabilidad "
+              f"calibrada: {confianza_correcta}, filas suman 1: {sumas_correctas}")
+        print(f"   {metodo}: {mejor_fila:.1f} µs con 1 fila, {mejor_lote:.3f} µs/fila en lote")
+        ok &= (diferencias == 0 and confianza_correcta and sumas_correctas
+               and mejor_fila < 100 and mejor_lote < 5)
+
+    print("✅ Resultados idénticos y costo en microsegundos" if ok else "❌ Hay diferencias")
+    return ok
+
+def medir(funcion, argumento, repeticiones):
+    """Microsegundos por llamada."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(argumento)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+def test_registro(directorio):
+    """registrar() incluye la calibración en la versión y el modelo registrado la usa."""
+    print("\n" + "="*70)
+    print("TEST 3: Calibración en el registro de modelos")
+    print("="*70)
+
+    ruta = Path(directorio) / ARCHIVO_CALIBRACION
+    calibracion.main(['ajustar', '--metodo', 'temperatura', '--salida', str(ruta)])
+    registros = Path(directorio) / 'modelos'
+    manifiesto = registrar('principal', SCRIPT_DIR / 'modelo_random_forest.pkl',
+                           SCRIPT_DIR / 'label_encoder.pkl', 'npz', registros,
+                           calibracion_path=ruta)
+    registro = RegistroModelos(registros)
+    registro.revisar()
+    entrada = registro.obtener('principal')
+
+    modelo, label_encoder = load_models()
+    adjuntar_calibracion(modelo, label_encoder, ruta)
+    # El registro agrega siempre los aportes por nodo (explicaciones.py)
+    original, _ = cargar_sklearn(SCRIPT_DIR / 'modelo_random_forest.pkl', SCRIPT_DIR / 'label_encoder.pkl')
+    modelo.explicador = compilar_explicaciones(original, label_encoder.classes_)
+    modelo.explicador.bosque = compilar(original)
+    perfil = dict(zip(FEATURE_ORDER, [3.2, 4.1, 2.5, 3.0, 2.8, 3.4, 4.2, 3.1, 3.9, 2.2, 2.9, 3.3, 3.6, 3.0]))
+    esperado = predecir(dict(perfil), modelo, label_encoder)
+    obtenido = entrada.predecir(dict(perfil))
+
+    print(f"\n   Archivos: {sorted(manifiesto['archivos'].values())}")
+    print(f"   Temperatura: {entrada.modelo.calibracion.temperatura:.3f}")
+    print(f"   Confianza: {obtenido['porcentaje_confianza']}% ({obtenido['carrera_recomendada']})")
+    ok = (ARCHIVO_CALIBRACION in manifiesto['hashes'] and obtenido == esperado
+          and entrada.modelo.calibracion.temperatura == modelo.calibracion.temperatura)
+    print("✅ Calibración registrada" if ok else "❌ Calibración no registrada")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_ajuste, test_lote_y_costo, test_registro):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de compactacion_bosque.py: los árboles compactados votan la misma
+clase con menos nodos y respetan la profundidad máxima, las métricas OOB
+reconstruidas coinciden con el oob_score_ de sklearn, el orden por aporte
+supera a un orden al azar, y el modelo elegido está dentro de la tolerancia,
+es el más chico y se puede usar como el original.
+"""
+
+import json
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bosque_compilado import compilar
+from busqueda_hiperparametros import dominada
+from carga_datos import cargar_matrices
+from compactacion_bosque import (compactar_arbol, construir_bosque, diferencia_bootstrap, main,
+                                 mascaras_oob, metricas_prefijos, ordenar_arboles, probabilidades_arboles)
+from predict import FEATURE_ORDER, SCRIPT_DIR, predecir
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def cargar():
+    modelo = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    X, y = cargar_matrices(DATASET, label_encoder)
+    return modelo, label_encoder, X, y.astype(np.int64)
+
+def test_compactar_arbol():
+    """Misma clase votada, menos nodos, profundidad acotada y compilable."""
+    print("="*70)
+    print("TEST 1: Colapso de subárboles y corte de profundidad")
+    print("="*70)
+
+    modelo, _, X, _ = cargar()
+    arboles = modelo.estimators_[:40]
+    colapsados = [compactar_arbol(a) for a in arboles]
+    cortados = [compactar_arbol(a, profundidad_maxima=8) for a in arboles]
+
+    misma_clase = np.mean([(a.predict(X) == c.predict(X)).mean() for a, c in zip(arboles, colapsados)])
+    nodos = sum(a.tree_.node_count for a in arboles)
+    nodos_colapsados = sum(c.tree_.node_count for c in colapsados)
+    profundidad_ok = all(c.tree_.max_depth <= 8 and c.get_depth() <= 8 for c in cortados)
+    bosque = construir_bosque(modelo, cortados)
+    compilado_igual = np.allclose(compilar(bosque).predict_proba(X), bosque.predict_proba(X))
+    recargado = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    original_intacto = all(a.tree_.node_count == b.tree_.node_count
+                           for a, b in zip(arboles, recargado.estimators_))
+
+    print(f"   Misma clase que el árbol original: {misma_clase:.4%}")
+    print(f"   Nodos: {nodos} → {nodos_colapsados} colapsando, {sum(c.tree_.node_count for c in cortados)} "
+          f"con profundidad 8")
+    print(f"   Profundidad ≤ 8: {profundidad_ok}, compilado igual: {compilado_igual}")
+    ok = (misma_clase > 0.999 and nodos_colapsados < nodos * 0.95 and profundidad_ok and compilado_igual
+          and original_intacto and len(bosque.estimators_) == 40)
+    print("✅ Compactación correcta" if ok else "❌ Compactación incorrecta")
+    return ok
+
+def test_oob_y_orden():
+    """OOB reconstruido = oob_score_ de sklearn; el orden por aporte gana al azar."""
+    print("\n" + "="*70)
+    print("TEST 2: OOB reconstruido y orden por aporte")
+    print("="*70)
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    modelo, _, X, y = cargar()
+    referencia = RandomForestClassifier(n_estimators=60, max_depth=20, min_samples_leaf=2, oob_score=True,
+                                        random_state=3, n_jobs=1).fit(X, y)
+    mascaras = mascaras_oob(referencia, len(y))
+    P = probabilidades_arboles(referencia.estimators_, X)
+    exactitud, _ = metricas_prefijos(P, y, mascaras, list(range(60)), [60])[60]
+    mascaras_sin_orden = mascaras_oob(referencia, len(y))[:, np.random.default_rng(0).permutation(len(y))]
+
+    P_modelo = probabilidades_arboles(modelo.estimators_, X)
+    mascaras_modelo = mascaras_oob(modelo, len(y))
+    orden = ordenar_arboles(P_modelo, y, mascaras_modelo)
+    ordenado = metricas_prefijos(P_modelo, y, mascaras_modelo, orden, [20])[20][0]
+    azar = np.mean([metricas_prefijos(P_modelo, y, mascaras_modelo, list(permutacion), [20])[20][0]
+                    for permutacion in (np.random.default_rng(s).permutation(200) for s in range(5))])
+
+    diferencia = diferencia_bootstrap(P, y, mascaras)
+    diferencia_sin_orden = diferencia_bootstrap(P, y, mascaras_sin_orden)
+    print(f"   Exactitud OOB: {exactitud:.4f} (sklearn {referencia.oob_score_:.4f})")
+    print(f"   Dentro - fuera del bootstrap: {diferencia:+.3f} (filas mezcladas: {diferencia_sin_orden:+.3f})")
+    print(f"   20 árboles: por aporte {ordenado:.4f}, al azar {azar:.4f}")
+    # Las probabilidades se suman en float32: algún empate puede resolverse distinto
+    ok = (abs(exactitud - referencia.oob_score_) <= 2 / len(y)
+          and diferencia > 0.05 and abs(diferencia_sin_orden) < 0.02
+          and sorted(orden) == list(range(200)) and ordenado > azar)
+    print("✅ OOB y orden correctos" if ok else "❌ OOB u orden incorrectos")
+    return ok
+
+def test_elegir_y_exportar(directorio):
+    """Tabla con Pareto correcto, elegida dentro de la tolerancia y modelo exportado utilizable."""
+    print("\n" + "="*70)
+    print("TEST 3: Tabla, elección y exportación")
+    print("="*70)
+
+    salida = Path(directorio) / 'compactacion.json'
+    exportado = Path(directorio) / 'compacto.pkl'
+    reporte = main(['--arboles', '10', '30', '60', '--profundidades', '0', '10', '--tolerancia', '0.01',
+                    '--salida', str(salida), '--exportar', str(exportado)])
+    tabla = reporte['tabla']
+    original = tabla[0]
+    elegida = next(f for f in tabla if all(f[k] == v for k, v in reporte['elegida'].items()))
+    aceptables = [f for f in tabla if f['exactitud'] >= original['exactitud'] - 0.01]
+    pareto_ok = all(f['pareto'] == (not dominada(f, tabla, ('bytes', 'latencia_us'), 'exactitud'))
+                    for f in tabla)
+
+    modelo = joblib.load(exportado)
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    _, _, X, y = cargar()
+    perfil = dict(zip(FEATURE_ORDER, [3.2, 4.1, 2.5, 3.0, 2.8, 3.4, 4.2, 3.1, 3.9, 2.2, 2.9, 3.3, 3.6, 3.0]))
+    resultado = predecir(dict(perfil), modelo, label_encoder)
+    compilado_igual = np.allclose(compilar(modelo).predict_proba(X[:500]), modelo.predict_proba(X[:500]))
+
+    print(f"\n   Variantes: {len(tabla)}, elegida: {elegida['arboles']} árboles, "
+          f"profundidad {elegida['profundidad_maxima']}, {elegida['bytes'] / 1024:.0f} KB")
+    print(f"   Exportado: {modelo.n_estimators} árboles, predicción {resultado['carrera_recomendada']}, "
+          f"compilado igual: {compilado_igual}")
+    ok = (len(tabla) == 1 + 2 * 4 and original['original'] and original['arboles'] == 200
+          and elegida['exactitud'] >= original['exactitud'] - 0.01
+          and elegida['bytes'] == min(f['bytes'] for f in aceptables) and pareto_ok
+          and json.loads(salida.read_text(encoding='utf-8'))['elegida'] == reporte['elegida']
+          and modelo.n_estimators == elegida['arboles'] == len(modelo.estimators_)
+          and list(modelo.feature_names_in_) == FEATURE_ORDER and resultado['success'] and compilado_igual)
+    print("✅ Elección y exportación correctas" if ok else "❌ Elección o exportación incorrectas")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [test_compactar_arbol(), test_oob_y_orden()]
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados.append(test_elegir_y_exportar(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga_datos.py y entrenamiento_fragmentos.py: la lectura por
+bloques da las mismas matrices con tipos compactos, el bosque unido de los
+sub-bosques es tan exacto como uno ajustado de una vez (también con el CSV
+ordenado por carrera, gracias al reparto previo en particiones), las filas de
+peso 0 de las clases faltantes no cambian los árboles más que otra semilla y
+la memoria pico de la lectura depende del tamaño de bloque.
+"""
+
+import sys
+import tempfile
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bosque_compilado import compilar
+from carga_datos import cargar_matrices, contar_filas, leer_bloques, matrices_bloque
+from entrenamiento_fragmentos import (ajustar_fragmento, cuotas_arboles, entrenar_por_fragmentos, main,
+                                      parametros_base)
+from predict import FEATURE_ORDER, SCRIPT_DIR
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_carga():
+    """Tipos compactos y mismos valores que la lectura completa."""
+    print("="*70)
+    print("TEST 1: Lectura por bloques con tipos compactos")
+    print("="*70)
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    X, y = cargar_matrices(DATASET, label_encoder, tamano_bloque=700)
+    bloque = next(leer_bloques(DATASET, 1000, carreras=label_encoder.classes_))
+
+    tipos_ok = (all(bloque[f].dtype == np.float32 for f in FEATURE_ORDER)
+                and bloque['Rendimiento_General'].dtype == np.uint8
+                and isinstance(bloque['Carrera'].dtype, pd.CategoricalDtype)
+                and X.dtype == np.float32 and X.flags['C_CONTIGUOUS'])
+    iguales = (np.allclose(X, df[FEATURE_ORDER].to_numpy(), atol=1e-6)
+               and np.array_equal(y, label_encoder.transform(df['Carrera'])))
+    completo = df.memory_usage(deep=True).sum()
+    compacto = bloque.memory_usage(deep=True).sum() * len(df) / len(bloque)
+    print(f"   Filas: {len(y)} (contadas: {contar_filas(DATASET)}), tipos compactos: {tipos_ok}, "
+          f"iguales: {iguales}")
+    print(f"   Memoria del DataFrame: {completo / 1024:.0f} KB → {compacto / 1024:.0f} KB")
+
+    # Carreras que el label encoder no conoce se descartan
+    desconocida = bloque.copy()
+    desconocida['Carrera'] = desconocida['Carrera'].cat.add_categories('Astronomía')
+    desconocida.loc[desconocida.index[:3], 'Carrera'] = 'Astronomía'
+    desconocida['Carrera'] = desconocida['Carrera'].cat.set_categories(label_encoder.classes_)
+    _, y_desconocida = matrices_bloque(desconocida)
+
+    ok = (tipos_ok and iguales and len(y) == contar_filas(DATASET) == len(df)
+          and compacto * 3 < completo and len(y_desconocida) == len(bloque) - 3)
+    print("✅ Lectura correcta" if ok else "❌ Lectura incorrecta")
+    return ok
+
+def test_entrenamiento(directorio):
+    """El bosque unido predice como uno normal, aun con el CSV ordenado por carrera."""
+    print("\n" + "="*70)
+    print("TEST 2: Sub-bosques por fragmentos unidos en un modelo")
+    print("="*70)
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    base = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    entrenamiento, prueba = train_test_split(df, test_size=0.2, stratify=df['Carrera'], random_state=0)
+    X_prueba = prueba[FEATURE_ORDER].to_numpy()
+    y_prueba = label_encoder.transform(prueba['Carrera'])
+
+    referencia = RandomForestClassifier(**parametros_base(base), n_estimators=100, random_state=0, n_jobs=1)
+    referencia.fit(entrenamiento[FEATURE_ORDER].to_numpy(), label_encoder.transform(entrenamiento['Carrera']))
+    exactitud_referencia = (referencia.predict(X_prueba) == y_prueba).mean()
+
+    ordenado = Path(directorio) / 'ordenado.csv'
+    entrenamiento.sort_values('Carrera').to_csv(ordenado, index=False)
+    entrenamiento.to_csv(Path(directorio) / 'aleatorio.csv', index=False)
+    casos = (('aleatorio', Path(directorio) / 'aleatorio.csv', False), ('ordenado', ordenado, True))
+    ok = True
+    for nombre, ruta, mezclar in casos:
+        modelo, resumen = entrenar_por_fragmentos(ruta, label_encoder, parametros_base(base), arboles=100,
+                                                  tamano_bloque=1000, workers=2, mezclar=mezclar)
+        exactitud = (modelo.predict(X_prueba) == y_prueba).mean()
+        valido = (modelo.n_estimators == len(modelo.estimators_) == 100
+                  and list(modelo.classes_) == list(range(len(label_encoder.classes_)))
+                  and all(a.n_classes_ == len(label_encoder.classes_) for a in modelo.estimators_)
+                  and list(modelo.feature_names_in_) == FEATURE_ORDER
+                  and np.allclose(compilar(modelo).predict_proba(X_prueba), modelo.predict_proba(X_prueba)))
+        print(f"   {nombre:10s} {resumen['bloques']} bloques, {resumen['fragmentos']} fragmentos: "
+              f"exactitud {exactitud:.4f} (de una vez {exactitud_referencia:.4f}), válido: {valido}")
+        ok &= valido and exactitud >= exactitud_referencia - 0.03 and resumen['filas'] == len(entrenamiento)
+
+    # Sin mezclar, un CSV ordenado por carrera da sub-bosques que no distinguen entre bloques
+    sin_mezclar, _ = entrenar_por_fragmentos(ordenado, label_encoder, parametros_base(base), arboles=100,
+                                             tamano_bloque=1000, workers=0, mezclar=False)
+    exactitud_sin_mezclar = (sin_mezclar.predict(X_prueba) == y_prueba).mean()
+    print(f"   ordenado sin mezclar: exactitud {exactitud_sin_mezclar:.4f}")
+
+    # CLI: guarda un .pkl con los hiperparámetros del modelo base
+    salida = Path(directorio) / 'modelo.pkl'
+    resumen = main([str(Path(directorio) / 'aleatorio.csv'), '--salida', str(salida),
+                    '--arboles', '30', '--bloque', '2000', '--workers', '0'])
+    guardado = joblib.load(salida)
+    ok &= (guardado.n_estimators == 30 and guardado.max_depth == base.max_depth
+           and resumen['bloques'] == 2 and resumen['fragmentos'] == 2)
+
+    cuotas_ok = cuotas_arboles([1000, 1000, 800], 100) == [36, 35, 29] and sum(cuotas_arboles([7] * 9, 20)) == 20
+    ok &= cuotas_ok
+    print(f"   CLI: {guardado.n_estimators} árboles, cuotas: {cuotas_ok}")
+    print("✅ Entrenamiento correcto" if ok else "❌ Entrenamiento incorrecto")
+    return ok
+
+def test_relleno():
+    """Las filas de peso 0 de las clases faltantes no cambian los árboles más que otra semilla."""
+    print("\n" + "="*70)
+    print("TEST 3: Filas de relleno de las clases faltantes")
+    print("="*70)
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    base = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    n_clases = len(label_encoder.classes_)
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    X = df[FEATURE_ORDER].to_numpy(np.float32)
+    y = label_encoder.transform(df['Carrera'])
+    # Un bloque sin las tres primeras carreras
+    presentes = y >= 3
+    X_bloque, X_prueba, y_bloque, y_prueba = train_test_split(
+        X[presentes], y[presentes], test_size=0.2, stratify=y[presentes], random_state=0)
+
+    def sin_relleno(parametros, semilla):
+        """Probabilidades del bosque ajustado solo con las filas reales, en columnas 0..n_clases-1."""
+        bosque = RandomForestClassifier(**parametros, n_estimators=50, random_state=semilla, n_jobs=1)
+        bosque.fit(X_bloque, y_bloque)
+        proba = np.zeros((len(X_prueba), n_clases))
+        proba[:, bosque.classes_] = bosque.predict_proba(X_prueba)
+        return proba
+
+    def exactitud(proba):
+        return (proba.argmax(axis=1) == y_prueba).mean()
+
+    # Sin bootstrap: los mismos árboles, nodo por nodo
+    parametros = dict(parametros_base(base), bootstrap=False)
+    relleno = ajustar_fragmento(X_bloque, y_bloque, n_clases, 50, 7, parametros)
+    identico = np.array_equal(relleno.predict_proba(X_prueba), sin_relleno(parametros, 7)) and all(
+        arbol.tree_.weighted_n_node_samples[0] == arbol.tree_.n_node_samples[0] == len(y_bloque)
+        for arbol in relleno.estimators_)
+
+    # Con bootstrap: la diferencia con relleno queda dentro de la variación entre semillas
+    parametros = parametros_base(base)
+    con_relleno = [
+        exactitud(ajustar_fragmento(X_bloque, y_bloque, n_clases, 50, s, parametros).predict_proba(X_prueba))
+        for s in range(5)
+    ]
+    semillas = [exactitud(sin_relleno(parametros, s)) for s in range(5)]
+    diferencia = abs(np.mean(con_relleno) - np.mean(semillas))
+    dispersion = max(semillas) - min(semillas)
+
+    print(f"   Sin bootstrap, mismos árboles que sin relleno: {identico}")
+    print(f"   Con bootstrap: exactitud con relleno {np.mean(con_relleno):.4f}, sin relleno {np.mean(semillas):.4f} "
+          f"(diferencia {diferencia:.4f}, rango entre semillas {dispersion:.4f})")
+    ok = identico and diferencia <= max(dispersion, 0.01)
+    print("✅ Relleno acotado" if ok else "❌ Relleno con efecto")
+    return ok
+
+def test_memoria(directorio):
+    """La memoria pico de la lectura por bloques no crece con el archivo."""
+    print("\n" + "="*70)
+    print("TEST 4: Memoria pico de la lectura")
+    print("="*70)
+
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    ruta = Path(directorio) / 'grande.csv'
+    pd.concat([df] * 20, ignore_index=True).to_csv(ruta, index=False)
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+
+    def pico(funcion):
+        tracemalloc.start()
+        funcion()
+        _, maximo = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return maximo
+
+    def completo():
+        tabla = pd.read_csv(ruta, encoding='utf-8-sig')
+        return tabla[FEATURE_ORDER].to_numpy(), tabla['Carrera'].to_numpy()
+
+    def por_bloques():
+        filas = 0
+        for bloque in leer_bloques(ruta, 5000, carreras=label_encoder.classes_):
+            filas += len(matrices_bloque(bloque)[1])
+        return filas
+
+    pico_completo = pico(completo)
+    pico_bloques = pico(por_bloques)
+    print(f"   {contar_filas(ruta)} filas: lectura completa {pico_completo / 1024 / 1024:.1f} MB, "
+          f"por bloques {pico_bloques / 1024 / 1024:.1f} MB")
+    ok = por_bloques() == len(df) * 20 and pico_bloques * 5 < pico_completo
+    print("✅ Memoria acotada" if ok else "❌ Memoria no acotada")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [test_carga()]
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados.append(test_entrenamiento(directorio))
+    resultados.append(test_relleno())
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados.append(test_memoria(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
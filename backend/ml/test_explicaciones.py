@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de explicaciones.py: base + aportes = predict_proba para cualquier
+clase, los aportes por dimensión coinciden con recorrer el decision_path de
+sklearn árbol por árbol, los de las preguntas suman los de su dimensión,
+predecir() y predecir_lote() devuelven la misma explicación (también con el
+.pkl de sklearn), y explicar cuesta a lo sumo unas pocas veces predict_proba.
+"""
+
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bosque_compilado import compilar, medir
+from explicaciones import adjuntar_explicaciones, cargar_explicaciones, compilar_explicaciones
+from predict import DIMENSION_MAP, FEATURE_ORDER, SCRIPT_DIR, predecir, predecir_lote
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def cargar():
+    modelo = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    X = pd.read_csv(DATASET, encoding='utf-8-sig')[FEATURE_ORDER].to_numpy()
+    return modelo, label_encoder, X
+
+def aportes_decision_path(modelo, x, clase):
+    """Aportes por dimensión recorriendo el camino de sklearn nodo por nodo."""
+    aportes = np.zeros(len(x))
+    for estimador in modelo.estimators_:
+        arbol = estimador.tree_
+        valores = arbol.value[:, 0, :] / arbol.value[:, 0, :].sum(axis=1, keepdims=True)
+        camino = estimador.decision_path(x[None, :].astype(np.float32)).indices
+        for padre, hijo in zip(camino[:-1], camino[1:]):
+            aportes[arbol.feature[padre]] += valores[hijo, clase] - valores[padre, clase]
+    return aportes / len(modelo.estimators_)
+
+def test_aportes(directorio):
+    """base + aportes = predict_proba; aportes = decision_path de sklearn."""
+    print("="*70)
+    print("TEST 1: Aportes por nodo")
+    print("="*70)
+
+    modelo, label_encoder, X = cargar()
+    ruta = Path(directorio) / 'explicaciones.npz'
+    compilar_explicaciones(modelo, label_encoder.classes_).guardar(ruta)
+    bosque = compilar(modelo)
+    adjuntar_explicaciones(bosque, label_encoder, ruta)
+    explicador = bosque.explicador
+
+    probabilidades = modelo.predict_proba(X)
+    recomendadas = probabilidades.argmax(axis=1)
+    al_azar = np.random.default_rng(0).integers(0, len(label_encoder.classes_), len(X))
+    error = max(
+        np.abs(explicador.base[clases] + explicador.contribuciones(X, clases).sum(axis=1)
+               - probabilidades[np.arange(len(X)), clases]).max()
+        for clases in (recomendadas, al_azar)
+    )
+
+    filas = [0, 700, 1400, 2100, 2800]
+    contribuciones = explicador.contribuciones(X[filas], recomendadas[filas])
+    esperadas = np.array([aportes_decision_path(modelo, X[i], recomendadas[i]) for i in filas])
+    diferencia = np.abs(contribuciones - esperadas).max()
+
+    print(f"   {explicador.n_nodos} nodos: |base + aportes - predict_proba| máximo {error:.1e}")
+    print(f"   Diferencia con decision_path de sklearn: {diferencia:.1e}")
+    ok = error < 1e-6 and diferencia < 1e-6 and cargar_explicaciones(ruta).n_nodos == len(bosque.izquierdo)
+    print("✅ Aportes correctos" if ok else "❌ Aportes incorrectos")
+    return ok
+
+def test_prediccion(directorio):
+    """Misma explicación en predecir(), predecir_lote() y con el .pkl."""
+    print("\n" + "="*70)
+    print("TEST 2: Explicación en la predicción")
+    print("="*70)
+
+    modelo, label_encoder, X = cargar()
+    ruta = Path(directorio) / 'explicaciones.npz'
+    compilar_explicaciones(modelo, label_encoder.classes_).guardar(ruta)
+    bosque = compilar(modelo)
+    adjuntar_explicaciones(bosque, label_encoder, ruta)
+    adjuntar_explicaciones(modelo, label_encoder, ruta)
+
+    X = X[::20]
+    individuales = [predecir(dict(zip(FEATURE_ORDER, x)), bosque, label_encoder) for x in X.tolist()]
+    lote = predecir_lote(X, bosque, label_encoder)
+    con_pkl = predecir_lote(X, modelo, label_encoder)
+    mismos = all(a == b == c for a, b, c in zip(individuales, lote, con_pkl))
+
+    explicacion = individuales[0]['explicacion']
+    aportes = {d['dimension']: d['contribucion'] for d in explicacion['dimensiones']}
+    reparto_ok = all(
+        abs(sum(explicacion['preguntas'][q] for q in preguntas) - aportes[dimension]) < 1e-5
+        for dimension, preguntas in DIMENSION_MAP.items()
+    )
+    recomendada_ok = all(r['explicacion']['carrera'] == r['carrera_recomendada'] for r in individuales)
+
+    print(f"   predecir = predecir_lote = .pkl: {mismos}, carrera explicada = recomendada: {recomendada_ok}")
+    print(f"   Preguntas: {len(explicacion['preguntas'])}, suman el aporte de su dimensión: {reparto_ok}")
+    print(f"   Mayor aporte a {explicacion['carrera']}: {explicacion['dimensiones'][0]}")
+    ok = mismos and recomendada_ok and reparto_ok and len(explicacion['preguntas']) == 62
+    print("✅ Explicación correcta" if ok else "❌ Explicación incorrecta")
+    return ok
+
+def test_costo(directorio):
+    """Explicar cuesta a lo sumo unas pocas veces predict_proba."""
+    print("\n" + "="*70)
+    print("TEST 3: Costo frente a predict_proba")
+    print("="*70)
+
+    modelo, label_encoder, X = cargar()
+    bosque = compilar(modelo)
+    ruta = Path(directorio) / 'explicaciones.npz'
+    compilar_explicaciones(modelo, label_encoder.classes_).guardar(ruta)
+    adjuntar_explicaciones(bosque, label_encoder, ruta)
+
+    ok = True
+    for n in (1, 64, 2000):
+        clases = bosque.predict_proba(X[:n]).argmax(axis=1)
+        proba = medir(lambda: bosque.predict_proba(X[:n]), 7)
+        explicar = medir(lambda: bosque.explicador.explicar(X[:n], clases), 7)
+        print(f"   {n:5d} filas: predict_proba {proba * 1e3:7.2f} ms, explicar {explicar * 1e3:7.2f} ms "
+              f"({explicar / proba:.1f}x)")
+        ok &= explicar < 3 * proba
+    print("✅ Costo acotado" if ok else "❌ Costo alto")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_aportes, test_prediccion, test_costo):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de generador_perfiles.py: los perfiles sintéticos reproducen las
+medias, correlaciones y rendimientos de cada carrera y el modelo los clasifica
+como a los reales, las respuestas q1..q62 vuelven a dar el perfil, el CSV
+tiene el esquema de datasets/ y coincide con la salida .npy para la misma
+semilla, y la generación alcanza para 10M de filas en menos de un minuto.
+"""
+
+import json
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from carga_datos import cargar_matrices
+from generador_perfiles import DATASET_BASE, DistribucionCarreras, columnas_salida, generar, main
+from predict import FEATURE_ORDER, SCRIPT_DIR, calcular_promedios_lote
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+def test_fidelidad(directorio):
+    """Medias, correlaciones y rendimientos por carrera como los del dataset real."""
+    print("="*70)
+    print("TEST 1: Fidelidad de los perfiles sintéticos")
+    print("="*70)
+
+    distribucion = DistribucionCarreras.ajustar()
+    generar(Path(directorio) / 'perfiles', 200_000, distribucion, semilla=1, tamano_bloque=50_000)
+    X = np.load(Path(directorio) / 'perfiles' / 'perfiles.npy', mmap_mode='r')
+    y = np.load(Path(directorio) / 'perfiles' / 'carrera.npy')
+    rendimiento = np.load(Path(directorio) / 'perfiles' / 'rendimiento.npy')
+    real = pd.read_csv(DATASET_BASE, encoding='utf-8-sig')
+    y_real = np.searchsorted(distribucion.carreras, real['Carrera'].to_numpy())
+
+    error_medias = error_correlaciones = error_rendimiento = 0.0
+    for c in range(len(distribucion.carreras)):
+        sinteticas = np.asarray(X[y == c], dtype=np.float64)
+        reales = real[FEATURE_ORDER].to_numpy()[y_real == c]
+        error_medias = max(error_medias, np.abs(sinteticas.mean(axis=0) - reales.mean(axis=0)).max())
+        error_correlaciones = max(error_correlaciones, np.abs(
+            np.corrcoef(sinteticas, rowvar=False) - np.corrcoef(reales, rowvar=False)).max())
+        error_rendimiento = max(error_rendimiento, np.abs(
+            rendimiento[y == c].mean(axis=0)
+            - real[['Rendimiento_General', 'Rendimiento_STEM', 'Rendimiento_Humanidades']].to_numpy()[y_real == c].mean(axis=0)
+        ).max())
+
+    modelo = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    muestra = np.asarray(X[:20_000])
+    exactitud = (label_encoder.classes_[modelo.predict(muestra)] == np.array(distribucion.carreras)[y[:20_000]]).mean()
+    proporciones = np.bincount(y, minlength=len(distribucion.carreras)) / len(y)
+
+    print(f"   Máxima diferencia por carrera: medias {error_medias:.3f}, correlaciones {error_correlaciones:.3f}, "
+          f"rendimiento medio {error_rendimiento:.3f}")
+    print(f"   Exactitud del modelo sobre perfiles sintéticos: {exactitud:.4f}")
+    ok = (error_medias < 0.03 and error_correlaciones < 0.12 and error_rendimiento < 0.05
+          and np.abs(proporciones - distribucion.proporciones).max() < 0.005
+          and X.dtype == np.float32 and X.min() >= real[FEATURE_ORDER].to_numpy().min() - 1e-6
+          and exactitud > 0.85)
+    print("✅ Perfiles fieles" if ok else "❌ Perfiles poco fieles")
+    return ok
+
+def test_formatos(directorio):
+    """Esquema CSV, respuestas consistentes, misma semilla = mismos datos."""
+    print("\n" + "="*70)
+    print("TEST 2: CSV, respuestas q1..q65 y semillas")
+    print("="*70)
+
+    distribucion = DistribucionCarreras.ajustar()
+    directorio = Path(directorio)
+    generar(directorio / 'a.csv', 30_000, distribucion, semilla=5, tamano_bloque=7_000)
+    generar(directorio / 'b.csv', 30_000, distribucion, semilla=5, tamano_bloque=7_000)
+    generar(directorio / 'c.csv', 30_000, distribucion, semilla=6, tamano_bloque=7_000)
+    generar(directorio / 'a_npy', 30_000, distribucion, semilla=5, tamano_bloque=7_000)
+    main([str(directorio / 'respuestas.csv'), '--filas', '30000', '--respuestas', '--bloque', '7000'])
+
+    perfiles = pd.read_csv(directorio / 'a.csv', encoding='utf-8-sig')
+    dataset = pd.read_csv(DATASET_BASE, encoding='utf-8-sig')
+    X_npy = np.load(directorio / 'a_npy' / 'perfiles.npy')
+    meta = json.loads((directorio / 'a_npy' / 'meta.json').read_text(encoding='utf-8'))
+    iguales_npy = (np.allclose(perfiles[FEATURE_ORDER].to_numpy(), X_npy, atol=1e-6)
+                   and list(perfiles['Carrera']) == [meta['carreras'][c] for c in np.load(directorio / 'a_npy' / 'carrera.npy')])
+    semillas = ((directorio / 'a.csv').read_bytes() == (directorio / 'b.csv').read_bytes()
+                and (directorio / 'a.csv').read_bytes() != (directorio / 'c.csv').read_bytes())
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    X, y = cargar_matrices(directorio / 'a.csv', label_encoder)
+
+    respuestas = pd.read_csv(directorio / 'respuestas.csv', encoding='utf-8-sig')
+    q = respuestas[[f'q{i}' for i in range(1, 66)]].to_numpy()
+    promedios, faltantes, fuera = calcular_promedios_lote(q)
+    sinteticos = main([str(directorio / 'perfiles_misma_semilla.csv'), '--filas', '30000', '--bloque', '7000'])
+    objetivo = pd.read_csv(directorio / 'perfiles_misma_semilla.csv', encoding='utf-8-sig')
+    diferencia = np.abs(promedios[:, :14] - np.clip(objetivo[FEATURE_ORDER].to_numpy(), 1, 5)).max()
+    dispersion = q[:, :5].std(axis=1).mean()
+
+    print(f"   Columnas como el dataset: {list(perfiles.columns) == list(dataset.columns)}, "
+          f"CSV = .npy: {iguales_npy}, semillas: {semillas}")
+    print(f"   Respuestas: promedios a {diferencia:.3f} del perfil, dispersión media por dimensión "
+          f"{dispersion:.2f}, rendimiento = q63..q65: "
+          f"{np.array_equal(promedios[:, 14:], objetivo.iloc[:, 14:17].to_numpy())}")
+    ok = (list(perfiles.columns) == list(dataset.columns) and list(respuestas.columns) == columnas_salida(True)
+          and len(perfiles) == 30_000 and iguales_npy and semillas
+          and len(y) == 30_000 and X.dtype == np.float32
+          and not faltantes.any() and not fuera.any() and diferencia <= 0.1 + 1e-9
+          and np.array_equal(promedios[:, 14:], objetivo.iloc[:, 14:17].to_numpy())
+          and list(respuestas['Carrera']) == list(objetivo['Carrera'])
+          and 0.3 < dispersion < 1.0 and sinteticos['bloques'] == 5)
+    print("✅ Formatos correctos" if ok else "❌ Formatos incorrectos")
+    return ok
+
+def test_velocidad(directorio):
+    """1M de filas CSV a un ritmo que da 10M en menos de un minuto."""
+    print("\n" + "="*70)
+    print("TEST 3: Velocidad de generación")
+    print("="*70)
+
+    distribucion = DistribucionCarreras.ajustar()
+    ok = True
+    for nombre, respuestas in (('perfiles.csv', False), ('respuestas.csv', True)):
+        resumen = generar(Path(directorio) / nombre, 1_000_000, distribucion, respuestas=respuestas)
+        estimado = 10_000_000 / resumen['filas_por_segundo']
+        print(f"   {nombre:15s} {resumen['filas_por_segundo']:>11,.0f} filas/s → 10M en ~{estimado:.0f} s")
+        ok &= estimado < 60
+    print("✅ Generación rápida" if ok else "❌ Generación lenta")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_fidelidad, test_formatos, test_velocidad):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
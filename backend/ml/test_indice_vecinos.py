@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de indice_vecinos.py: las consultas exactas coinciden con la fuerza
+bruta (también por carrera, con el KD-tree y tras guardar y cargar el índice,
+que sin árboles se carga sin importar scipy), las
+aproximadas (por defecto desde 100k perfiles) quedan dentro de la cota de eps,
+predecir() y predecir_lote() devuelven los mismos perfiles similares, y con
+1M de perfiles una consulta tarda menos de 1 ms.
+"""
+
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generador_perfiles import DistribucionCarreras
+from indice_vecinos import (APROXIMACION, IndiceVecinos, adjuntar_vecinos, cargar_indice,
+                            construir_arbol, construir_indice, medir_latencia)
+from predict import FEATURE_ORDER, SCRIPT_DIR, cargar_artefactos_modelo, predecir, predecir_lote
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def fuerza_bruta(X, referencia, k):
+    """(distancias, filas) exactas comparando contra todos los perfiles."""
+    distancias = np.sqrt(((X[:, None, :] - referencia[None, :, :]) ** 2).sum(axis=2))
+    filas = np.argsort(distancias, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(distancias, filas, axis=1), filas
+
+def test_consultas(directorio):
+    """Exactas = fuerza bruta, aproximadas dentro de la cota, partición por carrera."""
+    print("="*70)
+    print("TEST 1: Consultas contra fuerza bruta")
+    print("="*70)
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    ruta = Path(directorio) / 'indice.pkl'
+    construir_indice(DATASET, label_encoder).guardar(ruta)
+    indice = cargar_indice(ruta)
+    referencia = indice.perfiles
+    rng = np.random.default_rng(0)
+    X = np.round(rng.uniform(1, 5, size=(300, len(FEATURE_ORDER))), 1)
+
+    esperadas, _ = fuerza_bruta(X, referencia, 5)
+    exactas, filas = indice.consultar(X, 5)
+    aproximadas, _ = indice.consultar(X, 5, aproximacion=APROXIMACION)
+    exactas_ok = np.allclose(exactas, esperadas) and np.allclose(
+        np.sqrt(((X[:, None, :] - referencia[filas]) ** 2).sum(axis=2)), exactas)
+    cota_ok = bool((aproximadas <= esperadas * (1 + APROXIMACION) + 1e-9).all())
+    iguales = np.isclose(aproximadas[:, -1], esperadas[:, -1]).mean()
+    arbol_ok = np.allclose(construir_arbol(referencia).query(X, k=5)[0], exactas)
+
+    # Sin árboles el .pkl solo tiene arrays: cargarlo no importa scipy
+    codigo = (f"import sys; sys.path.insert(0, {str(Path(__file__).parent)!r}); "
+              f"from indice_vecinos import cargar_indice; cargar_indice({str(ruta)!r}).consultar([3.0] * 14); "
+              f"print('scipy' in sys.modules)")
+    sin_scipy = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True).stdout.strip() == 'False'
+
+    carrera = label_encoder.classes_[3]
+    en_carrera = np.flatnonzero(indice.carreras == 3)
+    esperadas_carrera, filas_carrera = fuerza_bruta(X, referencia[en_carrera], 5)
+    distancias_carrera, obtenidas_carrera = indice.consultar(X, 5, carrera=carrera)
+    particion_ok = (np.allclose(distancias_carrera, esperadas_carrera)
+                    and (indice.carreras[obtenidas_carrera] == 3).all()
+                    and len(indice.particiones) == len(label_encoder.classes_))
+
+    similares = indice.similares(X[:2], 3)
+    formato_ok = (len(similares) == 2 and len(similares[0]) == 3
+                  and similares[0][0]['carrera'] == label_encoder.classes_[indice.carreras[filas[0, 0]]]
+                  and list(similares[0][0]['perfil']) == FEATURE_ORDER
+                  and similares[0][0]['distancia'] == round(float(exactas[0, 0]), 4))
+
+    print(f"   {len(indice)} perfiles: exactas = fuerza bruta: {exactas_ok}, aproximadas dentro de la cota: "
+          f"{cota_ok} (k-ésimo exacto en {iguales:.1%}), = KD-tree: {arbol_ok}, carga sin scipy: {sin_scipy}")
+    print(f"   Solo {carrera}: {particion_ok}, formato del resultado: {formato_ok}")
+    ok = (len(indice) == len(referencia) == 3502 and indice.aproximacion == 0 and indice.arbol is None
+          and exactas_ok and cota_ok and arbol_ok and sin_scipy and particion_ok and formato_ok)
+    print("✅ Consultas correctas" if ok else "❌ Consultas incorrectas")
+    return ok
+
+def test_prediccion(directorio):
+    """predecir() y predecir_lote() agregan los mismos perfiles similares."""
+    print("\n" + "="*70)
+    print("TEST 2: Perfiles similares en la predicción")
+    print("="*70)
+
+    import pandas as pd
+
+    modelo, label_encoder = cargar_artefactos_modelo()
+    ruta = Path(directorio) / 'indice.pkl'
+    construir_indice(DATASET, label_encoder).guardar(ruta)
+    sin_indice = predecir(dict(zip(FEATURE_ORDER, [3.0] * 14)), modelo, label_encoder)
+    adjuntar_vecinos(modelo, ruta)
+
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    X = df[FEATURE_ORDER].to_numpy()[:300]
+    individuales = [predecir(dict(zip(FEATURE_ORDER, x)), modelo, label_encoder) for x in X.tolist()]
+    lote = predecir_lote(X, modelo, label_encoder)
+    mismos = all(a == b for a, b in zip(individuales, lote))
+    # Cada fila del dataset es su propio vecino más cercano (distancia 0)
+    propio = np.mean([r['perfiles_similares'][0]['distancia'] == 0 for r in individuales])
+    carrera_propia = np.mean([r['perfiles_similares'][0]['carrera'] == c
+                              for r, c in zip(individuales, df['Carrera'][:300])])
+
+    # Un índice con otras features no se adjunta
+    otro = IndiceVecinos(X[:, :13], df['Carrera'].map(list(label_encoder.classes_).index)[:300],
+                         label_encoder.classes_, FEATURE_ORDER[:13])
+    otro.guardar(Path(directorio) / 'otro.pkl')
+    modelo_sin, _ = cargar_artefactos_modelo()
+    adjuntar_vecinos(modelo_sin, Path(directorio) / 'otro.pkl')
+
+    print(f"   predecir = predecir_lote: {mismos}, vecino propio a distancia 0: {propio:.1%}, "
+          f"misma carrera: {carrera_propia:.1%}")
+    ok = (mismos and propio == 1 and carrera_propia == 1
+          and all(len(r['perfiles_similares']) == 5 for r in individuales)
+          and 'perfiles_similares' not in sin_indice and getattr(modelo_sin, 'vecinos', None) is None)
+    print("✅ Predicción con vecinos correcta" if ok else "❌ Predicción con vecinos incorrecta")
+    return ok
+
+def test_latencia():
+    """Menos de 1 ms por consulta con 1M de perfiles indexados."""
+    print("\n" + "="*70)
+    print("TEST 3: Latencia con 1M de perfiles")
+    print("="*70)
+
+    distribucion = DistribucionCarreras.ajustar()
+    rng = np.random.default_rng(7)
+    decimas, _, y = distribucion.muestrear(1_000_000, rng)
+    indice = IndiceVecinos(decimas / np.float32(10), y, distribucion.carreras, particionar=False)
+    consultas = distribucion.muestrear(300, rng)[0] / 10.0
+
+    individual, lote = medir_latencia(indice, consultas)
+    print(f"   {len(indice)} perfiles: {individual:.3f} ms por consulta, {lote:.3f} ms por fila en lote")
+    ok = indice.aproximacion == APROXIMACION and individual < 1.0 and lote < 1.0
+    print("✅ Consultas rápidas" if ok else "❌ Consultas lentas")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_consultas, test_prediccion):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    resultados.append(test_latencia())
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba del arranque de predict.py e informe_arranque.py: la salida de
+-X importtime se agrupa bien por paquete, un proceso de predicción no importa
+scipy, sklearn ni pandas (con artefactos compilados vigentes), no ejecuta
+predict.py dos veces, escribe UTF-8 con cualquier codificación de la consola
+y da el mismo resultado que predecir() en el proceso, y el vector float32 da
+las mismas probabilidades que el float64.
+"""
+
+import json
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from informe_arranque import SOLICITUD_EJEMPLO, entorno_medicion, importaciones_por_paquete, informe, lanzar
+from predict import (FEATURE_ORDER, SCRIPT_DIR, artefacto_vigente, calcular_promedios, load_models,
+                     predecir)
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_agrupar():
+    """Suma del tiempo propio por paquete de primer nivel."""
+    print("="*70)
+    print("TEST 1: Importaciones por paquete")
+    print("="*70)
+
+    texto = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |     numpy._core._multiarray_umath',
+        'import time:       300 |        400 |   numpy._core',
+        'import time:      2000 |       2400 | numpy',
+        'import time:       500 |        500 | json',
+        'otra línea de stderr',
+    ])
+    paquetes = importaciones_por_paquete(texto)
+    esperado = [{'paquete': 'numpy', 'ms': 2.4, 'modulos': 3}, {'paquete': 'json', 'ms': 0.5, 'modulos': 1}]
+
+    print(f"   {paquetes}")
+    ok = paquetes == esperado
+    print("✅ Agrupación correcta" if ok else "❌ Agrupación incorrecta")
+    return ok
+
+def test_proceso():
+    """Importaciones, UTF-8 y resultado de un proceso de predict.py."""
+    print("\n" + "="*70)
+    print("TEST 2: Proceso de predicción")
+    print("="*70)
+
+    entrada = json.dumps(SOLICITUD_EJEMPLO)
+    _, proceso = lanzar(entrada, opciones=('-X', 'importtime'))
+    paquetes = {paquete['paquete'] for paquete in importaciones_por_paquete(proceso.stderr)}
+    pesados = paquetes & {'scipy', 'sklearn', 'pandas', 'joblib'}
+    compilado = artefacto_vigente(SCRIPT_DIR / 'modelo_mmap' / 'metadatos.json',
+                                  SCRIPT_DIR / 'modelo_random_forest.pkl')
+
+    # Consola en latin-1: la salida sigue siendo UTF-8
+    _, latin = lanzar(entrada, entorno=entorno_medicion(PYTHONIOENCODING='latin-1'))
+    resultado = json.loads(latin.stdout)
+    modelo, label_encoder = load_models()
+    esperado = predecir(calcular_promedios(SOLICITUD_EJEMPLO), modelo, label_encoder)
+
+    print(f"   Paquetes pesados importados: {sorted(pesados) or 'ninguno'} (artefactos compilados: {compilado})")
+    print(f"   predict.py ejecutado una vez: {'predict' not in paquetes}, "
+          f"resultado = predecir(): {resultado == esperado} ({resultado.get('carrera_recomendada')})")
+    ok = (proceso.returncode == 0 and (not pesados or not compilado) and 'predict' not in paquetes
+          and resultado == esperado)
+    print("✅ Proceso correcto" if ok else "❌ Proceso incorrecto")
+    return ok
+
+def test_informe():
+    """Informe completo y vector float32 = float64."""
+    print("\n" + "="*70)
+    print("TEST 3: Informe y vector float32")
+    print("="*70)
+
+    datos = informe(json.dumps(SOLICITUD_EJEMPLO), repeticiones=3)
+    informe_ok = (datos['arranque_ms'] > datos['interprete_ms'] > 0 and datos['importaciones']
+                  and {'importar', 'cargar_modelo', 'bosque'} <= set(datos['etapas_ms'])
+                  and datos['resultado']['success'])
+
+    modelo, label_encoder = load_models()
+    X = pd.read_csv(DATASET, encoding='utf-8-sig')[FEATURE_ORDER].to_numpy()
+    iguales = np.array_equal(modelo.predict_proba(X.astype(np.float32)), modelo.predict_proba(X))
+
+    print(f"   {datos['arranque_ms']:.1f} ms hasta el resultado (intérprete {datos['interprete_ms']:.1f} ms), "
+          f"importaciones {datos['importaciones_ms']:.1f} ms")
+    print(f"   predict_proba float32 = float64 en {len(X)} perfiles: {iguales}")
+    ok = informe_ok and iguales
+    print("✅ Informe correcto" if ok else "❌ Informe incorrecto")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [test_agrupar(), test_proceso(), test_informe()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de metricas.py: histogramas en formato Prometheus, tiempos por etapa
+en --serve con correlación y costo con las métricas desactivadas.
+"""
+
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from metricas import CRONOMETRO_NULO, Cronometro, Histograma, Metricas
+from predict import load_models, predecir, servir
+
+PERFIL = {
+    'R': 3.2, 'I': 4.1, 'A': 2.5, 'S': 3.0, 'E': 2.8, 'C': 3.4, 'LM': 4.2,
+    'L': 3.1, 'ES': 3.9, 'M': 2.2, 'CK': 2.9, 'IP': 3.3, 'IA': 3.6, 'N': 3.0,
+}
+
+def test_histograma():
+    """Buckets acumulados, _sum y _count en formato Prometheus."""
+    print("="*70)
+    print("TEST 1: Histograma Prometheus")
+    print("="*70)
+
+    histograma = Histograma(buckets=(0.001, 0.01, 0.1))
+    for segundos in (0.0005, 0.001, 0.002, 0.05, 3.0):
+        histograma.observar(segundos)
+    lineas = histograma.lineas('x_segundos', 'etapa="bosque"')
+    for linea in lineas:
+        print(f"   {linea}")
+
+    esperado = [
+        'x_segundos_bucket{etapa="bosque",le="0.001"} 2',
+        'x_segundos_bucket{etapa="bosque",le="0.01"} 3',
+        'x_segundos_bucket{etapa="bosque",le="0.1"} 4',
+        'x_segundos_bucket{etapa="bosque",le="+Inf"} 5',
+        'x_segundos_sum{etapa="bosque"} 3.0535',
+        'x_segundos_count{etapa="bosque"} 5',
+    ]
+    ok = lineas == esperado
+    print("✅ Formato correcto" if ok else "❌ Formato incorrecto")
+    return ok
+
+def test_servir_con_metricas():
+    """Cada respuesta trae sus tiempos y la correlación; los histogramas los suman."""
+    print("\n" + "="*70)
+    print("TEST 2: Tiempos por etapa en --serve")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    solicitudes = ''.join(
+        json.dumps({'id': i, 'correlacion': f'c-{i}', 'datos': dict(PERFIL, R=1 + i % 5)}) + '\n'
+        for i in range(20)
+    ) + json.dumps({'id': 'm', 'comando': 'metricas'}) + '\n'
+
+    con_metricas = io.StringIO()
+    metricas = Metricas()
+    servir(modelo, label_encoder, io.StringIO(solicitudes), con_metricas, metricas=metricas)
+    sin_metricas = io.StringIO()
+    servir(modelo, label_encoder, io.StringIO(solicitudes), sin_metricas)
+
+    respuestas = [json.loads(l) for l in con_metricas.getvalue().splitlines()]
+    originales = [json.loads(l) for l in sin_metricas.getvalue().splitlines()]
+    texto = respuestas.pop()['metricas']
+    originales.pop()
+
+    correcto = True
+    for respuesta, original in zip(respuestas, originales):
+        tiempos = respuesta.pop('tiempos')
+        suma = sum(tiempos['etapas_ms'].values())
+        correcto &= tiempos['correlacion'] == f"c-{respuesta['id']}"
+        correcto &= abs(suma - tiempos['total_ms']) < 0.01
+        correcto &= respuesta == original
+    print(f"   Etapas: {list(tiempos['etapas_ms'])}")
+    print(f"   Total {tiempos['total_ms']} ms, suma de etapas {suma:.3f} ms")
+
+    conteo = f'ovp_ml_solicitud_segundos_count{{worker="{metricas.worker}"}} 20'
+    correcto &= conteo in texto and 'etapa="bosque"' in texto and 'resultado="ok"} 20' in texto
+    print(f"   Histograma del total: {'20 solicitudes' if conteo in texto else 'INCORRECTO'}")
+    print("✅ Tiempos y métricas correctos" if correcto else "❌ Tiempos o métricas incorrectos")
+    return correcto
+
+def test_costo_desactivadas():
+    """Con las métricas desactivadas el costo por predicción es despreciable."""
+    print("\n" + "="*70)
+    print("TEST 3: Costo con las métricas desactivadas")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    n = 2000
+    inicio = time.perf_counter()
+    for _ in range(n):
+        predecir(PERFIL, modelo, label_encoder)
+    por_prediccion = (time.perf_counter() - inicio) / n
+
+    inicio = time.perf_counter()
+    for _ in range(n):
+        for etapa in ('vector', 'bosque', 'top5', 'reglas', 'resultado'):
+            CRONOMETRO_NULO.marcar(etapa)
+    nulo = (time.perf_counter() - inicio) / n
+
+    inicio = time.perf_counter()
+    for _ in range(n):
+        cronometro = Cronometro()
+        for etapa in ('vector', 'bosque', 'top5', 'reglas', 'resultado'):
+            cronometro.marcar(etapa)
+    activo = (time.perf_counter() - inicio) / n
+
+    print(f"   predecir():                 {por_prediccion * 1e6:8.1f} µs")
+    print(f"   5 marcas desactivadas:      {nulo * 1e6:8.3f} µs ({nulo / por_prediccion:.3%})")
+    print(f"   5 marcas activas:           {activo * 1e6:8.3f} µs ({activo / por_prediccion:.3%})")
+    ok = nulo / por_prediccion < 0.01
+    print("✅ Costo despreciable" if ok else "❌ Costo apreciable")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [test_histograma(), test_servir_con_metricas(), test_costo_desactivadas()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de reglas_negocio.py: la tabla compilada da lo mismo que evaluar cada
+regla con if fila por fila, predecir() y predecir_lote() coinciden con las
+reglas propuestas activadas, y el costo por fila crece mucho menos que la
+cantidad de reglas.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import reglas_negocio
+from predict import FEATURE_ORDER, load_models, predecir, predecir_lote
+from reglas_negocio import OPERADORES, REGLAS, MotorReglas, ordenar_top
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+CLASES = ['Arquitectura', 'Diseño Gráfico', 'Ingeniería Civil', 'Ingeniería en Sistemas',
+          'Medicina', 'Psicología', 'Derecho']
+
+REGLAS_PRUEBA = [
+    {'nombre': 'veto', 'si': [('S', '<', 2.0), ('E', '<=', 2.5)], 'carreras': ['Psicología', 'Derecho'],
+     'accion': 'vetar', 'razon': 'veto S={S:.1f}'},
+    {'nombre': 'o', 'si': [[('I', '>=', 4.0), ('LM', '>', 4.2)], ('ES', '>=', 3.0)],
+     'carreras': ['Ingeniería Civil', 'Ingeniería en Sistemas'], 'accion': 'potenciar', 'factor': 1.5,
+     'razon': 'o I={I:.1f}'},
+    {'nombre': 'relegar', 'si': [('ES', '<', 3.5)], 'carreras': ['Arquitectura', 'Medicina'],
+     'accion': 'relegar', 'solo_predicha': True, 'razon': 'relegar ES={ES:.1f}'},
+    {'nombre': 'falta', 'si': [('Rendimiento_STEM', '>=', 4)], 'carreras': ['Medicina'],
+     'accion': 'vetar', 'razon': 'nunca'},
+    {'nombre': 'inactiva', 'si': [('S', '>=', 0)], 'carreras': ['Medicina'],
+     'accion': 'vetar', 'razon': 'inactiva', 'activa': False},
+]
+
+def referencia(perfil, fila, reglas, clases):
+    """Evaluación directa, una regla a la vez, para una fila."""
+    def cumple(comparacion):
+        feature, op, umbral = comparacion
+        return feature in perfil and OPERADORES[op](perfil[feature], umbral)
+
+    prediccion = clases[int(np.argmax(fila))]
+    fila = fila.copy()
+    relegadas, razones = set(), []
+    for regla in reglas:
+        if not regla.get('activa', True):
+            continue
+        if not all(any(map(cumple, e)) if isinstance(e, list) else cumple(e) for e in regla['si']):
+            continue
+        if regla.get('solo_predicha') and prediccion not in regla['carreras']:
+            continue
+        razones.append(regla['razon'].format(**{k: float(v) for k, v in perfil.items()}))
+        for carrera in regla['carreras']:
+            j = clases.index(carrera)
+            if regla['accion'] == 'vetar':
+                fila[j] = 0.0
+            elif regla['accion'] == 'potenciar':
+                fila[j] *= regla['factor']
+            else:
+                relegadas.add(carrera)
+    top = [j for j in np.argsort(-fila, kind='stable')[:5]]
+    top = [j for j in top if clases[j] not in relegadas] + [j for j in top if clases[j] in relegadas]
+    return [clases[j] for j in top], fila, '; '.join(razones) or None
+
+def test_equivalencia_con_referencia():
+    """Máscaras y matrices compiladas == reglas evaluadas una a una."""
+    print("="*70)
+    print("TEST 1: Tabla compilada vs evaluación regla por regla")
+    print("="*70)
+
+    azar = np.random.default_rng(7)
+    n = 3000
+    features = ['S', 'E', 'I', 'LM', 'ES']
+    X = np.round(azar.uniform(1, 5, (n, len(features))), 1)
+    probabilidades = azar.dirichlet(np.ones(len(CLASES)), n)
+
+    motor = MotorReglas(CLASES, REGLAS_PRUEBA)
+    valores = motor.valores_matriz(X, features)
+    ajustadas, relegadas, activas = motor.aplicar(probabilidades, valores)
+    razones = motor.razones(activas, valores)
+    top = ordenar_top(np.argsort(-ajustadas, axis=1, kind='stable')[:, :5], relegadas)
+
+    diferencias = 0
+    for i in range(n):
+        perfil = dict(zip(features, X[i].tolist()))
+        top_ref, fila_ref, razon_ref = referencia(perfil, probabilidades[i], REGLAS_PRUEBA, CLASES)
+        if ([CLASES[j] for j in top[i]] != top_ref or not np.allclose(ajustadas[i], fila_ref)
+                or razones[i] != razon_ref):
+            diferencias += 1
+
+    conteos = dict(zip([r['nombre'] for r in motor.reglas], activas.sum(axis=0).tolist()))
+    print(f"   Reglas compiladas: {len(motor.reglas)} de {len(REGLAS_PRUEBA)}")
+    print(f"   Filas por regla: {conteos}")
+    print(f"   Diferencias: {diferencias}/{n}")
+    ok = diferencias == 0 and all(conteos[r] > 0 for r in ('veto', 'o', 'relegar')) and conteos['falta'] == 0
+    print("✅ Resultados idénticos" if ok else "❌ Hay diferencias")
+    return ok
+
+def test_reglas_propuestas():
+    """Con las reglas propuestas activas, predecir() y predecir_lote() siguen coincidiendo."""
+    print("\n" + "="*70)
+    print("TEST 2: Reglas propuestas activadas en predecir y predecir_lote")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    # Perfiles de Arquitectura con ES bajo para ejercitar la regla que ya estaba activa
+    arquitectura = df[df['Carrera'] == 'Arquitectura'][FEATURE_ORDER].copy()
+    arquitectura['ES'] = 3.0
+    perfiles = pd.concat([df[FEATURE_ORDER].head(1500), arquitectura]).to_dict('records')
+    for i, datos in enumerate(perfiles):
+        datos['Rendimiento_STEM'] = 3 + i % 3
+
+    clave = tuple(str(c) for c in label_encoder.classes_)
+    activadas = [dict(regla, activa=True) for regla in REGLAS]
+    originales = dict(reglas_negocio._MOTORES), dict(reglas_negocio._POR_OBJETO)
+    reglas_negocio._MOTORES[clave] = MotorReglas(clave, activadas)
+    reglas_negocio._POR_OBJETO.clear()
+    try:
+        lote = predecir_lote(perfiles, modelo, label_encoder)
+        diferencias = sum(
+            json.dumps(r, ensure_ascii=False) != json.dumps(predecir(dict(d), modelo, label_encoder),
+                                                          ensure_ascii=False)
+            for d, r in zip(perfiles, lote)
+        )
+    finally:
+        reglas_negocio._MOTORES.clear()
+        reglas_negocio._MOTORES.update(originales[0])
+        reglas_negocio._POR_OBJETO.clear()
+        reglas_negocio._POR_OBJETO.update(originales[1])
+
+    ajustes = {}
+    for r in lote:
+        for razon in (r['ajuste_aplicado'] or '').split('; '):
+            if razon:
+                ajustes[razon.split(' (')[0]] = ajustes.get(razon.split(' (')[0], 0) + 1
+    print(f"   Filas: {len(perfiles)}, diferencias lote vs predecir: {diferencias}")
+    for razon, cantidad in sorted(ajustes.items()):
+        print(f"   {cantidad:5d} × {razon}")
+    ok = diferencias == 0 and len(ajustes) == 3
+    print("✅ Resultados idénticos" if ok else "❌ Hay diferencias")
+    return ok
+
+def test_costo_por_fila():
+    """Con 20 veces más reglas el costo por fila no llega a 5 veces."""
+    print("\n" + "="*70)
+    print("TEST 3: Costo por fila según la cantidad de reglas")
+    print("="*70)
+
+    azar = np.random.default_rng(3)
+    n = 20000
+    X = np.round(azar.uniform(1, 5, (n, len(FEATURE_ORDER))), 1)
+    probabilidades = azar.dirichlet(np.ones(len(CLASES)), n)
+
+    tiempos = {}
+    for cantidad in (3, 60):
+        reglas = [
+            dict(REGLAS_PRUEBA[i % 3], nombre=f'r{i}',
+                 si=[(FEATURE_ORDER[i % 14], '>=', 3.0 + (i % 7) / 5), ('ES', '<', 4.5)])
+            for i in range(cantidad)
+        ]
+        motor = MotorReglas(CLASES, reglas)
+        mejor = float('inf')
+        for _ in range(5):
+            inicio = time.perf_counter()
+            valores = motor.valores_matriz(X, FEATURE_ORDER)
+            ajustadas, relegadas, activas = motor.aplicar(probabilidades, valores)
+            ordenar_top(np.argsort(-ajustadas, axis=1, kind='stable')[:, :5], relegadas)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        tiempos[cantidad] = mejor / n * 1e6
+        print(f"   {cantidad:3d} reglas: {tiempos[cantidad]:.2f} µs/fila")
+
+    print(f"   20x reglas → {tiempos[60] / tiempos[3]:.1f}x tiempo")
+    ok = tiempos[60] < 5 * tiempos[3]
+    print("✅ Costo estable" if ok else "❌ El costo crece con las reglas")
+    return ok
+
+if __name__ == '__main__':
+    resultados = [test_equivalencia_con_referencia(), test_reglas_propuestas(), test_costo_por_fila()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de perfilador.py: fracción muestreada, metadatos de cada perfil,
+tope de tamaño del directorio y pilas colapsadas del modo de agregación.
+"""
+
+import io
+import json
+import pstats
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from perfilador import Perfilador, agregar
+from predict import load_models, servir
+
+def solicitudes(n):
+    return ''.join(
+        json.dumps({'id': i, 'correlacion': f'c-{i}', 'datos': {
+            'R': 1 + i % 5, 'I': 4.1, 'A': 2.5, 'S': 3.0, 'E': 2.8, 'C': 3.4, 'LM': 4.2,
+            'L': 3.1, 'ES': 1 + i % 4, 'M': 2.2, 'CK': 2.9, 'IP': 3.3, 'IA': 3.6, 'N': 3.0,
+        }}) + '\n'
+        for i in range(n)
+    )
+
+def test_muestreo(directorio):
+    """Se perfila la fracción pedida y las respuestas no cambian."""
+    print("="*70)
+    print("TEST 1: Muestreo del 20% en --serve")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    perfilador = Perfilador(0.2, Path(directorio) / 'muestreo', memoria=True)
+    con_perfilador, sin_perfilador = io.StringIO(), io.StringIO()
+    servir(modelo, label_encoder, io.StringIO(solicitudes(500)), con_perfilador, perfilador=perfilador)
+    servir(modelo, label_encoder, io.StringIO(solicitudes(500)), sin_perfilador)
+
+    perfiles = sorted(perfilador.directorio.glob('*.pstats'))
+    metadatos = [json.loads(p.with_suffix('.json').read_text(encoding='utf-8')) for p in perfiles]
+    completos = all(
+        m['tiempos']['etapas_ms'].get('bosque') is not None
+        and m['entrada']['I'] == 4.1
+        and m['correlacion'] == m['tiempos']['correlacion']
+        and m['memoria']['pico_kb'] > 0
+        for m in metadatos
+    )
+    legibles = all(pstats.Stats(str(p)).total_tt > 0 for p in perfiles)
+    iguales = con_perfilador.getvalue() == sin_perfilador.getvalue()
+
+    print(f"   Perfiles: {len(perfiles)} de 500 solicitudes")
+    print(f"   Metadatos completos: {completos}  .pstats legibles: {legibles}")
+    print(f"   Respuestas idénticas sin perfilador: {iguales}")
+    ok = 60 <= len(perfiles) <= 140 and completos and legibles and iguales
+    print("✅ Muestreo correcto" if ok else "❌ Muestreo incorrecto")
+    return ok, perfilador.directorio
+
+def test_rotacion(directorio):
+    """El directorio no supera el tope de tamaño."""
+    print("\n" + "="*70)
+    print("TEST 2: Tope de tamaño del directorio")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    perfilador = Perfilador(1.0, Path(directorio) / 'rotacion', max_bytes=200 * 1024)
+    servir(modelo, label_encoder, io.StringIO(solicitudes(100)), io.StringIO(), perfilador=perfilador)
+
+    total = sum(p.stat().st_size for p in perfilador.directorio.iterdir())
+    cantidad = len(list(perfilador.directorio.glob('*.pstats')))
+    print(f"   100 muestras, quedan {cantidad} ({total / 1024:.0f} KB, tope 200 KB)")
+    ok = total <= 200 * 1024 and 0 < cantidad < 100
+    print("✅ Rotación correcta" if ok else "❌ Rotación incorrecta")
+    return ok
+
+def test_agregacion(directorio_perfiles, directorio):
+    """Las pilas colapsadas conservan el tiempo total y pasan por predecir()."""
+    print("\n" + "="*70)
+    print("TEST 3: Pilas colapsadas")
+    print("="*70)
+
+    salida = Path(directorio) / 'perfiles.folded'
+    estadisticas = agregar(directorio_perfiles, salida, top=0)
+    lineas = salida.read_text(encoding='utf-8').splitlines()
+    total_pilas = sum(int(l.rsplit(' ', 1)[1]) for l in lineas)
+    total_perfiles = estadisticas.total_tt * 1e6
+    con_predecir = sum(int(l.rsplit(' ', 1)[1]) for l in lineas if '(predecir)' in l)
+
+    print(f"   {len(lineas)} pilas, {total_pilas / 1e3:.1f} ms de {total_perfiles / 1e3:.1f} ms perfilados")
+    print(f"   Bajo predecir(): {con_predecir / max(total_pilas, 1):.0%}")
+    ok = abs(total_pilas - total_perfiles) / total_perfiles < 0.05 and con_predecir > 0.5 * total_pilas
+    print("✅ Agregación correcta" if ok else "❌ Agregación incorrecta")
+    return ok
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directorio:
+        ok, perfiles = test_muestreo(directorio)
+        resultados = [ok, test_rotacion(directorio), test_agregacion(perfiles, directorio)]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
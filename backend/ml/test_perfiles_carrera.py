@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de perfiles_carrera.py: la tabla coincide con las medias, desviaciones
+e inversas de la covarianza calculadas con pandas y numpy, las distancias
+vectorizadas coinciden con las de una fila y una carrera a la vez (como en
+datasets/analisis_perfil_ingeniera.py), una carrera sin estudiantes no deja
+NaN en el resultado, predecir() y predecir_lote() devuelven
+los mismos campos, y el costo por solicitud es de microsegundos.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from perfiles_carrera import adjuntar_perfiles, calcular_perfiles, cargar_perfiles, construir_perfiles
+from predict import FEATURE_ORDER, SCRIPT_DIR, cargar_artefactos_modelo, predecir, predecir_lote
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_tabla(directorio):
+    """Tabla = pandas/numpy por carrera; distancias = cálculo fila por fila."""
+    print("="*70)
+    print("TEST 1: Tabla por carrera y distancias")
+    print("="*70)
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    ruta = Path(directorio) / 'perfiles.npz'
+    construir_perfiles(DATASET, label_encoder, FEATURE_ORDER).guardar(ruta)
+    perfiles = cargar_perfiles(ruta)
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+
+    medias = df.groupby('Carrera')[FEATURE_ORDER].mean().loc[label_encoder.classes_].to_numpy()
+    desviaciones = df.groupby('Carrera')[FEATURE_ORDER].std().loc[label_encoder.classes_].to_numpy()
+    inversas = np.stack([np.linalg.inv(np.cov(df[df['Carrera'] == c][FEATURE_ORDER].to_numpy(), rowvar=False))
+                         for c in label_encoder.classes_])
+    tabla_ok = (np.allclose(perfiles.centroides, medias, atol=1e-5)
+                and np.allclose(perfiles.desviaciones, desviaciones, atol=1e-5)
+                and np.allclose(perfiles.precision, inversas, rtol=1e-3, atol=1e-3)
+                and perfiles.conteos.sum() == len(df) and perfiles.clases == list(label_encoder.classes_))
+
+    X = np.round(np.random.default_rng(0).uniform(1, 5, size=(50, len(FEATURE_ORDER))), 1)
+    euclidea, mahalanobis = perfiles.distancias(X)
+    esperada_e = np.array([[np.linalg.norm(x - m) for m in perfiles.centroides] for x in X])
+    esperada_m = np.array([[np.sqrt((x - m) @ p @ (x - m)) for m, p in zip(perfiles.centroides, perfiles.precision)]
+                           for x in X])
+    distancias_ok = np.allclose(euclidea, esperada_e) and np.allclose(mahalanobis, esperada_m)
+
+    carreras = np.arange(len(X)) % len(perfiles.clases)
+    dimensiones, z = perfiles.desvios(X, carreras)
+    z_esperado = (X - medias[carreras]) / desviaciones[carreras]
+    desvios_ok = all(
+        np.allclose(z[i], z_esperado[i, dimensiones[i]], atol=1e-4)
+        and np.abs(z_esperado[i, dimensiones[i][-1]]) >= np.sort(np.abs(z_esperado[i]))[-3] - 1e-9
+        for i in range(len(X))
+    )
+
+    comparacion = perfiles.comparar(X[:1], carreras[:1])[0]
+    formato_ok = (len(comparacion['distancias_carreras']) == len(perfiles.clases)
+                  and [d['mahalanobis'] for d in comparacion['distancias_carreras']]
+                  == sorted(d['mahalanobis'] for d in comparacion['distancias_carreras'])
+                  and len(comparacion['dimensiones_diferentes']) == 3)
+
+    # Una carrera con una dimensión constante no rompe la inversa
+    constante = df[FEATURE_ORDER].to_numpy().copy()
+    y = label_encoder.transform(df['Carrera'])
+    constante[y == 0, 3] = 3.0
+    degenerada = calcular_perfiles(constante, y, label_encoder.classes_, FEATURE_ORDER)
+    degenerada_ok = np.isfinite(degenerada.distancias(X)[1]).all() and degenerada.desviaciones[0, 3] == 0
+
+    # Una carrera sin estudiantes no deja NaN en el JSON del resultado
+    sin_filas = calcular_perfiles(df[FEATURE_ORDER].to_numpy()[y != 1], y[y != 1],
+                                  label_encoder.classes_, FEATURE_ORDER)
+    comparaciones = sin_filas.comparar(X[:2], [0, 1])
+    texto = json.dumps(comparaciones, allow_nan=False)
+    vacia_ok = (all(len(c['distancias_carreras']) == len(label_encoder.classes_) - 1 for c in comparaciones)
+                and label_encoder.classes_[1] not in texto and len(comparaciones[0]['dimensiones_diferentes']) == 3
+                and comparaciones[1]['dimensiones_diferentes'] == [])
+
+    print(f"   Tabla = pandas: {tabla_ok}, distancias = fila por fila: {distancias_ok}, "
+          f"dimensiones diferentes: {desvios_ok}")
+    print(f"   Formato: {formato_ok}, dimensión constante: {degenerada_ok}, carrera sin estudiantes: {vacia_ok}")
+    ok = tabla_ok and distancias_ok and desvios_ok and formato_ok and degenerada_ok and vacia_ok
+    print("✅ Tabla correcta" if ok else "❌ Tabla incorrecta")
+    return ok
+
+def test_prediccion(directorio):
+    """predecir() y predecir_lote() agregan los mismos campos."""
+    print("\n" + "="*70)
+    print("TEST 2: Distancias en la predicción")
+    print("="*70)
+
+    modelo, label_encoder = cargar_artefactos_modelo()
+    ruta = Path(directorio) / 'perfiles.npz'
+    construir_perfiles(DATASET, label_encoder, FEATURE_ORDER).guardar(ruta)
+    adjuntar_perfiles(modelo, label_encoder, ruta)
+
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    X = df[FEATURE_ORDER].to_numpy()[::10]
+    individuales = [predecir(dict(zip(FEATURE_ORDER, x)), modelo, label_encoder) for x in X.tolist()]
+    lote = predecir_lote(X, modelo, label_encoder)
+    mismos = all(a == b for a, b in zip(individuales, lote))
+    campos = all(len(r['distancias_carreras']) == 17 and len(r['dimensiones_diferentes']) == 3
+                 for r in individuales)
+    cercana = np.mean([r['distancias_carreras'][0]['carrera'] == r['carrera_recomendada'] for r in individuales])
+
+    # Una tabla de otras clases no se adjunta
+    otra = Path(directorio) / 'otra.npz'
+    perfiles = cargar_perfiles(ruta)
+    perfiles.clases = perfiles.clases[::-1]
+    perfiles.guardar(otra)
+    modelo_sin, _ = cargar_artefactos_modelo()
+    adjuntar_perfiles(modelo_sin, label_encoder, otra)
+
+    print(f"   predecir = predecir_lote: {mismos}, campos completos: {campos}")
+    print(f"   Carrera más cercana (Mahalanobis) = recomendada: {cercana:.1%}")
+    ok = (mismos and campos and cercana > 0.8 and getattr(modelo_sin, 'perfiles_carrera', None) is None
+          and 'distancias_carreras' not in predecir(dict(zip(FEATURE_ORDER, X[0])), modelo_sin, label_encoder))
+    print("✅ Predicción con distancias correcta" if ok else "❌ Predicción con distancias incorrecta")
+    return ok
+
+def test_costo(directorio):
+    """Microsegundos por solicitud y por fila en lote."""
+    print("\n" + "="*70)
+    print("TEST 3: Costo por solicitud")
+    print("="*70)
+
+    label_encoder = joblib.load(SCRIPT_DIR / 'label_encoder.pkl')
+    perfiles = construir_perfiles(DATASET, label_encoder, FEATURE_ORDER)
+    X = np.random.default_rng(1).uniform(1, 5, size=(5000, len(FEATURE_ORDER)))
+    carreras = np.zeros(len(X), dtype=np.intp)
+
+    perfiles.comparar(X[:1], carreras[:1])
+    inicio = time.perf_counter()
+    for i in range(1000):
+        perfiles.comparar(X[i:i + 1], carreras[:1])
+    individual = (time.perf_counter() - inicio) / 1000
+    inicio = time.perf_counter()
+    perfiles.comparar(X, carreras)
+    lote = (time.perf_counter() - inicio) / len(X)
+
+    print(f"   {individual * 1e6:.0f} µs por solicitud, {lote * 1e6:.0f} µs por fila en lote de {len(X)}")
+    ok = individual < 1e-3 and lote < individual
+    print("✅ Costo bajo" if ok else "❌ Costo alto")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_tabla, test_prediccion, test_costo):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de predecir_lote(): debe dar exactamente el mismo resultado que
+predecir() fila por fila, y mantener un costo por fila estable en lotes grandes.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from predict import FEATURE_ORDER, load_models, predecir, predecir_lote
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def test_equivalencia_con_predecir():
+    """Compara predecir_lote con predecir en todo el dataset."""
+    print("="*70)
+    print("TEST 1: predecir_lote == predecir (fila por fila)")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    # Perfiles de Arquitectura con ES bajo para ejercitar la regla de negocio
+    arquitectura = df[df['Carrera'] == 'Arquitectura'][FEATURE_ORDER].copy()
+    arquitectura['ES'] = 3.0
+    perfiles = pd.concat([df[FEATURE_ORDER], arquitectura]).to_dict('records')
+
+    lote = predecir_lote(perfiles, modelo, label_encoder)
+    lote_matriz = predecir_lote(np.array([[d[f] for f in FEATURE_ORDER] for d in perfiles]),
+                                modelo, label_encoder)
+
+    diferencias = 0
+    for datos, r_lote, r_matriz in zip(perfiles, lote, lote_matriz):
+        esperado = json.dumps(predecir(dict(datos), modelo, label_encoder), ensure_ascii=False)
+        if json.dumps(r_lote, ensure_ascii=False) != esperado:
+            diferencias += 1
+        if json.dumps(r_matriz, ensure_ascii=False) != esperado:
+            diferencias += 1
+
+    print(f"   Filas comparadas: {len(perfiles)}")
+    print(f"   Filas con regla de negocio: {sum(1 for r in lote if r.get('ajuste_aplicado'))}")
+    print(f"   Diferencias: {diferencias}")
+    print("✅ Resultados idénticos" if diferencias == 0 else "❌ Hay diferencias")
+    return diferencias == 0
+
+def test_throughput():
+    """Mide el costo por fila para distintos tamaños de lote."""
+    print("\n" + "="*70)
+    print("TEST 2: Throughput de predecir_lote")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    df = pd.read_csv(DATASET, encoding='utf-8-sig')
+    base = df[FEATURE_ORDER].to_numpy()
+
+    for n in (1, 100, 1000, 10000, 50000):
+        matriz = base[np.arange(n) % len(base)]
+        inicio = time.perf_counter()
+        predecir_lote(matriz, modelo, label_encoder)
+        segundos = time.perf_counter() - inicio
+        print(f"   n={n:>6}: {segundos * 1000:9.1f} ms  "
+              f"({segundos / n * 1e6:8.1f} µs/fila, {n / segundos:9.0f} filas/s)")
+
+    return True
+
+if __name__ == '__main__':
+    resultados = [test_equivalencia_con_predecir(), test_throughput()]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de puntuar_archivo.py: resultados idénticos a predecir() en orden,
+entradas con respuestas o promedios, salida CSV y reanudación.
+"""
+
+import csv
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from predict import FEATURE_ORDER, calcular_promedios, load_models, predecir
+from puntuar_archivo import puntuar_archivo, ultima_fila_escrita
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def crear_jsonl_respuestas(ruta, n):
+    """
+    JSONL con n cuestionarios aleatorios; cada 100 filas tres inválidas (una
+    respuesta falta, fuera de rango o con decimales) y una con 4.0 (válida).
+    """
+    rng = np.random.default_rng(0)
+    registros = []
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            registro = {'alumno': f'A{i}', **{f'q{j}': int(v) for j, v in
+                                              enumerate(rng.integers(1, 6, 62), start=1)}}
+            if i % 100 == 7:
+                del registro['q10']
+            if i % 100 == 42:
+                registro['q3'] = 9
+            if i % 100 == 63:
+                registro['q5'] = 3.7
+            if i % 100 == 80:
+                registro['q1'] = 4.0
+            registros.append(registro)
+            f.write(json.dumps(registro) + '\n')
+    return registros
+
+def test_equivalencia(directorio):
+    """La salida coincide con predecir() fila por fila y en orden."""
+    print("="*70)
+    print("TEST 1: Resultados == predecir() (promedios CSV y respuestas JSONL)")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    correcto = True
+
+    salida = Path(directorio) / 'dataset.jsonl'
+    puntuar_archivo(DATASET, salida, workers=2, tamano_bloque=300, intervalo_progreso=0)
+    with open(DATASET, encoding='utf-8-sig') as f:
+        esperados = [
+            predecir({k: float(fila[k]) for k in FEATURE_ORDER}, modelo, label_encoder)
+            for fila in csv.DictReader(f)
+        ]
+    obtenidos = [json.loads(linea) for linea in open(salida, encoding='utf-8')]
+    diferencias = sum(
+        1 for i, (esperado, obtenido) in enumerate(zip(esperados, obtenidos))
+        if obtenido['fila'] != i
+        or obtenido['top_5_carreras'] != esperado['top_5_carreras']
+        or obtenido['confianza'] != esperado['confianza']
+    )
+    correcto &= diferencias == 0 and len(obtenidos) == len(esperados)
+    print(f"   Promedios (CSV):    {len(obtenidos)} filas, diferencias: {diferencias}")
+
+    entrada = Path(directorio) / 'respuestas.jsonl'
+    registros = crear_jsonl_respuestas(entrada, 2000)
+    salida = Path(directorio) / 'respuestas_resultado.jsonl'
+    puntuar_archivo(entrada, salida, workers=2, tamano_bloque=256, columna_id='alumno',
+                    intervalo_progreso=0)
+    obtenidos = [json.loads(linea) for linea in open(salida, encoding='utf-8')]
+    diferencias = 0
+    errores = 0
+    for i, (registro, obtenido) in enumerate(zip(registros, obtenidos)):
+        if obtenido['id'] != registro['alumno'] or obtenido['fila'] != i:
+            diferencias += 1
+        elif i % 100 in (7, 42, 63):
+            errores += not obtenido['success']
+        else:
+            esperado = predecir(calcular_promedios(registro), modelo, label_encoder)
+            diferencias += json.dumps(obtenido['top_5_carreras']) != json.dumps(esperado['top_5_carreras'])
+    correcto &= diferencias == 0 and errores == 60
+    print(f"   Respuestas (JSONL): {len(obtenidos)} filas, diferencias: {diferencias}, "
+          f"inválidas detectadas: {errores}/60")
+
+    print("✅ Resultados idénticos y en orden" if correcto else "❌ Hay diferencias")
+    return correcto
+
+def test_reanudar(directorio):
+    """Una salida interrumpida se completa con --reanudar igual que una corrida entera."""
+    print("\n" + "="*70)
+    print("TEST 2: Reanudar una salida interrumpida (JSONL y CSV)")
+    print("="*70)
+
+    correcto = True
+    for extension in ('jsonl', 'csv'):
+        completa = Path(directorio) / f'completa.{extension}'
+        parcial = Path(directorio) / f'parcial.{extension}'
+        puntuar_archivo(DATASET, completa, workers=0, tamano_bloque=500, intervalo_progreso=0)
+
+        # Simular una interrupción a mitad de una línea
+        contenido = completa.read_bytes()
+        corte = contenido.index(b'\n', len(contenido) // 3) + 40
+        parcial.write_bytes(contenido[:corte])
+
+        desde = ultima_fila_escrita(parcial, extension)
+        puntuar_archivo(DATASET, parcial, workers=0, tamano_bloque=500, desde=desde,
+                        intervalo_progreso=0)
+        iguales = parcial.read_bytes() == contenido
+        correcto &= iguales
+        print(f"   {extension}: reanudado desde la fila {desde}, "
+              f"{'idéntico' if iguales else 'DISTINTO'} a la corrida completa")
+
+    print("✅ Reanudación correcta" if correcto else "❌ Reanudación incorrecta")
+    return correcto
+
+def test_throughput(directorio):
+    """Filas por segundo con y sin pool de procesos."""
+    print("\n" + "="*70)
+    print("TEST 3: Throughput")
+    print("="*70)
+
+    entrada = Path(directorio) / 'grande.jsonl'
+    crear_jsonl_respuestas(entrada, 20000)
+    for workers in (0, 2):
+        inicio = time.perf_counter()
+        progreso = puntuar_archivo(entrada, Path(directorio) / 'grande_resultado.csv',
+                                   workers=workers, tamano_bloque=1000, intervalo_progreso=0)
+        segundos = time.perf_counter() - inicio
+        print(f"   workers={workers}: {progreso.filas} filas en {segundos:.1f} s "
+              f"({progreso.filas / segundos:.0f} filas/s)")
+    return True
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = [
+            test_equivalencia(directorio),
+            test_reanudar(directorio),
+            test_throughput(directorio),
+        ]
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de reentrenamiento_incremental.py: un ciclo reemplaza los árboles más
+antiguos sin cambiar el tamaño del bosque, lee los registros exportados con
+carrera confirmada, publica una versión que cargan predict.py y el registro
+de modelos, no publica si la validación cae demasiado y cuesta mucho menos
+que reajustar el bosque completo.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bosque_compilado import compilar
+from explicaciones import compilar_explicaciones
+from predict import FEATURE_ORDER, SCRIPT_DIR, predecir
+from reentrenamiento_incremental import EstadoReentrenamiento, instalar, main
+from registro_modelos import RegistroModelos, registrar
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+DATASET = Path(__file__).parent.parent.parent / 'datasets' / 'dataset_orientacion_vocacional_17carreras_3500.csv'
+
+def preparar_datos(directorio):
+    """Dataset base sin 600 filas, y esas filas como exportación JSONL de resultados."""
+    df = pd.read_csv(DATASET, encoding='utf-8-sig').sample(frac=1.0, random_state=0)
+    base, nuevos = df.iloc[600:], df.iloc[:600]
+    base_path = Path(directorio) / 'base.csv'
+    base.to_csv(base_path, index=False)
+
+    nuevos_path = Path(directorio) / 'nuevos.jsonl'
+    with open(nuevos_path, 'w', encoding='utf-8') as f:
+        for i, fila in enumerate(nuevos.to_dict('records')):
+            perfil = {k: fila[k] for k in FEATURE_ORDER}
+            if i % 2:
+                registro = {'id': i, 'profile': perfil, 'carrera_confirmada': fila['Carrera']}
+            else:
+                registro = dict(perfil, id=i, carrera_confirmada=fila['Carrera'])
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        f.write(json.dumps(dict(perfil, carrera_confirmada='Astronomía')) + '\n')
+        f.write(json.dumps(dict(perfil)) + '\n')
+        # Respuestas con decimales: se rechazan en lugar de truncarse
+        respuestas = {f'q{i}': 3 for i in range(1, 63)}
+        f.write(json.dumps(dict(respuestas, q5=3.7, carrera_confirmada=fila['Carrera']), ensure_ascii=False) + '\n')
+    return base_path, nuevos_path
+
+def firma_arbol(arbol):
+    return (arbol.tree_.node_count, arbol.tree_.threshold.tobytes())
+
+def test_ciclo(directorio):
+    """Los árboles más antiguos se retiran, el histórico crece y la deriva se reporta."""
+    print("="*70)
+    print("TEST 1: Ciclo incremental")
+    print("="*70)
+
+    base_path, nuevos_path = preparar_datos(directorio)
+    estado_dir = Path(directorio) / 'estado'
+    main(['--directorio', str(estado_dir), 'iniciar', '--dataset', str(base_path)])
+    estado = EstadoReentrenamiento(estado_dir)
+    anterior = joblib.load(estado.version_actual() / 'modelo_random_forest.pkl')
+    historico_antes = len(estado.cargar(estado.historico_path)['y'])
+
+    reporte = main(['--directorio', str(estado_dir), 'ciclo', str(nuevos_path), '--arboles', '40'])
+    nuevo = joblib.load(estado.version_actual() / 'modelo_random_forest.pkl')
+    historico = estado.cargar(estado.historico_path)
+
+    conservados = [firma_arbol(a) for a in nuevo.estimators_[:160]] == \
+                  [firma_arbol(a) for a in anterior.estimators_[40:]]
+    retirados = not {firma_arbol(a) for a in anterior.estimators_[:40]} & {firma_arbol(a) for a in nuevo.estimators_}
+    print(f"\n   Árboles: {len(nuevo.estimators_)}, conservados en orden: {conservados}, "
+          f"retirados: {retirados}")
+    print(f"   Histórico: {historico_antes} → {len(historico['y'])}, ciclos: {len(estado.ciclos())}")
+    ok = (len(nuevo.estimators_) == 200 and nuevo.n_estimators == 200 and not nuevo.warm_start
+          and conservados and retirados and list(nuevo.classes_) == list(anterior.classes_)
+          and reporte['filas_nuevas'] == 600
+          and reporte['rechazados'] == {'carrera desconocida: Astronomía': 1, 'sin carrera confirmada': 1,
+                                        'La respuesta q5 no es un entero: 3.7': 1}
+          and len(historico['y']) == historico_antes + 600 and (historico['ciclo'] == 1).sum() == 600
+          and abs(reporte['deriva_vs_ciclo_0']) < 0.02 and reporte['publicado'])
+    print("✅ Ciclo correcto" if ok else "❌ Ciclo incorrecto")
+    return ok
+
+def test_compatibilidad(directorio):
+    """La versión publicada se instala como los .pkl de load_models() y se registra."""
+    print("\n" + "="*70)
+    print("TEST 2: Versión compatible con load_models() y el registro")
+    print("="*70)
+
+    base_path, nuevos_path = preparar_datos(directorio)
+    estado_dir = Path(directorio) / 'estado'
+    main(['--directorio', str(estado_dir), 'iniciar', '--dataset', str(base_path)])
+    main(['--directorio', str(estado_dir), 'ciclo', str(nuevos_path)])
+    version = EstadoReentrenamiento(estado_dir).version_actual()
+
+    destino = Path(directorio) / 'ml'
+    destino.mkdir()
+    instalar(version, destino)
+    modelo = joblib.load(destino / 'modelo_random_forest.pkl')
+    label_encoder = joblib.load(destino / 'label_encoder.pkl')
+    # El registro agrega siempre los aportes por nodo (explicaciones.py)
+    modelo.explicador = compilar_explicaciones(modelo, label_encoder.classes_)
+    modelo.explicador.bosque = compilar(modelo)
+    perfil = dict(zip(FEATURE_ORDER, [3.2, 4.1, 2.5, 3.0, 2.8, 3.4, 4.2, 3.1, 3.9, 2.2, 2.9, 3.3, 3.6, 3.0]))
+    resultado = predecir(dict(perfil), modelo, label_encoder)
+
+    registrar('principal', version / 'modelo_random_forest.pkl', version / 'label_encoder.pkl', 'npz',
+              Path(directorio) / 'modelos')
+    registro = RegistroModelos(Path(directorio) / 'modelos')
+    registro.revisar()
+    registrado = registro.obtener('principal').predecir(dict(perfil))
+    X = pd.read_csv(DATASET, encoding='utf-8-sig')[FEATURE_ORDER].to_numpy()[:300]
+    compilado_igual = np.allclose(compilar(modelo).predict_proba(X), modelo.predict_proba(X))
+
+    print(f"   Predicción: {resultado['carrera_recomendada']} ({resultado['porcentaje_confianza']}%)")
+    print(f"   Registrada igual: {registrado == resultado}, compilado igual: {compilado_igual}")
+    ok = resultado['success'] and registrado == resultado and compilado_igual
+    print("✅ Versión compatible" if ok else "❌ Versión incompatible")
+    return ok
+
+def test_caida_y_costo(directorio):
+    """Sin publicar si la validación cae más de lo tolerado; el ciclo cuesta menos que reajustar."""
+    print("\n" + "="*70)
+    print("TEST 3: Umbral de deriva y costo frente a un reajuste completo")
+    print("="*70)
+
+    from sklearn.base import clone
+
+    base_path, nuevos_path = preparar_datos(directorio)
+    estado_dir = Path(directorio) / 'estado'
+    main(['--directorio', str(estado_dir), 'iniciar', '--dataset', str(base_path)])
+    estado = EstadoReentrenamiento(estado_dir)
+    versiones_antes = sorted(d.name for d in estado.versiones.iterdir())
+    historico_antes = len(estado.cargar(estado.historico_path)['y'])
+
+    # Con tolerancia negativa ningún ciclo puede publicarse
+    try:
+        main(['--directorio', str(estado_dir), 'ciclo', str(nuevos_path), '--max-caida', '-1'])
+        rechazado = False
+    except SystemExit as e:
+        rechazado = e.code == 1
+    sin_cambios = (sorted(d.name for d in estado.versiones.iterdir()) == versiones_antes
+                   and len(estado.cargar(estado.historico_path)['y']) == historico_antes
+                   and len(estado.ciclos()) == 1)
+
+    reporte = main(['--directorio', str(estado_dir), 'ciclo', str(nuevos_path)])
+    historico = estado.cargar(estado.historico_path)
+    modelo = joblib.load(SCRIPT_DIR / 'modelo_random_forest.pkl')
+    inicio = time.perf_counter()
+    clone(modelo).fit(pd.DataFrame(historico['X'], columns=FEATURE_ORDER), historico['y'])
+    completo = time.perf_counter() - inicio
+
+    print(f"\n   Rechazado sin cambios: {rechazado and sin_cambios}")
+    print(f"   Ciclo: {reporte['segundos_ajuste']:.2f} s, reajuste completo: {completo:.2f} s "
+          f"({completo / reporte['segundos_ajuste']:.1f}x)")
+    ok = rechazado and sin_cambios and reporte['segundos_ajuste'] * 2 < completo
+    print("✅ Umbral y costo correctos" if ok else "❌ Umbral o costo incorrectos")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_ciclo, test_compatibilidad, test_caida_y_costo):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de registro_modelos.py: resultados idénticos a predecir() con los
+tres formatos, rechazo de artefactos alterados, recarga en caliente sin
+perder solicitudes y elección del modelo por solicitud (también con ML_MODELO
+en el modo de un proceso por predicción).
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from almacen_resultados import AlmacenResultados
+from bosque_compilado import cargar_sklearn, compilar
+from explicaciones import compilar_explicaciones
+from predict import SCRIPT_DIR, calcular_promedios, load_models, predecir, servir
+from registro_modelos import RegistroModelos, registrar
+
+MODELO = SCRIPT_DIR / 'modelo_random_forest.pkl'
+CODIFICADOR = SCRIPT_DIR / 'label_encoder.pkl'
+
+PERFIL = {
+    'R': 3.2, 'I': 4.1, 'A': 2.5, 'S': 3.0, 'E': 2.8, 'C': 3.4, 'LM': 4.2,
+    'L': 3.1, 'ES': 3.9, 'M': 2.2, 'CK': 2.9, 'IP': 3.3, 'IA': 3.6, 'N': 3.0,
+}
+
+def respuestas(semilla):
+    return {f'q{i}': (i * 7 + semilla) % 5 + 1 for i in range(1, 66)}
+
+def test_formatos(directorio):
+    """Los modelos registrados predicen igual que load_models() + predecir()."""
+    print("="*70)
+    print("TEST 1: Formatos pkl, npz y mmap")
+    print("="*70)
+
+    modelo, label_encoder = load_models()
+    # El registro agrega siempre los aportes por nodo (explicaciones.py)
+    original, _ = cargar_sklearn(MODELO, CODIFICADOR)
+    modelo.explicador = compilar_explicaciones(original, label_encoder.classes_)
+    modelo.explicador.bosque = compilar(original)
+    for formato in ('pkl', 'npz', 'mmap'):
+        registrar(formato, MODELO, CODIFICADOR, formato, directorio)
+    registro = RegistroModelos(directorio)
+    registro.revisar()
+
+    ok = True
+    for nombre, entrada in sorted(registro.modelos.items()):
+        iguales = all(
+            entrada.predecir(entrada.plan.preparar(datos)) ==
+            predecir(calcular_promedios(datos), modelo, label_encoder)
+            for datos in [respuestas(s) for s in range(30)]
+        ) and entrada.predecir(PERFIL) == predecir(PERFIL, modelo, label_encoder)
+        print(f"   {nombre:<5} {entrada.manifiesto['version']}: {'idéntico' if iguales else 'DISTINTO'}")
+        ok &= iguales
+
+    # Un artefacto alterado se rechaza y se sigue usando la versión anterior
+    anterior = registro.obtener('npz')
+    manifiesto = Path(directorio) / 'npz' / 'manifiesto.json'
+    datos = json.loads(manifiesto.read_text(encoding='utf-8'))
+    datos['hash'] = '0' * 64
+    time.sleep(0.01)
+    manifiesto.write_text(json.dumps(datos), encoding='utf-8')
+    cambios = registro.revisar()
+    rechazado = cambios == [] and registro.obtener('npz') is anterior and registro.contadores['errores'] == 1
+    print(f"   Manifiesto alterado rechazado: {rechazado}")
+
+    ok &= rechazado
+    print("✅ Formatos correctos" if ok else "❌ Formatos incorrectos")
+    return ok
+
+class EntradaLenta:
+    """Solicitudes NDJSON con una pausa entre líneas; publica una versión a mitad."""
+
+    def __init__(self, n, publicar_en, publicar):
+        self.n = n
+        self.publicar_en = publicar_en
+        self.publicar = publicar
+
+    def __iter__(self):
+        for i in range(self.n):
+            if i == self.publicar_en:
+                threading.Thread(target=self.publicar).start()
+            time.sleep(0.002)
+            yield json.dumps({'id': i, 'datos': dict(PERFIL, R=1 + i % 5)}) + '\n'
+
+def test_recarga_en_caliente(directorio):
+    """Una versión publicada mientras se atiende reemplaza a la anterior sin perder solicitudes."""
+    print("\n" + "="*70)
+    print("TEST 2: Recarga en caliente")
+    print("="*70)
+
+    registrar('principal', MODELO, CODIFICADOR, 'npz', directorio)
+    registro = RegistroModelos(directorio)
+    registro.revisar()
+    version_inicial = registro.obtener().manifiesto['version']
+    registro.iniciar_vigilancia(0.02)
+
+    publicada = {}
+    def publicar():
+        publicada.update(registrar('principal', MODELO, CODIFICADOR, 'mmap', directorio,
+                                   version='v2'))
+
+    salida = io.StringIO()
+    n = 600
+    servir(None, None, EntradaLenta(n, 100, publicar), salida, registro=registro)
+    registro.detener()
+
+    lineas = [json.loads(l) for l in salida.getvalue().splitlines()]
+    exitosas = [l for l in lineas if l['success']]
+    ids = [l['id'] for l in lineas]
+    version_final = registro.obtener().manifiesto['version']
+
+    print(f"   Versión inicial {version_inicial} → final {version_final}")
+    print(f"   Respuestas: {len(lineas)}/{n}, exitosas: {len(exitosas)}, en orden: {ids == list(range(n))}")
+    print(f"   Cargas: {registro.contadores['cargas']}, errores: {registro.contadores['errores']}")
+    ok = (len(exitosas) == n and ids == list(range(n)) and version_final == 'v2'
+          and publicada.get('version') == 'v2' and registro.contadores['cargas'] == 2)
+    print("✅ Recarga sin pérdidas" if ok else "❌ Recarga con pérdidas")
+    return ok
+
+def test_modelo_por_solicitud(directorio):
+    """Cada solicitud usa el modelo que pide y el almacén separa sus resultados."""
+    print("\n" + "="*70)
+    print("TEST 3: Modelo por solicitud")
+    print("="*70)
+
+    registrar('principal', MODELO, CODIFICADOR, 'npz', directorio)
+    registrar('alterno', MODELO, CODIFICADOR, 'pkl', directorio)
+    registro = RegistroModelos(directorio)
+    registro.revisar()
+    almacen = AlmacenResultados(Path(directorio) / 'resultados.sqlite3', limpiar=False)
+
+    solicitudes = ''.join(
+        json.dumps({'id': i, 'modelo': modelo, 'datos': respuestas(i % 3)}) + '\n'
+        for i, modelo in enumerate(['principal', 'alterno', None, 'otro'] * 3)
+    )
+    salida = io.StringIO()
+    servir(None, None, io.StringIO(solicitudes), salida, almacen=almacen, registro=registro)
+    lineas = [json.loads(l) for l in salida.getvalue().splitlines()]
+
+    usados = [l.get('modelo') for l in lineas[:4]]
+    errores = [l['error'] for l in lineas if not l['success']]
+    versiones = {fila[0] for fila in almacen.conexion.execute('SELECT DISTINCT version FROM resultados')}
+    print(f"   Modelos usados: {usados}")
+    print(f"   Errores: {sorted(set(errores))}")
+    print(f"   Versiones en el almacén: {len(versiones)}")
+
+    # Un proceso por predicción: ML_MODELO desconocido da el mismo error que --serve
+    unico = {}
+    for modelo in ('alterno', 'otro'):
+        entorno = dict(os.environ, ML_REGISTRO_DIR=directorio, ML_MODELO=modelo, ML_ALMACEN_MAX='0')
+        proceso = subprocess.run([sys.executable, str(SCRIPT_DIR / 'predict.py')], input=json.dumps(respuestas(0)),
+                                 capture_output=True, text=True, encoding='utf-8', env=entorno)
+        unico[modelo] = json.loads(proceso.stdout)
+    print(f"   Proceso único: alterno success={unico['alterno']['success']}, "
+          f"otro -> {unico['otro'].get('error')}")
+
+    # Al quitar un modelo, sus resultados se limpian
+    almacen.limpiar = True
+    registro.al_cambiar = lambda r: almacen.conservar_versiones(r.versiones())
+    for archivo in (Path(directorio) / 'alterno').glob('manifiesto.json'):
+        archivo.unlink()
+    registro.revisar()
+    almacen.hilo_limpieza.join()
+    restantes = {fila[0] for fila in almacen.conexion.execute('SELECT DISTINCT version FROM resultados')}
+    print(f"   Versiones tras quitar 'alterno': {len(restantes)}")
+    almacen.cerrar()
+
+    ok = (usados == ['principal', 'alterno', 'principal', None]
+          and errores == ['Modelo desconocido: otro'] * 3
+          and len(versiones) == 2
+          and unico['alterno']['success'] and unico['otro'] == {'success': False, 'error': 'Modelo desconocido: otro'}
+          and restantes == {registro.obtener('principal').version})
+    print("✅ Modelo por solicitud correcto" if ok else "❌ Modelo por solicitud incorrecto")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    for prueba in (test_formatos, test_recarga_en_caliente, test_modelo_por_solicitud):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de servidor_async.py: decodificación de las tramas (como las arma
+codificarSolicitud en clienteSocket.js), respuestas de error con el id de la
+solicitud, y separación de los micro-lotes: cada respuesta es la de su perfil
+y ningún lote supera max_lote.
+"""
+
+import asyncio
+import json
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from predict import FEATURE_ORDER, N_PREGUNTAS, calcular_promedios, load_models, predecir
+from servidor_async import (CABECERA, TIPO_PROMEDIOS, TIPO_RESPUESTAS, ServidorPrediccion,
+                            decodificar_solicitud)
+
+def trama(id_solicitud, tipo, datos):
+    """[uint32 largo][uint32 id][uint8 tipo][datos], como codificarSolicitud."""
+    return struct.pack('>IIB', 4 + 1 + len(datos), id_solicitud, tipo) + bytes(datos)
+
+def respuestas_ejemplo(semilla):
+    return np.random.default_rng(semilla).integers(1, 6, N_PREGUNTAS, dtype=np.uint8).tobytes()
+
+def test_decodificar():
+    """Tipos 1 y 2 válidos; largos, valores y tipos inválidos se rechazan."""
+    print("="*70)
+    print("TEST 1: Decodificación de tramas")
+    print("="*70)
+
+    datos = respuestas_ejemplo(0)
+    esperado = calcular_promedios({f'q{i}': v for i, v in enumerate(datos, start=1)})
+    id_1, promedios = decodificar_solicitud(trama(5, TIPO_RESPUESTAS, datos)[4:])
+    flotantes = np.array([esperado[f] for f in FEATURE_ORDER], dtype='<f4').tobytes()
+    id_2, desde_float = decodificar_solicitud(trama(6, TIPO_PROMEDIOS, flotantes)[4:])
+    validas_ok = (id_1, id_2) == (5, 6) and promedios == esperado and desde_float == esperado
+
+    invalidas = {
+        'respuestas cortas': trama(1, TIPO_RESPUESTAS, datos[:-1]),
+        'respuestas de más': trama(1, TIPO_RESPUESTAS, datos + b'\x03'),
+        'respuesta 0': trama(1, TIPO_RESPUESTAS, b'\x00' + datos[1:]),
+        'respuesta 6': trama(1, TIPO_RESPUESTAS, datos[:-1] + b'\x06'),
+        'float32 cortos': trama(1, TIPO_PROMEDIOS, flotantes[:-4]),
+        'tipo 3': trama(1, 3, datos),
+    }
+    rechazadas = {}
+    for nombre, cuerpo in invalidas.items():
+        try:
+            decodificar_solicitud(cuerpo[4:])
+            rechazadas[nombre] = None
+        except ValueError as e:
+            rechazadas[nombre] = str(e)
+        print(f"   {nombre:<20} {rechazadas[nombre]}")
+
+    ok = validas_ok and all(rechazadas.values())
+    print(f"   Tramas válidas: {validas_ok}")
+    print("✅ Decodificación correcta" if ok else "❌ Decodificación incorrecta")
+    return ok
+
+class ServidorMedido(ServidorPrediccion):
+    """Registra el tamaño de cada lote."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lotes = []
+
+    def predecir_lote(self, perfiles):
+        self.lotes.append(len(perfiles))
+        return super().predecir_lote(perfiles)
+
+async def enviar(ruta, tramas):
+    """Envía todas las tramas por una conexión y devuelve {id: resultado}."""
+    reader, writer = await asyncio.open_unix_connection(ruta)
+    writer.write(b''.join(tramas))
+    await writer.drain()
+    recibidas = {}
+    while len(recibidas) < len(tramas):
+        (largo,) = CABECERA.unpack(await asyncio.wait_for(reader.readexactly(CABECERA.size), 30))
+        cuerpo = await reader.readexactly(largo)
+        (id_solicitud,) = CABECERA.unpack_from(cuerpo)
+        recibidas[id_solicitud] = json.loads(cuerpo[CABECERA.size:])
+    writer.close()
+    await writer.wait_closed()
+    return recibidas
+
+async def con_servidor(directorio, modelo, label_encoder, tramas, **opciones):
+    servidor_prediccion = ServidorMedido(modelo, label_encoder, **opciones)
+    ruta = str(Path(directorio) / 'async.sock')
+    servidor = await asyncio.start_unix_server(servidor_prediccion.manejar_conexion, path=ruta)
+    tarea_lotes = asyncio.create_task(servidor_prediccion.bucle_lotes())
+    try:
+        return await enviar(ruta, tramas), servidor_prediccion.lotes
+    finally:
+        tarea_lotes.cancel()
+        servidor.close()
+        await servidor.wait_closed()
+
+def test_errores(directorio, modelo, label_encoder):
+    """Las tramas inválidas se responden con su id y success: false."""
+    print("\n" + "="*70)
+    print("TEST 2: Respuestas de error")
+    print("="*70)
+
+    datos = respuestas_ejemplo(1)
+    tramas = [
+        trama(11, TIPO_RESPUESTAS, datos),
+        trama(12, 7, datos),
+        trama(13, TIPO_PROMEDIOS, b'\x00' * 10),
+        trama(14, TIPO_RESPUESTAS, datos[:30]),
+    ]
+    recibidas, _ = asyncio.run(con_servidor(directorio, modelo, label_encoder, tramas))
+    esperado = predecir(calcular_promedios({f'q{i}': v for i, v in enumerate(datos, start=1)}),
+                        modelo, label_encoder)
+
+    for id_solicitud in sorted(recibidas):
+        resultado = recibidas[id_solicitud]
+        print(f"   id {id_solicitud}: success={resultado['success']} {resultado.get('error', '')}")
+    ok = (sorted(recibidas) == [11, 12, 13, 14] and recibidas[11] == esperado
+          and not any(recibidas[i]['success'] for i in (12, 13, 14)))
+    print("✅ Errores con su id" if ok else "❌ Errores sin su id")
+    return ok
+
+def test_lotes(directorio, modelo, label_encoder):
+    """Solicitudes concurrentes: lotes de hasta max_lote y cada resultado es el suyo."""
+    print("\n" + "="*70)
+    print("TEST 3: Separación de micro-lotes")
+    print("="*70)
+
+    ids = list(range(100, 110))
+    datos = {i: respuestas_ejemplo(i) for i in ids}
+    recibidas, lotes = asyncio.run(con_servidor(
+        directorio, modelo, label_encoder, [trama(i, TIPO_RESPUESTAS, datos[i]) for i in ids],
+        ventana_ms=200, max_lote=4,
+    ))
+    iguales = all(
+        recibidas[i] == predecir(calcular_promedios({f'q{q}': v for q, v in enumerate(datos[i], start=1)}),
+                                 modelo, label_encoder)
+        for i in ids
+    )
+
+    print(f"   Lotes: {lotes}, cada resultado = predecir() de su perfil: {iguales}")
+    ok = iguales and sum(lotes) == len(ids) and max(lotes) == 4 and len(lotes) < len(ids)
+    print("✅ Lotes separados correctamente" if ok else "❌ Lotes mal separados")
+    return ok
+
+if __name__ == '__main__':
+    modelo, label_encoder = load_models()
+    resultados = [test_decodificar()]
+    for prueba in (test_errores, test_lotes):
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.append(prueba(directorio, modelo, label_encoder))
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
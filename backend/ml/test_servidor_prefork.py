@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de servidor_prefork.py: los hijos atienden conexiones concurrentes con
+el mismo resultado que predecir(), un hijo terminado se reemplaza, y los hijos
+que fallan al arrancar se recrean con una espera creciente hasta el tope en
+lugar de hacer fork en un bucle cerrado.
+"""
+
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Agregar el directorio ml al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from predict import SCRIPT_DIR, calcular_promedios, load_models, predecir
+
+def respuestas(semilla):
+    return {f'q{i}': (i * 7 + semilla) % 5 + 1 for i in range(1, 63)}
+
+def hijos_de(pid):
+    """PIDs de los procesos cuyo padre es `pid` (columna ppid de /proc/*/stat)."""
+    hijos = set()
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            campos = stat.read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(campos[1]) == pid:
+            hijos.add(int(stat.parent.name))
+    return hijos
+
+def esperar(condicion, segundos=60):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.05)
+    return False
+
+def consultar(ruta, semillas):
+    """Una conexión con una solicitud por semilla; devuelve los resultados en orden."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexion:
+        conexion.connect(ruta)
+        conexion.sendall(''.join(json.dumps({'id': s, 'datos': respuestas(s)}) + '\n'
+                                 for s in semillas).encode('utf-8'))
+        # Una línea por solicitud, como los clientes de --serve
+        entrada = conexion.makefile('r', encoding='utf-8')
+        return [json.loads(entrada.readline()) for _ in semillas]
+
+def test_servidor(directorio):
+    """Conexiones concurrentes = predecir(); un hijo terminado se reemplaza."""
+    print("="*70)
+    print("TEST 1: Conexiones concurrentes y reemplazo de hijos")
+    print("="*70)
+
+    ruta = str(Path(directorio) / 'prefork.sock')
+    entorno = dict(os.environ, ML_REGISTRO_DIR=str(Path(directorio) / 'modelos'), ML_ALMACEN_MAX='0',
+                   ML_RESTART_DELAY_MS='100', PYTHONIOENCODING='utf-8')
+    servidor = subprocess.Popen([sys.executable, str(SCRIPT_DIR / 'servidor_prefork.py'), '--socket', ruta,
+                                 '--workers', '2'], env=entorno, stderr=subprocess.DEVNULL)
+    try:
+        listo = esperar(lambda: os.path.exists(ruta) and len(hijos_de(servidor.pid)) == 2)
+        modelo, label_encoder = load_models()
+
+        def comparar():
+            with ThreadPoolExecutor(max_workers=8) as ejecutor:
+                lotes = list(ejecutor.map(lambda c: consultar(ruta, range(c * 5, c * 5 + 5)), range(8)))
+            obtenidos = [r for lote in lotes for r in lote]
+            return len(obtenidos) == 40 and all(
+                {k: v for k, v in r.items() if k != 'id'}
+                == predecir(calcular_promedios(respuestas(r['id'])), modelo, label_encoder)
+                for r in obtenidos
+            )
+
+        iguales = listo and comparar()
+        antes = hijos_de(servidor.pid)
+        terminado = min(antes)
+        os.kill(terminado, signal.SIGKILL)
+        reemplazado = esperar(lambda: len(hijos_de(servidor.pid)) == 2 and terminado not in hijos_de(servidor.pid))
+        despues = reemplazado and comparar()
+
+        print(f"   Hijos: {sorted(antes)}, 40 solicitudes en 8 conexiones = predecir(): {iguales}")
+        print(f"   Hijo {terminado} terminado, reemplazado: {reemplazado} ({sorted(hijos_de(servidor.pid))}), "
+              f"sigue atendiendo: {despues}")
+        ok = iguales and reemplazado and despues
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=30)
+    print("✅ Servidor correcto" if ok else "❌ Servidor incorrecto")
+    return ok
+
+# Supervisión con hijos que terminan apenas se crean
+CODIGO_FALLA_ARRANQUE = """
+import os, sys
+sys.path.insert(0, {directorio!r})
+import servidor_prefork
+
+def lanzar():
+    pid = os.fork()
+    if pid == 0:
+        os._exit(1)
+    return pid
+
+servidor_prefork.supervisar({{lanzar()}}, lanzar)
+"""
+
+def test_espera():
+    """Los hijos que fallan al arrancar se recrean con espera creciente hasta el tope."""
+    print("\n" + "="*70)
+    print("TEST 2: Espera creciente con hijos que fallan al arrancar")
+    print("="*70)
+
+    entorno = dict(os.environ, ML_RESTART_DELAY_MS='50', ML_RESTART_MAX_DELAY_MS='200',
+                   PYTHONIOENCODING='utf-8')
+    supervisor = subprocess.Popen([sys.executable, '-c', CODIGO_FALLA_ARRANQUE.format(directorio=str(SCRIPT_DIR))],
+                                  env=entorno, stderr=subprocess.PIPE, text=True)
+    time.sleep(2.0)
+    supervisor.kill()
+    _, errores = supervisor.communicate(timeout=30)
+
+    esperas = [float(e) for e in re.findall(r'creando uno nuevo en ([\d.]+) s', errores)]
+    print(f"   Esperas (s): {esperas[:8]}{' ...' if len(esperas) > 8 else ''} ({len(esperas)} hijos recreados)")
+    ok = esperas[:5] == [0.05, 0.1, 0.2, 0.2, 0.2] and 5 < len(esperas) < 15
+    print("✅ Espera creciente con tope" if ok else "❌ Espera incorrecta")
+    return ok
+
+if __name__ == '__main__':
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados.append(test_servidor(directorio))
+    resultados.append(test_espera())
+    print("\n" + "="*70)
+    print(f"✅ Pruebas exitosas: {sum(resultados)}/{len(resultados)}")
+    print("="*70)
@@ -6,7 +6,8 @@ import {
   deleteUser,
   getAllTestResults,
   getUserTestResults,
-  getStats
+  getStats,
+  getMlMetrics
 } from '../controllers/adminController.js';
 import { protect, adminOnly } from '../middleware/auth.js';
 
@@ -27,5 +28,6 @@ router.get('/results/:userId', getUserTestResults);
 
 // Estadísticas
 router.get('/stats', getStats);
+router.get('/ml/metrics', getMlMetrics);
 
 export default router;
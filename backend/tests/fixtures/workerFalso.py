@@ -0,0 +1,23 @@
+"""
+Worker falso para las pruebas del pool de mlService.js: habla el protocolo
+NDJSON de `predict.py --serve` sin cargar ningún modelo.
+
+- WORKER_FALSO_MODO=caer: termina al arrancar, antes de responder.
+- datos.colgar: no responde esa solicitud (ni las que lleguen detrás).
+- El resto se responde con el pid del proceso y los datos recibidos.
+"""
+
+import json
+import os
+import sys
+import time
+
+if os.environ.get('WORKER_FALSO_MODO') == 'caer':
+    sys.exit(3)
+
+for linea in sys.stdin:
+    solicitud = json.loads(linea)
+    if solicitud.get('datos', {}).get('colgar'):
+        time.sleep(60)
+    respuesta = {'id': solicitud['id'], 'success': True, 'pid': os.getpid(), 'datos': solicitud.get('datos')}
+    print(json.dumps(respuesta), flush=True)
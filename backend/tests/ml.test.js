@@ -7,7 +7,8 @@
  */
 
 import { jest } from '@jest/globals';
-import mlService from '../ml/mlService.js';
+import mlService, { unirMetricas } from '../ml/mlService.js';
+import { codificarSolicitud } from '../ml/clienteSocket.js';
 
 // Mock del servicio de Python para las pruebas
 const originalPredecir = mlService.predecir.bind(mlService);
@@ -442,4 +443,58 @@ describe('Pruebas de Machine Learning', () => {
       expect(prediction.carrera).toBeTruthy();
     });
   });
+
+  describe('Protocolo binario del servidor de predicción', () => {
+    it('debería codificar 62 respuestas como uint8', () => {
+      const input = {};
+      for (let i = 1; i <= 62; i++) {
+        input[`q${i}`] = (i % 5) + 1;
+      }
+
+      const trama = codificarSolicitud(7, input);
+
+      expect(trama.length).toBe(4 + 4 + 1 + 62);
+      expect(trama.readUInt32BE(0)).toBe(4 + 1 + 62);
+      expect(trama.readUInt32BE(4)).toBe(7);
+      expect(trama.readUInt8(8)).toBe(1);
+      expect(trama.readUInt8(9)).toBe(2);
+      expect(trama.readUInt8(9 + 61)).toBe((62 % 5) + 1);
+    });
+
+    it('debería codificar 14 promedios como float32', () => {
+      const promedios = {
+        R: 3.2, I: 2.8, A: 4.0, S: 3.5, E: 3.1, C: 2.9, LM: 3.7,
+        L: 4.2, ES: 3.9, M: 1.4, CK: 2.8, IP: 3.0, IA: 2.7, N: 3.4
+      };
+
+      const trama = codificarSolicitud(1, promedios);
+
+      expect(trama.length).toBe(4 + 4 + 1 + 14 * 4);
+      expect(trama.readUInt8(8)).toBe(2);
+      expect(trama.readFloatLE(9)).toBeCloseTo(3.2, 5);
+      expect(trama.readFloatLE(9 + 8 * 4)).toBeCloseTo(3.9, 5);
+    });
+  });
+
+  describe('Métricas Prometheus de los workers', () => {
+    it('debería agrupar cada familia de métricas una sola vez', () => {
+      const texto = (worker) => [
+        '# HELP ovp_ml_solicitud_segundos Duración total',
+        '# TYPE ovp_ml_solicitud_segundos histogram',
+        `ovp_ml_solicitud_segundos_count{worker="${worker}"} 3`,
+        '# HELP ovp_ml_solicitudes_total Solicitudes',
+        '# TYPE ovp_ml_solicitudes_total counter',
+        `ovp_ml_solicitudes_total{worker="${worker}",resultado="ok"} 3`
+      ].join('\n') + '\n';
+
+      const lineas = unirMetricas([texto('1'), texto('2')]).trim().split('\n');
+
+      expect(lineas.filter((l) => l.startsWith('# TYPE'))).toHaveLength(2);
+      expect(lineas.slice(2, 4)).toEqual([
+        'ovp_ml_solicitud_segundos_count{worker="1"} 3',
+        'ovp_ml_solicitud_segundos_count{worker="2"} 3'
+      ]);
+      expect(lineas).toHaveLength(8);
+    });
+  });
 });
@@ -0,0 +1,109 @@
+/**
+ * Pruebas del pool de procesos Python de mlService (modo --serve)
+ * TC-POOL-001: Timeout de una solicitud
+ * TC-POOL-002: Reinicio con espera creciente
+ *
+ * Los procesos son tests/fixtures/workerFalso.py, que habla el protocolo
+ * NDJSON de predict.py --serve sin cargar el modelo.
+ */
+
+import { jest } from '@jest/globals';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import mlService from '../ml/mlService.js';
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const WORKER_FALSO = path.join(__dirname, 'fixtures', 'workerFalso.py');
+
+const esperar = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Servicio nuevo (no la instancia compartida) con el worker falso
+ */
+function crearServicio(opciones) {
+  const servicio = new mlService.constructor();
+  Object.assign(servicio, { pythonScript: WORKER_FALSO, poolSize: 1 }, opciones);
+  return servicio;
+}
+
+describe('Pool de procesos de predicción', () => {
+  let servicio;
+  let errores;
+
+  beforeEach(() => {
+    errores = jest.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  afterEach(() => {
+    servicio.cerrar();
+    errores.mockRestore();
+    delete process.env.WORKER_FALSO_MODO;
+  });
+
+  describe('TC-POOL-001: Timeout de una solicitud', () => {
+    it('debería rechazar solo la solicitud vencida y reenviar las que esperaban detrás', async () => {
+      servicio = crearServicio({ timeoutMs: 1500 });
+
+      const colgada = servicio.predecir({ colgar: true });
+      const siguientes = [servicio.predecir({ R: 1 }), servicio.predecir({ R: 2 })];
+      const pidOriginal = servicio.workers[0].proceso.pid;
+
+      await expect(colgada).rejects.toThrow('Tiempo de espera agotado');
+      const resultados = await Promise.all(siguientes);
+
+      expect(resultados.map((r) => r.datos)).toEqual([{ R: 1 }, { R: 2 }]);
+      // Las atendió el proceso de reemplazo, no el que quedó colgado
+      expect(resultados.every((r) => r.pid !== pidOriginal)).toBe(true);
+      expect(servicio.workers[0].proceso.pid).not.toBe(pidOriginal);
+    }, 10000);
+
+    it('debería seguir atendiendo con el proceso de reemplazo', async () => {
+      servicio = crearServicio({ timeoutMs: 1500 });
+
+      await expect(servicio.predecir({ colgar: true })).rejects.toThrow('Tiempo de espera agotado');
+      const resultado = await servicio.predecir({ R: 3 });
+
+      expect(resultado.success).toBe(true);
+      expect(resultado.datos).toEqual({ R: 3 });
+    }, 10000);
+  });
+
+  describe('TC-POOL-002: Reinicio con espera creciente', () => {
+    it('debería duplicar la espera hasta el tope sin dejar de reiniciar', async () => {
+      process.env.WORKER_FALSO_MODO = 'caer';
+      servicio = crearServicio({ reinicioMs: 20, reinicioMaxMs: 80 });
+      const crearWorker = jest.spyOn(servicio, '_crearWorker');
+
+      servicio._iniciarPool();
+      await esperar(2000);
+
+      const esperas = errores.mock.calls
+        .map(([mensaje]) => String(mensaje).match(/reiniciando en (\d+) ms/))
+        .filter(Boolean)
+        .map((coincidencia) => Number(coincidencia[1]));
+
+      expect(esperas.slice(0, 5)).toEqual([20, 40, 80, 80, 80]);
+      expect(crearWorker.mock.calls.length).toBeGreaterThan(5);
+    }, 10000);
+
+    it('debería volver a la espera inicial cuando un proceso responde', async () => {
+      process.env.WORKER_FALSO_MODO = 'caer';
+      servicio = crearServicio({ reinicioMs: 20, reinicioMaxMs: 80 });
+
+      servicio._iniciarPool();
+      await esperar(500);
+      delete process.env.WORKER_FALSO_MODO;
+      await esperar(300);
+
+      const resultado = await servicio.predecir({ R: 4 });
+      expect(resultado.success).toBe(true);
+      expect(servicio.fallosArranque[0]).toBeGreaterThan(0);
+
+      servicio.workers[0].proceso.kill();
+      await esperar(300);
+      const esperas = errores.mock.calls.map(([mensaje]) => String(mensaje));
+      expect(esperas[esperas.length - 1]).toMatch(/reiniciando en 20 ms/);
+      expect(servicio.fallosArranque[0]).toBe(0);
+    }, 10000);
+  });
+});